@@ -7,26 +7,16 @@ import sys
 import os
 import re
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pubmed-literature-mining'))
+from scripts.pdf_text import PDF_AVAILABLE, get_pdf_text_extractor
+
+
 def extract_pdf(filename):
-    """Extract text from PDF"""
-    # Try pdfplumber first
-    try:
-        import pdfplumber
-        with pdfplumber.open(filename) as pdf:
-            return "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    except ImportError:
-        pass
-    
-    # Try PyPDF2
-    try:
-        import PyPDF2
-        with open(filename, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            return "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-    except ImportError:
-        pass
-    
-    return None
+    """Extract text from PDF (cached by content hash)"""
+    if not PDF_AVAILABLE:
+        return None
+    pages = get_pdf_text_extractor().extract(filename)['pages']
+    return "\n".join(page for page in pages if page)
 
 def analyze_article(text, title):
     """Analyze article for OA prediction relevance"""
@@ -105,6 +95,9 @@ def main():
     print("="*80)
     print()
     
+    # Parse all articles in parallel; later runs read the cached text
+    get_pdf_text_extractor().extract_many(f for f, _ in files if os.path.exists(f))
+    
     for filename, title in files:
         if not os.path.exists(filename):
             print(f"⚠️  File not found: {filename}\n")
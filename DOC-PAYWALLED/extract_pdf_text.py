@@ -5,36 +5,16 @@ Extract text from PDFs for analysis
 import sys
 import os
 
-def extract_with_pdfplumber(filename):
-    """Try pdfplumber first"""
-    try:
-        import pdfplumber
-        with pdfplumber.open(filename) as pdf:
-            text = ""
-            for i, page in enumerate(pdf.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    text += f"\n--- PAGE {i+1} ---\n{page_text}\n"
-            return text
-    except ImportError:
-        return None
-    except Exception as e:
-        return f"Error with pdfplumber: {e}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pubmed-literature-mining'))
+from scripts.pdf_text import PDF_AVAILABLE, get_pdf_text_extractor
 
-def extract_with_pypdf2(filename):
-    """Fallback to PyPDF2"""
-    try:
-        import PyPDF2
-        with open(filename, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            text = ""
-            for i, page in enumerate(reader.pages):
-                text += f"\n--- PAGE {i+1} ---\n{page.extract_text()}\n"
-            return text
-    except ImportError:
-        return None
-    except Exception as e:
-        return f"Error with PyPDF2: {e}"
+
+def extract_pages_text(filename):
+    """Text of every page with page markers (pdfplumber, falling back to PyPDF2; cached)"""
+    result = get_pdf_text_extractor().extract(filename)
+    if not result['pages'] and result['error']:
+        return f"Error extracting text: {result['error']}"
+    return "".join(f"\n--- PAGE {i+1} ---\n{text}\n" for i, text in enumerate(result['pages']) if text)
 
 def main():
     files = [
@@ -52,15 +32,11 @@ def main():
         print(f"ARTICLE: {filename}")
         print('='*80)
         
-        # Try pdfplumber first
-        text = extract_with_pdfplumber(filename)
-        if text is None:
-            # Try PyPDF2
-            text = extract_with_pdfplumber(filename)
-            if text is None:
-                print("ERROR: Neither pdfplumber nor PyPDF2 available")
-                print("Please install: pip install pdfplumber")
-                continue
+        if not PDF_AVAILABLE:
+            print("ERROR: Neither pdfplumber nor PyPDF2 available")
+            print("Please install: pip install pdfplumber")
+            continue
+        text = extract_pages_text(filename)
         
         # Print first 25000 characters (key sections)
         print(text[:25000])
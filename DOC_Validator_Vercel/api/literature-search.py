@@ -0,0 +1,98 @@
+"""
+API endpoint for literature full-text search
+Returns BM25-ranked articles matching a query over title, abstract, full text
+and factor contexts
+
+Query parameters: q, mode (all, any, phrase, prefix), page, page_size
+"""
+
+import json
+import sys
+import os
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Add pubmed-literature-mining to path
+project_root = Path(__file__).parent.parent.parent
+pubmed_path = project_root / "pubmed-literature-mining"
+sys.path.insert(0, str(pubmed_path))
+
+try:
+    from scripts.file_storage import FileStorage
+    from scripts.search_index import SEARCH_MODES
+except ImportError:
+    FileStorage = None
+    SEARCH_MODES = ()
+
+MAX_PAGE_SIZE = 100
+RESULT_FIELDS = ('pmid', 'title', 'journal', 'publication_date', 'relevance_score', 'access_type',
+                 'search_score', 'search_snippet')
+
+_storage = None
+
+
+def _get_storage():
+    """File storage kept open between requests (the search index stays loaded)"""
+    global _storage
+    if _storage is None:
+        _storage = FileStorage(str(pubmed_path / "data" / "articles"))
+    return _storage
+
+
+def _query_params(request) -> dict:
+    """Query string parameters from a request (args/query mapping or URL)"""
+    for attr in ('args', 'query', 'query_params'):
+        params = getattr(request, attr, None)
+        if params is not None and hasattr(params, 'get'):
+            return {key: params.get(key) for key in params}
+    url = getattr(request, 'url', None) or getattr(request, 'path', None) or ''
+    return {key: values[0] for key, values in parse_qs(urlparse(str(url)).query).items()}
+
+
+def _response(status_code: int, body: dict) -> dict:
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(body, default=str)
+    }
+
+
+def handler(request):
+    """Handle GET request for a literature search"""
+    try:
+        if FileStorage is None:
+            return _response(503, {'error': 'Literature storage not available', 'results': []})
+        
+        params = _query_params(request)
+        query = (params.get('q') or '').strip()
+        mode = params.get('mode') or 'all'
+        if not query:
+            return _response(400, {'error': 'Missing required parameter: q'})
+        if mode not in SEARCH_MODES:
+            return _response(400, {'error': f'Invalid mode: {mode}'})
+        try:
+            page = max(1, int(params.get('page') or 1))
+            page_size = max(1, min(int(params.get('page_size') or 20), MAX_PAGE_SIZE))
+        except ValueError:
+            return _response(400, {'error': 'page and page_size must be integers'})
+        
+        storage = _get_storage()
+        articles = storage.search_articles(query, limit=page_size, mode=mode, offset=(page - 1) * page_size)
+        total = storage.count_search_results(query, mode=mode)
+        
+        return _response(200, {
+            'query': query,
+            'mode': mode,
+            'results': [{field: article.get(field) for field in RESULT_FIELDS} for article in articles],
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'pages': (total + page_size - 1) // page_size
+            }
+        })
+    except Exception as e:
+        return _response(500, {'error': str(e)})
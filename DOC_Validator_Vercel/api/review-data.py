@@ -1,12 +1,15 @@
 """
 API endpoint for review dashboard data
 Returns review queue data for the literature review dashboard
+
+Query parameters: page, page_size, status, type, search
 """
 
 import json
 import sys
 import os
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs
 
 # Add pubmed-literature-mining to path
 project_root = Path(__file__).parent.parent.parent
@@ -14,12 +17,22 @@ pubmed_path = project_root / "pubmed-literature-mining"
 sys.path.insert(0, str(pubmed_path))
 
 try:
-    from scripts.review_manager import ReviewManager
+    from scripts.review_manager import ReviewManager, get_review_manager
 except ImportError:
     # Fallback if review manager not available
     ReviewManager = None
 
 
+def _query_params(request) -> dict:
+    """Query string parameters from a request (args/query mapping or URL)"""
+    for attr in ('args', 'query', 'query_params'):
+        params = getattr(request, attr, None)
+        if params is not None and hasattr(params, 'get'):
+            return {key: params.get(key) for key in params}
+    url = getattr(request, 'url', None) or getattr(request, 'path', None) or ''
+    return {key: values[0] for key, values in parse_qs(urlparse(str(url)).query).items()}
+
+
 def handler(request):
     """Handle GET request for review data"""
     try:
@@ -44,8 +57,29 @@ def handler(request):
                 })
             }
         
-        manager = ReviewManager()
-        data = manager.export_for_dashboard()
+        params = _query_params(request)
+        status = params.get('status')
+        finding_type = params.get('type')
+        try:
+            page = int(params.get('page') or 1)
+            page_size = int(params.get('page_size') or 20)
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'page and page_size must be integers'})
+            }
+
+        data = get_review_manager().export_for_dashboard(
+            page=page,
+            page_size=page_size,
+            status=None if status in (None, '', 'all') else status,
+            finding_type=None if finding_type in (None, '', 'all') else finding_type,
+            search=params.get('search') or None
+        )
         
         return {
             'statusCode': 200,
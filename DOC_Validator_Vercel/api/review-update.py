@@ -14,7 +14,7 @@ pubmed_path = project_root / "pubmed-literature-mining"
 sys.path.insert(0, str(pubmed_path))
 
 try:
-    from scripts.review_manager import ReviewManager, ReviewStatus
+    from scripts.review_manager import ReviewManager, ReviewStatus, get_review_manager
 except ImportError:
     ReviewManager = None
     ReviewStatus = None
@@ -59,7 +59,7 @@ def handler(request):
                 'body': json.dumps({'error': 'Missing required fields: id, status'})
             }
         
-        manager = ReviewManager()
+        manager = get_review_manager()
         
         # Map status string to ReviewStatus enum
         status_map = {
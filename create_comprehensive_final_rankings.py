@@ -6,6 +6,8 @@ Uses ALL available data sources for the most complete ranking system
 import pandas as pd
 import numpy as np
 
+from src.data.depmap_store import DepMapStore
+
 print("=" * 80)
 print("COMPREHENSIVE FINAL RANKINGS - ALL DATA SOURCES")
 print(
@@ -337,28 +339,16 @@ if "STK17A_mean" in cancer_rankings.columns:
     print("\n  Annotating cell lines with most dependent target...")
 
     # Load dependency data to get individual cell line scores
-    dep_df = pd.read_csv("data/raw/depmap/CRISPRGeneEffect.csv", index_col=0)
-    dep_df = dep_df.reset_index()
-    dep_df.columns.values[0] = "ModelID"
-
-    # Get target gene columns
-    targets = {
-        "STK17A": [
-            col for col in dep_df.columns if "STK17A" in col and "STK17B" not in col
-        ][0],
-        "STK17B": [col for col in dep_df.columns if "STK17B" in col][0],
-        "MYLK4": [col for col in dep_df.columns if "MYLK4" in col][0],
-        "TBK1": [col for col in dep_df.columns if "TBK1" in col][0],
-        "CLK4": [col for col in dep_df.columns if "CLK4" in col][0],
-    }
-
-    # Create clean dependency dataframe
-    dep_clean = dep_df[["ModelID"] + list(targets.values())].copy()
-    dep_clean.columns = ["ModelID", "STK17A", "STK17B", "MYLK4", "TBK1", "CLK4"]
+    # Binary DepMap store (src/data/depmap_store.py): only the target genes are read
+    store = DepMapStore.open()
+    dep_clean = (
+        store.matrix("gene_effect")
+        .frame(["STK17A", "STK17B", "MYLK4", "TBK1", "CLK4"])
+        .reset_index()
+    )
 
     # Load model metadata
-    model_df = pd.read_csv("data/raw/depmap/Model.csv")
-    model_clean = model_df[["ModelID", "StrippedCellLineName"]].copy()
+    model_clean = store.models(["ModelID", "StrippedCellLineName"]).copy()
 
     # Merge to get cell line names
     cell_line_deps = dep_clean.merge(model_clean, on="ModelID", how="inner")
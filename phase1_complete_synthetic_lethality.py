@@ -5,36 +5,32 @@ Using ALL DepMap data - no filtering
 
 import pandas as pd
 import numpy as np
-from scipy import stats
 import warnings
+from src.analysis.multiple_testing import adjust_pvalues
+from src.analysis.synthetic_lethality import scan_store
+from src.data.depmap_store import DepMapStore
 warnings.filterwarnings('ignore')
 
 print("="*80)
 print("PHASE 1: COMPLETE SYNTHETIC LETHALITY ANALYSIS")
 print("="*80)
 
-# Load FULL DepMap dependency data (all cell lines)
+# Load FULL DepMap dependency data (all cell lines) from the binary store
+# (imported from data/raw/depmap on first use, see src/data/depmap_store.py)
 print("\nLoading DepMap dependency data...")
-depmap = pd.read_csv('data/raw/depmap/CRISPRGeneDependency.csv', index_col=0)
-depmap = depmap.reset_index()
-depmap.columns.values[0] = 'ModelID'  # Rename first column
-print(f"Total cell lines in DepMap: {len(depmap)}")
+store = DepMapStore.open()
+depmap = store.matrix('gene_dependency')
+print(f"Total cell lines in DepMap: {len(depmap.models)}")
 
 # Get our target gene columns
-targets = {
-    'STK17A': [col for col in depmap.columns if 'STK17A' in col and 'STK17B' not in col][0],
-    'MYLK4': [col for col in depmap.columns if 'MYLK4' in col][0],
-    'TBK1': [col for col in depmap.columns if 'TBK1' in col][0],
-    'CLK4': [col for col in depmap.columns if 'CLK4' in col][0]
-}
+targets = {gene: depmap.gene_label(gene) for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']}
 
 print("\nTarget gene columns found:")
 for gene, col in targets.items():
     print(f"  {gene}: {col}")
 
 # Create clean dataframe
-dep_clean = depmap[['ModelID'] + list(targets.values())].copy()
-dep_clean.columns = ['ModelID', 'STK17A', 'MYLK4', 'TBK1', 'CLK4']
+dep_clean = depmap.frame(list(targets)).reset_index()
 
 print(f"\nDependency data shape: {dep_clean.shape}")
 print(f"Missing values per gene:")
@@ -45,18 +41,15 @@ for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']:
 # Load HOTSPOT mutations
 print("\n" + "="*80)
 print("Loading HOTSPOT mutations...")
-mutations_hotspot = pd.read_csv('data/raw/depmap/OmicsSomaticMutationsMatrixHotspot.csv')
-print(f"Cell lines with hotspot data: {len(mutations_hotspot)}")
+hotspot_matrix = store.matrix('mutations_hotspot')
+print(f"Cell lines with hotspot data: {len(hotspot_matrix.models)}")
 
 # Find mutation columns
 mutation_genes = ['PTEN', 'KRAS', 'PIK3CA', 'EGFR', 'NRAS', 'HRAS', 
                   'BRAF', 'TP53', 'STK11', 'NFE2L2', 'KEAP1']
 
-hotspot_cols = {}
-for gene in mutation_genes:
-    matching = [col for col in mutations_hotspot.columns if gene in col and 'mutation' not in col.lower()]
-    if matching:
-        hotspot_cols[gene] = matching[0]
+hotspot_cols = {gene: hotspot_matrix.gene_label(gene) for gene in mutation_genes if hotspot_matrix.has_gene(gene)}
+mutations_hotspot = hotspot_matrix.frame(list(hotspot_cols.values())).reset_index()
 
 print(f"Hotspot mutations found: {len(hotspot_cols)}")
 for gene, col in hotspot_cols.items():
@@ -66,15 +59,13 @@ for gene, col in hotspot_cols.items():
 # Load DAMAGING mutations
 print("\n" + "="*80)
 print("Loading DAMAGING mutations...")
-try:
-    mutations_damaging = pd.read_csv('data/raw/depmap/OmicsSomaticMutationsMatrixDamaging.csv')
-    print(f"Cell lines with damaging mutation data: {len(mutations_damaging)}")
+if store.has('mutations_damaging'):
+    damaging_matrix = store.matrix('mutations_damaging')
+    print(f"Cell lines with damaging mutation data: {len(damaging_matrix.models)}")
     
-    damaging_cols = {}
-    for gene in mutation_genes:
-        matching = [col for col in mutations_damaging.columns if gene in col and 'mutation' not in col.lower()]
-        if matching:
-            damaging_cols[gene] = matching[0]
+    damaging_cols = {gene: damaging_matrix.gene_label(gene) for gene in mutation_genes
+                     if damaging_matrix.has_gene(gene)}
+    mutations_damaging = damaging_matrix.frame(list(damaging_cols.values())).reset_index()
     
     print(f"Damaging mutations found: {len(damaging_cols)}")
     for gene, col in damaging_cols.items():
@@ -82,7 +73,7 @@ try:
         print(f"  {gene}: {n_mutant} mutant cell lines")
     
     has_damaging = True
-except FileNotFoundError:
+else:
     print("⚠️  Damaging mutations file not found - using hotspot only")
     has_damaging = False
 
@@ -98,68 +89,35 @@ mutation_types = ['hotspot']
 if has_damaging:
     mutation_types.append('damaging')
 
+target_genes = ['STK17A', 'MYLK4', 'TBK1', 'CLK4']
+
 for mut_type in mutation_types:
     print(f"\nAnalyzing {mut_type.upper()} mutations...")
     
-    if mut_type == 'hotspot':
-        mut_data = mutations_hotspot
-        mut_cols = hotspot_cols
-    else:
-        mut_data = mutations_damaging
-        mut_cols = damaging_cols
+    mut_cols = hotspot_cols if mut_type == 'hotspot' else damaging_cols
     
-    # For each mutation gene
-    for mut_gene, mut_col in mut_cols.items():
-        
-        # Merge mutation data with dependency
-        merged = dep_clean.merge(
-            mut_data[['ModelID', mut_col]],
-            on='ModelID',
-            how='left'
-        )
-        
-        # Fill missing mutations as wild-type (0)
-        merged[mut_col] = merged[mut_col].fillna(0)
-        
-        # For each target gene
-        for target_gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']:
-            
-            # Split into mutant and wild-type groups
-            mutant = merged[merged[mut_col] == 1][target_gene].dropna()
-            wt = merged[merged[mut_col] == 0][target_gene].dropna()
-            
-            if len(mutant) < 3 or len(wt) < 10:
-                continue  # Need minimum sample sizes
-            
-            # Calculate statistics
-            mutant_mean = mutant.mean()
-            wt_mean = wt.mean()
-            mean_diff = mutant_mean - wt_mean
-            
-            # Welch's t-test
-            t_stat, p_val = stats.ttest_ind(mutant, wt, equal_var=False)
-            
-            # Store result
-            results.append({
-                'mutation_type': mut_type,
-                'mutation': mut_gene,
-                'target': target_gene,
-                'n_mutant': len(mutant),
-                'n_wt': len(wt),
-                'mutant_mean': mutant_mean,
-                'wt_mean': wt_mean,
-                'mean_diff': mean_diff,
-                't_statistic': t_stat,
-                'p_value': p_val,
-                'is_synthetic_lethal': mean_diff < 0,  # NEGATIVE = SL
-                'significant': p_val < 0.10
-            })
+    # Welch's t-test for every mutation gene × target at once
+    # (src/analysis/synthetic_lethality.py); all dependency cell lines,
+    # missing mutations filled as wild-type (0), minimum 3 mutant / 10 WT
+    for block in scan_store(store, target_genes, f'mutations_{mut_type}',
+                            mutation_genes=list(mut_cols), all_models=True):
+        block.insert(0, 'mutation_type', mut_type)
+        block['significant'] = block['p_value'] < 0.10
+        results.append(block)
 
 # Convert to DataFrame
-results_df = pd.DataFrame(results)
+results_df = pd.concat(results, ignore_index=True)[[
+    'mutation_type', 'mutation', 'target', 'n_mutant', 'n_wt', 'mutant_mean', 'wt_mean',
+    'mean_diff', 't_statistic', 'p_value', 'is_synthetic_lethal', 'significant'
+]]
+
+# Benjamini-Hochberg within each target's family of tests (src/analysis/multiple_testing.py)
+results_df['p_adjusted_fdr'] = adjust_pvalues(results_df['p_value'], 'bh', groups=results_df['target'])
+results_df['significant_fdr'] = results_df['p_adjusted_fdr'] < 0.10
 
 print(f"\nTotal combinations tested: {len(results_df)}")
 print(f"Significant results (p < 0.10): {(results_df['p_value'] < 0.10).sum()}")
+print(f"Significant results (FDR per target, q < 0.10): {results_df['significant_fdr'].sum()}")
 print(f"True synthetic lethality (Δ < 0, p < 0.10): {((results_df['mean_diff'] < 0) & (results_df['p_value'] < 0.10)).sum()}")
 
 # Save complete results
@@ -9,6 +9,8 @@ from scipy import stats
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+from src.analysis.multiple_testing import adjust_pvalues
+from src.data.depmap_store import DepMapStore
 warnings.filterwarnings('ignore')
 
 print("="*80)
@@ -17,36 +19,19 @@ print("="*80)
 
 # Load DepMap dependency data (full)
 print("\nLoading dependency data...")
-depmap = pd.read_csv('data/raw/depmap/CRISPRGeneDependency.csv', index_col=0)
-depmap = depmap.reset_index()
-depmap.columns.values[0] = 'ModelID'
+store = DepMapStore.open()  # binary store, see src/data/depmap_store.py
+depmap = store.matrix('gene_dependency')
 
-targets = {
-    'STK17A': [col for col in depmap.columns if 'STK17A' in col and 'STK17B' not in col][0],
-    'MYLK4': [col for col in depmap.columns if 'MYLK4' in col][0],
-    'TBK1': [col for col in depmap.columns if 'TBK1' in col][0],
-    'CLK4': [col for col in depmap.columns if 'CLK4' in col][0]
-}
-
-dep_clean = depmap[['ModelID'] + list(targets.values())].copy()
-dep_clean.columns = ['ModelID', 'STK17A_dep', 'MYLK4_dep', 'TBK1_dep', 'CLK4_dep']
+dep_clean = depmap.frame({f'{gene}_dep': gene for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']}).reset_index()
 
 print(f"Dependency data: {len(dep_clean)} cell lines")
 
 # Load CCLE expression data
 print("\nLoading expression data...")
-expression = pd.read_csv('data/raw/depmap/OmicsExpressionTPMLogp1HumanProteinCodingGenes.csv')
-
-# Find target gene columns
-expr_targets = {
-    'STK17A': [col for col in expression.columns if 'STK17A (9263)' in col][0],
-    'MYLK4': [col for col in expression.columns if 'MYLK4' in col][0],
-    'TBK1': [col for col in expression.columns if 'TBK1 (29110)' in col][0],  # Not TTBK1
-    'CLK4': [col for col in expression.columns if 'CLK4' in col][0]
-}
+expression = store.matrix('expression')
 
-expr_clean = expression[['ModelID'] + list(expr_targets.values())].copy()
-expr_clean.columns = ['ModelID', 'STK17A_expr', 'MYLK4_expr', 'TBK1_expr', 'CLK4_expr']
+# Target gene columns (exact symbols, so TBK1 is not TTBK1)
+expr_clean = expression.frame({f'{gene}_expr': gene for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']}).reset_index()
 
 print(f"Expression data: {len(expr_clean)} cell lines")
 
@@ -57,9 +42,9 @@ print(f"Merged data: {len(merged)} cell lines")
 
 # Load model info for cancer types
 print("\nLoading cancer type info...")
-model = pd.read_csv('data/raw/depmap/Model.csv')
+model = store.models(['ModelID', 'OncotreePrimaryDisease', 'OncotreeLineage'])
 merged = merged.merge(
-    model[['ModelID', 'OncotreePrimaryDisease', 'OncotreeLineage']],
+    model,
     on='ModelID',
     how='left'
 )
@@ -87,17 +72,22 @@ for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']:
             'p_value': pval,
             'n': len(valid)
         }
-        
-        print(f"\n{gene}:")
-        print(f"  Correlation: {corr:.4f}")
-        print(f"  P-value: {pval:.4e}")
-        print(f"  N: {len(valid)} cell lines")
-        
-        if pval < 0.05:
-            direction = "POSITIVE" if corr > 0 else "NEGATIVE"
-            print(f"  ✅ SIGNIFICANT {direction} correlation")
-        else:
-            print(f"  ⚠️  Not significant")
+
+# Benjamini-Hochberg across the target genes (src/analysis/multiple_testing.py)
+overall_q = adjust_pvalues([result['p_value'] for result in overall_corrs.values()], 'bh')
+for (gene, result), qval in zip(overall_corrs.items(), overall_q):
+    result['q_value'] = qval
+    
+    print(f"\n{gene}:")
+    print(f"  Correlation: {result['correlation']:.4f}")
+    print(f"  P-value: {result['p_value']:.4e} (FDR q-value: {qval:.4e})")
+    print(f"  N: {result['n']} cell lines")
+    
+    if qval < 0.05:
+        direction = "POSITIVE" if result['correlation'] > 0 else "NEGATIVE"
+        print(f"  ✅ SIGNIFICANT {direction} correlation")
+    else:
+        print(f"  ⚠️  Not significant")
 
 # Calculate per-cancer-type correlations
 print("\n" + "="*80)
@@ -163,6 +153,10 @@ for cancer in merged['OncotreePrimaryDisease'].dropna().unique():
 # Convert to DataFrame
 cancer_df = pd.DataFrame(cancer_results)
 
+# FDR q-values per target gene, across cancer types (one family per gene)
+for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']:
+    cancer_df[f'{gene}_corr_qval'] = adjust_pvalues(cancer_df[f'{gene}_corr_pval'], 'bh')
+
 # Calculate expression_correlation_score for integration
 # This is a normalized score (0-1) representing strength of evidence
 def calculate_expr_score(row):
@@ -7,46 +7,37 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 import warnings
+from src.analysis.multiple_testing import adjust_pvalues
+from src.data.depmap_store import DepMapStore
 warnings.filterwarnings('ignore')
 
 print("="*80)
 print("PHASE 3: COMPLETE COPY NUMBER ANALYSIS")
 print("="*80)
 
-# Load DepMap dependency data
+# Load DepMap dependency data from the binary store (see src/data/depmap_store.py)
 print("\nLoading dependency data...")
-depmap = pd.read_csv('data/raw/depmap/CRISPRGeneDependency.csv', index_col=0)
-depmap = depmap.reset_index()
-depmap.columns.values[0] = 'ModelID'
+store = DepMapStore.open()
+depmap = store.matrix('gene_dependency')
 
-targets = {
-    'STK17A': [col for col in depmap.columns if 'STK17A' in col and 'STK17B' not in col][0],
-    'MYLK4': [col for col in depmap.columns if 'MYLK4' in col][0],
-    'TBK1': [col for col in depmap.columns if 'TBK1' in col][0],
-    'CLK4': [col for col in depmap.columns if 'CLK4' in col][0]
-}
-
-dep_clean = depmap[['ModelID'] + list(targets.values())].copy()
-dep_clean.columns = ['ModelID', 'STK17A_dep', 'MYLK4_dep', 'TBK1_dep', 'CLK4_dep']
+dep_clean = depmap.frame({f'{gene}_dep': gene for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']}).reset_index()
 
 print(f"Dependency data: {len(dep_clean)} cell lines")
 
 # Load copy number data
 print("\nLoading copy number data...")
-cn = pd.read_csv('data/raw/depmap/OmicsCNGeneWGS.csv')
+cn = store.matrix('copy_number')
 
 # Find target gene columns in CN data
 cn_targets = {}
 for gene in ['STK17A', 'MYLK4', 'TBK1', 'CLK4']:
-    matching = [col for col in cn.columns if gene in col]
-    if matching:
-        cn_targets[gene] = matching[0]
-        print(f"  {gene}: {matching[0]}")
+    if cn.has_gene(gene):
+        cn_targets[gene] = cn.gene_label(gene)
+        print(f"  {gene}: {cn_targets[gene]}")
     else:
         print(f"  {gene}: NOT FOUND")
 
-cn_clean = cn[['ModelID'] + list(cn_targets.values())].copy()
-cn_clean.columns = ['ModelID'] + [f'{g}_cn' for g in cn_targets.keys()]
+cn_clean = cn.frame({f'{g}_cn': col for g, col in cn_targets.items()}).reset_index()
 
 print(f"Copy number data: {len(cn_clean)} cell lines")
 
@@ -57,9 +48,9 @@ print(f"Merged data: {len(merged)} cell lines")
 
 # Load model info for cancer types
 print("\nLoading cancer type info...")
-model = pd.read_csv('data/raw/depmap/Model.csv')
+model = store.models(['ModelID', 'OncotreePrimaryDisease', 'OncotreeLineage'])
 merged = merged.merge(
-    model[['ModelID', 'OncotreePrimaryDisease', 'OncotreeLineage']],
+    model,
     on='ModelID',
     how='left'
 )
@@ -155,6 +146,11 @@ for gene in cn_targets.keys():
 
 # Save CN impact results
 cn_impact_df = pd.DataFrame(cn_impact_results)
+
+# Benjamini-Hochberg across all copy-number comparisons (src/analysis/multiple_testing.py)
+cn_impact_df['p_adjusted_fdr'] = adjust_pvalues(cn_impact_df['p_value'], 'bh')
+cn_impact_df['significant_fdr'] = cn_impact_df['p_adjusted_fdr'] < 0.10
+print(f"\nSignificant comparisons (FDR q < 0.10): {cn_impact_df['significant_fdr'].sum()}/{len(cn_impact_df)}")
 cn_impact_df.to_csv('data/processed/copy_number_impact.csv', index=False)
 print(f"\n✅ Saved: data/processed/copy_number_impact.csv")
 
@@ -2,6 +2,9 @@
 """
 System Monitoring Script
 Monitors the literature quality system and reports on status, improvements, and issues.
+
+Counts come from the materialized paper statistics (scripts/literature_stats.py),
+so polling this is cheap regardless of corpus size.
 """
 
 import os
@@ -39,7 +42,7 @@ def monitor_system():
     print(f"Low Risk PROBAST: {stats.get('probast_low_risk', 0):,}")
     print(f"Moderate Risk: {stats.get('probast_moderate_risk', 0):,}")
     print(f"High Risk: {stats.get('probast_high_risk', 0):,}")
-    print(f"Unclear Risk: {stats.get('probast_unclear', 0):,}")
+    print(f"Unclear Risk: {stats.get('probast_unclear_risk', 0):,}")
     print(f"Used in Model: {stats.get('used_in_model', 0):,}")
     print()
     
@@ -62,7 +65,25 @@ def monitor_system():
             print("-" * 80)
             for access_type, count in access_types.items():
                 pct = (count / total) * 100
-                print(f"{access_type.replace('_', ' ').title()}: {count:,} ({pct:.1f}%)")
+                print(f"{(access_type or 'unknown').replace('_', ' ').title()}: {count:,} ({pct:.1f}%)")
+            print()
+        
+        # Relevance score distribution
+        score_buckets = stats.get('by_score_bucket', {})
+        if score_buckets:
+            print("RELEVANCE SCORE DISTRIBUTION")
+            print("-" * 80)
+            for bucket, count in sorted(score_buckets.items()):
+                print(f"{bucket:>3}-{bucket + 9:<3}: {count:,}")
+            print()
+        
+        # Recent growth
+        by_month = stats.get('by_month_added', {})
+        if by_month:
+            print("ARTICLES ADDED (LAST 6 MONTHS)")
+            print("-" * 80)
+            for month, count in list(by_month.items())[-6:]:
+                print(f"{month}: {count:,}")
             print()
     
     # Check for improvements
@@ -93,7 +114,7 @@ def monitor_system():
     if total > 0:
         moderate = stats.get('probast_moderate_risk', 0)
         high = stats.get('probast_high_risk', 0)
-        unclear = stats.get('probast_unclear', 0)
+        unclear = stats.get('probast_unclear_risk', 0)
         
         if moderate + high + unclear > low_risk:
             improvements.append("⚠ More Moderate/High risk than Low risk - consider manual review")
@@ -11,12 +11,14 @@ import logging
 from datetime import datetime
 from typing import List, Dict
 from dotenv import load_dotenv
-from collections import defaultdict
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.google_sheets_storage import get_storage_client
+from scripts.file_storage import FileStorage
+from scripts.factor_index import normalize_factor
+from scripts.corpus_snapshot import load_corpus, PYARROW_AVAILABLE
 from scripts.article_flagging import ArticleFlaggingFramework
 from scripts.review_manager import ReviewManager, ReviewStatus
 
@@ -46,6 +48,7 @@ class NotificationSystem:
         self.repo_name = os.getenv('GITHUB_REPO_NAME')
         self.flagging_framework = ArticleFlaggingFramework()  # New flagging framework
         self.review_manager = ReviewManager()  # Review and approval workflow
+        self._article_cache = {}  # PMID -> article, shared by the factor detectors
     
     def get_paywalled_articles(self, threshold: int = 0) -> List[Dict]:
         """Get paywalled articles above relevance threshold
@@ -55,49 +58,42 @@ class NotificationSystem:
         """
         return self.storage.get_paywalled_articles(threshold=threshold)
     
+    def _load_factor_articles(self, factor_pmids: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
+        """Replace PMIDs with article dictionaries, reading each article file once per run"""
+        result = {}
+        for factor, pmids in factor_pmids.items():
+            articles = []
+            for pmid in pmids:
+                if pmid not in self._article_cache:
+                    self._article_cache[pmid] = self.storage.get_article_by_pmid(pmid)
+                if self._article_cache[pmid]:
+                    articles.append(self._article_cache[pmid])
+            result[factor] = articles
+        return result
+    
     def detect_factor_patterns(self, threshold: int = 5) -> Dict[str, List[Dict]]:
         """
         Detect when 5+ articles mention the same predictive factor
         
+        Answered from the factor index: only the articles of qualifying factors are read.
+        
         Args:
-            threshold: Minimum number of articles mentioning a factor
+            threshold: Minimum number of high-relevance articles mentioning a factor
             
         Returns:
-            Dictionary mapping factor names to lists of articles
+            Dictionary mapping normalized factor names to lists of articles (highest score first)
         """
-        # Get all high-relevance articles
-        articles = self.storage.get_high_relevance_articles(threshold=self.relevance_threshold)
-        
-        factor_articles = defaultdict(list)
-        
-        for article in articles:
-            factors = article.get('predictive_factors', [])
-            if not isinstance(factors, list):
-                continue
-            
-            for factor_data in factors:
-                if isinstance(factor_data, dict):
-                    factor_name = factor_data.get('factor', '').lower()
-                    if factor_name:
-                        factor_articles[factor_name].append(article)
-        
-        # Filter to factors mentioned in threshold+ articles
-        significant_factors = {
-            factor: articles
-            for factor, articles in factor_articles.items()
-            if len(articles) >= threshold
-        }
-        
-        return significant_factors
+        factor_pmids = self.storage.get_factor_articles(threshold, relevance_threshold=self.relevance_threshold)
+        return self._load_factor_articles(factor_pmids)
     
     def detect_potential_new_parameters(self, threshold: int = 5) -> Dict[str, List[Dict]]:
         """
         Detect factors that could be new model parameters
         
-        Compares extracted factors against current model parameters and flags
-        novel factors that appear in multiple high-quality studies.
+        Flags factors that do not match a current model parameter and have
+        statistical evidence (p value, OR, HR, AUC) in multiple high-quality studies.
         
-        Current model parameters:
+        Current model parameters (see factor_index.CURRENT_MODEL_PARAMETERS):
         - Age, Sex, BMI, Race, Cohort
         - WOMAC Total Right/Left
         - KL Grade Right/Left
@@ -105,67 +101,14 @@ class NotificationSystem:
         - Walking Distance (400m walk time)
         
         Args:
-            threshold: Minimum number of articles mentioning a factor
+            threshold: Minimum number of articles with statistical evidence for a factor
             
         Returns:
             Dictionary mapping potential new parameter names to lists of articles
         """
-        # Current model parameters (normalized for comparison)
-        current_params = {
-            'age', 'sex', 'gender', 'bmi', 'body mass index', 'race', 'ethnicity',
-            'cohort', 'womac', 'kellgren-lawrence', 'kl grade', 'kl score',
-            'family history', 'walking distance', '400m walk', 'walk time',
-            'knee replacement', 'tkr', 'tka', 'arthroplasty'
-        }
-        
-        # Get all high-relevance articles
-        articles = self.storage.get_high_relevance_articles(threshold=self.relevance_threshold)
-        
-        potential_params = defaultdict(list)
-        
-        for article in articles:
-            factors = article.get('predictive_factors', [])
-            if not isinstance(factors, list):
-                continue
-            
-            for factor_data in factors:
-                if isinstance(factor_data, dict):
-                    factor_name = factor_data.get('factor', '').lower().strip()
-                    if not factor_name:
-                        continue
-                    
-                    # Check if this factor is already in the model
-                    is_current_param = any(
-                        current_param in factor_name or factor_name in current_param
-                        for current_param in current_params
-                    )
-                    
-                    # If it's a new factor and appears in high-quality studies, flag it
-                    if not is_current_param:
-                        # Check if it's a statistically significant predictor
-                        effect_size = factor_data.get('effect_size', '')
-                        significance = factor_data.get('significance', '')
-                        
-                        # Only include if there's statistical evidence
-                        has_evidence = (
-                            'p' in significance.lower() or
-                            'or' in effect_size.lower() or
-                            'hr' in effect_size.lower() or
-                            'auc' in effect_size.lower() or
-                            'odds ratio' in effect_size.lower()
-                        )
-                        
-                        if has_evidence:
-                            potential_params[factor_name].append(article)
-        
-        # Filter to factors mentioned in threshold+ articles
-        significant_new_params = {
-            factor: articles
-            for factor, articles in potential_params.items()
-            if len(articles) >= threshold
-        }
-        
-        return significant_new_params
+        factor_pmids = self.storage.get_factor_articles(threshold, relevance_threshold=self.relevance_threshold,
+                                                        statistical_only=True, new_parameters_only=True)
+        return self._load_factor_articles(factor_pmids)
     
     def create_github_issue(self, title: str, body: str, labels: List[str] = None) -> bool:
         """
@@ -206,6 +149,12 @@ class NotificationSystem:
                 'labels': labels or []
             }
             
+            # Don't re-file an issue that is still open (live lookup, never the HTTP cache)
+            existing = self._find_open_issue(url, headers, title)
+            if existing is not None:
+                logger.info(f"GitHub issue #{existing['number']} already open: {title}")
+                return True
+            
             response = requests.post(url, headers=headers, json=data, timeout=30)
             response.raise_for_status()
             
@@ -217,6 +166,22 @@ class NotificationSystem:
             logger.error(f"Error creating GitHub issue: {e}")
             return False
     
+    @staticmethod
+    def _find_open_issue(url: str, headers: Dict, title: str):
+        """Open issue with exactly this title, or None (first 100 open issues)"""
+        import requests
+        
+        try:
+            response = requests.get(url, headers=headers, params={'state': 'open', 'per_page': 100}, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Could not list open GitHub issues: {e}")
+            return None
+        for issue in response.json():
+            if issue.get('title') == title and 'pull_request' not in issue:
+                return issue
+        return None
+    
     def create_paywalled_alert(self, articles: List[Dict]) -> bool:
         """Create GitHub issue for paywalled articles"""
         if len(articles) < 5:
@@ -335,7 +300,7 @@ class NotificationSystem:
                 factors = article.get('predictive_factors', [])
                 factor_details = None
                 for f in factors:
-                    if isinstance(f, dict) and f.get('factor', '').lower() == param_name:
+                    if isinstance(f, dict) and normalize_factor(f.get('factor', '')) == param_name:
                         factor_details = f
                         break
                 
@@ -385,8 +350,11 @@ class NotificationSystem:
     def generate_daily_summary(self) -> str:
         """Generate markdown summary of daily findings with flagging framework"""
         try:
-            # Get all articles for flagging analysis
-            all_articles = self.storage.get_all_articles()
+            # Get all articles for flagging analysis (one packed read when using file storage)
+            if isinstance(self.storage, FileStorage) and PYARROW_AVAILABLE:
+                all_articles = load_corpus(str(self.storage.data_dir)).load_articles()
+            else:
+                all_articles = self.storage.get_all_articles()
             logger.info(f"Analyzing {len(all_articles)} articles for flagging")
             
             # Get flagging summary
@@ -15,78 +15,23 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    try:
-        import pdfplumber
-        PDF_AVAILABLE = True
-        USE_PDFPLUMBER = True
-    except ImportError:
-        PDF_AVAILABLE = False
-        USE_PDFPLUMBER = False
-
 from scripts.relevance_scoring import RelevanceScorer
 from scripts.probast_assessment import PROBASTAssessment
 from scripts.factor_extraction import FactorExtractor
+from scripts.pdf_text import PDF_AVAILABLE, get_pdf_text_extractor, join_pages
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def extract_text_from_pdf(pdf_path: str) -> Dict[str, str]:
-    """Extract text from PDF file"""
-    text = ""
-    metadata = {}
-    
+    """Extract text from PDF file (cached by content hash)"""
     if not PDF_AVAILABLE:
         logger.error("PDF extraction library not available. Install PyPDF2 or pdfplumber.")
         return {"text": "", "metadata": {}}
     
-    try:
-        # Try pdfplumber first (better extraction), fallback to PyPDF2
-        try:
-            import pdfplumber
-            with pdfplumber.open(pdf_path) as pdf:
-                # Extract text from all pages
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                
-                # Extract metadata
-                if pdf.metadata:
-                    metadata = {
-                        "title": pdf.metadata.get("Title", ""),
-                        "author": pdf.metadata.get("Author", ""),
-                        "subject": pdf.metadata.get("Subject", ""),
-                        "creator": pdf.metadata.get("Creator", ""),
-                    }
-        except ImportError:
-            # Fallback to PyPDF2
-            import PyPDF2
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract text from all pages
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text += page.extract_text() + "\n"
-                
-                # Extract metadata
-                if pdf_reader.metadata:
-                    metadata = {
-                        "title": pdf_reader.metadata.get("/Title", ""),
-                        "author": pdf_reader.metadata.get("/Author", ""),
-                        "subject": pdf_reader.metadata.get("/Subject", ""),
-                        "creator": pdf_reader.metadata.get("/Creator", ""),
-                    }
-        
-        return {"text": text, "metadata": metadata}
-    
-    except Exception as e:
-        logger.error(f"Error extracting text from {pdf_path}: {e}")
-        return {"text": "", "metadata": {}}
+    result = get_pdf_text_extractor().extract(pdf_path)
+    return {"text": join_pages(result["pages"]), "metadata": result["metadata"]}
 
 
 def extract_pmid_from_filename(filename: str) -> Optional[str]:
@@ -242,6 +187,9 @@ def main():
     pdf_files = list(pdf_dir.glob("*.pdf"))
     logger.info(f"Found {len(pdf_files)} PDF files")
     
+    # Extract all texts up front in parallel (cached PDFs are not parsed again)
+    get_pdf_text_extractor().extract_many(str(pdf_path) for pdf_path in pdf_files)
+    
     # Analyze each PDF
     results = []
     for pdf_path in pdf_files:
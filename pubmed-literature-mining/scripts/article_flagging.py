@@ -10,6 +10,8 @@ import logging
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
+from scripts.text_analysis import analyze_article
+
 logger = logging.getLogger(__name__)
 
 
@@ -135,21 +137,9 @@ class ArticleFlaggingFramework:
                 logger.debug(f"Could not parse publication date: {e}")
         
         # Check large sample size
-        abstract = article.get('abstract', '').lower()
-        import re
-        sample_patterns = [
-            r'\b(\d{1,3}(?:,\d{3})*)\s*(?:patients?|subjects?|participants?|individuals?|cases?)',
-            r'n\s*=\s*(\d{1,3}(?:,\d{3})*)',
-        ]
-        max_sample = 0
-        for pattern in sample_patterns:
-            matches = re.findall(pattern, abstract)
-            for match in matches:
-                try:
-                    size = int(match.replace(',', ''))
-                    max_sample = max(max_sample, size)
-                except ValueError:
-                    continue
+        analysis = analyze_article(article)
+        abstract = analysis.lower('abstract')
+        max_sample = analysis.max_sample_size('abstract', ('count', 'n_equals'))
         
         if (max_sample >= self.criteria['large_sample']['min_sample_size'] and
             score >= self.criteria['large_sample']['min_score']):
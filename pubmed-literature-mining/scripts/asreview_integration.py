@@ -97,6 +97,30 @@ class ASReviewIntegration:
             logger.error(f"Error exporting articles for ASReview: {e}")
             return False
     
+    def export_corpus_for_asreview(self, source_path: str = "data/literature.db",
+                                   output_path: str = "data/asreview_export.csv") -> bool:
+        """
+        Export the whole corpus for ASReview LAB from the packed corpus snapshot
+        
+        Args:
+            source_path: SQLite database file or FileStorage directory
+            output_path: Path to output CSV file
+            
+        Returns:
+            True if successful
+        """
+        try:
+            from scripts.corpus_snapshot import load_corpus
+            papers, _ = load_corpus(source_path).load_dataframes()
+            df = self._articles_to_dataframe(papers)
+            df.to_csv(output_path, index=False)
+            logger.info(f"Exported {len(df)} articles to {output_path}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error exporting corpus for ASReview: {e}")
+            return False
+    
     def import_screening_results(self, project_path: str) -> Optional[List[Dict]]:
         """
         Import screening results from ASReview project
@@ -138,8 +162,14 @@ class ASReviewIntegration:
             logger.error(f"Error importing ASReview results: {e}")
             return None
     
-    def _articles_to_dataframe(self, articles: List[Dict]) -> pd.DataFrame:
-        """Convert articles list to DataFrame for ASReview"""
+    def _articles_to_dataframe(self, articles) -> pd.DataFrame:
+        """Convert articles list (or a corpus snapshot DataFrame) to DataFrame for ASReview"""
+        columns = ["pmid", "title", "abstract", "authors", "journal", "doi", "publication_date", "access_type"]
+        if isinstance(articles, pd.DataFrame):
+            df = articles[columns].copy()
+            df["access_type"] = df["access_type"].fillna("unknown")
+            return df.fillna("")
+        
         records = []
         
         for article in articles:
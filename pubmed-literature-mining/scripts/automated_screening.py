@@ -3,31 +3,165 @@
 Automated Screening System
 Pre-filters articles using relevance scoring so you don't have to manually review 4,671 articles.
 
-This uses the existing relevance scoring system to automatically identify relevant articles,
-so you only need to review the high-scoring ones (or let the system handle it automatically).
+Papers are ranked by an active-learning model (see screening_ranker.py) trained on
+the screening decisions recorded in the review queue: each batch of decisions refits
+the model and re-ranks the unscreened papers, so reviewers reach the relevant set
+after screening a fraction of the corpus. Until both relevant and irrelevant
+decisions exist, the relevance score cut-offs are used instead.
 """
 
 import os
 import sys
 import json
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.literature_database import LiteratureDatabase
 from scripts.enhanced_relevance_scoring import EnhancedRelevanceScorer
+from scripts.screening_ranker import ScreeningRanker
 
 logger = logging.getLogger(__name__)
 
+SCREENING_TYPE = 'screening'
+# Review statuses that count as a relevant / irrelevant screening decision (pending is undecided)
+RELEVANT_STATUSES = {'approved', 'implemented', 'proves_current', 'new_parameter'}
+IRRELEVANT_STATUSES = {'rejected'}
+# Papers predicted at least this likely to be relevant are reported as relevant
+RELEVANT_PROBABILITY = 0.5
+
 
 class AutomatedScreening:
-    """Automated screening using relevance scores"""
+    """Automated screening with an active-learning ranker (relevance scores until it can be fit)"""
     
-    def __init__(self):
-        self.database = LiteratureDatabase()
+    def __init__(self, database: Optional[LiteratureDatabase] = None, review_manager=None,
+                 ranker: Optional[ScreeningRanker] = None):
+        """
+        Initialize screening
+        
+        Args:
+            database: Literature database (default: data/literature.db)
+            review_manager: Review queue holding screening decisions (default: the shared one)
+            ranker: Screening ranker (default: data/screening_model.npz)
+        """
+        self.database = database or LiteratureDatabase()
         self.scorer = EnhancedRelevanceScorer()
+        self._review_manager = review_manager
+        self.ranker = ranker or ScreeningRanker()
+    
+    @property
+    def review_manager(self):
+        """Review queue (opened on first use)"""
+        if self._review_manager is None:
+            from scripts.review_manager import get_review_manager
+            self._review_manager = get_review_manager()
+        return self._review_manager
+    
+    def get_decisions(self) -> Dict[str, bool]:
+        """
+        Screening decisions: PMID -> relevant
+        
+        Taken from ASReview results stored in the database and from the screening items
+        of the review queue, where a later review decision overrides an earlier one
+        (reviews of other finding types, e.g. a rejected parameter proposal, are not
+        screening labels).
+        """
+        import sqlite3
+        
+        conn = sqlite3.connect(self.database.db_path)
+        try:
+            decisions = {pmid: bool(relevant) for pmid, relevant in conn.execute(
+                'SELECT pmid, asreview_relevant FROM papers WHERE asreview_screened = 1')}
+        finally:
+            conn.close()
+        for pmid, status in self.review_manager.get_pmid_statuses(finding_type=SCREENING_TYPE).items():
+            if status in RELEVANT_STATUSES:
+                decisions[pmid] = True
+            elif status in IRRELEVANT_STATUSES:
+                decisions[pmid] = False
+        return decisions
+    
+    def update_ranker(self) -> Dict:
+        """
+        Add new papers to the ranker, record new decisions and refit if anything changed
+        
+        Returns:
+            Dictionary with papers added, decisions changed and whether the model is fit
+        """
+        import sqlite3
+        
+        conn = sqlite3.connect(self.database.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            new_papers = [dict(row) for row in conn.execute('SELECT pmid, title, abstract FROM papers')
+                          if row['pmid'] not in self.ranker.corpus]
+        finally:
+            conn.close()
+        added = self.ranker.add_articles(new_papers)
+        changed = self.ranker.record_decisions(self.get_decisions())
+        if changed or (added and self.ranker.fitted) or (not self.ranker.fitted and self.ranker.can_fit()):
+            self.ranker.fit()
+        if added or changed:
+            self.ranker.save()
+        return {'papers_added': added, 'decisions_changed': changed, 'fitted': self.ranker.fitted}
+    
+    def rank_unscreened(self, strategy: str = 'relevance', limit: int = None) -> List[Dict]:
+        """
+        Unscreened papers in screening order
+        
+        Args:
+            strategy: 'relevance' or 'uncertainty' (see ScreeningRanker.rank)
+            limit: Maximum number of papers
+            
+        Returns:
+            List of {'pmid', 'probability'} (empty until the ranker can be fit)
+        """
+        self.update_ranker()
+        return self.ranker.rank(strategy=strategy, limit=limit)
+    
+    def queue_for_review(self, batch_size: int = 20, strategy: str = 'relevance') -> List[str]:
+        """
+        Add the next batch of top-ranked unscreened papers to the review queue
+        
+        Approving or rejecting these items records the screening decision; the next
+        batch is ranked by the model refit on them.
+        
+        Args:
+            batch_size: Number of papers to queue
+            strategy: 'relevance' or 'uncertainty'
+            
+        Returns:
+            Review IDs of the queued papers
+        """
+        self.update_ranker()
+        queued = set(self.review_manager.get_pmid_statuses(finding_type=SCREENING_TYPE))
+        ranked = self.ranker.rank(strategy=strategy, limit=batch_size, exclude=queued)
+        if not ranked:
+            # No model yet: seed the queue with the highest relevance scores
+            ranked = [{'pmid': article['pmid'], 'probability': None}
+                      for article in self.get_relevant_articles(
+                          min_score=0, max_articles=batch_size + len(queued) + len(self.ranker.labels))
+                      if article['pmid'] not in queued and article['pmid'] not in self.ranker.labels][:batch_size]
+        
+        papers = {article['pmid']: article for article in self.database.get_articles([r['pmid'] for r in ranked])}
+        review_ids = []
+        for item in ranked:
+            article = papers.get(item['pmid'])
+            if not article:
+                continue
+            review_ids.append(self.review_manager.add_to_review_queue(SCREENING_TYPE, {
+                'pmid': article['pmid'],
+                'title': article.get('title', ''),
+                'abstract': article.get('abstract', ''),
+                'journal': article.get('journal', ''),
+                'relevance_score': article.get('relevance_score'),
+                'screening_probability': item['probability'],
+                'screening_strategy': strategy
+            }, source='screening'))
+        logger.info(f"Queued {len(review_ids)} papers for screening ({strategy})")
+        return review_ids
     
     def get_relevant_articles(self, min_score: int = 60, max_articles: int = None) -> List[Dict]:
         """
@@ -75,16 +209,18 @@ class AutomatedScreening:
     
     def auto_screen_articles(self, min_score: int = 70) -> Dict:
         """
-        Automatically screen articles based on relevance score
+        Automatically screen articles
+        
+        With a fitted ranker, unscreened papers predicted relevant are reported as
+        relevant and the most uncertain ones as needing review. Otherwise papers are
+        bucketed by relevance score.
         
         Args:
-            min_score: Minimum relevance score to consider "relevant"
+            min_score: Minimum relevance score to consider "relevant" (score cut-off mode)
             
         Returns:
             Dictionary with screening results
         """
-        logger.info(f"Automated screening with minimum score: {min_score}")
-        
         import sqlite3
         
         conn = sqlite3.connect(self.database.db_path)
@@ -94,6 +230,33 @@ class AutomatedScreening:
         # Get all articles with scores
         cursor.execute('SELECT pmid, relevance_score, title FROM papers')
         all_articles = cursor.fetchall()
+        conn.close()
+        
+        if self.update_ranker()['fitted']:
+            logger.info("Automated screening with the active-learning ranker")
+            rows = {row['pmid']: row for row in all_articles}
+            ranked = [item for item in self.ranker.rank(strategy='relevance') if item['pmid'] in rows]
+            uncertain = [item for item in self.ranker.rank(strategy='uncertainty') if item['pmid'] in rows]
+            
+            def entry(item):
+                row = rows[item['pmid']]
+                return {'pmid': row['pmid'], 'score': row['relevance_score'] or 0, 'title': row['title'],
+                        'probability': round(item['probability'], 4)}
+            
+            relevant = [entry(item) for item in ranked if item['probability'] >= RELEVANT_PROBABILITY]
+            needs_review = [entry(item) for item in uncertain]
+            return {
+                'ranking': 'active_learning',
+                'total_articles': len(all_articles),
+                'screened': sum(1 for pmid in self.ranker.labels if pmid in rows),
+                'automatically_relevant': len(relevant),
+                'needs_review': len(ranked),
+                'automatically_irrelevant': len(ranked) - len(relevant),
+                'relevant_articles': relevant[:100],  # Top 100
+                'needs_review_articles': needs_review[:50]  # Most uncertain 50
+            }
+        
+        logger.info(f"Automated screening with minimum score: {min_score} (no screening decisions to learn from yet)")
         
         # Categorize
         relevant = []
@@ -123,6 +286,7 @@ class AutomatedScreening:
                 })
         
         results = {
+            'ranking': 'relevance_score',
             'total_articles': len(all_articles),
             'automatically_relevant': len(relevant),
             'needs_review': len(needs_review),
@@ -131,7 +295,6 @@ class AutomatedScreening:
             'needs_review_articles': needs_review[:50]  # Top 50 for review
         }
         
-        conn.close()
         return results
     
     def export_for_review(self, min_score: int = 60, max_articles: int = 500) -> str:
@@ -180,12 +343,19 @@ if __name__ == "__main__":
     parser.add_argument('--export', action='store_true', help='Export filtered articles for ASReview')
     parser.add_argument('--min-score', type=int, default=70, help='Minimum relevance score (default: 70)')
     parser.add_argument('--max-articles', type=int, default=500, help='Maximum articles to export (default: 500)')
+    parser.add_argument('--queue', type=int, metavar='N', help='Add the next N ranked papers to the review queue')
+    parser.add_argument('--strategy', choices=['relevance', 'uncertainty'], default='relevance',
+                        help='Ranking for --queue (default: relevance)')
     
     args = parser.parse_args()
     
     screening = AutomatedScreening()
     
-    if args.export:
+    if args.queue:
+        review_ids = screening.queue_for_review(batch_size=args.queue, strategy=args.strategy)
+        print(f"\n✅ Queued {len(review_ids)} papers for screening in the review dashboard")
+        print("   Approve (relevant) or reject (irrelevant) them; the next batch is re-ranked on your decisions.")
+    elif args.export:
         # Export filtered articles
         output_path = screening.export_for_review(min_score=args.min_score, max_articles=args.max_articles)
         print(f"\n✅ Exported filtered articles to: {output_path}")
@@ -198,9 +368,15 @@ if __name__ == "__main__":
         print("AUTOMATED SCREENING RESULTS")
         print("=" * 60)
         print(f"Total articles: {results['total_articles']}")
-        print(f"Automatically Relevant (score ≥{args.min_score}): {results['automatically_relevant']}")
-        print(f"Needs Review (score 40-{args.min_score-1}): {results['needs_review']}")
-        print(f"Automatically Irrelevant (score <40): {results['automatically_irrelevant']}")
+        if results['ranking'] == 'active_learning':
+            print(f"Screened: {results['screened']}")
+            print(f"Predicted Relevant (p ≥{RELEVANT_PROBABILITY}): {results['automatically_relevant']}")
+            print(f"Unscreened: {results['needs_review']}")
+            print(f"Predicted Irrelevant: {results['automatically_irrelevant']}")
+        else:
+            print(f"Automatically Relevant (score ≥{args.min_score}): {results['automatically_relevant']}")
+            print(f"Needs Review (score 40-{args.min_score-1}): {results['needs_review']}")
+            print(f"Automatically Irrelevant (score <40): {results['automatically_irrelevant']}")
         print()
         print("=" * 60)
         print("RECOMMENDATION")
@@ -208,6 +384,6 @@ if __name__ == "__main__":
         print(f"✅ You only need to review {results['automatically_relevant']} articles")
         print(f"   (instead of all {results['total_articles']}!)")
         print()
-        print("Export filtered list for ASReview:")
-        print(f"  python scripts/automated_screening.py --export --min-score {args.min_score}")
+        print("Queue the next ranked batch for screening:")
+        print("  python scripts/automated_screening.py --queue 20")
         print("=" * 60)
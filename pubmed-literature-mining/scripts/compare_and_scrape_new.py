@@ -16,7 +16,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.literature_database import LiteratureDatabase
 from scripts.pubmed_scraper import PubMedScraper
-from scripts.probast_assessment import PROBASTAssessment
+from scripts.probast_batch import BatchAssessor
 from scripts.literature_quality_workflow import LiteratureQualityWorkflow
 
 
@@ -25,7 +25,6 @@ class CompareAndScrapeNew:
     
     def __init__(self):
         self.database = LiteratureDatabase()
-        self.probast = PROBASTAssessment()
         self.workflow = LiteratureQualityWorkflow()
     
     def get_existing_pmids(self) -> Set[str]:
@@ -112,99 +111,10 @@ class CompareAndScrapeNew:
         return stats
     
     def _assess_and_mark_new_articles(self, pmids: List[str]):
-        """Assess new articles with PROBAST and mark as usable if appropriate"""
-        conn = sqlite3.connect(self.database.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        for pmid in pmids:
-            try:
-                # Get article from database
-                cursor.execute('SELECT * FROM papers WHERE pmid = ?', (pmid,))
-                row = cursor.fetchone()
-                
-                if not row:
-                    continue
-                
-                article = self.database._row_to_dict(row)
-                
-                # Assess with PROBAST if not already assessed
-                if not article.get('probast_risk'):
-                    assessment = self.probast.assess_article(article)
-                    
-                    # Update database with assessment
-                    cursor.execute('''
-                    UPDATE papers 
-                    SET probast_risk = ?,
-                        probast_domain_1 = ?,
-                        probast_domain_2 = ?,
-                        probast_domain_3 = ?,
-                        probast_domain_4 = ?,
-                        assessment_date = datetime('now'),
-                        assessment_method = 'automated'
-                    WHERE pmid = ?
-                    ''', (
-                        assessment.get('overall_risk'),
-                        assessment.get('domain_1_participants'),
-                        assessment.get('domain_2_predictors'),
-                        assessment.get('domain_3_outcome'),
-                        assessment.get('domain_4_analysis'),
-                        pmid
-                    ))
-                    
-                    # Mark as usable if appropriate (using lenient criteria)
-                    if self._is_usable_with_justification(assessment):
-                        cursor.execute('''
-                        UPDATE papers 
-                        SET used_in_model = 1,
-                            notes = 'Usable with justification: ' || 
-                                    CASE 
-                                        WHEN probast_risk = 'Low' THEN 'All domains Low Risk'
-                                        WHEN probast_risk = 'Moderate' THEN '3+ Low domains or 2 Low + 2 Moderate'
-                                        ELSE 'Reclassified as usable'
-                                    END
-                        WHERE pmid = ?
-                        ''', (pmid,))
-            except Exception as e:
-                print(f"Warning: Error processing PMID {pmid}: {e}")
-                continue
-        
-        conn.commit()
-        conn.close()
-    
-    def _is_usable_with_justification(self, assessment: Dict) -> bool:
-        """Check if article is usable with justification (same as fix_probast_system)"""
-        if not assessment:
-            return False
-        
-        domain_1 = (assessment.get("domain_1_participants", "") or "").lower()
-        domain_2 = (assessment.get("domain_2_predictors", "") or "").lower()
-        domain_3 = (assessment.get("domain_3_outcome", "") or "").lower()
-        domain_4 = (assessment.get("domain_4_analysis", "") or "").lower()
-        
-        domains = [domain_1, domain_2, domain_3, domain_4]
-        low_count = sum(1 for d in domains if d == "low")
-        moderate_count = sum(1 for d in domains if d == "moderate")
-        high_count = sum(1 for d in domains if d == "high")
-        
-        # All Low = Usable
-        if low_count == 4:
-            return True
-        
-        # 3 Low + 1 Moderate = Usable
-        if low_count == 3 and moderate_count == 1:
-            return True
-        
-        # 2 Low + 2 Moderate = Usable
-        if low_count == 2 and moderate_count == 2:
-            return True
-        
-        # No High Risk domains
-        if high_count == 0:
-            if low_count >= 1 and moderate_count >= 3:
-                return True
-        
-        return False
+        """Assess new articles with PROBAST and mark as usable if appropriate (see probast_batch.py)"""
+        stats = BatchAssessor(self.database.db_path).run(pmids, mark_existing=False)
+        if stats['failed']:
+            print(f"Warning: PROBAST assessment failed for {stats['failed']} articles")
     
     def generate_final_report(self) -> Dict:
         """Generate final comprehensive report with all totals"""
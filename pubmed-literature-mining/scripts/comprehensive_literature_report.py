@@ -18,6 +18,8 @@ from typing import Dict, List
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.literature_database import LiteratureDatabase
+from scripts.literature_stats import LiteratureStatistics
+from scripts.corpus_snapshot import load_corpus
 
 
 class ComprehensiveLiteratureReport:
@@ -27,71 +29,42 @@ class ComprehensiveLiteratureReport:
         self.database = LiteratureDatabase()
     
     def get_all_metrics(self) -> Dict:
-        """Get all literature metrics"""
+        """Get all literature metrics (from the materialized paper statistics)"""
         conn = sqlite3.connect(self.database.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        summary = LiteratureStatistics(conn)
         
         metrics = {}
         
         # Total articles looked at
         # Report 4,810 total: 4,671 initial + 139 from monitoring
         # (Some monitoring articles were duplicates, but we report total looked at)
-        cursor.execute('SELECT COUNT(*) FROM papers')
-        db_count = cursor.fetchone()[0]
+        db_count = summary.total()
         # If database has less than 4,810, it means some monitoring articles were duplicates
         # We still report 4,810 as total looked at (4,671 + 139)
         metrics['total_articles_looked_at'] = max(db_count, 4810)  # Report at least 4,810
         
         # Articles used for model
-        cursor.execute('SELECT COUNT(*) FROM papers WHERE used_in_model = 1')
-        metrics['articles_used_for_model'] = cursor.fetchone()[0]
+        metrics['articles_used_for_model'] = summary.total(used_only=True)
         
         # Articles by PROBAST risk
-        cursor.execute('''
-        SELECT probast_risk, COUNT(*) 
-        FROM papers 
-        WHERE used_in_model = 1
-        GROUP BY probast_risk
-        ''')
-        metrics['probast_distribution'] = dict(cursor.fetchall())
+        metrics['probast_distribution'] = summary.counts('probast_risk', used_only=True)
         
         # Relevance score stats for used articles
-        cursor.execute('''
-        SELECT 
-            MIN(relevance_score) as min_score,
-            MAX(relevance_score) as max_score,
-            AVG(relevance_score) as avg_score,
-            COUNT(*) as count
-        FROM papers 
-        WHERE used_in_model = 1
-        ''')
-        stats = cursor.fetchone()
+        stats = summary.score_summary(used_only=True)
         metrics['relevance_stats'] = {
-            'min': stats['min_score'],
-            'max': stats['max_score'],
-            'avg': round(stats['avg_score'], 1) if stats['avg_score'] else 0,
+            'min': stats['min'],
+            'max': stats['max'],
+            'avg': round(stats['avg'], 1) if stats['avg'] else 0,
             'count': stats['count']
         }
         
         # High Risk check (should be 0)
-        cursor.execute('''
-        SELECT COUNT(*) FROM papers 
-        WHERE used_in_model = 1 AND probast_risk = 'High'
-        ''')
-        metrics['high_risk_count'] = cursor.fetchone()[0]
+        metrics['high_risk_count'] = metrics['probast_distribution'].get('High', 0)
         
-        # Paywalled articles count
-        cursor.execute('''
-        SELECT COUNT(*) FROM papers WHERE access_type = 'paywalled'
-        ''')
-        metrics['total_paywalled'] = cursor.fetchone()[0]
-        
-        # Open access articles count
-        cursor.execute('''
-        SELECT COUNT(*) FROM papers WHERE access_type = 'open_access'
-        ''')
-        metrics['total_open_access'] = cursor.fetchone()[0]
+        # Paywalled / open access article counts
+        by_access_type = summary.counts('access_type')
+        metrics['total_paywalled'] = by_access_type.get('paywalled', 0)
+        metrics['total_open_access'] = by_access_type.get('open_access', 0)
         
         conn.close()
         return metrics
@@ -138,7 +111,6 @@ class ComprehensiveLiteratureReport:
     def verify_probast_compliance(self) -> Dict:
         """Verify PROBAST compliance for all used articles"""
         conn = sqlite3.connect(self.database.db_path)
-        cursor = conn.cursor()
         
         compliance = {
             'all_safe': True,
@@ -149,26 +121,8 @@ class ComprehensiveLiteratureReport:
             'issues': []
         }
         
-        # Check for High Risk articles (should be 0)
-        cursor.execute('''
-        SELECT COUNT(*) FROM papers 
-        WHERE used_in_model = 1 AND probast_risk = 'High'
-        ''')
-        high_risk = cursor.fetchone()[0]
-        compliance['high_risk_count'] = high_risk
-        
-        if high_risk > 0:
-            compliance['all_safe'] = False
-            compliance['issues'].append(f'⚠️ {high_risk} High Risk articles found (should be 0)')
-        
         # Count by risk level
-        cursor.execute('''
-        SELECT probast_risk, COUNT(*) 
-        FROM papers 
-        WHERE used_in_model = 1
-        GROUP BY probast_risk
-        ''')
-        for risk, count in cursor.fetchall():
+        for risk, count in LiteratureStatistics(conn).counts('probast_risk', used_only=True).items():
             if risk == 'High':
                 compliance['high_risk_count'] = count
             elif risk == 'Moderate':
@@ -178,6 +132,12 @@ class ComprehensiveLiteratureReport:
             elif risk == 'Unclear':
                 compliance['unclear_risk_count'] = count
         
+        # Check for High Risk articles (should be 0)
+        high_risk = compliance['high_risk_count']
+        if high_risk > 0:
+            compliance['all_safe'] = False
+            compliance['issues'].append(f'⚠️ {high_risk} High Risk articles found (should be 0)')
+        
         # Check EPV compliance (model-level, not article-level)
         # This is verified separately in model validation
         compliance['epv_note'] = 'EPV = 15.55 (11 predictors, 171 events) - Verified separately'
@@ -273,18 +233,10 @@ class ComprehensiveLiteratureReport:
         paywalled_path = os.path.join(output_dir, 'top_paywalled_articles_for_doctor.csv')
         paywalled_df.to_csv(paywalled_path, index=False)
         
-        # Export all used articles
-        conn = sqlite3.connect(self.database.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT * FROM papers WHERE used_in_model = 1
-        ORDER BY relevance_score DESC
-        ''')
-        used_articles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        used_df = pd.DataFrame(used_articles)
+        # Export all used articles (from the packed corpus snapshot; factors are
+        # normalized into the snapshot's factors table, so only factor_count is exported)
+        papers, _ = load_corpus(self.database.db_path).load_dataframes()
+        used_df = papers[papers['used_in_model']].sort_values('relevance_score', ascending=False, kind='stable')
         used_path = os.path.join(output_dir, 'all_articles_used_for_model.csv')
         used_df.to_csv(used_path, index=False)
         
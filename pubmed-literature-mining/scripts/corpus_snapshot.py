@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Packed Corpus Snapshot
+Stores the whole literature corpus as columnar Arrow files for bulk analytics.
+
+The snapshot directory holds:
+- papers.arrow: one row per article (scalar fields + factor_count)
+- factors.arrow: one row per predictive factor, keyed by pmid
+- manifest.json: source path, source modification time and row counts
+
+Files are written uncompressed so they can be memory-mapped straight into
+pandas instead of re-reading thousands of JSON files or SQLite rows.
+"""
+
+import os
+import ast
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Try to import Arrow (optional dependency)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not installed. Install with: pip install pyarrow")
+
+
+# Scalar article fields kept in papers.arrow (predictive_factors lives in factors.arrow)
+PAPER_STRING_COLUMNS = [
+    'pmid', 'title', 'abstract', 'journal', 'authors', 'doi', 'publication_date',
+    'access_type', 'pdf_path', 'pdf_url', 'probast_risk', 'probast_domain_1',
+    'probast_domain_2', 'probast_domain_3', 'probast_domain_4', 'probast_justification',
+    'assessment_date', 'assessment_method', 'value_category', 'priority_level',
+    'processing_status', 'date_added', 'last_updated', 'created_at', 'updated_at', 'notes'
+]
+# Nested dict fields stored as JSON text and decoded again by load_articles()
+PAPER_JSON_COLUMNS = ['relevance_score_breakdown']
+PAPER_INT_COLUMNS = ['relevance_score', 'factor_count']
+PAPER_BOOL_COLUMNS = ['used_in_model', 'asreview_screened', 'asreview_relevant']
+
+FACTOR_COLUMNS = ['pmid', 'position', 'factor', 'outcome', 'effect_size', 'significance', 'context']
+
+
+def _parse_structured(value, expected_type):
+    """Parse a list/dict field stored natively, as JSON text or as a Python repr string"""
+    if isinstance(value, expected_type):
+        return value
+    if not value or not isinstance(value, str):
+        return expected_type()
+    try:
+        parsed = json.loads(value)
+    except (json.JSONDecodeError, ValueError):
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return expected_type()
+    return parsed if isinstance(parsed, expected_type) else expected_type()
+
+
+def _to_int(value) -> Optional[int]:
+    """Coerce scores stored as int, float or numeric string"""
+    if value is None or value == '':
+        return None
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def _to_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+class CorpusSnapshot:
+    """Columnar snapshot of the literature corpus with memory-mapped loading"""
+
+    def __init__(self, snapshot_dir: str = 'data/snapshot'):
+        """
+        Initialize snapshot
+
+        Args:
+            snapshot_dir: Directory holding papers.arrow, factors.arrow and manifest.json
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow not installed. Install with: pip install pyarrow")
+
+        self.snapshot_dir = Path(snapshot_dir)
+        self.papers_file = self.snapshot_dir / 'papers.arrow'
+        self.factors_file = self.snapshot_dir / 'factors.arrow'
+        self.manifest_file = self.snapshot_dir / 'manifest.json'
+
+    @staticmethod
+    def _source_mtime(source_path: str) -> float:
+        """Modification time of a SQLite file, or of index.json for a FileStorage directory"""
+        path = Path(source_path)
+        if path.is_dir():
+            path = path / 'index.json'
+        return path.stat().st_mtime if path.exists() else 0.0
+
+    def get_manifest(self) -> Optional[Dict]:
+        """Read the snapshot manifest, or None if no snapshot exists"""
+        if not self.manifest_file.exists():
+            return None
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Error reading snapshot manifest: {e}")
+            return None
+
+    def is_stale(self, source_path: str) -> bool:
+        """True if the snapshot is missing or older than its source"""
+        manifest = self.get_manifest()
+        if not manifest or not self.papers_file.exists() or not self.factors_file.exists():
+            return True
+        if manifest.get('source') != str(source_path):
+            return True
+        return manifest.get('source_mtime', 0) < self._source_mtime(source_path)
+
+    def write(self, articles: Iterable[Dict], source: str = '', source_mtime: Optional[float] = None) -> Dict:
+        """
+        Write a snapshot from article dictionaries
+
+        Args:
+            articles: Iterable of article dicts (SQLite rows or FileStorage JSON)
+            source: Source path recorded in the manifest for staleness checks
+            source_mtime: Source modification time taken before reading (default: now)
+
+        Returns:
+            Manifest dictionary
+        """
+        papers = {column: [] for column in
+                  PAPER_STRING_COLUMNS + PAPER_JSON_COLUMNS + PAPER_INT_COLUMNS + PAPER_BOOL_COLUMNS}
+        factors = {column: [] for column in FACTOR_COLUMNS}
+
+        for article in articles:
+            pmid = _to_str(article.get('pmid'))
+            if not pmid:
+                continue
+
+            article_factors = [f for f in _parse_structured(article.get('predictive_factors'), list) if isinstance(f, dict)]
+            for position, factor in enumerate(article_factors):
+                factors['pmid'].append(pmid)
+                factors['position'].append(position)
+                for column in FACTOR_COLUMNS[2:]:
+                    factors[column].append(_to_str(factor.get(column)))
+
+            for column in PAPER_STRING_COLUMNS:
+                papers[column].append(_to_str(article.get(column)))
+            for column in PAPER_JSON_COLUMNS:
+                value = _parse_structured(article.get(column), dict)
+                papers[column].append(json.dumps(value) if value else None)
+            papers['relevance_score'].append(_to_int(article.get('relevance_score')))
+            papers['factor_count'].append(len(article_factors))
+            for column in PAPER_BOOL_COLUMNS:
+                papers[column].append(bool(article.get(column)))
+
+        schema_fields = (
+            [(c, pa.string()) for c in PAPER_STRING_COLUMNS + PAPER_JSON_COLUMNS] +
+            [(c, pa.int64()) for c in PAPER_INT_COLUMNS] +
+            [(c, pa.bool_()) for c in PAPER_BOOL_COLUMNS]
+        )
+        papers_table = pa.table(papers, schema=pa.schema(schema_fields))
+        factors_table = pa.table(factors, schema=pa.schema(
+            [('pmid', pa.string()), ('position', pa.int32())] +
+            [(c, pa.string()) for c in FACTOR_COLUMNS[2:]]
+        ))
+
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self._write_table(papers_table, self.papers_file)
+        self._write_table(factors_table, self.factors_file)
+
+        manifest = {
+            'source': str(source),
+            'source_mtime': source_mtime if source_mtime is not None else (self._source_mtime(source) if source else 0.0),
+            'created_at': datetime.now().isoformat(),
+            'paper_count': papers_table.num_rows,
+            'factor_count': factors_table.num_rows
+        }
+        tmp_manifest = self.manifest_file.with_suffix('.json.tmp')
+        with open(tmp_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, self.manifest_file)
+
+        logger.info(f"Wrote corpus snapshot: {manifest['paper_count']} papers, {manifest['factor_count']} factors")
+        return manifest
+
+    @staticmethod
+    def _write_table(table: 'pa.Table', path: Path):
+        """Write an uncompressed Arrow IPC file atomically"""
+        tmp_path = path.with_suffix('.arrow.tmp')
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def export_from_database(self, db_path: str = 'data/literature.db') -> Dict:
+        """Export the SQLite papers table in a single pass"""
+        source_mtime = self._source_mtime(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute('SELECT * FROM papers')
+            return self.write((dict(row) for row in cursor), source=db_path, source_mtime=source_mtime)
+        finally:
+            conn.close()
+
+    def export_from_file_storage(self, data_dir: str = 'data/articles') -> Dict:
+        """Export a FileStorage directory (per-PMID JSON files)"""
+        from scripts.file_storage import FileStorage
+        source_mtime = self._source_mtime(data_dir)
+        storage = FileStorage(data_dir=data_dir)
+        return self.write(storage.load_articles(list(storage.index.keys())), source=data_dir,
+                          source_mtime=source_mtime)
+
+    def refresh(self, source_path: str) -> bool:
+        """
+        Rebuild the snapshot if it is older than its source
+
+        Args:
+            source_path: SQLite database file or FileStorage directory
+
+        Returns:
+            True if the snapshot was rebuilt
+        """
+        if not self.is_stale(source_path):
+            return False
+        if Path(source_path).is_dir():
+            self.export_from_file_storage(source_path)
+        else:
+            self.export_from_database(source_path)
+        return True
+
+    def read_tables(self) -> Tuple['pa.Table', 'pa.Table']:
+        """Memory-map papers and factors as Arrow tables (zero-copy)"""
+        return self._read_table(self.papers_file), self._read_table(self.factors_file)
+
+    @staticmethod
+    def _read_table(path: Path) -> 'pa.Table':
+        source = pa.memory_map(str(path), 'r')
+        return pa.ipc.open_file(source).read_all()
+
+    def load_dataframes(self) -> Tuple['pd.DataFrame', 'pd.DataFrame']:
+        """Load papers and factors as pandas DataFrames from the memory-mapped files"""
+        papers, factors = self.read_tables()
+        return papers.to_pandas(), factors.to_pandas()
+
+    def load_articles(self, pmids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Load articles as dictionaries with predictive_factors re-attached
+
+        Args:
+            pmids: Optional PMIDs to load; results follow this order. None loads all.
+
+        Returns:
+            List of article dictionaries (same shape the storage clients return)
+        """
+        papers, factors = self.read_tables()
+        if pmids is not None:
+            pmid_array = pa.array([str(p) for p in pmids], type=pa.string())
+            papers = papers.filter(pc.is_in(papers['pmid'], value_set=pmid_array))
+            factors = factors.filter(pc.is_in(factors['pmid'], value_set=pmid_array))
+
+        factors_by_pmid = {}
+        for factor in factors.to_pylist():
+            pmid = factor.pop('pmid')
+            factor.pop('position')
+            factors_by_pmid.setdefault(pmid, []).append(factor)
+
+        articles = []
+        for row in papers.to_pylist():
+            # Drop empty fields so .get(key, default) behaves as it does on the JSON files
+            article = {key: value for key, value in row.items() if value is not None}
+            for column in PAPER_JSON_COLUMNS:
+                if column in article:
+                    article[column] = json.loads(article[column])
+            article['predictive_factors'] = factors_by_pmid.get(article['pmid'], [])
+            articles.append(article)
+
+        if pmids is not None:
+            order = {str(pmid): i for i, pmid in enumerate(pmids)}
+            articles.sort(key=lambda a: order[a['pmid']])
+        return articles
+
+
+def load_corpus(source_path: str = 'data/literature.db', snapshot_dir: Optional[str] = None,
+                refresh: bool = True) -> CorpusSnapshot:
+    """
+    Get a snapshot for a corpus source, rebuilding it first if it is stale
+
+    Args:
+        source_path: SQLite database file or FileStorage directory
+        snapshot_dir: Snapshot directory (default: data/snapshot/<source name>)
+        refresh: Rebuild the snapshot when the source has changed
+
+    Returns:
+        CorpusSnapshot ready for load_dataframes() / load_articles()
+    """
+    if snapshot_dir is None:
+        source = Path(source_path)
+        snapshot_dir = str(source.parent / 'snapshot' / source.stem)
+    snapshot = CorpusSnapshot(snapshot_dir)
+    if refresh:
+        snapshot.refresh(source_path)
+    return snapshot
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export a packed corpus snapshot')
+    parser.add_argument('--source', default='data/literature.db',
+                       help='SQLite database file or FileStorage directory (default: data/literature.db)')
+    parser.add_argument('--snapshot-dir', default=None,
+                       help='Output directory (default: data/snapshot/<source name>)')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    snapshot = load_corpus(args.source, snapshot_dir=args.snapshot_dir, refresh=False)
+    if Path(args.source).is_dir():
+        manifest = snapshot.export_from_file_storage(args.source)
+    else:
+        manifest = snapshot.export_from_database(args.source)
+    print(json.dumps(manifest, indent=2))
@@ -8,15 +8,20 @@ import os
 import json
 import logging
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
+from scripts.text_analysis import SCORING_TERMS, AnalyzedText, analyze_article, article_matcher
+
 logger = logging.getLogger(__name__)
 
 
 class EnhancedRelevanceScorer:
     """Enhanced relevance scoring with multi-dimensional assessment"""
     
+    # Term lists scored in addition to keywords.json ("scoring.<name>" categories)
+    SCORING_TERMS = SCORING_TERMS
+    
     def __init__(self):
         # Load keywords configuration
         try:
@@ -38,8 +43,11 @@ class EnhancedRelevanceScorer:
             self.study_designs = {}
             self.top_tier_journals = []
             self.mid_tier_journals = []
+        
+        # Shared with RelevanceScorer: one scan of each field serves both scorers
+        self.matcher = article_matcher(self.config)
     
-    def calculate_clinical_relevance_score(self, article: Dict) -> int:
+    def calculate_clinical_relevance_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Calculate clinical relevance score (0-40 points)
         
@@ -48,79 +56,54 @@ class EnhancedRelevanceScorer:
         Low (10-19): OA-related but not progression-focused
         Very Low (0-9): Minimally relevant
         """
-        text = f"{article.get('title', '')} {article.get('abstract', '')}".lower()
+        if analysis is None:
+            analysis = analyze_article(article)
+        hits = analysis.hits(self.matcher, 'title_abstract')
         score = 0
         
         # Direct prediction terms (high value)
-        direct_prediction_terms = [
-            'predict tkr', 'predict total knee', 'predict arthroplasty',
-            'prognostic model', 'prediction model', 'risk prediction',
-            'predict progression', 'predict surgery', 'predict replacement'
-        ]
-        for term in direct_prediction_terms:
-            if term in text:
-                score += 5
+        score += hits.count_present('scoring.direct_prediction') * 5
         
         # Progression/outcome terms (medium value)
-        progression_terms = [
-            'progression', 'total knee replacement', 'tkr', 'tka',
-            'arthroplasty', 'joint replacement', 'surgical intervention'
-        ]
-        progression_count = sum(1 for term in progression_terms if term in text)
+        progression_count = hits.count_present('scoring.progression')
         score += min(progression_count * 2, 15)
         
         # Prediction/prognosis terms (medium value)
-        prediction_terms = [
-            'predictor', 'risk factor', 'prognostic', 'prognosis',
-            'forecast', 'outcome prediction'
-        ]
-        prediction_count = sum(1 for term in prediction_terms if term in text)
+        prediction_count = hits.count_present('scoring.prediction')
         score += min(prediction_count * 2, 10)
         
         # OA-related but not progression (low value)
-        if 'osteoarthritis' in text or 'knee oa' in text:
+        if hits.any('scoring.osteoarthritis'):
             score += 5
         
         return min(score, 40)
     
-    def calculate_study_quality_score(self, article: Dict) -> int:
+    def calculate_study_quality_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Calculate study quality score (0-30 points)
         - Study Design (15 pts)
         - Sample Size (10 pts)
         - Follow-up Duration (5 pts)
         """
+        if analysis is None:
+            analysis = analyze_article(article)
+        hits = analysis.hits(self.matcher, 'title_abstract')
         score = 0
-        text = f"{article.get('title', '')} {article.get('abstract', '')}".lower()
         
         # Study Design (15 points max)
-        if any(term in text for term in self.study_designs.get('systematic_review', [])):
+        if hits.any('study_designs.systematic_review'):
             score += 15
-        elif any(term in text for term in self.study_designs.get('cohort_study', [])):
+        elif hits.any('study_designs.cohort_study'):
             score += 12
-        elif any(term in text for term in self.study_designs.get('rct', [])):
+        elif hits.any('study_designs.rct'):
             score += 10
-        elif any(term in text for term in self.study_designs.get('case_control', [])):
+        elif hits.any('study_designs.case_control'):
             score += 8
-        elif any(term in text for term in self.study_designs.get('cross_sectional', [])):
+        elif hits.any('study_designs.cross_sectional'):
             score += 5
         
         # Sample Size (10 points max)
-        patterns = [
-            r'\b(\d{1,3}(?:,\d{3})*)\s*(?:patients?|subjects?|participants?|individuals?|cases?)',
-            r'n\s*=\s*(\d{1,3}(?:,\d{3})*)',
-            r'sample\s+size\s+(?:of\s+)?(\d{1,3}(?:,\d{3})*)',
-        ]
-        
-        max_size = 0
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                try:
-                    size = int(match.replace(',', ''))
-                    max_size = max(max_size, size)
-                except ValueError:
-                    continue
+        max_size = analysis.max_sample_size('title_abstract', ('count', 'n_equals', 'sample_size_of'))
         
         if max_size >= 1000:
             score += 10
@@ -132,20 +115,7 @@ class EnhancedRelevanceScorer:
             score += 2
         
         # Follow-up Duration (5 points max)
-        followup_patterns = [
-            r'(?:follow[-\s]?up|followed|over)\s+([0-9.]+)\s*(?:years?|yrs?)',
-            r'([0-9.]+)\s*(?:year|yr)\s*(?:follow[-\s]?up|follow)',
-        ]
-        
-        max_followup = 0
-        for pattern in followup_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                try:
-                    years = float(match)
-                    max_followup = max(max_followup, years)
-                except ValueError:
-                    continue
+        max_followup = max(analysis.followup_years('title_abstract'), default=0)
         
         if max_followup >= 5:
             score += 5
@@ -156,20 +126,22 @@ class EnhancedRelevanceScorer:
         
         return min(score, 30)
     
-    def calculate_novelty_impact_score(self, article: Dict) -> int:
+    def calculate_novelty_impact_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Calculate novelty/impact score (0-20 points)
         - Journal Impact (10 pts)
         - Recency (5 pts)
         - Novel Findings (5 pts)
         """
+        if analysis is None:
+            analysis = analyze_article(article)
         score = 0
         
         # Journal Impact (10 points max)
-        journal = article.get('journal', '').lower()
-        if any(top_journal in journal for top_journal in self.top_tier_journals):
+        journal_hits = analysis.hits(self.matcher, 'journal')
+        if journal_hits.any('top_tier_journals'):
             score += 10
-        elif any(mid_journal in journal for mid_journal in self.mid_tier_journals):
+        elif journal_hits.any('mid_tier_journals'):
             score += 7
         else:
             score += 3  # Default: peer-reviewed
@@ -199,49 +171,37 @@ class EnhancedRelevanceScorer:
                 pass
         
         # Novel Findings (5 points max)
-        text = f"{article.get('title', '')} {article.get('abstract', '')}".lower()
-        novel_indicators = [
-            'novel', 'new', 'first', 'previously unreported',
-            'innovative', 'breakthrough', 'significant finding'
-        ]
-        if any(indicator in text for indicator in novel_indicators):
+        hits = analysis.hits(self.matcher, 'title_abstract')
+        if hits.any('scoring.novel_indicators'):
             score += 3
         
         # Significant results
-        if re.search(r'p\s*[<>=]\s*0\.0[0-5]', text) or 'highly significant' in text:
+        if analysis.has_significant_p('title_abstract') or hits.any('scoring.highly_significant'):
             score += 2
         
         return min(score, 20)
     
-    def calculate_actionability_score(self, article: Dict) -> int:
+    def calculate_actionability_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Calculate actionability score (0-10 points)
         - Modifiable Factors (5 pts)
         - Clinical Applicability (5 pts)
         """
+        if analysis is None:
+            analysis = analyze_article(article)
+        hits = analysis.hits(self.matcher, 'title_abstract')
         score = 0
-        text = f"{article.get('title', '')} {article.get('abstract', '')}".lower()
         
         # Modifiable Factors (5 points max)
-        modifiable_terms = [
-            'bmi', 'body mass index', 'weight', 'exercise', 'physical activity',
-            'strength', 'muscle', 'gait', 'walking', 'lifestyle', 'intervention',
-            'treatment', 'therapy', 'rehabilitation'
-        ]
-        modifiable_count = sum(1 for term in modifiable_terms if term in text)
+        modifiable_count = hits.count_present('scoring.modifiable')
         score += min(modifiable_count * 1, 5)
         
         # Clinical Applicability (5 points max)
-        clinical_terms = [
-            'clinical', 'practice', 'guideline', 'recommendation',
-            'screening', 'assessment', 'diagnosis', 'management'
-        ]
-        if any(term in text for term in clinical_terms):
+        if hits.any('scoring.clinical'):
             score += 3
         
         # Actionable language
-        actionable_terms = ['should', 'recommend', 'consider', 'suggest', 'indicate']
-        if any(term in text for term in actionable_terms):
+        if hits.any('scoring.actionable'):
             score += 2
         
         return min(score, 10)
@@ -253,10 +213,11 @@ class EnhancedRelevanceScorer:
         Returns:
             Tuple of (total_score, breakdown_dict)
         """
-        clinical = self.calculate_clinical_relevance_score(article)
-        quality = self.calculate_study_quality_score(article)
-        novelty = self.calculate_novelty_impact_score(article)
-        actionability = self.calculate_actionability_score(article)
+        analysis = analyze_article(article)
+        clinical = self.calculate_clinical_relevance_score(article, analysis=analysis)
+        quality = self.calculate_study_quality_score(article, analysis=analysis)
+        novelty = self.calculate_novelty_impact_score(article, analysis=analysis)
+        actionability = self.calculate_actionability_score(article, analysis=analysis)
         
         total_score = clinical + quality + novelty + actionability
         
@@ -270,6 +231,18 @@ class EnhancedRelevanceScorer:
         
         return total_score, breakdown
     
+    def score_many(self, articles: List[Dict]) -> List[Tuple[int, Dict]]:
+        """
+        Calculate relevance scores for a batch of articles
+        
+        Args:
+            articles: List of article dictionaries
+            
+        Returns:
+            List of (total_score, breakdown_dict) tuples, in input order
+        """
+        return [self.calculate_relevance_score(article) for article in articles]
+    
     def get_value_category(self, score: int) -> str:
         """Get value category based on score"""
         if score >= 80:
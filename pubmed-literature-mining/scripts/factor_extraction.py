@@ -2,17 +2,65 @@
 """
 Predictive Factor Extraction
 Uses NLP and regex to extract predictive factors from article text.
+
+Text is segmented into sentences (bounded in length) before the statistical
+patterns run, and phrase captures are bounded in word count, so the cost of a
+full-text PDF grows linearly with its length instead of backtracking over the
+whole document. Sentence spans, keyword hits and results are cached on the
+text's shared analysis (see text_analysis.py).
 """
 
 import os
 import json
+import time
 import logging
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
 from collections import defaultdict
 
+from scripts.keyword_matcher import KeywordMatcher
+from scripts.text_analysis import P_VALUE_PATTERN as P_VALUE
+from scripts.text_analysis import analyze_text
+
 logger = logging.getLogger(__name__)
 
+# Factor/outcome phrases are at most this many words (bounds backtracking)
+MAX_PHRASE_WORDS = 30
+
+# Default wall-clock budget per document, in seconds
+DEFAULT_TIME_BUDGET = 10.0
+
+# Longest outcome phrase, in characters
+MAX_OUTCOME_CHARS = 300
+
+# A factor phrase starts at a word start: a match starting mid-word is never
+# preferred by the unanchored pattern, so anchoring only skips dead attempts
+_PHRASE = r'(?<!\w)(\w+(?:\s+\w+){0,%d})' % (MAX_PHRASE_WORDS - 1)
+_OUTCOME_NO_PARENS = r'([^()]{1,%d}?)' % MAX_OUTCOME_CHARS
+_OUTCOME_NO_PUNCT = r'([^,;.]{1,%d}?)' % MAX_OUTCOME_CHARS
+
+# Pattern 1: "X was a predictor of Y (OR: Z, 95% CI: ...)"
+OR_PATTERN = re.compile(
+    _PHRASE + r'\s+(?:was|were)\s+(?:a|an|independent|significant)?\s*(?:predictor|risk\s+factor|associated)\s+(?:of|with)\s+' + _OUTCOME_NO_PARENS + r'\s*\([^)]*(?:OR|odds\s+ratio|hazard\s+ratio|HR)[^)]*:?\s*([\d.]+)[^)]*\)',
+    re.IGNORECASE
+)
+# Pattern 2: "X associated with Y (p<0.05)"
+P_VALUE_PATTERN = re.compile(
+    _PHRASE + r'\s+(?:was|were)\s+(?:significantly|independently)?\s*(?:associated|correlated|related)\s+with\s+' + _OUTCOME_NO_PUNCT + r'\s*[,\s]+(?:p\s*[<>=]\s*[\d.]+|p\s*=\s*[\d.]+)',
+    re.IGNORECASE
+)
+# Pattern 3: "X predicted Y (AUC: Z)"
+AUC_PATTERN = re.compile(
+    _PHRASE + r'\s+(?:predicted|prediction\s+of)\s+' + _OUTCOME_NO_PUNCT + r'\s*[,\s]+(?:AUC|area\s+under\s+curve|C-index)[\s:]+([\d.]+)',
+    re.IGNORECASE
+)
+
+# Cheap necessary conditions checked before running the patterns on a sentence
+_WAS_WERE = re.compile(r'\s(?:was|were)\s', re.IGNORECASE)
+_EFFECT_TERMS = re.compile(r'OR|odds\s+ratio|hazard\s+ratio|HR', re.IGNORECASE)
+_PREDICTED = re.compile(r'\s(?:predicted|prediction\s+of)\s', re.IGNORECASE)
+_AUC_TERMS = re.compile(r'AUC|area\s+under\s+curve|C-index', re.IGNORECASE)
+
 
 class FactorExtractor:
     """Extracts predictive factors from article text"""
@@ -43,8 +91,11 @@ class FactorExtractor:
             self.config = {}
             self.factor_categories = {}
             self.factor_keywords = []
+        
+        # Compile factor keywords once for mention detection
+        self.matcher = KeywordMatcher(self.factor_categories)
     
-    def extract_statistical_associations(self, text: str) -> List[Dict]:
+    def extract_statistical_associations(self, text: str, time_budget: Optional[float] = None) -> List[Dict]:
         """
         Extract statistical associations using regex patterns
         
@@ -53,84 +104,88 @@ class FactorExtractor:
         - "X associated with Y (p<0.05)"
         - "X predicted Y (AUC: Z)"
         - "X was independently associated with Y (HR: Z)"
+        
+        Patterns run sentence by sentence over the text's shared analysis. If
+        time_budget (seconds) runs out, the factors found so far are returned;
+        complete results are cached with the analysis.
         """
-        factors = []
+        analysis = analyze_text(text)
+        cached = analysis.cached(('associations', self))
+        if cached is not None:
+            return [dict(factor) for factor in cached]
         
-        # Pattern 1: OR with CI
-        pattern1 = r'(\w+(?:\s+\w+)*)\s+(?:was|were)\s+(?:a|an|independent|significant)?\s*(?:predictor|risk\s+factor|associated)\s+(?:of|with)\s+([^()]+?)\s*\([^)]*(?:OR|odds\s+ratio|hazard\s+ratio|HR)[^)]*:?\s*([\d.]+)[^)]*\)'
-        matches = re.finditer(pattern1, text, re.IGNORECASE)
-        for match in matches:
-            factor = match.group(1).strip()
-            outcome = match.group(2).strip()
-            effect = match.group(3).strip()
-            
-            # Extract full context
-            start = max(0, match.start() - 100)
-            end = min(len(text), match.end() + 100)
-            context = text[start:end].strip()
-            
-            factors.append({
-                'factor': factor,
-                'outcome': outcome,
-                'effect_size': f"OR/HR: {effect}",
-                'significance': 'p-value in context',
-                'context': context
-            })
-        
-        # Pattern 2: p-value associations
-        pattern2 = r'(\w+(?:\s+\w+)*)\s+(?:was|were)\s+(?:significantly|independently)?\s*(?:associated|correlated|related)\s+with\s+([^,;.]+?)\s*[,\s]+(?:p\s*[<>=]\s*[\d.]+|p\s*=\s*[\d.]+)'
-        matches = re.finditer(pattern2, text, re.IGNORECASE)
-        for match in matches:
-            factor = match.group(1).strip()
-            outcome = match.group(2).strip()
-            
-            # Extract p-value
-            p_match = re.search(r'p\s*[<>=]\s*([\d.]+)', match.group(0), re.IGNORECASE)
-            p_value = p_match.group(1) if p_match else 'not specified'
+        or_factors = []
+        p_value_factors = []
+        auc_factors = []
+        deadline = time.monotonic() + time_budget if time_budget else None
+        complete = True
+        
+        for sent_start, sent_end in analysis.sentence_spans('text'):
+            if deadline is not None and time.monotonic() > deadline:
+                logger.warning(f"Factor extraction time budget ({time_budget}s) exceeded "
+                               f"after {sent_start}/{len(text)} characters")
+                complete = False
+                break
             
-            start = max(0, match.start() - 100)
-            end = min(len(text), match.end() + 100)
-            context = text[start:end].strip()
+            sentence = text[sent_start:sent_end]
             
-            factors.append({
-                'factor': factor,
-                'outcome': outcome,
-                'effect_size': 'not specified',
-                'significance': f"p<{p_value}",
-                'context': context
-            })
-        
-        # Pattern 3: AUC/ROC predictions
-        pattern3 = r'(\w+(?:\s+\w+)*)\s+(?:predicted|prediction\s+of)\s+([^,;.]+?)\s*[,\s]+(?:AUC|area\s+under\s+curve|C-index)[\s:]+([\d.]+)'
-        matches = re.finditer(pattern3, text, re.IGNORECASE)
-        for match in matches:
-            factor = match.group(1).strip()
-            outcome = match.group(2).strip()
-            auc = match.group(3).strip()
+            has_was_were = _WAS_WERE.search(sentence)
             
-            start = max(0, match.start() - 100)
-            end = min(len(text), match.end() +100)
-            context = text[start:end].strip()
+            # Pattern 1: OR with CI
+            if has_was_were and '(' in sentence and _EFFECT_TERMS.search(sentence):
+                for match in OR_PATTERN.finditer(sentence):
+                    or_factors.append({
+                        'factor': match.group(1).strip(),
+                        'outcome': match.group(2).strip(),
+                        'effect_size': f"OR/HR: {match.group(3).strip()}",
+                        'significance': 'p-value in context',
+                        'context': self._context(text, sent_start, match)
+                    })
+                
+            # Pattern 2: p-value associations
+            if has_was_were and P_VALUE.search(sentence):
+                for match in P_VALUE_PATTERN.finditer(sentence):
+                    p_match = P_VALUE.search(match.group(0))
+                    p_value = p_match.group(1) if p_match else 'not specified'
+                    p_value_factors.append({
+                        'factor': match.group(1).strip(),
+                        'outcome': match.group(2).strip(),
+                        'effect_size': 'not specified',
+                        'significance': f"p<{p_value}",
+                        'context': self._context(text, sent_start, match)
+                    })
             
-            factors.append({
-                'factor': factor,
-                'outcome': outcome,
-                'effect_size': f"AUC: {auc}",
-                'significance': 'not specified',
-                'context': context
-            })
+            # Pattern 3: AUC/ROC predictions
+            if _PREDICTED.search(sentence) and _AUC_TERMS.search(sentence):
+                for match in AUC_PATTERN.finditer(sentence):
+                    auc_factors.append({
+                        'factor': match.group(1).strip(),
+                        'outcome': match.group(2).strip(),
+                        'effect_size': f"AUC: {match.group(3).strip()}",
+                        'significance': 'not specified',
+                        'context': self._context(text, sent_start, match)
+                    })
         
+        factors = or_factors + p_value_factors + auc_factors
+        if complete:
+            analysis.store(('associations', self), [dict(factor) for factor in factors])
         return factors
     
+    @staticmethod
+    def _context(text: str, offset: int, match: re.Match) -> str:
+        """Match plus 100 characters either side, taken from the full document"""
+        start = max(0, offset + match.start() - 100)
+        end = min(len(text), offset + match.end() + 100)
+        return text[start:end].strip()
+    
     def extract_factor_mentions(self, text: str) -> List[str]:
         """Extract mentions of known predictive factors"""
-        text_lower = text.lower()
+        hits = analyze_text(text).hits(self.matcher, 'text')
         found_factors = []
         
         for category, keywords in self.factor_categories.items():
             for keyword in keywords:
-                pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-                if re.search(pattern, text_lower):
+                if hits.has_word(keyword):
                     # Capitalize first letter
                     factor_name = keyword.title() if keyword.islower() else keyword
                     if factor_name not in found_factors:
@@ -138,12 +193,36 @@ class FactorExtractor:
         
         return found_factors
     
-    def extract_predictive_factors(self, text: str) -> List[Dict]:
+    @staticmethod
+    def _mention_context(text_lower: str, term: str) -> Optional[str]:
+        """
+        Context around the first mention of term
+        
+        Same span as the first match of r'.{0,200}' + term + r'.{0,200}'
+        (no newlines), computed with string searches instead of a regex scan.
+        """
+        first = text_lower.find(term)
+        if first == -1:
+            return None
+        start = max(first - 200, text_lower.rfind('\n', 0, first) + 1)
+        line_end = text_lower.find('\n', start)
+        if line_end == -1:
+            line_end = len(text_lower)
+        # Greedy leading window: last occurrence starting within 200 chars on the same line
+        last = text_lower.rfind(term, start, min(start + 200, line_end) + len(term))
+        end = last + len(term)
+        tail_end = text_lower.find('\n', end)
+        if tail_end == -1:
+            tail_end = len(text_lower)
+        return text_lower[start:min(end + 200, tail_end)].strip()
+    
+    def extract_predictive_factors(self, text: str, time_budget: Optional[float] = DEFAULT_TIME_BUDGET) -> List[Dict]:
         """
         Extract all predictive factors from text
         
         Args:
             text: Article abstract or full text
+            time_budget: Seconds allowed for statistical pattern extraction (None = unlimited)
             
         Returns:
             List of factor dictionaries
@@ -154,7 +233,7 @@ class FactorExtractor:
         factors = []
         
         # Extract statistical associations
-        statistical_factors = self.extract_statistical_associations(text)
+        statistical_factors = self.extract_statistical_associations(text, time_budget=time_budget)
         factors.extend(statistical_factors)
         
         # Extract factor mentions (for articles without clear statistical reporting)
@@ -163,12 +242,11 @@ class FactorExtractor:
         # If we found statistical associations, use those
         # Otherwise, create simple entries for mentioned factors
         if not statistical_factors and mentioned_factors:
+            text_lower = analyze_text(text).lower('text')
             # Look for context around each mentioned factor
             for factor in mentioned_factors[:10]:  # Limit to top 10
-                pattern = r'.{0,200}' + re.escape(factor.lower()) + r'.{0,200}'
-                matches = re.finditer(pattern, text.lower())
-                for match in list(matches)[:1]:  # Take first match
-                    context = match.group(0).strip()
+                context = self._mention_context(text_lower, factor.lower())
+                if context is not None:
                     factors.append({
                         'factor': factor,
                         'outcome': 'knee osteoarthritis progression',
@@ -176,7 +254,6 @@ class FactorExtractor:
                         'significance': 'mentioned in text',
                         'context': context
                     })
-                    break
         
         # Remove duplicates (same factor + outcome combination)
         seen = set()
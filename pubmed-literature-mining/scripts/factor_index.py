@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Predictive Factor Index
+Inverted index from normalized factor name to the articles that mention it,
+kept up to date by FileStorage.insert_article. Articles marked as near-duplicates
+of another record (see near_duplicates.py) are left out.
+
+Each posting records the kind of evidence the article gives for the factor:
+'statistical' when any mention carries an effect size or significance
+(p value, OR, HR, AUC), otherwise 'mention'. Article counts per factor are
+maintained alongside the postings, so "factors seen in 5+ articles with
+statistical evidence" walks the factor dictionary instead of every article,
+and whether a factor is already a model parameter is decided once per factor
+rather than once per mention.
+
+The index is stored next to index.json as factor_index.json.
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATISTICAL = 'statistical'
+MENTION = 'mention'
+
+# Current model parameters (normalized for comparison)
+CURRENT_MODEL_PARAMETERS = {
+    'age', 'sex', 'gender', 'bmi', 'body mass index', 'race', 'ethnicity',
+    'cohort', 'womac', 'kellgren-lawrence', 'kl grade', 'kl score',
+    'family history', 'walking distance', '400m walk', 'walk time',
+    'knee replacement', 'tkr', 'tka', 'arthroplasty'
+}
+
+
+def normalize_factor(name) -> str:
+    """Canonical factor name: lowercase, single-spaced, without surrounding punctuation"""
+    if not isinstance(name, str):
+        return ''
+    return ' '.join(name.lower().split()).strip(' .,;:')
+
+
+def is_current_parameter(factor: str) -> bool:
+    """Whether a normalized factor name matches a current model parameter (either contains the other)"""
+    return any(param in factor or factor in param for param in CURRENT_MODEL_PARAMETERS)
+
+
+def has_statistical_evidence(factor_data: Dict) -> bool:
+    """Whether a factor mention reports a p value, odds/hazard ratio or AUC"""
+    effect_size = str(factor_data.get('effect_size', '') or '').lower()
+    significance = str(factor_data.get('significance', '') or '').lower()
+    return (
+        'p' in significance or
+        'or' in effect_size or
+        'hr' in effect_size or
+        'auc' in effect_size or
+        'odds ratio' in effect_size
+    )
+
+
+def article_factors(article: Dict) -> List:
+    """predictive_factors that count as evidence (none for near-duplicates of another record)"""
+    if article.get('duplicate_of'):
+        return []
+    return article.get('predictive_factors', [])
+
+
+def article_postings(factors) -> Dict[str, str]:
+    """Normalized factor -> evidence type for one article's predictive_factors"""
+    postings = {}
+    if not isinstance(factors, list):
+        return postings
+    for factor_data in factors:
+        if not isinstance(factor_data, dict):
+            continue
+        factor = normalize_factor(factor_data.get('factor', ''))
+        if not factor:
+            continue
+        if has_statistical_evidence(factor_data):
+            postings[factor] = STATISTICAL
+        else:
+            postings.setdefault(factor, MENTION)
+    return postings
+
+
+class FactorIndex:
+    """Factor dictionary with factor -> {pmid: evidence type} postings"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Load the index
+
+        Args:
+            path: JSON file (None keeps the index in memory only)
+        """
+        self.path = Path(path) if path else None
+        self.postings: Dict[str, Dict[str, str]] = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.postings = json.load(f).get('factors', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Error loading factor index, starting empty: {e}")
+        self._build_derived()
+
+    @classmethod
+    def build(cls, articles: Iterable[Dict], path: Optional[str] = None) -> 'FactorIndex':
+        """Build a new index from article dictionaries (and save it if path is given)"""
+        index = cls()
+        index.path = Path(path) if path else None
+        for article in articles:
+            pmid = article.get('pmid')
+            if pmid:
+                index.update_article(str(pmid), article_factors(article))
+        index.save()
+        return index
+
+    def _build_derived(self):
+        """
+        Derived structures:
+        - _by_article: pmid -> set of factors (to replace an article's postings)
+        - _statistical_counts: factor -> number of articles with statistical evidence
+        - _current: factor -> is_current_parameter(factor), decided once per factor
+        """
+        self._by_article = {}
+        self._statistical_counts = {}
+        self._current = {}
+        for factor, articles in self.postings.items():
+            self._current[factor] = is_current_parameter(factor)
+            self._statistical_counts[factor] = sum(1 for e in articles.values() if e == STATISTICAL)
+            for pmid in articles:
+                self._by_article.setdefault(pmid, set()).add(factor)
+
+    def _remove_posting(self, factor: str, pmid: str):
+        articles = self.postings.get(factor)
+        if not articles or pmid not in articles:
+            return
+        if articles.pop(pmid) == STATISTICAL:
+            self._statistical_counts[factor] -= 1
+        if not articles:
+            del self.postings[factor]
+            del self._statistical_counts[factor]
+            del self._current[factor]
+
+    def update_article(self, pmid: str, factors) -> bool:
+        """
+        Replace an article's postings with those of its predictive_factors
+
+        Returns:
+            True if the index changed
+        """
+        new = article_postings(factors)
+        old = {factor: self.postings[factor][pmid] for factor in self._by_article.get(pmid, ())}
+        if new == old:
+            return False
+
+        for factor in old:
+            self._remove_posting(factor, pmid)
+        for factor, evidence in new.items():
+            if factor not in self.postings:
+                self.postings[factor] = {}
+                self._statistical_counts[factor] = 0
+                self._current[factor] = is_current_parameter(factor)
+            self.postings[factor][pmid] = evidence
+            if evidence == STATISTICAL:
+                self._statistical_counts[factor] += 1
+        if new:
+            self._by_article[pmid] = set(new)
+        else:
+            self._by_article.pop(pmid, None)
+        return True
+
+    def factor_count(self) -> int:
+        """Number of distinct normalized factors"""
+        return len(self.postings)
+
+    def frequent_factors(self, min_articles: int, statistical_only: bool = False,
+                         new_parameters_only: bool = False) -> Dict[str, List[str]]:
+        """
+        Factors mentioned by at least min_articles articles
+
+        Args:
+            min_articles: Minimum number of articles
+            statistical_only: Count only articles with statistical evidence for the factor
+            new_parameters_only: Skip factors that match a current model parameter
+
+        Returns:
+            Dictionary mapping factor to the PMIDs counted
+        """
+        result = {}
+        for factor, articles in self.postings.items():
+            count = self._statistical_counts[factor] if statistical_only else len(articles)
+            if count < min_articles:
+                continue
+            if new_parameters_only and self._current[factor]:
+                continue
+            result[factor] = [pmid for pmid, evidence in articles.items()
+                              if not statistical_only or evidence == STATISTICAL]
+        return result
+
+    def save(self):
+        """Write the index atomically"""
+        if self.path is None:
+            return
+        try:
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump({'factors': self.postings}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving factor index: {e}")
@@ -7,11 +7,15 @@ Replaces Xata with free file-based storage using JSON files in the repository.
 
 import os
 import json
+import bisect
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
+from scripts.factor_index import FactorIndex, article_factors
+from scripts.search_index import FTS5_AVAILABLE, SearchIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +35,14 @@ class FileStorage:
         # Index file for fast lookups
         self.index_file = self.data_dir / 'index.json'
         self._load_index()
+        
+        # Factor -> article postings, loaded (or built from the article files) on first use
+        self.factor_index_file = self.data_dir / 'factor_index.json'
+        self._factor_index = None
+        
+        # Full-text search index, opened (and brought up to date with index.json) on first use
+        self.search_index_file = self.data_dir / 'search_index.db'
+        self._search_index = None
     
     def _load_index(self):
         """Load or create index file"""
@@ -43,12 +55,101 @@ class FileStorage:
                 self.index = {}
         else:
             self.index = {}
+        
+        # Older index files predate factor_count; backfill them once from the article files
+        # (saved atomically, so later opens read only index.json)
+        stale = [pmid for pmid, entry in self.index.items() if 'factor_count' not in entry]
+        if stale:
+            logger.info(f"Backfilling index fields for {len(stale)} articles")
+            for pmid in stale:
+                article = self.get_article_by_pmid(pmid)
+                if article:
+                    self.index[pmid] = self._index_entry(pmid, article)
+                else:
+                    self.index[pmid]['factor_count'] = 0
+            self._save_index()
+        
+        self._build_secondary_indexes()
+    
+    @staticmethod
+    def _coerce_score(value) -> float:
+        """Relevance scores may be stored as int, float or numeric string"""
+        try:
+            return float(value) if value else 0
+        except (ValueError, TypeError):
+            return 0
+    
+    def _index_entry(self, pmid: str, article_data: Dict) -> Dict:
+        """Build the index entry for an article"""
+        factors = article_data.get('predictive_factors', [])
+        return {
+            'pmid': pmid,
+            'title': (article_data.get('title') or '')[:100] if article_data.get('title') else '',  # Truncate for index
+            'relevance_score': article_data.get('relevance_score', 0) or 0,
+            'access_type': article_data.get('access_type', 'unknown') or 'unknown',
+            'journal': article_data.get('journal', '') or '',
+            'updated_at': article_data.get('updated_at', '') or '',
+            'factor_count': len(factors) if isinstance(factors, list) else 0,
+            'scoring_version': article_data.get('scoring_version')
+        }
+    
+    def _build_secondary_indexes(self):
+        """
+        Build in-memory secondary structures over the index
+        
+        - _by_score: (score, pmid) tuples sorted ascending, for threshold queries
+        - _by_updated: (updated_at, pmid) tuples sorted ascending, for recency queries
+        - _by_access: access_type -> set of PMIDs
+        - _factor_total: running sum of factor_count
+        - _by_scoring_version: scoring_version -> set of PMIDs
+        """
+        self._by_score = sorted(
+            (self._coerce_score(entry.get('relevance_score')), pmid)
+            for pmid, entry in self.index.items()
+        )
+        self._by_updated = sorted(
+            (entry.get('updated_at', '') or '', pmid)
+            for pmid, entry in self.index.items()
+        )
+        self._by_access = {}
+        for pmid, entry in self.index.items():
+            self._by_access.setdefault(entry.get('access_type', 'unknown'), set()).add(pmid)
+        self._factor_total = sum(entry.get('factor_count', 0) for entry in self.index.values())
+        self._by_scoring_version = {}
+        for pmid, entry in self.index.items():
+            self._by_scoring_version.setdefault(entry.get('scoring_version'), set()).add(pmid)
+    
+    @staticmethod
+    def _sorted_remove(items: List, item):
+        """Remove item from a sorted list if present"""
+        pos = bisect.bisect_left(items, item)
+        if pos < len(items) and items[pos] == item:
+            del items[pos]
+    
+    def _update_index_entry(self, pmid: str, entry: Dict):
+        """Replace an index entry and keep the secondary structures in step"""
+        old = self.index.get(pmid)
+        if old:
+            self._sorted_remove(self._by_score, (self._coerce_score(old.get('relevance_score')), pmid))
+            self._sorted_remove(self._by_updated, (old.get('updated_at', '') or '', pmid))
+            self._by_access.get(old.get('access_type', 'unknown'), set()).discard(pmid)
+            self._factor_total -= old.get('factor_count', 0)
+            self._by_scoring_version.get(old.get('scoring_version'), set()).discard(pmid)
+        
+        self.index[pmid] = entry
+        bisect.insort(self._by_score, (self._coerce_score(entry['relevance_score']), pmid))
+        bisect.insort(self._by_updated, (entry['updated_at'], pmid))
+        self._by_access.setdefault(entry['access_type'], set()).add(pmid)
+        self._factor_total += entry['factor_count']
+        self._by_scoring_version.setdefault(entry['scoring_version'], set()).add(pmid)
     
     def _save_index(self):
-        """Save index file"""
+        """Save index file (written to a temporary file and renamed, so readers never see a partial index)"""
+        tmp_file = self.index_file.with_name(self.index_file.name + '.tmp')
         try:
-            with open(self.index_file, 'w') as f:
+            with open(tmp_file, 'w') as f:
                 json.dump(self.index, f, indent=2)
+            os.replace(tmp_file, self.index_file)
         except Exception as e:
             logger.error(f"Error saving index: {e}")
     
@@ -74,19 +175,11 @@ class FileStorage:
             logger.error(f"Error reading article {pmid}: {e}")
             return None
     
-    def insert_article(self, article_data: Dict) -> bool:
-        """
-        Insert or update article
-        
-        Args:
-            article_data: Dictionary with article fields
-            
-        Returns:
-            True if successful
-        """
+    def _store_article(self, article_data: Dict) -> Optional[Dict]:
+        """Merge an article into its file and the in-memory index (caller saves the indexes)"""
         if 'pmid' not in article_data:
             logger.error("PMID is required")
-            return False
+            return None
         
         pmid = article_data['pmid']
         article_file = self._get_article_file(pmid)
@@ -107,28 +200,72 @@ class FileStorage:
             # Ensure article_data is a dict and has required fields
             if not isinstance(article_data, dict):
                 logger.error(f"article_data is not a dict for {pmid}")
-                return False
+                return None
             
             # Save article
             with open(article_file, 'w') as f:
                 json.dump(article_data, f, indent=2, ensure_ascii=False)
             
             # Update index - safely handle None values
-            self.index[pmid] = {
-                'pmid': pmid,
-                'title': (article_data.get('title') or '')[:100] if article_data.get('title') else '',  # Truncate for index
-                'relevance_score': article_data.get('relevance_score', 0) or 0,
-                'access_type': article_data.get('access_type', 'unknown') or 'unknown',
-                'journal': article_data.get('journal', '') or '',
-                'updated_at': article_data.get('updated_at', '') or ''
-            }
+            self._update_index_entry(pmid, self._index_entry(pmid, article_data))
+            return article_data
+        except Exception as e:
+            logger.error(f"Error saving article {pmid}: {e}", exc_info=True)
+            return None
+    
+    def insert_article(self, article_data: Dict) -> bool:
+        """
+        Insert or update article
+        
+        Args:
+            article_data: Dictionary with article fields
+            
+        Returns:
+            True if successful
+        """
+        article_data = self._store_article(article_data)
+        if article_data is None:
+            return False
+        
+        try:
             self._save_index()
             
+            if self.factor_index.update_article(article_data['pmid'], article_factors(article_data)):
+                self.factor_index.save()
+            
+            if self._search_index is not None:
+                self._search_index.add_article(article_data)
+            
             return True
         except Exception as e:
-            logger.error(f"Error saving article {pmid}: {e}", exc_info=True)
+            logger.error(f"Error saving article {article_data['pmid']}: {e}", exc_info=True)
             return False
     
+    def insert_articles(self, articles: List[Dict]) -> int:
+        """
+        Insert or update many articles, writing index.json and the factor index once
+        
+        Args:
+            articles: Article dictionaries (merged into existing articles like insert_article)
+            
+        Returns:
+            Number of articles saved
+        """
+        stored = [article for article in map(self._store_article, articles) if article is not None]
+        if not stored:
+            return 0
+        
+        self._save_index()
+        changed = False
+        for article_data in stored:
+            changed |= self.factor_index.update_article(article_data['pmid'], article_factors(article_data))
+        if changed:
+            self.factor_index.save()
+        
+        if self._search_index is not None:
+            self._search_index.add_articles(stored)
+        return len(stored)
+    
     def query_articles(self, filter_func=None, limit: int = 10000) -> List[Dict]:
         """
         Query articles with optional filter function
@@ -157,46 +294,172 @@ class FileStorage:
         
         return articles
     
+    def _pmids_with_score_at_least(self, threshold: float) -> List[str]:
+        """PMIDs with relevance score >= threshold, highest score first (index only)"""
+        start = bisect.bisect_left(self._by_score, (threshold, ''))
+        return [pmid for _, pmid in reversed(self._by_score[start:])]
+    
+    def load_articles(self, pmids: List[str]) -> Iterator[Dict]:
+        """Lazily load the article files for the given PMIDs, skipping unreadable ones"""
+        for pmid in pmids:
+            article = self.get_article_by_pmid(pmid)
+            if article:
+                yield article
+    
     def get_high_relevance_articles(self, threshold: int = 70) -> List[Dict]:
-        """Get articles with relevance score >= threshold"""
-        def filter_func(article):
-            return article.get('relevance_score', 0) >= threshold
-        return self.query_articles(filter_func=filter_func)
+        """Get articles with relevance score >= threshold, highest score first"""
+        return list(self.load_articles(self._pmids_with_score_at_least(threshold)))
     
     def get_paywalled_articles(self, threshold: int = 70) -> List[Dict]:
-        """Get paywalled articles with relevance >= threshold"""
-        def filter_func(article):
-            return (article.get('access_type') == 'paywalled' and 
-                   article.get('relevance_score', 0) >= threshold)
-        return self.query_articles(filter_func=filter_func, limit=10000)  # Increased limit to get all articles
+        """Get paywalled articles with relevance >= threshold, highest score first"""
+        paywalled = self._by_access.get('paywalled', set())
+        pmids = [pmid for pmid in self._pmids_with_score_at_least(threshold) if pmid in paywalled]
+        return list(self.load_articles(pmids))
+    
+    def get_articles_updated_since(self, since: str) -> List[Dict]:
+        """Get articles whose updated_at (ISO timestamp) is >= since, oldest first"""
+        start = bisect.bisect_left(self._by_updated, (since, ''))
+        return list(self.load_articles([pmid for _, pmid in self._by_updated[start:]]))
     
     def count_paywalled_articles(self) -> int:
-        """Count paywalled articles"""
-        def filter_func(article):
-            return article.get('access_type') == 'paywalled'
-        return len(self.query_articles(filter_func=filter_func, limit=10000))
+        """Count paywalled articles (answered from the index)"""
+        return len(self._by_access.get('paywalled', ()))
     
     def count_predictive_factors(self) -> int:
-        """Count total number of predictive factors extracted"""
-        total = 0
-        for pmid in self.index.keys():
-            article = self.get_article_by_pmid(pmid)
-            if article:
-                factors = article.get('predictive_factors', [])
-                if isinstance(factors, list):
-                    total += len(factors)
-        return total
+        """Count total number of predictive factors extracted (answered from the index)"""
+        return self._factor_total
+    
+    @property
+    def factor_index(self) -> FactorIndex:
+        """Factor -> article postings (built from the article files the first time)"""
+        if self._factor_index is None:
+            if self.factor_index_file.exists():
+                self._factor_index = FactorIndex(str(self.factor_index_file))
+            else:
+                logger.info(f"Building factor index for {len(self.index)} articles")
+                self._factor_index = FactorIndex.build(self.load_articles(list(self.index)),
+                                                       path=str(self.factor_index_file))
+        return self._factor_index
+    
+    def get_factor_articles(self, min_articles: int = 5, relevance_threshold: float = 0,
+                            statistical_only: bool = False,
+                            new_parameters_only: bool = False) -> Dict[str, List[str]]:
+        """
+        Factors mentioned in at least min_articles articles with relevance >= relevance_threshold
+        
+        Args:
+            min_articles: Minimum number of articles
+            relevance_threshold: Only count articles scoring at least this
+            statistical_only: Only count articles with statistical evidence for the factor
+            new_parameters_only: Skip factors that match a current model parameter
+            
+        Returns:
+            Dictionary mapping normalized factor to PMIDs, highest score first (index only)
+        """
+        result = {}
+        candidates = self.factor_index.frequent_factors(min_articles, statistical_only=statistical_only,
+                                                        new_parameters_only=new_parameters_only)
+        for factor, pmids in candidates.items():
+            scored = [(self._coerce_score(self.index[pmid].get('relevance_score')), pmid)
+                      for pmid in pmids if pmid in self.index]
+            scored = [item for item in scored if item[0] >= relevance_threshold]
+            if len(scored) >= min_articles:
+                result[factor] = [pmid for _, pmid in sorted(scored, reverse=True)]
+        return result
+    
+    def get_stale_scoring(self, version: str) -> Dict[str, Optional[str]]:
+        """PMID -> stored scoring_version for articles not scored with version (index only)"""
+        current = self._by_scoring_version.get(version, set())
+        return {pmid: entry.get('scoring_version') for pmid, entry in self.index.items() if pmid not in current}
+    
+    def restamp_scoring_version(self, pmids: List[str], version: str) -> int:
+        """
+        Mark articles' stored scores as computed with version, without rescoring them
+        
+        updated_at is left alone: the article content has not changed.
+        
+        Returns:
+            Number of articles restamped
+        """
+        count = 0
+        for article in self.load_articles(pmids):
+            pmid = article['pmid']
+            article['scoring_version'] = version
+            try:
+                with open(self._get_article_file(pmid), 'w') as f:
+                    json.dump(article, f, indent=2, ensure_ascii=False)
+            except Exception as e:
+                logger.error(f"Error restamping article {pmid}: {e}")
+                continue
+            self._update_index_entry(pmid, dict(self.index[pmid], scoring_version=version))
+            count += 1
+        if count:
+            self._save_index()
+        return count
+    
+    def get_scoring_texts(self, pmids: List[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        PMID -> ("<title> <abstract>", journal), the text the relevance scorers match keywords in
+        
+        Read from the search index when available instead of the article files.
+        """
+        if not FTS5_AVAILABLE:
+            return {article['pmid']: (f"{article.get('title') or ''} {article.get('abstract') or ''}",
+                                      article.get('journal') or '')
+                    for article in self.load_articles(pmids)}
+        texts = self.search_index.get_texts(pmids, ('title', 'abstract'))
+        return {pmid: (f"{text['title']} {text['abstract']}", self.index[pmid].get('journal', '') or '')
+                for pmid, text in texts.items() if pmid in self.index}
     
     def get_all_articles(self) -> List[Dict]:
         """Get all articles (for analysis)"""
         return self.query_articles(limit=10000)
     
-    def search_articles(self, search_term: str, limit: int = 100) -> List[Dict]:
-        """Search articles by title or abstract"""
-        search_lower = search_term.lower()
-        def filter_func(article):
-            title = article.get('title', '').lower()
-            abstract = article.get('abstract', '').lower()
-            return search_lower in title or search_lower in abstract
-        return self.query_articles(filter_func=filter_func, limit=limit)
-
+    @property
+    def search_index(self) -> SearchIndex:
+        """Full-text index, synced with index.json's updated_at stamps when first opened"""
+        if self._search_index is None:
+            search_index = SearchIndex(str(self.search_index_file))
+            search_index.sync({pmid: entry.get('updated_at', '') or '' for pmid, entry in self.index.items()},
+                              self.load_articles)
+            self._search_index = search_index
+        return self._search_index
+    
+    def search_articles(self, search_term: str, limit: int = 100, mode: str = 'all',
+                        offset: int = 0) -> List[Dict]:
+        """
+        Search articles by title, abstract, full text and factor contexts
+        
+        Args:
+            search_term: Words ("quoted phrases" and prefix* words allowed)
+            limit: Maximum number of results
+            mode: 'all', 'any', 'phrase' or 'prefix' (see search_index.match_expression)
+            offset: Results to skip
+            
+        Returns:
+            Articles ranked by BM25, each with search_score and search_snippet
+            (substring matches on title/abstract if SQLite lacks FTS5)
+        """
+        if not FTS5_AVAILABLE:
+            search_lower = search_term.lower()
+            def filter_func(article):
+                title = article.get('title', '').lower()
+                abstract = article.get('abstract', '').lower()
+                return search_lower in title or search_lower in abstract
+            return self.query_articles(filter_func=filter_func, limit=offset + limit)[offset:]
+        
+        hits = self.search_index.search(search_term, mode=mode, limit=limit, offset=offset)
+        articles = []
+        for hit in hits:
+            article = self.get_article_by_pmid(hit['pmid'])
+            if article:
+                article['search_score'] = hit['score']
+                article['search_snippet'] = hit['snippet']
+                articles.append(article)
+        return articles
+    
+    def count_search_results(self, search_term: str, mode: str = 'all') -> int:
+        """Number of articles matching a full-text search"""
+        if not FTS5_AVAILABLE:
+            return len(self.search_articles(search_term, limit=len(self.index)))
+        return self.search_index.count(search_term, mode=mode)
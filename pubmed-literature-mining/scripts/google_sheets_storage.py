@@ -3,12 +3,22 @@
 Google Sheets Storage System for Python
 Replaces file storage with Google Sheets for easy monitoring
 100% free, easy to view and filter data
+
+Writes are write-behind: the sheet is read once into a local mirror (with a
+PMID -> row map), inserts are merged into the mirror and queued, and queued
+changes are flushed as one batched range update plus one append on a timer,
+at a size threshold, on flush() and at interpreter exit. Reads are served
+from the mirror, so a scrape costs a handful of API calls instead of several
+per article.
 """
 
 import os
+import re
 import json
+import atexit
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 
@@ -24,15 +34,61 @@ except ImportError:
     logger.warning("Google Sheets libraries not installed. Install with: pip install gspread google-auth")
 
 
+HEADERS = [
+    'id', 'pmid', 'title', 'abstract', 'authors', 'journal',
+    'publication_date', 'doi', 'access_type', 'relevance_score',
+    'predictive_factors', 'pdf_url', 'processing_status',
+    'created_at', 'updated_at'
+]
+
+# Queued changes are flushed after this many seconds...
+DEFAULT_FLUSH_INTERVAL = 30.0
+# ...or once this many articles have pending changes
+DEFAULT_FLUSH_SIZE = 50
+
+
+def _column_letter(col: int) -> str:
+    """1-based column number to A1 column letters"""
+    letters = ''
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _numericise(value: Any) -> Any:
+    """Convert numeric cell text to int/float, as gspread's get_all_records does"""
+    if isinstance(value, str) and value:
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value
+    return value
+
+
+def _cell_text(value: Any) -> str:
+    """Value as the sheet returns it when read back"""
+    return '' if value is None else str(value)
+
+
 class GoogleSheetsStorage:
-    """Google Sheets storage using gspread"""
+    """Google Sheets storage using gspread, with a local mirror and write-behind queue"""
     
-    def __init__(self, sheet_name: str = "oa_articles"):
+    def __init__(self, sheet_name: str = "oa_articles",
+                 flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+                 flush_size: int = DEFAULT_FLUSH_SIZE,
+                 worksheet=None):
         """
         Initialize Google Sheets storage
         
         Args:
             sheet_name: Name of the sheet tab to use
+            flush_interval: Seconds before queued changes are flushed (None = only on size/flush())
+            flush_size: Number of articles with pending changes that triggers a flush
+            worksheet: Already opened worksheet (skips credential setup)
         """
         self.sheet_name = sheet_name
         self.client = None
@@ -40,6 +96,24 @@ class GoogleSheetsStorage:
         self.sheet = None
         self.initialized = False
         
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.headers = []
+        self.mirror_loaded = False
+        self._rows = {}             # pmid -> row values (local mirror, sheet order)
+        self._row_numbers = {}      # pmid -> sheet row number
+        self._pending_updates = {}  # pmid -> {column: value} for rows already in the sheet
+        self._pending_appends = {}  # pmid -> row values not yet appended
+        self._next_row = 2
+        self._lock = threading.RLock()        # mirror and pending changes
+        self._flush_lock = threading.RLock()  # one flush at a time (held across API calls)
+        self._timer = None
+        self._exit_hook = False
+        
+        if worksheet is not None:
+            self.sheet = worksheet
+            self.initialized = True
+        
     def _initialize(self):
         """Initialize Google Sheets connection"""
         if self.initialized:
@@ -128,13 +202,41 @@ class GoogleSheetsStorage:
     
     def _setup_headers(self):
         """Set up column headers"""
-        headers = [
-            'id', 'pmid', 'title', 'abstract', 'authors', 'journal',
-            'publication_date', 'doi', 'access_type', 'relevance_score',
-            'predictive_factors', 'pdf_url', 'processing_status',
-            'created_at', 'updated_at'
-        ]
-        self.sheet.append_row(headers)
+        self.sheet.append_row(HEADERS)
+    
+    def _ensure_mirror(self):
+        """Connect and load the local mirror on first use"""
+        self._initialize()
+        if not self.mirror_loaded:
+            with self._lock:
+                if not self.mirror_loaded:
+                    self._load_mirror()
+    
+    def _load_mirror(self):
+        """Read the whole sheet once (a single API call) into the local mirror"""
+        values = self._retry_with_backoff(self.sheet.get_all_values, max_retries=5, initial_delay=2.0) or []
+        self.headers = [str(h) for h in values[0]] if values else list(HEADERS)
+        pmid_col = self.headers.index('pmid') if 'pmid' in self.headers else 1
+        
+        self._rows = {}
+        self._row_numbers = {}
+        for row_number, row in enumerate(values[1:], start=2):
+            pmid = _cell_text(row[pmid_col]) if len(row) > pmid_col else ''
+            # First occurrence wins, like sheet.find()
+            if pmid and pmid not in self._row_numbers:
+                self._row_numbers[pmid] = row_number
+                self._rows[pmid] = [_cell_text(v) for v in row]
+        self._next_row = len(values) + 1
+        self.mirror_loaded = True
+        logger.info(f"Loaded {len(self._rows)} articles from Google Sheets into local mirror")
+    
+    def refresh(self):
+        """Flush queued changes and reload the mirror from the sheet"""
+        self._initialize()
+        with self._flush_lock:
+            self.flush()
+            with self._lock:
+                self._load_mirror()
     
     def _retry_with_backoff(self, func, max_retries: int = 3, initial_delay: float = 1.0):
         """Retry function with exponential backoff for quota errors"""
@@ -160,172 +262,288 @@ class GoogleSheetsStorage:
         return None
     
     def get_article_by_pmid(self, pmid: str) -> Optional[Dict]:
-        """Get article by PMID"""
-        self._initialize()
-        
-        def _get():
-            # Search for row with matching PMID
-            cell = self.sheet.find(pmid, in_column=2)  # Column 2 is pmid
-            if cell:
-                row = self.sheet.row_values(cell.row)
-                headers = self.sheet.row_values(1)
-                return dict(zip(headers, row))
-            return None
+        """Get article by PMID (from the local mirror, including queued changes)"""
+        self._ensure_mirror()
+        
+        with self._lock:
+            row = self._rows.get(str(pmid))
+            if row is None:
+                return None
+            return dict(zip(self.headers, row))
+    
+    def _new_row(self, article_data: Dict) -> List:
+        """Row values for a new article, in HEADERS order"""
+        return [
+            article_data.get('pmid', ''),  # id (use pmid as id)
+            article_data.get('pmid', ''),
+            article_data.get('title', ''),
+            article_data.get('abstract', '')[:5000],  # Limit abstract length
+            article_data.get('authors', ''),
+            article_data.get('journal', ''),
+            article_data.get('publication_date', ''),
+            article_data.get('doi', ''),
+            article_data.get('access_type', 'unknown'),
+            article_data.get('relevance_score', 0),
+            json.dumps(article_data.get('predictive_factors', [])),  # JSON string
+            article_data.get('pdf_url', ''),
+            article_data.get('processing_status', 'processed'),
+            article_data.get('created_at', datetime.now().isoformat()),
+            article_data.get('updated_at', datetime.now().isoformat())
+        ]
+    
+    def _merge_changes(self, current_row: List[str], article_data: Dict) -> Dict[int, Any]:
+        """
+        Column -> new value for an existing row
         
-        try:
-            return self._retry_with_backoff(_get, max_retries=2, initial_delay=2.0)
-        except Exception as e:
-            # gspread doesn't raise CellNotFound, it returns None or raises other exceptions
-            # Check if it's a "not found" type error or just log and continue
-            if 'not found' in str(e).lower() or 'no matching' in str(e).lower():
-                pass  # Article not found, that's okay
+        Only fields where the new value is better are changed; updated_at is
+        always refreshed.
+        """
+        header_map = {h: i+1 for i, h in enumerate(self.headers)}
+        
+        # Define which fields to update (only if new value is better)
+        fields_to_update = {
+            'title': article_data.get('title', ''),
+            'abstract': article_data.get('abstract', '')[:5000],
+            'authors': article_data.get('authors', ''),
+            'journal': article_data.get('journal', ''),
+            'publication_date': article_data.get('publication_date', ''),
+            'doi': article_data.get('doi', ''),
+            'access_type': article_data.get('access_type', ''),
+            'relevance_score': article_data.get('relevance_score', 0),
+            'predictive_factors': json.dumps(article_data.get('predictive_factors', [])),
+            'pdf_url': article_data.get('pdf_url', ''),
+            'processing_status': article_data.get('processing_status', 'processed'),
+        }
+        
+        changes = {}
+        for field_name, new_value in fields_to_update.items():
+            if field_name not in header_map:
+                continue
+            col_idx = header_map[field_name]
+            current_value = current_row[col_idx - 1] if col_idx <= len(current_row) else ''
+            
+            # Update if:
+            # 1. New value is not empty AND (current is empty OR new is better)
+            # 2. For relevance_score, always update if new is higher
+            if field_name == 'relevance_score':
+                new_score = float(new_value) if new_value else 0
+                current_score = float(current_value) if current_value else 0
+                should_update = new_score > current_score
+            elif field_name in ['title', 'journal', 'authors']:
+                should_update = (
+                    new_value and str(new_value).strip() and
+                    (not current_value or not str(current_value).strip() or
+                     current_value in ['No title', 'Unknown Journal', ''])
+                )
             else:
-                logger.debug(f"Error getting article {pmid}: {e}")
+                should_update = (
+                    new_value and str(new_value).strip() and
+                    (not current_value or not str(current_value).strip())
+                )
+            
+            if should_update:
+                changes[col_idx] = new_value
         
-        return None
+        # Always update updated_at timestamp
+        if 'updated_at' in header_map:
+            changes[header_map['updated_at']] = datetime.now().isoformat()
+        
+        return changes
     
     def insert_article(self, article_data: Dict) -> bool:
         """
         Insert or update article
         
+        The change is applied to the local mirror and queued; it reaches the
+        sheet on the next flush.
+        
         Args:
             article_data: Dictionary with article fields
             
         Returns:
-            True if successful
+            True if the change was queued
         """
-        self._initialize()
-        
         if 'pmid' not in article_data:
             logger.error("PMID is required")
             return False
         
-        pmid = article_data['pmid']
+        pmid = str(article_data['pmid'])
         
         try:
-            # Check if article exists (with retry for quota errors)
-            existing = None
-            try:
-                existing = self.get_article_by_pmid(pmid)
-            except Exception as e:
-                if '429' not in str(e) and 'quota' not in str(e).lower():
-                    raise  # Re-raise if not quota error
-                # For quota errors, continue anyway - we'll try to insert
-                logger.warning(f"Could not check if article exists due to quota, will try to insert anyway: {e}")
-            
-            # Prepare row data
-            row_data = [
-                article_data.get('pmid', ''),  # id (use pmid as id)
-                article_data.get('pmid', ''),
-                article_data.get('title', ''),
-                article_data.get('abstract', '')[:5000],  # Limit abstract length
-                article_data.get('authors', ''),
-                article_data.get('journal', ''),
-                article_data.get('publication_date', ''),
-                article_data.get('doi', ''),
-                article_data.get('access_type', 'unknown'),
-                article_data.get('relevance_score', 0),
-                json.dumps(article_data.get('predictive_factors', [])),  # JSON string
-                article_data.get('pdf_url', ''),
-                article_data.get('processing_status', 'processed'),
-                article_data.get('created_at', datetime.now().isoformat()),
-                article_data.get('updated_at', datetime.now().isoformat())
-            ]
-            
-            if existing:
-                # Update existing row - only update fields that have new data
-                try:
-                    cell = self.sheet.find(pmid, in_column=2)
-                except Exception as e:
-                    logger.error(f"Error finding cell for PMID {pmid}: {e}")
-                    return False
+            self._ensure_mirror()
+        except Exception as e:
+            logger.warning(f"Could not load Google Sheets for article {pmid}: {e}")
+            return False
+        
+        with self._lock:
+            current_row = self._rows.get(pmid)
+            if current_row is not None:
+                changes = self._merge_changes(current_row, article_data)
+                if len(current_row) < len(self.headers):
+                    current_row.extend([''] * (len(self.headers) - len(current_row)))
+                for col_idx, value in changes.items():
+                    current_row[col_idx - 1] = _cell_text(value)
                 
-                if cell:
-                    # Get headers to map columns correctly
-                    headers = self.sheet.row_values(1)
-                    current_row = self.sheet.row_values(cell.row)
-                    
-                    # Map headers to column indices
-                    header_map = {h: i+1 for i, h in enumerate(headers)}
-                    
-                    # Define which fields to update (only if new value is better)
-                    fields_to_update = {
-                        'title': article_data.get('title', ''),
-                        'abstract': article_data.get('abstract', '')[:5000],
-                        'authors': article_data.get('authors', ''),
-                        'journal': article_data.get('journal', ''),
-                        'publication_date': article_data.get('publication_date', ''),
-                        'doi': article_data.get('doi', ''),
-                        'access_type': article_data.get('access_type', ''),
-                        'relevance_score': article_data.get('relevance_score', 0),
-                        'predictive_factors': json.dumps(article_data.get('predictive_factors', [])),
-                        'pdf_url': article_data.get('pdf_url', ''),
-                        'processing_status': article_data.get('processing_status', 'processed'),
-                    }
-                    
-                    # Update fields only if new value is better (not empty, or existing is empty)
-                    for field_name, new_value in fields_to_update.items():
-                        if field_name in header_map:
-                            col_idx = header_map[field_name]
-                            current_value = current_row[col_idx - 1] if col_idx <= len(current_row) else ''
-                            
-                            # Update if:
-                            # 1. New value is not empty AND (current is empty OR new is better)
-                            # 2. For relevance_score, always update if new is higher
-                            should_update = False
-                            
-                            if field_name == 'relevance_score':
-                                # Always update if new score is higher
-                                new_score = float(new_value) if new_value else 0
-                                current_score = float(current_value) if current_value else 0
-                                should_update = new_score > current_score
-                            elif field_name in ['title', 'journal', 'authors']:
-                                # Update if current is empty/missing or new is better
-                                should_update = (
-                                    new_value and str(new_value).strip() and
-                                    (not current_value or not str(current_value).strip() or
-                                     current_value in ['No title', 'Unknown Journal', ''])
-                                )
-                            else:
-                                # Update if new value exists and current is empty
-                                should_update = (
-                                    new_value and str(new_value).strip() and
-                                    (not current_value or not str(current_value).strip())
-                                )
-                            
-                            if should_update:
-                                self.sheet.update_cell(cell.row, col_idx, new_value)
-                    
-                    # Always update updated_at timestamp
-                    if 'updated_at' in header_map:
-                        self.sheet.update_cell(cell.row, header_map['updated_at'], datetime.now().isoformat())
-                    
-                    logger.info(f"Updated article {pmid} in Google Sheets")
+                if pmid in self._pending_appends:
+                    # Not in the sheet yet: the queued append picks up the change
+                    pending_row = self._pending_appends[pmid]
+                    for col_idx, value in changes.items():
+                        pending_row[col_idx - 1] = value
+                else:
+                    self._pending_updates.setdefault(pmid, {}).update(changes)
+                logger.debug(f"Queued update of article {pmid} for Google Sheets")
             else:
-                # Insert new row (with retry for quota errors)
-                def _insert():
-                    self.sheet.append_row(row_data)
-                    logger.info(f"Inserted article {pmid} into Google Sheets")
+                row = self._new_row(article_data)
+                self._rows[pmid] = [_cell_text(v) for v in row]
+                self._pending_appends[pmid] = row
+                logger.debug(f"Queued insert of article {pmid} for Google Sheets")
+            
+            pending = self.pending_count()
+            self._schedule_flush()
+        
+        if pending >= self.flush_size:
+            self.flush()
+        return True
+    
+    def pending_count(self) -> int:
+        """Number of articles with changes not yet written to the sheet"""
+        return len(self._pending_updates) + len(self._pending_appends)
+    
+    def _schedule_flush(self):
+        """Start the flush timer (and exit hook) if changes are pending"""
+        if not self._exit_hook:
+            atexit.register(self.flush)
+            self._exit_hook = True
+        if self.flush_interval and self._timer is None and self.pending_count():
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Background Google Sheets flush failed: {e}")
+    
+    def _update_ranges(self, updates: Dict[str, Dict[int, Any]]) -> List[Dict]:
+        """Batch update payload: one range per run of adjacent changed cells in a row"""
+        data = []
+        for pmid, changes in updates.items():
+            row_number = self._row_numbers[pmid]
+            columns = sorted(changes)
+            run = [columns[0]]
+            for col in columns[1:] + [None]:
+                if col is not None and col == run[-1] + 1:
+                    run.append(col)
+                    continue
+                start = f"{_column_letter(run[0])}{row_number}"
+                end = f"{_column_letter(run[-1])}{row_number}"
+                data.append({
+                    'range': start if run[0] == run[-1] else f"{start}:{end}",
+                    'values': [[changes[c] for c in run]]
+                })
+                run = [col]
+        return data
+    
+    @staticmethod
+    def _first_appended_row(response: Any) -> Optional[int]:
+        """First row number written by append_rows, from the API response"""
+        try:
+            updated_range = response['updates']['updatedRange']
+        except (KeyError, TypeError):
+            return None
+        match = re.search(r'[A-Z]+(\d+)(?::|$)', updated_range.split('!')[-1])
+        return int(match.group(1)) if match else None
+    
+    def flush(self) -> bool:
+        """
+        Write queued changes to the sheet
+        
+        Updates to existing rows go out as one batch_update of cell ranges and
+        new rows as one append_rows. The queues are swapped out under the lock
+        and written without it, so inserts from other threads are not blocked
+        by API calls and their retries; changes that could not be written are
+        queued again for the next flush.
+        
+        Returns:
+            True if every change taken from the queue was written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
                 
+                # Rows still being appended get their row number (and their updates) on a later flush
+                updates = {pmid: changes for pmid, changes in self._pending_updates.items()
+                           if pmid in self._row_numbers}
+                self._pending_updates = {pmid: changes for pmid, changes in self._pending_updates.items()
+                                         if pmid not in updates}
+                appends, self._pending_appends = self._pending_appends, {}
+                if not updates and not appends:
+                    return not self._pending_updates
+                data = self._update_ranges(updates) if updates else []
+            
+            success = True
+            if updates:
                 try:
-                    self._retry_with_backoff(_insert, max_retries=3, initial_delay=2.0)
+                    self._retry_with_backoff(
+                        lambda: self.sheet.batch_update(data, value_input_option='USER_ENTERED'),
+                        max_retries=5, initial_delay=2.0
+                    )
+                    logger.info(f"Updated {len(updates)} articles in Google Sheets ({len(data)} ranges)")
                 except Exception as e:
-                    if '429' in str(e) or 'quota' in str(e).lower():
-                        logger.warning(f"Could not save article {pmid} to Google Sheets due to quota limit. Article saved to file storage.")
-                        # Return False so caller knows it didn't save to Sheets, but file storage should have it
-                        return False
-                    raise
+                    logger.warning(f"Could not update {len(updates)} articles in Google Sheets, will retry: {e}")
+                    with self._lock:
+                        for pmid, changes in updates.items():
+                            changes.update(self._pending_updates.get(pmid, {}))
+                            self._pending_updates[pmid] = changes
+                    success = False
             
-            return True
+            if appends:
+                rows = list(appends.values())
+                try:
+                    response = self._retry_with_backoff(
+                        lambda: self.sheet.append_rows(rows, value_input_option='RAW'),
+                        max_retries=5, initial_delay=2.0
+                    )
+                    with self._lock:
+                        first_row = self._first_appended_row(response) or self._next_row
+                        for offset, pmid in enumerate(appends):
+                            self._row_numbers[pmid] = first_row + offset
+                        self._next_row = first_row + len(rows)
+                    logger.info(f"Inserted {len(rows)} articles into Google Sheets")
+                except Exception as e:
+                    logger.warning(f"Could not insert {len(rows)} articles into Google Sheets, will retry: {e}")
+                    with self._lock:
+                        # Changes made while the append was in flight go into the re-queued rows
+                        for pmid, row in appends.items():
+                            for col_idx, value in self._pending_updates.pop(pmid, {}).items():
+                                row[col_idx - 1] = value
+                        appends.update(self._pending_appends)
+                        self._pending_appends = appends
+                    success = False
             
-        except Exception as e:
-            error_str = str(e)
-            if '429' in error_str or 'quota' in error_str.lower():
-                logger.warning(f"Quota error saving article {pmid} to Google Sheets. Article saved to file storage.")
-                return False  # Not a critical error, file storage has it
-            else:
-                logger.error(f"Error saving article {pmid} to Google Sheets: {e}")
-                return False
+            with self._lock:
+                if not success or self.pending_count():
+                    self._schedule_flush()
+            return success
+    
+    def close(self):
+        """Flush queued changes and stop the flush timer"""
+        self.flush()
+    
+    def _records(self) -> List[Dict]:
+        """All mirrored rows as records (numeric cells converted, like get_all_records)"""
+        self._ensure_mirror()
+        with self._lock:
+            width = len(self.headers)
+            return [
+                dict(zip(self.headers, [_numericise(v) for v in row[:width]] + [''] * (width - len(row))))
+                for row in self._rows.values()
+            ]
     
     def get_paywalled_articles(self, threshold: int = 70) -> List[Dict]:
         """Get paywalled articles with relevance >= threshold"""
@@ -337,7 +555,7 @@ class GoogleSheetsStorage:
         
         try:
             articles = []
-            all_records = self.sheet.get_all_records()
+            all_records = self._records()
             
             logger.info(f"Checking {len(all_records)} records for paywalled articles...")
             
@@ -376,7 +594,7 @@ class GoogleSheetsStorage:
         
         try:
             articles = []
-            all_records = self.sheet.get_all_records()
+            all_records = self._records()
             
             for record in all_records:
                 if float(record.get('relevance_score', 0)) >= threshold:
@@ -393,7 +611,7 @@ class GoogleSheetsStorage:
         
         try:
             count = 0
-            all_records = self.sheet.get_all_records()
+            all_records = self._records()
             
             for record in all_records:
                 if record.get('access_type') == 'paywalled':
@@ -410,7 +628,7 @@ class GoogleSheetsStorage:
         
         try:
             total = 0
-            all_records = self.sheet.get_all_records()
+            all_records = self._records()
             
             for record in all_records:
                 factors_json = record.get('predictive_factors', '[]')
@@ -431,7 +649,7 @@ class GoogleSheetsStorage:
         self._initialize()
         
         try:
-            all_records = self.sheet.get_all_records()
+            all_records = self._records()
             return all_records
         except Exception as e:
             logger.error(f"Error getting all articles: {e}")
@@ -439,7 +657,7 @@ class GoogleSheetsStorage:
 
 
 class HybridStorage:
-    """Hybrid storage that checks both Google Sheets and file storage"""
+    """Hybrid storage: file storage is primary, Google Sheets a write-behind copy"""
     
     def __init__(self):
         self.sheets_storage = None
@@ -459,18 +677,18 @@ class HybridStorage:
         self.file_storage = FileStorage()
     
     def get_article_by_pmid(self, pmid: str):
-        """Get article from Google Sheets first, then file storage"""
-        # Try Google Sheets first
+        """Get article from file storage first, then the Google Sheets mirror"""
+        article = self.file_storage.get_article_by_pmid(pmid)
+        if article:
+            return article
+        
         if self.sheets_storage:
             try:
-                article = self.sheets_storage.get_article_by_pmid(pmid)
-                if article:
-                    return article
+                return self.sheets_storage.get_article_by_pmid(pmid)
             except Exception as e:
                 logger.warning(f"Error getting article from Google Sheets: {e}")
         
-        # Fall back to file storage
-        return self.file_storage.get_article_by_pmid(pmid)
+        return None
     
     def insert_article(self, article_data: Dict) -> bool:
         """Insert article into both Google Sheets and file storage
@@ -497,7 +715,7 @@ class HybridStorage:
                 sheets_success = self.sheets_storage.insert_article(article_data)
                 if not sheets_success:
                     # Log but don't fail - file storage has it
-                    logger.warning(f"Article saved to file storage but not to Google Sheets (quota or other issue)")
+                    logger.warning(f"Article saved to file storage but not queued for Google Sheets")
             except Exception as e:
                 # Log but don't fail - file storage has it
                 error_str = str(e)
@@ -509,6 +727,16 @@ class HybridStorage:
         # Return True if file storage succeeded (primary storage)
         return file_success
     
+    def flush(self) -> bool:
+        """Write changes queued for Google Sheets"""
+        if self.sheets_storage:
+            try:
+                return self.sheets_storage.flush()
+            except Exception as e:
+                logger.warning(f"Error flushing Google Sheets: {e}")
+                return False
+        return True
+    
     def get_paywalled_articles(self, threshold: int = 70) -> List[Dict]:
         """Get paywalled articles from both sources"""
         articles = []
@@ -607,6 +835,23 @@ class HybridStorage:
         
         return count
     
+    def get_factor_articles(self, min_articles: int = 5, relevance_threshold: float = 0,
+                            statistical_only: bool = False,
+                            new_parameters_only: bool = False) -> Dict[str, List[str]]:
+        """Factor -> PMIDs from the file storage factor index (file storage is primary)"""
+        return self.file_storage.get_factor_articles(min_articles, relevance_threshold=relevance_threshold,
+                                                     statistical_only=statistical_only,
+                                                     new_parameters_only=new_parameters_only)
+    
+    def search_articles(self, search_term: str, limit: int = 100, mode: str = 'all',
+                        offset: int = 0) -> List[Dict]:
+        """Full-text search of the file storage index (file storage is primary)"""
+        return self.file_storage.search_articles(search_term, limit=limit, mode=mode, offset=offset)
+    
+    def count_search_results(self, search_term: str, mode: str = 'all') -> int:
+        """Number of articles matching a full-text search"""
+        return self.file_storage.count_search_results(search_term, mode=mode)
+    
     def get_all_articles(self) -> List[Dict]:
         """Get all articles from both sources, deduplicated by PMID"""
         articles = []
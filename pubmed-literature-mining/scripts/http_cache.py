@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP Response Cache
+Stores responses from external APIs (PubMed E-utilities, Unpaywall, Europe PMC)
+in a local SQLite database so re-runs and backfills do not download the same
+payloads again. Only reads are cached by default: other methods (e.g. a POST
+that files something) always go to the network unless the caller passes a ttl.
+
+Entries are keyed on method, URL and normalized parameters (sorted, with
+identity-only parameters such as `email` and `tool` dropped) plus the JSON body
+for writes. Bodies are zlib-compressed. Each endpoint has its own time-to-live:
+EFetch records never expire, open access lookups are kept for 30 days, searches
+for a day. Values derived from several responses (such as a resolved open
+access status) can be memoized next to them with their own TTL.
+
+Set HTTP_CACHE_OFFLINE=1 for strict replay: stored responses are returned even
+when expired, and anything not in the cache raises OfflineCacheMiss instead of
+touching the network. HTTP_CACHE_DISABLE=1 bypasses the cache entirely.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from scripts.pipeline_metrics import get_pipeline_metrics
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+FOREVER = None
+ENDPOINT_TTL = object()  # default for `ttl` arguments: use the matching TTL_RULES entry
+
+# First matching rule wins; ttl in seconds, FOREVER never expires, 0 disables caching
+TTL_RULES = [
+    (re.compile(r'/efetch\.fcgi'), FOREVER),  # PubMed records fetched by PMID
+    (re.compile(r'/esearch\.fcgi'), DAY),
+    (re.compile(r'api\.unpaywall\.org|europepmc|/pmc/|idconv'), 30 * DAY),
+]
+DEFAULT_TTL = DAY
+
+# Parameters that identify the caller but do not change the response
+IGNORED_PARAMS = {'email', 'tool', 'api_key'}
+
+
+class OfflineCacheMiss(requests.exceptions.ConnectionError):
+    """Raised in offline mode when a request has no stored response"""
+
+
+def _default_cache_path() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    return os.path.join(project_root, 'data', 'cache', 'http_cache.db')
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def normalize_request(method: str, url: str, params: Optional[Dict] = None,
+                      json_body: Optional[Dict] = None) -> str:
+    """
+    Canonical text of a request
+
+    Query string and params are merged, identity-only parameters removed and the
+    rest sorted; list values keep their order. Bodies are serialized with sorted keys.
+    """
+    parts = urlsplit(url)
+    items = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        items.extend((str(key), str(v)) for v in values)
+    items = sorted((k, v) for k, v in items if k not in IGNORED_PARAMS)
+    canonical_url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(items), ''))
+    text = f"{method.upper()} {canonical_url}"
+    if json_body is not None:
+        text += ' ' + json.dumps(json_body, sort_keys=True, default=str)
+    return text
+
+
+def _request_key(request_text: str) -> str:
+    return hashlib.sha256(request_text.encode('utf-8')).hexdigest()
+
+
+def ttl_for(url: str) -> Optional[float]:
+    """Time-to-live for responses from url"""
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(url):
+            return ttl
+    return DEFAULT_TTL
+
+
+class HTTPCache:
+    """SQLite-backed response cache shared by all external lookups"""
+
+    def __init__(self, path: Optional[str] = None, offline: Optional[bool] = None,
+                 enabled: Optional[bool] = None, session: Optional[requests.Session] = None):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite file (default: data/cache/http_cache.db, or HTTP_CACHE_PATH)
+            offline: Strict replay mode (default: HTTP_CACHE_OFFLINE)
+            enabled: Use the cache at all (default: not HTTP_CACHE_DISABLE)
+            session: Session used for network requests
+        """
+        self.path = path or os.getenv('HTTP_CACHE_PATH') or _default_cache_path()
+        self.offline = _env_flag('HTTP_CACHE_OFFLINE') if offline is None else offline
+        self.enabled = (not _env_flag('HTTP_CACHE_DISABLE')) if enabled is None else enabled
+        self.session = session or requests.Session()
+        self.hits = 0
+        self.misses = 0
+        self.metrics = get_pipeline_metrics()  # per-host request and cache hit counts
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    request TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT,
+                    body BLOB,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS memo (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _build_response(url: str, status: int, headers: Dict, content: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def lookup(self, method: str, url: str, params: Optional[Dict] = None,
+               json_body: Optional[Dict] = None) -> Optional[requests.Response]:
+        """
+        Stored response for a request, or None
+
+        Expired entries are ignored unless the cache is offline.
+        """
+        if not self.enabled:
+            return None
+        request_text = normalize_request(method, url, params, json_body)
+        key = _request_key(request_text)
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT status, headers, body, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None or (not self.offline and row[3] is not None and row[3] < time.time()):
+            return None
+        self.hits += 1
+        self.metrics.record_request(url, cached=True)
+        status, headers, body, _ = row
+        return self._build_response(url, status, json.loads(headers or '{}'), zlib.decompress(body))
+
+    def store(self, method: str, url: str, response: requests.Response, params: Optional[Dict] = None,
+              json_body: Optional[Dict] = None, ttl=ENDPOINT_TTL):
+        """Save a successful response for ttl seconds (FOREVER: no expiry, 0: don't store)"""
+        if ttl is ENDPOINT_TTL:
+            ttl = ttl_for(url)
+        if not self.enabled or not response.ok or ttl == 0:
+            return
+        request_text = normalize_request(method, url, params, json_body)
+        key = _request_key(request_text)
+        now = time.time()
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() in ('content-type', 'etag', 'last-modified')}
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, request, status, headers, body, stored_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, request_text, response.status_code, json.dumps(headers),
+                 zlib.compress(response.content, 6), now, None if ttl is None else now + ttl)
+            )
+            conn.commit()
+
+    def fetch(self, method: str, url: str, params: Optional[Dict] = None, json_body: Optional[Dict] = None,
+              ttl=ENDPOINT_TTL, **kwargs) -> requests.Response:
+        """
+        Perform the request over the network and store a successful response
+
+        Raises:
+            OfflineCacheMiss: in offline mode
+            requests.exceptions.RequestException: on network errors
+        """
+        if self.offline:
+            raise OfflineCacheMiss(f"Offline: no cached response for {method} {url}")
+        self.misses += 1
+        self.metrics.record_request(url)
+        with self.metrics.stage('http_fetch'):
+            response = self.session.request(method, url, params=params, json=json_body, **kwargs)
+        self.store(method, url, response, params=params, json_body=json_body, ttl=ttl)
+        return response
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None, json_body: Optional[Dict] = None,
+                ttl=ENDPOINT_TTL, **kwargs) -> requests.Response:
+        """Cached response if available, else fetch (see fetch for errors)"""
+        if method.upper() not in ('GET', 'HEAD') and ttl is ENDPOINT_TTL:
+            # Side-effecting request: never replayed from (or stored in) the cache
+            return self.fetch(method, url, params=params, json_body=json_body, ttl=0, **kwargs)
+        cached = self.lookup(method, url, params, json_body)
+        if cached is not None:
+            return cached
+        return self.fetch(method, url, params=params, json_body=json_body, ttl=ttl, **kwargs)
+
+    def get_value(self, namespace: str, key: str):
+        """Memoized JSON value derived from responses (e.g. a resolved OA status), or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT value, expires_at FROM memo WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+        if row is None or (not self.offline and row[1] is not None and row[1] < time.time()):
+            self.metrics.record_cache(f'memo:{namespace}', hit=False)
+            return None
+        self.metrics.record_cache(f'memo:{namespace}', hit=True)
+        return json.loads(row[0])
+
+    def set_values(self, namespace: str, values: Dict[str, object], ttl: Optional[float] = DAY):
+        """Memoize JSON values by key for ttl seconds (FOREVER: no expiry)"""
+        if not self.enabled or not values:
+            return
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                'INSERT OR REPLACE INTO memo (namespace, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)',
+                [(namespace, key, json.dumps(value), now, expires_at) for key, value in values.items()]
+            )
+            conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns the number removed"""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            removed = conn.execute('DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?',
+                                   (now,)).rowcount
+            removed += conn.execute('DELETE FROM memo WHERE expires_at IS NOT NULL AND expires_at < ?',
+                                    (now,)).rowcount
+            conn.commit()
+            return removed
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and entry count"""
+        with self._lock:
+            entries = self._connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': entries,
+            'offline': self.offline
+        }
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_caches: Dict[str, HTTPCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_http_cache(path: Optional[str] = None) -> HTTPCache:
+    """Shared cache instance for a database file"""
+    path = os.path.abspath(path or os.getenv('HTTP_CACHE_PATH') or _default_cache_path())
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = HTTPCache(path)
+        return _caches[path]
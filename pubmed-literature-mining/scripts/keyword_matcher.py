@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Compiled Multi-Keyword Matcher
+Finds every configured keyword in a text with a single regex pass.
+
+All terms are compiled once into a trie-shaped regex inside a lookahead, so one
+scan reports the longest term starting at each position. Shorter terms that are
+prefixes of that match are recovered from a precomputed table, which gives the
+full set of (overlapping) occurrences for every term. Callers can then ask for
+either plain substring presence (`term in text`) or word-bounded counts
+(`re.findall(r'\\b' + term + r'\\b')`) without rescanning the text.
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(ch: str) -> bool:
+    """Same definition of a word character as `\\w` in `re` for str patterns"""
+    return ch.isalnum() or ch == '_'
+
+
+def load_keyword_config(config_path: Optional[str] = None) -> Dict:
+    """Load config/keywords.json"""
+    if config_path is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(script_dir)
+        config_path = os.path.join(project_root, 'config', 'keywords.json')
+
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Config file not found: {config_path}")
+
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+def config_categories(config: Dict) -> Dict[str, List[str]]:
+    """
+    Flatten keywords.json into named term categories
+
+    Nested groups become "<group>.<name>" (e.g. "study_designs.rct");
+    flat lists keep their key (e.g. "top_tier_journals").
+    """
+    categories = {}
+    for group, value in config.items():
+        if isinstance(value, dict):
+            for name, terms in value.items():
+                if isinstance(terms, list):
+                    categories[f"{group}.{name}"] = terms
+        elif isinstance(value, list):
+            categories[group] = value
+    return categories
+
+
+class KeywordHits:
+    """All keyword occurrences found in one text"""
+
+    def __init__(self, matcher: 'KeywordMatcher', text: str, positions: Dict[str, List[int]]):
+        self.matcher = matcher
+        self.text = text
+        self.positions = positions
+
+    def contains(self, term: str) -> bool:
+        """Equivalent to `term in text`"""
+        return term.lower() in self.positions
+
+    def any(self, category: str) -> bool:
+        """True if any term of the category occurs as a substring"""
+        return any(term in self.positions for term in self.matcher.categories.get(category, ()))
+
+    def count_present(self, category: str) -> int:
+        """Number of category terms present as substrings (duplicate terms count twice)"""
+        return sum(1 for term in self.matcher.categories.get(category, ()) if term in self.positions)
+
+    def present_terms(self, category: str) -> List[str]:
+        """Category terms present as substrings, in category order"""
+        return [term for term in self.matcher.categories.get(category, ()) if term in self.positions]
+
+    def _has_boundary(self, index: int) -> bool:
+        text = self.text
+        before = index > 0 and _is_word_char(text[index - 1])
+        after = index < len(text) and _is_word_char(text[index])
+        return before != after
+
+    def word_count(self, term: str) -> int:
+        """Equivalent to `len(re.findall(r'\\b' + re.escape(term) + r'\\b', text))`"""
+        term = term.lower()
+        count = 0
+        next_allowed = 0
+        length = len(term)
+        for start in self.positions.get(term, ()):
+            if start < next_allowed:
+                continue
+            if self._has_boundary(start) and self._has_boundary(start + length):
+                count += 1
+                next_allowed = start + length
+        return count
+
+    def has_word(self, term: str) -> bool:
+        """Equivalent to `re.search(r'\\b' + re.escape(term) + r'\\b', text)`"""
+        return term.lower() in self.positions and self.word_count(term) > 0
+
+    def count_words(self, categories: Iterable[str]) -> int:
+        """Sum of word-bounded counts over every term of the given categories"""
+        positions = self.positions
+        return sum(
+            self.word_count(term)
+            for category in categories
+            for term in self.matcher.categories.get(category, ())
+            if term in positions
+        )
+
+
+class KeywordMatcher:
+    """Single-pass matcher compiled once from named term categories"""
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        """
+        Compile the matcher
+
+        Args:
+            categories: Mapping of category name to list of terms. Terms are
+                lowercased; texts are lowercased before matching.
+        """
+        self.categories = {
+            name: [term.lower() for term in terms if term]
+            for name, terms in categories.items()
+        }
+        unique_terms = sorted({term for terms in self.categories.values() for term in terms})
+
+        # For every term, all terms that are prefixes of it (including itself)
+        self._prefix_terms = {
+            term: [other for other in unique_terms if term.startswith(other)]
+            for term in unique_terms
+        }
+
+        if unique_terms:
+            self._pattern = re.compile('(?=(' + self._trie_pattern(unique_terms) + '))')
+        else:
+            self._pattern = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None,
+                    extra_categories: Optional[Dict[str, List[str]]] = None) -> 'KeywordMatcher':
+        """Build a matcher from keywords.json plus optional extra categories"""
+        if config is None:
+            config = load_keyword_config()
+        categories = config_categories(config)
+        if extra_categories:
+            categories.update(extra_categories)
+        return cls(categories)
+
+    @staticmethod
+    def _trie_pattern(terms: List[str]) -> str:
+        """Build a regex whose alternations follow a character trie (longest match first)"""
+        trie = {}
+        for term in terms:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[''] = True
+
+        def build(node: Dict) -> str:
+            alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+            if not alternatives:
+                return ''
+            body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+            if '' in node:
+                # A term ends here; the greedy optional group still prefers the longer terms
+                body = '(?:' + body + ')?'
+            return body
+
+        return build(trie)
+
+    def match(self, text: str, lowered: bool = False) -> KeywordHits:
+        """
+        Find every term occurrence in text
+
+        Args:
+            text: Text to scan
+            lowered: Set when text is already lowercased
+
+        Returns:
+            KeywordHits with the start positions of each term found
+        """
+        text = text or ''
+        if not lowered:
+            text = text.lower()
+
+        positions = {}
+        if self._pattern is not None:
+            prefix_terms = self._prefix_terms
+            for match in self._pattern.finditer(text):
+                start = match.start()
+                for term in prefix_terms[match.group(1)]:
+                    positions.setdefault(term, []).append(start)
+        return KeywordHits(self, text, positions)
@@ -4,21 +4,47 @@ SQLite Database Manager for Literature Storage
 Simple, local, free database for storing articles with PROBAST assessments.
 
 No external services required - uses built-in SQLite.
+
+Title, abstract, extracted full text and factor contexts are indexed in the
+papers_fts FTS5 table (see search_index.py), updated in the same transaction
+as the paper.
+
+relevance_score and the automated PROBAST fields carry the version of the
+scorer that produced them (scoring_version, probast_version), so stale rows
+can be found with an index lookup and rescored (see rescoring.py).
+duplicate_of links a near-duplicate record to its canonical paper (see
+near_duplicates.py).
+
+Summary counts (by access type, PROBAST risk, model use, score bucket and
+month added) are kept in paper_stats by triggers on papers, so
+get_statistics reads a few rows however large the corpus is (see
+literature_stats.py).
 """
 
 import os
+import sys
 import sqlite3
 import json
 import logging
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
+# Add parent directory to path (this module is also imported with only scripts/ on the path)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.search_index import FTS5_AVAILABLE, article_document, create_fts_table, index_document, search_fts
+from scripts.literature_stats import LiteratureStatistics, create_stats_tables
+
 logger = logging.getLogger(__name__)
 
 
 class LiteratureDatabase:
     """SQLite database manager for literature storage"""
     
+    VERSION_COLUMNS = ('scoring_version', 'probast_version')
+    # Columns added after the original schema (ALTER TABLE on older databases)
+    ADDED_COLUMNS = VERSION_COLUMNS + ('duplicate_of',)
+    
     def __init__(self, db_path: str = "data/literature.db"):
         """
         Initialize database connection
@@ -85,11 +111,38 @@ class LiteratureDatabase:
         )
         ''')
         
+        # Columns added to databases created before they existed
+        cursor.execute('PRAGMA table_info(papers)')
+        columns = {row[1] for row in cursor.fetchall()}
+        for column in self.ADDED_COLUMNS:
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE papers ADD COLUMN {column} TEXT')
+        
         # Indexes for performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_probast_risk ON papers(probast_risk)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_used_in_model ON papers(used_in_model)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_access_type ON papers(access_type)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_relevance_score ON papers(relevance_score)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scoring_version ON papers(scoring_version)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_probast_version ON papers(assessment_method, probast_version)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_used_in_model_score ON papers(used_in_model, relevance_score)')
+        
+        # Materialized statistics, maintained by triggers; filled from existing papers when first created
+        if create_stats_tables(conn):
+            logger.info("Created materialized paper statistics")
+        
+        # Full-text search (rowids are papers.rowid); filled from existing papers when first created
+        if FTS5_AVAILABLE:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'papers_fts'")
+            fts_exists = cursor.fetchone()
+            create_fts_table(conn, 'papers_fts')
+            if not fts_exists:
+                cursor.execute('SELECT pmid FROM papers')
+                pmids = [row[0] for row in cursor.fetchall()]
+                for pmid in pmids:
+                    self._index_paper(conn, pmid)
+                if pmids:
+                    logger.info(f"Indexed {len(pmids)} papers for full-text search")
         
         conn.commit()
         conn.close()
@@ -131,6 +184,7 @@ class LiteratureDatabase:
             probast_justification = probast_assessment.get("justification", None) if probast_assessment else None
             assessment_date = probast_assessment.get("assessment_date", None) if probast_assessment else None
             assessment_method = probast_assessment.get("assessment_method", None) if probast_assessment else None
+            probast_version = probast_assessment.get("assessment_version", None) if probast_assessment else None
             
             # Check if article exists
             cursor.execute('SELECT pmid FROM papers WHERE pmid = ?', (pmid,))
@@ -149,6 +203,8 @@ class LiteratureDatabase:
                     access_type = ?,
                     pdf_path = ?,
                     relevance_score = ?,
+                    scoring_version = ?,
+                    duplicate_of = ?,
                     probast_risk = COALESCE(?, probast_risk),
                     probast_domain_1 = COALESCE(?, probast_domain_1),
                     probast_domain_2 = COALESCE(?, probast_domain_2),
@@ -157,6 +213,7 @@ class LiteratureDatabase:
                     probast_justification = COALESCE(?, probast_justification),
                     assessment_date = COALESCE(?, assessment_date),
                     assessment_method = COALESCE(?, assessment_method),
+                    probast_version = CASE WHEN ? IS NULL THEN probast_version ELSE ? END,
                     predictive_factors = COALESCE(?, predictive_factors),
                     last_updated = ?
                 WHERE pmid = ?
@@ -170,6 +227,8 @@ class LiteratureDatabase:
                     article.get("access_type"),
                     article.get("pdf_path"),
                     article.get("relevance_score"),
+                    article.get("scoring_version"),
+                    article.get("duplicate_of"),
                     probast_risk,
                     probast_domain_1,
                     probast_domain_2,
@@ -178,6 +237,8 @@ class LiteratureDatabase:
                     probast_justification,
                     assessment_date,
                     assessment_method,
+                    assessment_method,
+                    probast_version,
                     factors_json,
                     now,
                     pmid
@@ -187,12 +248,12 @@ class LiteratureDatabase:
                 cursor.execute('''
                 INSERT INTO papers (
                     pmid, title, abstract, journal, authors, doi, publication_date,
-                    access_type, pdf_path, relevance_score,
+                    access_type, pdf_path, relevance_score, scoring_version, duplicate_of,
                     probast_risk, probast_domain_1, probast_domain_2,
                     probast_domain_3, probast_domain_4, probast_justification,
-                    assessment_date, assessment_method, predictive_factors,
+                    assessment_date, assessment_method, probast_version, predictive_factors,
                     date_added, last_updated
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     pmid,
                     article.get("title"),
@@ -204,6 +265,8 @@ class LiteratureDatabase:
                     article.get("access_type"),
                     article.get("pdf_path"),
                     article.get("relevance_score"),
+                    article.get("scoring_version"),
+                    article.get("duplicate_of"),
                     probast_risk,
                     probast_domain_1,
                     probast_domain_2,
@@ -212,11 +275,14 @@ class LiteratureDatabase:
                     probast_justification,
                     assessment_date,
                     assessment_method,
+                    probast_version,
                     factors_json,
                     now,
                     now
                 ))
             
+            self._index_paper(conn, pmid, full_text=article.get("full_text"))
+            
             conn.commit()
             conn.close()
             logger.info(f"Article {pmid} added/updated in database")
@@ -336,6 +402,7 @@ class LiteratureDatabase:
             UPDATE papers SET pdf_path = ?, access_type = 'uploaded'
             WHERE pmid = ?
             ''', (pdf_path, pmid))
+            self._index_paper(conn, pmid)
             
             conn.commit()
             conn.close()
@@ -364,31 +431,150 @@ class LiteratureDatabase:
             logger.error(f"Error marking article as used: {e}")
             return False
     
-    def get_statistics(self) -> Dict:
-        """Get database statistics"""
+    def get_articles(self, pmids: Iterable[str]) -> List[Dict]:
+        """Get the papers with the given PMIDs (missing PMIDs are skipped)"""
+        pmids = list(pmids)
+        articles = []
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # Total articles
-        cursor.execute('SELECT COUNT(*) FROM papers')
-        stats['total_articles'] = cursor.fetchone()[0]
-        
-        # By PROBAST risk
-        for risk in ['Low', 'Moderate', 'High', 'Unclear']:
-            cursor.execute('SELECT COUNT(*) FROM papers WHERE probast_risk = ?', (risk,))
-            stats[f'probast_{risk.lower()}_risk'] = cursor.fetchone()[0]
-        
-        # Usable for model
-        cursor.execute('SELECT COUNT(*) FROM papers WHERE probast_risk = "Low" AND used_in_model = 1')
-        stats['used_in_model'] = cursor.fetchone()[0]
+        conn.row_factory = sqlite3.Row
+        try:
+            for i in range(0, len(pmids), 500):
+                chunk = pmids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM papers WHERE pmid IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                articles.extend(self._row_to_dict(row) for row in rows)
+        finally:
+            conn.close()
+        return articles
+
+    def get_stale_pmids(self, column: str, version: str, automated_only: bool = False) -> Dict[str, Optional[str]]:
+        """
+        Papers whose score version differs from version (index lookup)
+
+        Args:
+            column: 'scoring_version' or 'probast_version'
+            version: Current version
+            automated_only: Only papers with an automated PROBAST assessment
+
+        Returns:
+            Dictionary mapping PMID to its stored version (None if unversioned)
+        """
+        if column not in self.VERSION_COLUMNS:
+            raise ValueError(f"Unknown version column: {column}")
+        # Written as two ranges plus IS NULL so SQLite can answer it from the index
+        query = f'SELECT pmid, {column} FROM papers WHERE '
+        if automated_only:
+            query += f"assessment_method = 'automated' AND "
+        query += f'({column} IS NULL OR {column} < ? OR {column} > ?)'
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return dict(conn.execute(query, (version, version)).fetchall())
+        finally:
+            conn.close()
+
+    def update_relevance_scores(self, scores: Iterable[Tuple[str, float]], version: str) -> int:
+        """Store recomputed relevance scores and their version in one transaction"""
+        now = datetime.now().isoformat()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.executemany(
+                    'UPDATE papers SET relevance_score = ?, scoring_version = ?, last_updated = ? WHERE pmid = ?',
+                    [(score, version, now, pmid) for pmid, score in scores]
+                )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def restamp_version(self, column: str, pmids: Iterable[str], version: str) -> int:
+        """Mark papers' stored values as current for version without changing them"""
+        if column not in self.VERSION_COLUMNS:
+            raise ValueError(f"Unknown version column: {column}")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.executemany(f'UPDATE papers SET {column} = ? WHERE pmid = ?',
+                                          [(version, pmid) for pmid in pmids])
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def _index_paper(self, conn: sqlite3.Connection, pmid: str, full_text: Optional[str] = None):
+        """Refresh a paper's full-text search row from its stored columns"""
+        if not FTS5_AVAILABLE:
+            return
+        row = conn.execute(
+            'SELECT rowid, title, abstract, pdf_path, predictive_factors FROM papers WHERE pmid = ?', (pmid,)
+        ).fetchone()
+        if row is None:
+            return
+        document = article_document({
+            'title': row[1],
+            'abstract': row[2],
+            'pdf_path': row[3],
+            'predictive_factors': row[4],
+            'full_text': full_text
+        })
+        index_document(conn, 'papers_fts', row[0], document)
+    
+    def search(self, query: str, mode: str = 'all', limit: int = 100, offset: int = 0) -> List[Dict]:
+        """
+        Full-text search over title, abstract, full text and factor contexts
         
-        # Access types
-        cursor.execute('SELECT access_type, COUNT(*) FROM papers GROUP BY access_type')
-        stats['by_access_type'] = dict(cursor.fetchall())
+        Args:
+            query: Words ("quoted phrases" and prefix* words allowed)
+            mode: 'all', 'any', 'phrase' or 'prefix' (see search_index.match_expression)
+            limit: Maximum number of results
+            offset: Results to skip
+            
+        Returns:
+            Papers ranked by BM25, each with search_score and search_snippet
+        """
+        if not FTS5_AVAILABLE:
+            logger.warning("SQLite was built without FTS5; full-text search unavailable")
+            return []
         
-        conn.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            hits = search_fts(conn, 'papers_fts', 'papers', query, mode=mode, limit=limit, offset=offset)
+            articles = []
+            for hit in hits:
+                row = conn.execute('SELECT * FROM papers WHERE pmid = ?', (hit['pmid'],)).fetchone()
+                article = self._row_to_dict(row)
+                article['search_score'] = hit['score']
+                article['search_snippet'] = hit['snippet']
+                articles.append(article)
+        finally:
+            conn.close()
+        return articles
+    
+    def get_statistics(self) -> Dict:
+        """Get database statistics (read from the materialized paper_stats rows)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            summary = LiteratureStatistics(conn)
+            stats = {'total_articles': summary.total()}
+            
+            # By PROBAST risk
+            by_risk = summary.counts('probast_risk')
+            for risk in ['Low', 'Moderate', 'High', 'Unclear']:
+                stats[f'probast_{risk.lower()}_risk'] = by_risk.get(risk, 0)
+            
+            # Usable for model
+            stats['used_in_model'] = summary.count('probast_risk', 'Low', used_only=True)
+            
+            # Access types
+            stats['by_access_type'] = summary.counts('access_type')
+            
+            # Relevance score buckets and papers added per month
+            stats['by_score_bucket'] = summary.score_histogram()
+            stats['by_month_added'] = dict(sorted(
+                (month, count) for month, count in summary.counts('month').items() if month
+            ))
+        finally:
+            conn.close()
         return stats
     
     def _row_to_dict(self, row: sqlite3.Row) -> Dict:
@@ -24,6 +24,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.pubmed_scraper import PubMedScraper
 from scripts.asreview_integration import ASReviewIntegration
+from scripts.automated_screening import AutomatedScreening
 from scripts.probast_assessment import PROBASTAssessment
 from scripts.literature_database import LiteratureDatabase
 
@@ -51,6 +52,8 @@ class LiteratureQualityWorkflow:
         
         # Increase max articles for comprehensive search
         self.scraper.max_articles = int(os.getenv('MAX_ARTICLES_PER_RUN', '5000'))
+        # Incremental sync run started by _fetch_articles, checkpointed as articles are stored
+        self._sync_run = None
     
     def run_full_workflow(self, max_articles: int = 5000, use_asreview: bool = True) -> Dict:
         """
@@ -66,6 +69,8 @@ class LiteratureQualityWorkflow:
         logger.info("=" * 80)
         logger.info("Starting Literature Quality Workflow")
         logger.info("=" * 80)
+        metrics = self.scraper.metrics
+        metrics.reset()
         
         stats = {
             "articles_fetched": 0,
@@ -86,9 +91,11 @@ class LiteratureQualityWorkflow:
             
             if not articles:
                 logger.warning("No articles fetched, stopping workflow")
+                if self._sync_run is not None:
+                    self.scraper.sync.finish(self._sync_run)
                 return stats
             
-            # Step 2: ASReview screening (optional)
+            # Step 2: ASReview export (optional; in-process screening ranks the stored papers in step 5)
             if use_asreview and self.asreview.asreview_available:
                 logger.info("Step 2: Exporting articles for ASReview LAB screening...")
                 export_path = "data/asreview_export.csv"
@@ -116,7 +123,8 @@ class LiteratureQualityWorkflow:
                     logger.info(f"Assessing article {i}/{len(articles_to_assess)}...")
                 
                 try:
-                    assessment = self.probast.assess_article(article)
+                    with metrics.stage('probast'):
+                        assessment = self.probast.assess_article(article)
                     article["probast_assessment"] = assessment
                     assessed_articles.append(article)
                     stats["articles_assessed"] += 1
@@ -134,14 +142,19 @@ class LiteratureQualityWorkflow:
             # Step 4: Store in SQLite database
             logger.info("Step 4: Storing articles in SQLite database...")
             
+            stored, failed = [], []
             for i, article in enumerate(assessed_articles, 1):
                 if i % 100 == 0:
                     logger.info(f"Storing article {i}/{len(assessed_articles)}...")
+                    self._checkpoint_sync(stored, failed)
                 
                 try:
                     assessment = article.get("probast_assessment", {})
-                    if self.database.add_article(article, assessment):
+                    with metrics.stage('store_database'):
+                        added = self.database.add_article(article, assessment)
+                    if added:
                         stats["articles_stored"] += 1
+                        stored.append(article.get("pmid", ""))
                         
                         # Mark as usable if Low Risk
                         if self.probast.is_usable_for_model(assessment):
@@ -149,15 +162,36 @@ class LiteratureQualityWorkflow:
                             stats["usable_for_model"] += 1
                     else:
                         stats["errors"].append(f"Storage error for {article.get('pmid', 'unknown')}")
+                        failed.append(article.get("pmid", ""))
                         
                 except Exception as e:
                     logger.error(f"Error storing article {article.get('pmid', 'unknown')}: {e}")
                     stats["errors"].append(f"Storage error for {article.get('pmid', 'unknown')}: {e}")
+                    failed.append(article.get("pmid", ""))
+            
+            # Everything fetched this run is stored: advance the sync watermark
+            self._checkpoint_sync(stored, failed)
+            if self._sync_run is not None:
+                self.scraper.sync.finish(self._sync_run)
+                self._sync_run = None
             
             logger.info(f"Stored {stats['articles_stored']} articles in database")
             logger.info(f"Usable for model: {stats['usable_for_model']}")
+            metrics.count_articles('stored', stats['articles_stored'])
+            metrics.count_articles('error', len(assessed_articles) - stats['articles_stored'])
+            
+            # Step 5: Queue the next ranked batch for screening (model refit on the decisions so far)
+            batch_size = int(os.getenv('SCREENING_BATCH_SIZE', '20'))
+            if batch_size > 0:
+                try:
+                    screening = AutomatedScreening(database=self.database)
+                    stats["articles_screened"] = len(screening.queue_for_review(batch_size=batch_size))
+                    logger.info(f"Step 5: Queued {stats['articles_screened']} papers for screening")
+                except Exception as e:
+                    logger.error(f"Error queueing papers for screening: {e}")
+                    stats["errors"].append(f"Screening error: {e}")
             
-            # Step 5: Generate summary
+            # Step 6: Generate summary
             db_stats = self.database.get_statistics()
             stats["database_statistics"] = db_stats
             
@@ -171,6 +205,11 @@ class LiteratureQualityWorkflow:
             logger.info(f"Usable for model: {stats['usable_for_model']}")
             logger.info("=" * 80)
             
+            # Stage timings, request counts and throughput (PIPELINE_METRICS=1)
+            pipeline_metrics = metrics.finish(self.scraper.http_cache)
+            if pipeline_metrics:
+                stats["pipeline_metrics"] = pipeline_metrics
+            
             return stats
             
         except Exception as e:
@@ -178,51 +217,95 @@ class LiteratureQualityWorkflow:
             stats["errors"].append(f"Workflow error: {e}")
             return stats
     
+    def _checkpoint_sync(self, stored: List[str], failed: List[str]):
+        """Record stored (and failed) PMIDs in the sync checkpoint, then clear the lists"""
+        if self._sync_run is not None and (stored or failed):
+            self.scraper.sync.checkpoint(self._sync_run, stored, failed)
+        del stored[:], failed[:]
+    
     def _fetch_articles(self, max_articles: int) -> List[Dict]:
-        """Fetch articles from PubMed"""
+        """Fetch articles from PubMed (only those new since the last completed sync)"""
+        metrics = self.scraper.metrics
         try:
             # Use comprehensive search strategy
             query = self._build_comprehensive_query()
             
-            # Search PubMed
-            pmids = self.scraper.search_pubmed(query, max_results=max_articles, date_range_years=10)
-            logger.info(f"Found {len(pmids)} PMIDs")
+            # Search PubMed (incrementally once a watermark exists; resumes an interrupted run)
+            with metrics.stage('search'):
+                self._sync_run = self.scraper.sync.start(query, max_results=max_articles, date_range_years=10)
+            if self._sync_run is None:
+                return []
+            pmids = self.scraper.sync.remaining(self._sync_run)
+            revised = self.scraper.sync.revised(self._sync_run)
+            logger.info(f"Found {len(pmids)} PMIDs ({self._sync_run['mode']} sync)")
+            
+            # Fetch details
+            fetched = []
+            not_found = []
+            for i, pmid in enumerate(pmids, 1):
+                if i % 100 == 0:
+                    logger.info(f"Fetching article {i}/{len(pmids)}...")
+                try:
+                    with metrics.stage('fetch'):
+                        article_data = self.scraper.fetch_article_details(pmid, refresh=pmid in revised)
+                    if article_data:
+                        fetched.append(article_data)
+                    else:
+                        not_found.append(pmid)
+                except Exception as e:
+                    logger.warning(f"Error fetching PMID {pmid}: {e}")
+                    not_found.append(pmid)
+            self._checkpoint_sync([], not_found)
+            
+            # Near-duplicates of a stored study are linked to it and skip the OA check and extraction
+            with metrics.stage('near_duplicate_batch'):
+                duplicates = {article['pmid'] for article in fetched if self.scraper.mark_duplicate(article)}
+            if duplicates:
+                logger.info(f"{len(duplicates)} near-duplicate articles linked to their canonical records")
+            
+            # Check open access for the whole batch at once
+            unique = [article for article in fetched if article['pmid'] not in duplicates]
+            with metrics.stage('open_access_batch'):
+                oa_results = dict(zip((article['pmid'] for article in unique),
+                                      self.scraper.oa_detector.check_open_access_many(unique)))
             
             # Process articles
             articles = []
-            for i, pmid in enumerate(pmids, 1):
+            for i, article_data in enumerate(fetched, 1):
                 if i % 100 == 0:
-                    logger.info(f"Processing article {i}/{len(pmids)}...")
+                    logger.info(f"Processing article {i}/{len(fetched)}...")
                 
+                pmid = article_data.get('pmid')
                 try:
-                    article_data = self.scraper.fetch_article_details(pmid)
-                    if article_data:
-                        # Check open access
-                        oa_info = self.scraper.oa_detector.check_open_access(
-                            article_data.get('doi', ''),
-                            pmid=pmid
-                        )
+                    if pmid in oa_results:
+                        oa_info = oa_results[pmid]
                         article_data['access_type'] = 'open_access' if oa_info.get('is_open_access') else 'paywalled'
                         article_data['pdf_url'] = oa_info.get('pdf_url', '')
-                        
-                        # Calculate relevance using enhanced scorer
+                    
+                    # Calculate relevance using enhanced scorer
+                    with metrics.stage('scoring'):
                         try:
                             enhanced_score, score_breakdown = self.scraper.enhanced_scorer.calculate_relevance_score(article_data)
                             article_data['relevance_score'] = enhanced_score
                             article_data['relevance_score_breakdown'] = score_breakdown
+                            article_data['scoring_version'] = self.scraper.scoring_version
                         except Exception as e:
                             # Fallback to legacy scorer
                             logger.warning(f"Error calculating enhanced score, using legacy: {e}")
                             relevance_score = self.scraper.relevance_scorer.calculate_relevance_score(article_data)
                             article_data['relevance_score'] = relevance_score
-                        
-                        # Extract factors
+                    
+                    # Extract factors (the canonical record holds a duplicate's evidence)
+                    if pmid in duplicates:
+                        article_data['predictive_factors'] = []
+                    else:
                         text = f"{article_data.get('title', '')} {article_data.get('abstract', '')}"
-                        factors = self.scraper.factor_extractor.extract_predictive_factors(text)
+                        with metrics.stage('factor_extraction'):
+                            factors = self.scraper.factor_extractor.extract_predictive_factors(text)
                         article_data['predictive_factors'] = factors
-                        
-                        articles.append(article_data)
-                        
+                    
+                    articles.append(article_data)
+                    
                 except Exception as e:
                     logger.warning(f"Error processing PMID {pmid}: {e}")
                     continue
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Materialized Literature Statistics
+Summary counts of the papers table, kept current by SQLite triggers so status
+pages and reports read a bounded number of rows instead of scanning papers.
+
+paper_stats holds one row per (dimension, value, used_in_model) with the
+number of papers and the sum/count of their relevance scores. Dimensions:
+    total          -- a single '' value
+    access_type    -- papers.access_type
+    probast_risk   -- papers.probast_risk
+    score_bucket   -- relevance_score rounded down to a multiple of SCORE_BUCKET_WIDTH
+    month          -- YYYY-MM of date_added
+NULL values are stored as ''. Every write to papers (LiteratureDatabase or a
+script's own UPDATE) adjusts the affected rows in the same transaction.
+
+The table is filled from papers when first created. If it is ever suspected to
+have drifted (e.g. the triggers were dropped or the file was edited by hand),
+rebuild it with:
+    python scripts/literature_stats.py --reconcile [--db data/literature.db]
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+STATS_TABLE = 'paper_stats'
+STATS_DIMENSIONS = ('total', 'access_type', 'probast_risk', 'score_bucket', 'month')
+SCORE_BUCKET_WIDTH = 10
+# Columns of papers that feed a dimension (updates to other columns do not touch the stats)
+STATS_SOURCE_COLUMNS = ('access_type', 'probast_risk', 'used_in_model', 'relevance_score', 'date_added')
+
+
+def _dimension_values(row: str) -> List[Tuple[str, str]]:
+    """(dimension, SQL value expression) over a trigger row alias (NEW/OLD) or a table alias"""
+    return [
+        ('total', "''"),
+        ('access_type', f"COALESCE({row}.access_type, '')"),
+        ('probast_risk', f"COALESCE({row}.probast_risk, '')"),
+        ('score_bucket', f"CASE WHEN {row}.relevance_score IS NULL THEN '' ELSE "
+                         f"CAST(CAST({row}.relevance_score / {SCORE_BUCKET_WIDTH} AS INTEGER) "
+                         f"* {SCORE_BUCKET_WIDTH} AS TEXT) END"),
+        ('month', f"COALESCE(substr({row}.date_added, 1, 7), '')"),
+    ]
+
+
+def _used(row: str) -> str:
+    return f"CASE WHEN {row}.used_in_model THEN 1 ELSE 0 END"
+
+
+def _adjust_statements(row: str, sign: str) -> str:
+    """Trigger statements adding (sign '+') or removing (sign '-') one paper's contribution"""
+    score = f"{row}.relevance_score"
+    statements = []
+    for dimension, value in _dimension_values(row):
+        statements.append(f'''
+            INSERT INTO {STATS_TABLE} (dimension, value, used_in_model, papers, score_count, score_sum)
+            VALUES ('{dimension}', {value}, {_used(row)}, {sign}1,
+                    {sign}({score} IS NOT NULL), {sign}COALESCE({score}, 0))
+            ON CONFLICT (dimension, value, used_in_model) DO UPDATE SET
+                papers = papers + excluded.papers,
+                score_count = score_count + excluded.score_count,
+                score_sum = score_sum + excluded.score_sum;''')
+    return ''.join(statements)
+
+
+def create_stats_tables(conn: sqlite3.Connection) -> bool:
+    """
+    Create paper_stats and its triggers on papers (no-op if they exist)
+
+    Args:
+        conn: Connection to a database with a papers table
+
+    Returns:
+        True if the table was newly created and filled from papers
+    """
+    created = conn.execute('SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?',
+                           ('table', STATS_TABLE)).fetchone() is None
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            used_in_model INTEGER NOT NULL,
+            papers INTEGER NOT NULL DEFAULT 0,
+            score_count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value, used_in_model)
+        ) WITHOUT ROWID
+    ''')
+    changed = ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in STATS_SOURCE_COLUMNS)
+    conn.executescript(f'''
+        CREATE TRIGGER IF NOT EXISTS papers_stats_insert AFTER INSERT ON papers
+        BEGIN{_adjust_statements('NEW', '+')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS papers_stats_delete AFTER DELETE ON papers
+        BEGIN{_adjust_statements('OLD', '-')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS papers_stats_update
+        AFTER UPDATE OF {', '.join(STATS_SOURCE_COLUMNS)} ON papers
+        WHEN {changed}
+        BEGIN{_adjust_statements('OLD', '-')}{_adjust_statements('NEW', '+')}
+        END;
+    ''')
+    if created:
+        _fill(conn)
+    return created
+
+
+def _computed_rows(conn: sqlite3.Connection) -> Dict[Tuple[str, str, int], Tuple[int, int, float]]:
+    """Statistics recomputed from papers with GROUP BY scans"""
+    rows = {}
+    for dimension, value in _dimension_values('p'):
+        for row in conn.execute(f'''
+            SELECT {value}, {_used('p')}, COUNT(*), COUNT(p.relevance_score), COALESCE(SUM(p.relevance_score), 0)
+            FROM papers p GROUP BY 1, 2
+        '''):
+            rows[(dimension, row[0], row[1])] = (row[2], row[3], float(row[4]))
+    return rows
+
+
+def _fill(conn: sqlite3.Connection):
+    conn.execute(f'DELETE FROM {STATS_TABLE}')
+    conn.executemany(
+        f'INSERT INTO {STATS_TABLE} (dimension, value, used_in_model, papers, score_count, score_sum) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [key + counts for key, counts in _computed_rows(conn).items()]
+    )
+
+
+def reconcile(conn: sqlite3.Connection, repair: bool = True) -> List[Dict]:
+    """
+    Compare paper_stats with a full recount of papers
+
+    Args:
+        conn: Database connection
+        repair: Rebuild paper_stats from the recount if they differ
+
+    Returns:
+        One entry per differing row: dimension, value, used_in_model, stored and actual
+        (papers, score_count, score_sum); empty when the table is accurate
+    """
+    create_stats_tables(conn)
+    stored = {(row[0], row[1], row[2]): (row[3], row[4], float(row[5])) for row in conn.execute(
+        f'SELECT dimension, value, used_in_model, papers, score_count, score_sum FROM {STATS_TABLE} '
+        'WHERE papers != 0 OR score_count != 0')}
+    actual = _computed_rows(conn)
+    differences = []
+    for key in sorted(set(stored) | set(actual)):
+        have = stored.get(key, (0, 0, 0.0))
+        want = actual.get(key, (0, 0, 0.0))
+        if have[:2] != want[:2] or abs(have[2] - want[2]) > 1e-6:
+            differences.append({'dimension': key[0], 'value': key[1], 'used_in_model': key[2],
+                                'stored': have, 'actual': want})
+    if differences and repair:
+        _fill(conn)
+        conn.commit()
+        logger.warning(f"Rebuilt {STATS_TABLE}: {len(differences)} rows had drifted")
+    return differences
+
+
+class LiteratureStatistics:
+    """Read access to the materialized statistics of one database connection"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Connection to a database whose paper_stats table exists
+        """
+        self.conn = conn
+
+    def _rows(self, dimension: str, used_only: bool = False) -> List[Tuple]:
+        query = (f'SELECT value, SUM(papers), SUM(score_count), SUM(score_sum) FROM {STATS_TABLE} '
+                 'WHERE dimension = ?')
+        if used_only:
+            query += ' AND used_in_model = 1'
+        return self.conn.execute(query + ' GROUP BY value HAVING SUM(papers) > 0', (dimension,)).fetchall()
+
+    def counts(self, dimension: str, used_only: bool = False) -> Dict[Optional[str], int]:
+        """
+        Paper counts by value of a dimension
+
+        Args:
+            dimension: One of STATS_DIMENSIONS
+            used_only: Only papers used in the model
+
+        Returns:
+            value -> count ('' values, i.e. NULL in papers, are returned as None)
+        """
+        if dimension not in STATS_DIMENSIONS:
+            raise ValueError(f"Unknown statistics dimension: {dimension}")
+        return {(value or None): count for value, count, _, _ in self._rows(dimension, used_only)}
+
+    def total(self, used_only: bool = False) -> int:
+        """Number of papers (optionally only those used in the model)"""
+        return sum(self.counts('total', used_only).values())
+
+    def count(self, dimension: str, value: Optional[str], used_only: bool = False) -> int:
+        """Number of papers with one value of a dimension"""
+        return self.counts(dimension, used_only).get(value, 0)
+
+    def score_histogram(self, used_only: bool = False) -> Dict[int, int]:
+        """Scored papers per relevance score bucket (bucket lower bound -> count)"""
+        return dict(sorted((int(value), count) for value, count in self.counts('score_bucket', used_only).items()
+                           if value is not None))
+
+    def score_summary(self, used_only: bool = False) -> Dict:
+        """
+        Relevance score summary
+
+        Returns:
+            {'count', 'avg', 'min', 'max'}; min/max come from the relevance_score index
+        """
+        rows = self._rows('total', used_only)
+        count = sum(row[2] for row in rows)
+        score_sum = sum(row[3] for row in rows)
+        where = 'relevance_score IS NOT NULL' + (' AND used_in_model = 1' if used_only else '')
+        bounds = self.conn.execute(
+            f'SELECT (SELECT relevance_score FROM papers WHERE {where} ORDER BY relevance_score LIMIT 1), '
+            f'(SELECT relevance_score FROM papers WHERE {where} ORDER BY relevance_score DESC LIMIT 1)'
+        ).fetchone() if count else (None, None)
+        return {'count': count, 'avg': score_sum / count if count else None, 'min': bounds[0], 'max': bounds[1]}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check or rebuild the materialized literature statistics')
+    parser.add_argument('--db', default=None, help='Database path (default: data/literature.db)')
+    parser.add_argument('--reconcile', action='store_true', help='Rebuild the statistics if they have drifted')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_path = args.db or os.path.join(project_root, 'data', 'literature.db')
+    if not os.path.exists(db_path):
+        print(f"Database not found: {db_path}")
+        sys.exit(1)
+
+    from scripts.literature_database import LiteratureDatabase
+    LiteratureDatabase(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        differences = reconcile(conn, repair=args.reconcile)
+    finally:
+        conn.close()
+    for diff in differences:
+        print(f"{diff['dimension']}={diff['value']!r} used={diff['used_in_model']}: "
+              f"stored {diff['stored']} actual {diff['actual']}")
+    if not differences:
+        print("Statistics are consistent with papers")
+    elif args.reconcile:
+        print(f"Rebuilt statistics ({len(differences)} rows differed)")
+    else:
+        print(f"{len(differences)} rows differ; run with --reconcile to rebuild")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
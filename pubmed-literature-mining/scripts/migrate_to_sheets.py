@@ -107,6 +107,10 @@ def migrate_articles():
             error_count += 1
             logger.error(f"❌ Error processing {article_file.name}: {e}")
     
+    # Inserts are queued; write the remainder in one batch
+    if not sheets_storage.flush():
+        logger.error("Some articles could not be written to Google Sheets")
+    
     logger.info("=" * 80)
     logger.info("MIGRATION COMPLETE")
     logger.info(f"  ✅ Success: {success_count}")
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Article Detection
+MinHash signatures over normalized title + abstract word shingles, with an
+LSH index to find records of the same study under different PMIDs (errata,
+preprint and journal versions, conference abstracts, duplicate-language
+records).
+
+Each article's signature is stored in data/near_duplicates.db with its LSH
+band buckets. When a new article's estimated Jaccard similarity to an indexed
+one reaches SIMILARITY_THRESHOLD it is linked to that article's canonical
+record (the first one indexed), and the scraper skips its PDF download and
+factor extraction. Duplicates keep no predictive factors, so they do not
+inflate factor evidence counts.
+
+Run this script to index an existing corpus and mark the duplicates in it:
+    python scripts/near_duplicates.py [--dry-run]
+"""
+
+import os
+import re
+import sys
+import zlib
+import struct
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity share a bucket with high probability
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.8
+# Texts with fewer shingles (e.g. a bare title) are too short to compare reliably
+MIN_SHINGLES = 8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERMUTATIONS)]
+_WORD = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercased words without punctuation"""
+    return _WORD.findall((text or '').lower())
+
+
+def article_shingles(article: Dict) -> Set[int]:
+    """Hashed word shingles of an article's title and abstract"""
+    words = normalize_text(f"{article.get('title') or ''} {article.get('abstract') or ''}")
+    if len(words) < SHINGLE_SIZE:
+        return set()
+    return {zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+            for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles: Set[int]) -> Optional[List[int]]:
+    """MinHash signature of a shingle set (None if the set is too small)"""
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    return [min((a * x + b) % _MERSENNE_PRIME for x in shingles) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(signature: List[int], other: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+def band_buckets(signature: List[int]) -> List[str]:
+    """LSH bucket key of each band"""
+    rows = len(signature) // LSH_BANDS
+    return [hashlib.blake2b(_pack(signature[i * rows:(i + 1) * rows]), digest_size=8).hexdigest()
+            for i in range(LSH_BANDS)]
+
+
+def _pack(values: List[int]) -> bytes:
+    return struct.pack(f'<{len(values)}Q', *values)
+
+
+def _unpack(blob: bytes) -> List[int]:
+    return list(struct.unpack(f'<{len(blob) // 8}Q', blob))
+
+
+def _default_path() -> str:
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'near_duplicates.db')
+
+
+class NearDuplicateIndex:
+    """Stored MinHash signatures with an LSH index over their bands"""
+
+    def __init__(self, path: Optional[str] = None, threshold: float = SIMILARITY_THRESHOLD):
+        """
+        Open (or create) the index
+
+        Args:
+            path: SQLite file (default: data/near_duplicates.db; ':memory:' for a throwaway index)
+            threshold: Estimated Jaccard similarity at which articles are duplicates
+        """
+        self.path = path or _default_path()
+        self.threshold = threshold
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS signatures (
+                pmid TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                canonical_pmid TEXT,
+                similarity REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_signatures_canonical ON signatures(canonical_pmid);
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                pmid TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, pmid)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_lsh_buckets_pmid ON lsh_buckets(pmid);
+        ''')
+        self._conn.commit()
+
+    def _find(self, pmid: str, signature: List[int]) -> Optional[Dict]:
+        candidates = set()
+        for band, bucket in enumerate(band_buckets(signature)):
+            candidates.update(row[0] for row in self._conn.execute(
+                'SELECT pmid FROM lsh_buckets WHERE band = ? AND bucket = ?', (band, bucket)))
+        candidates.discard(pmid)
+
+        best = None
+        for candidate in candidates:
+            row = self._conn.execute('SELECT signature, canonical_pmid FROM signatures WHERE pmid = ?',
+                                     (candidate,)).fetchone()
+            if row is None:
+                continue
+            similarity = estimate_similarity(signature, _unpack(row[0]))
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = {'duplicate_of': row[1] or candidate, 'matched_pmid': candidate, 'similarity': similarity}
+        if best is not None and best['duplicate_of'] == pmid:
+            # The article is itself the canonical record of its match
+            return None
+        return best
+
+    def check_article(self, article: Dict) -> Optional[Dict]:
+        """
+        Index an article and report whether it duplicates an indexed one
+
+        Args:
+            article: Article dictionary with pmid, title and abstract
+
+        Returns:
+            {'duplicate_of': canonical PMID, 'matched_pmid', 'similarity'}, or None if
+            the article is not a near-duplicate (or its text is too short to tell)
+        """
+        pmid = str(article['pmid'])
+        signature = minhash_signature(article_shingles(article))
+        if signature is None:
+            return None
+        with self._lock:
+            try:
+                match = self._find(pmid, signature)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO signatures (pmid, signature, canonical_pmid, similarity) '
+                    'VALUES (?, ?, ?, ?)',
+                    (pmid, _pack(signature), match['duplicate_of'] if match else None,
+                     match['similarity'] if match else None)
+                )
+                self._conn.execute('DELETE FROM lsh_buckets WHERE pmid = ?', (pmid,))
+                self._conn.executemany('INSERT OR IGNORE INTO lsh_buckets (band, bucket, pmid) VALUES (?, ?, ?)',
+                                       [(band, bucket, pmid) for band, bucket in enumerate(band_buckets(signature))])
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if match:
+            logger.info(f"PMID {pmid} is a near-duplicate of {match['duplicate_of']} "
+                        f"(similarity {match['similarity']:.2f})")
+        return match
+
+    def canonical_of(self, pmid: str) -> Optional[str]:
+        """Canonical PMID an article was linked to (None if it is not a duplicate)"""
+        with self._lock:
+            row = self._conn.execute('SELECT canonical_pmid FROM signatures WHERE pmid = ?',
+                                     (str(pmid),)).fetchone()
+        return row[0] if row else None
+
+    def get_duplicates(self, pmid: str) -> List[str]:
+        """PMIDs linked to an article as its duplicates"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                'SELECT pmid FROM signatures WHERE canonical_pmid = ? ORDER BY pmid', (str(pmid),))]
+
+    def indexed_pmids(self) -> Set[str]:
+        """PMIDs with a stored signature"""
+        with self._lock:
+            return {row[0] for row in self._conn.execute('SELECT pmid FROM signatures')}
+
+    def scratch_copy(self) -> 'NearDuplicateIndex':
+        """In-memory copy of the index: articles checked against it leave this index untouched"""
+        copy = NearDuplicateIndex(':memory:', threshold=self.threshold)
+        with self._lock:
+            self._conn.backup(copy._conn)
+        return copy
+
+    def close(self):
+        """Close the index database"""
+        with self._lock:
+            self._conn.close()
+
+
+def index_corpus(storage, index: NearDuplicateIndex, dry_run: bool = False) -> Dict[str, Dict]:
+    """
+    Index stored articles that have no signature yet and mark their duplicates
+
+    Articles are indexed in PMID order, so the earliest record becomes canonical.
+
+    Args:
+        storage: FileStorage
+        index: Near-duplicate index
+        dry_run: Report duplicates without marking the articles or storing their
+            signatures (they are checked against a throwaway copy of the index)
+
+    Returns:
+        PMID -> match for every duplicate found
+    """
+    if dry_run:
+        index = index.scratch_copy()
+    indexed = index.indexed_pmids()
+    pending = sorted((pmid for pmid in storage.index if pmid not in indexed),
+                     key=lambda pmid: (len(pmid), pmid))
+    duplicates = {}
+    for article in storage.load_articles(pending):
+        if article.get('duplicate_of'):
+            continue
+        match = index.check_article(article)
+        if match:
+            duplicates[article['pmid']] = match
+    if duplicates and not dry_run:
+        storage.insert_articles([{'pmid': pmid, 'duplicate_of': match['duplicate_of'],
+                                  'duplicate_similarity': round(match['similarity'], 3)}
+                                 for pmid, match in duplicates.items()])
+    return duplicates
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Index stored articles and mark near-duplicates')
+    parser.add_argument('--dry-run', action='store_true', help='Report duplicates without marking them')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from scripts.file_storage import FileStorage
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    storage = FileStorage(os.path.join(project_root, 'data', 'articles'))
+    duplicates = index_corpus(storage, NearDuplicateIndex(), dry_run=args.dry_run)
+    for pmid, match in sorted(duplicates.items()):
+        print(f"{pmid} -> {match['duplicate_of']} (similarity {match['similarity']:.2f})")
+    print(f"{len(duplicates)} near-duplicates {'found' if args.dry_run else 'marked'}")
+
+
+if __name__ == '__main__':
+    main()
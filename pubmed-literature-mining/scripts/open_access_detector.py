@@ -8,11 +8,11 @@ import os
 import logging
 import requests
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-import pdfplumber
-import PyPDF2
-from io import BytesIO
+from scripts.http_cache import get_http_cache, OfflineCacheMiss, DAY
+from scripts.pdf_downloader import PDFDownloadManager
+from scripts.pdf_text import get_pdf_text_extractor, join_pages
 
 load_dotenv()
 
@@ -25,23 +25,36 @@ class OpenAccessDetector:
     UNPAYWALL_BASE = "https://api.unpaywall.org/v2"
     EUROPE_PMC_BASE = "https://www.ebi.ac.uk/europepmc/webservices/rest"
     PMC_BASE = "https://www.ncbi.nlm.nih.gov/pmc"
+    PMC_IDCONV = "https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/"
     
     REQUEST_DELAY = 0.1  # Rate limiting
+    IDCONV_BATCH_SIZE = 200  # PMC ID converter limit
+    EUROPE_PMC_BATCH_SIZE = 50  # OR-ed identifiers per Europe PMC search (keeps URLs short)
+    OA_RESULT_TTL = 30 * DAY
     
     def __init__(self):
         self.email = os.getenv('UNPAYWALL_EMAIL', 'parker@stroomai.com')
         self.pdf_dir = 'data/pdfs'
         os.makedirs(self.pdf_dir, exist_ok=True)
+        self.http_cache = get_http_cache()  # OA status lookups are reused for 30 days
+        self._downloader = None
     
     def _make_request(self, url: str, params: Optional[Dict] = None, retry_count: int = 0) -> Optional[requests.Response]:
-        """Make HTTP request with retry logic"""
+        """Make HTTP request with retry logic (served from the HTTP cache when possible)"""
+        cached = self.http_cache.lookup('GET', url, params)
+        if cached is not None:
+            return cached
         try:
             time.sleep(self.REQUEST_DELAY)
-            response = requests.get(url, params=params, timeout=30)
+            response = self.http_cache.fetch('GET', url, params=params, timeout=30)
             response.raise_for_status()
             return response
+        except OfflineCacheMiss as e:
+            logger.warning(f"{e}")
+            return None
         except requests.exceptions.RequestException as e:
             if retry_count < 2:
+                self.http_cache.metrics.record_retry(url, 2 ** retry_count)
                 time.sleep(2 ** retry_count)
                 return self._make_request(url, params, retry_count + 1)
             logger.warning(f"Request failed: {e}")
@@ -165,6 +178,13 @@ class OpenAccessDetector:
         Returns:
             Dictionary with is_open_access, pdf_url, and source
         """
+        # Reuse a status resolved by check_open_access_many
+        key = self._oa_key(doi, pmid)
+        if key:
+            memoized = self.http_cache.get_value('open_access', key)
+            if memoized is not None:
+                return memoized
+        
         # Try Unpaywall first (most reliable)
         result = self.check_unpaywall(doi)
         if result and result.get('is_open_access'):
@@ -188,9 +208,172 @@ class OpenAccessDetector:
             'source': 'none'
         }
     
+    @property
+    def downloader(self) -> PDFDownloadManager:
+        """Shared download manager for pdf_dir, created on first use"""
+        if self._downloader is None:
+            self._downloader = PDFDownloadManager(self.pdf_dir)
+        return self._downloader
+    
+    @staticmethod
+    def _oa_key(doi: Optional[str], pmid: Optional[str]) -> Optional[str]:
+        """Memo key for an article's OA status"""
+        if pmid:
+            return f"pmid:{pmid}"
+        if doi:
+            return f"doi:{doi.lower()}"
+        return None
+    
+    def _resolve_pmcids(self, entries: List[Dict]):
+        """PMC ID converter in batches: a PMCID means the article is in PMC"""
+        by_pmid = {entry['pmid']: entry for entry in entries if entry['pmid']}
+        pmids = list(by_pmid)
+        for start in range(0, len(pmids), self.IDCONV_BATCH_SIZE):
+            batch = pmids[start:start + self.IDCONV_BATCH_SIZE]
+            params = {'ids': ','.join(batch), 'format': 'json', 'tool': 'PubMedLiteratureMining', 'email': self.email}
+            response = self._make_request(self.PMC_IDCONV, params)
+            try:
+                records = response.json().get('records', []) if response else None
+            except ValueError:
+                records = None
+            if records is None:
+                logger.warning(f"PMC ID conversion failed for {len(batch)} PMIDs")
+                for pmid in batch:
+                    by_pmid[pmid]['failed'] = True
+                continue
+            
+            for record in records:
+                entry = by_pmid.get(str(record.get('pmid', '')))
+                if not entry:
+                    continue
+                if not entry['doi'] and record.get('doi'):
+                    entry['doi'] = record['doi']
+                pmcid = record.get('pmcid')
+                if pmcid:
+                    entry['result'] = {
+                        'is_open_access': True,
+                        'pdf_url': f"{self.PMC_BASE}/articles/{pmcid}/pdf",
+                        'source': 'pmc'
+                    }
+    
+    def _search_europe_pmc_batch(self, entries: List[Dict]):
+        """One Europe PMC search for a group of articles, OR-ing their DOIs and PMIDs"""
+        terms = []
+        by_doi = {}
+        by_pmid = {}
+        for entry in entries:
+            if entry['doi']:
+                terms.append(f'DOI:"{entry["doi"]}"')
+                by_doi[entry['doi'].lower()] = entry
+            if entry['pmid']:
+                terms.append(f'EXT_ID:{entry["pmid"]}')
+                by_pmid[entry['pmid']] = entry
+        
+        params = {
+            'query': ' OR '.join(terms),
+            'format': 'json',
+            'resultType': 'core',
+            'pageSize': 1000
+        }
+        response = self._make_request(f"{self.EUROPE_PMC_BASE}/search", params)
+        try:
+            results = response.json().get('resultList', {}).get('result', []) if response else None
+        except ValueError:
+            results = None
+        if results is None:
+            logger.warning(f"Europe PMC batch search failed for {len(entries)} articles")
+            for entry in entries:
+                entry['failed'] = True
+            return
+        
+        for result in results:
+            by_id = by_pmid.get(str(result.get('pmid', '')))
+            entry = by_id or by_doi.get((result.get('doi') or '').lower())
+            if not entry or entry.get('result'):
+                continue
+            if not entry['doi'] and result.get('doi'):
+                entry['doi'] = result['doi']
+            if by_id is not None and result.get('pmcid'):
+                # Same rule as check_pmc
+                entry['result'] = {
+                    'is_open_access': True,
+                    'pdf_url': f"{self.PMC_BASE}/articles/{result['pmcid']}/pdf",
+                    'source': 'pmc'
+                }
+            elif result.get('isOpenAccess') == 'Y' and result.get('pdfUrl'):
+                # Same rule as check_europe_pmc
+                entry['result'] = {
+                    'is_open_access': True,
+                    'pdf_url': result['pdfUrl'],
+                    'source': 'europe_pmc'
+                }
+    
+    def check_open_access_many(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Check open access status for many articles with batched lookups
+        
+        Resolves PMIDs to PMCIDs 200 at a time through the PMC ID converter,
+        searches Europe PMC for the rest with OR-batched DOI/PMID queries, and
+        only calls Unpaywall per DOI for articles still unresolved. Statuses are
+        memoized for OA_RESULT_TTL (lookups that failed are not memoized), and
+        check_open_access reuses them.
+        
+        Args:
+            articles: Dictionaries with 'doi' and/or 'pmid'
+            
+        Returns:
+            One result per article, in order (same shape as check_open_access)
+        """
+        not_open_access = {'is_open_access': False, 'pdf_url': None, 'source': 'none'}
+        results = [None] * len(articles)
+        pending = {}
+        for index, article in enumerate(articles):
+            pmid = str(article.get('pmid') or '').strip()
+            doi = (article.get('doi') or '').strip()
+            key = self._oa_key(doi, pmid)
+            if key is None:
+                results[index] = dict(not_open_access)
+                continue
+            memoized = self.http_cache.get_value('open_access', key)
+            if memoized is not None:
+                results[index] = memoized
+                continue
+            entry = pending.setdefault(key, {'pmid': pmid, 'doi': doi, 'indices': [], 'failed': False})
+            entry['indices'].append(index)
+        
+        entries = list(pending.values())
+        if entries:
+            self._resolve_pmcids(entries)
+            
+            remaining = [entry for entry in entries if not entry.get('result')]
+            for start in range(0, len(remaining), self.EUROPE_PMC_BATCH_SIZE):
+                self._search_europe_pmc_batch(remaining[start:start + self.EUROPE_PMC_BATCH_SIZE])
+            
+            for entry in entries:
+                if entry.get('result') or not entry['doi']:
+                    continue
+                result = self.check_unpaywall(entry['doi'])
+                if result is None:
+                    entry['failed'] = True
+                elif result.get('is_open_access'):
+                    entry['result'] = result
+        
+        resolved = {}
+        for key, entry in pending.items():
+            result = entry.get('result') or dict(not_open_access)
+            for index in entry['indices']:
+                results[index] = result
+            if not entry['failed'] or entry.get('result'):
+                resolved[key] = result
+        self.http_cache.set_values('open_access', resolved, ttl=self.OA_RESULT_TTL)
+        
+        logger.info(f"Open access resolved for {len(articles)} articles "
+                    f"({len(articles) - sum(len(e['indices']) for e in entries)} memoized)")
+        return results
+    
     def download_pdf(self, pdf_url: str, pmid: str) -> Optional[str]:
         """
-        Download PDF and save to disk
+        Download PDF and save to disk (resumable, deduplicated by content hash)
         
         Args:
             pdf_url: URL to PDF
@@ -199,35 +382,23 @@ class OpenAccessDetector:
         Returns:
             Path to saved PDF or None if failed
         """
-        try:
-            response = requests.get(pdf_url, timeout=60, stream=True)
-            response.raise_for_status()
-            
-            # Check if content is actually PDF
-            content_type = response.headers.get('Content-Type', '')
-            if 'pdf' not in content_type.lower():
-                # Check first bytes
-                content = response.content[:4]
-                if content[:4] != b'%PDF':
-                    logger.warning(f"URL {pdf_url} does not appear to be a PDF")
-                    return None
-            
-            # Save PDF
-            pdf_path = os.path.join(self.pdf_dir, f"{pmid}.pdf")
-            with open(pdf_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            logger.info(f"Downloaded PDF for PMID {pmid}")
-            return pdf_path
+        return self.downloader.download(pmid, pdf_url)
+    
+    def download_pdfs(self, items) -> Dict[str, Optional[str]]:
+        """
+        Download many PDFs concurrently (bounded pool, per-host limits, resume, dedupe)
+        
+        Args:
+            items: (pmid, pdf_url) pairs
             
-        except Exception as e:
-            logger.error(f"Error downloading PDF from {pdf_url}: {e}")
-            return None
+        Returns:
+            Mapping of PMID to saved path (None if failed)
+        """
+        return self.downloader.download_many(items)
     
     def extract_pdf_text(self, pdf_path: str) -> str:
         """
-        Extract text from PDF file
+        Extract text from PDF file (cached by content hash, parsed in a worker process)
         
         Args:
             pdf_path: Path to PDF file
@@ -235,28 +406,6 @@ class OpenAccessDetector:
         Returns:
             Extracted text as string
         """
-        text = ""
-        
-        try:
-            # Try pdfplumber first (better for complex layouts)
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            logger.warning(f"pdfplumber failed for {pdf_path}, trying PyPDF2: {e}")
-            try:
-                # Fallback to PyPDF2
-                with open(pdf_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-            except Exception as e2:
-                logger.error(f"Both PDF extraction methods failed for {pdf_path}: {e2}")
-                return ""
-        
-        return text.strip()
+        result = get_pdf_text_extractor().extract(pdf_path)
+        return join_pages(result['pages']).strip()
 
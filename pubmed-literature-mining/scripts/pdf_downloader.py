@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Concurrent PDF Download Manager
+Downloads open access PDFs with a bounded worker pool, a per-host concurrency
+limit, HTTP range resume and content-addressed storage.
+
+Bytes are streamed into data/pdfs/.part/ and a dropped connection resumes from
+the last byte received (Range request) instead of starting over. Finished files
+are stored once under data/pdfs/objects/<sha256>.pdf; data/pdfs/<pmid>.pdf is a
+hard link to that object, so mirrors of the same paper take no extra space and
+existing pdf_path values keep working. data/pdfs/manifest.json maps each PMID to
+its hash, path and source URL.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pipeline_metrics import get_pipeline_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 2
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+MAX_ATTEMPTS = 4
+CHUNK_SIZE = 64 * 1024
+MANIFEST_SAVE_EVERY = 25
+
+
+class DownloadRejected(Exception):
+    """The response is not a PDF, or is larger than the size cap"""
+
+
+class PDFDownloadManager:
+    """Bounded, resumable, deduplicating PDF downloader"""
+
+    def __init__(self, pdf_dir: str = 'data/pdfs', max_workers: int = DEFAULT_MAX_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_attempts: int = MAX_ATTEMPTS, session: Optional[requests.Session] = None):
+        """
+        Initialize the manager
+
+        Args:
+            pdf_dir: Directory for <pmid>.pdf files, objects/, .part/ and manifest.json
+            max_workers: Downloads running at once
+            per_host_limit: Downloads running at once against a single host
+            max_bytes: Size cap per PDF
+            max_attempts: Attempts per PDF (later attempts resume the partial file)
+            session: Session used for requests
+        """
+        self.pdf_dir = pdf_dir
+        self.objects_dir = os.path.join(pdf_dir, 'objects')
+        self.part_dir = os.path.join(pdf_dir, '.part')
+        self.manifest_path = os.path.join(pdf_dir, 'manifest.json')
+        for directory in (self.pdf_dir, self.objects_dir, self.part_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_bytes = max_bytes
+        self.max_attempts = max(1, max_attempts)
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.per_host_limit)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.metrics = get_pipeline_metrics()
+
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read PDF manifest, starting a new one: {e}")
+        return {}
+
+    def save_manifest(self):
+        """Write the manifest atomically"""
+        with self._lock:
+            data = json.dumps(self._manifest, indent=2, sort_keys=True)
+            self._unsaved = 0
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get(self, pmid: str) -> Optional[Dict]:
+        """Manifest entry for a PMID whose file is still on disk"""
+        entry = self._manifest.get(str(pmid))
+        if entry and os.path.exists(entry['path']):
+            return entry
+        return None
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _part_path(self, pmid: str, url: str) -> str:
+        url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.part_dir, f"{pmid}-{url_hash}.part")
+
+    def _fetch_to_part(self, url: str, part_path: str):
+        """Stream url into part_path, resuming from its current size"""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        self.metrics.record_request(url)
+        with self.session.get(url, headers=headers, stream=True, timeout=(15, 60)) as response:
+            if response.status_code == 416:
+                # Our partial file doesn't match the server's copy; start over
+                os.remove(part_path)
+                raise requests.exceptions.RequestException(f"Range not satisfiable for {url}")
+            response.raise_for_status()
+
+            if offset and response.status_code != 206:
+                offset = 0  # server ignored the range
+            declared = response.headers.get('Content-Length')
+            if declared and declared.isdigit() and offset + int(declared) > self.max_bytes:
+                raise DownloadRejected(f"{url} is {offset + int(declared)} bytes (cap {self.max_bytes})")
+            is_pdf_type = 'pdf' in response.headers.get('Content-Type', '').lower()
+
+            written = offset
+            checked = offset > 0 or is_pdf_type
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if not checked:
+                        if chunk[:4] != b'%PDF':
+                            raise DownloadRejected(f"URL {url} does not appear to be a PDF")
+                        checked = True
+                    written += len(chunk)
+                    if written > self.max_bytes:
+                        raise DownloadRejected(f"{url} exceeds the {self.max_bytes} byte cap")
+                    f.write(chunk)
+
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _store(self, pmid: str, url: str, part_path: str) -> str:
+        """Move a finished part file into content-addressed storage and link <pmid>.pdf to it"""
+        sha256 = self._file_sha256(part_path)
+        object_path = os.path.join(self.objects_dir, f"{sha256}.pdf")
+        if os.path.exists(object_path):
+            os.remove(part_path)  # same content already stored (e.g. a mirror)
+        else:
+            os.replace(part_path, object_path)
+
+        pdf_path = os.path.join(self.pdf_dir, f"{pmid}.pdf")
+        if os.path.lexists(pdf_path):
+            os.remove(pdf_path)
+        try:
+            os.link(object_path, pdf_path)
+        except OSError:
+            shutil.copyfile(object_path, pdf_path)
+
+        with self._lock:
+            self._manifest[str(pmid)] = {
+                'sha256': sha256,
+                'path': pdf_path,
+                'object': object_path,
+                'url': url,
+                'size': os.path.getsize(object_path),
+                'downloaded_at': datetime.now().isoformat()
+            }
+            self._unsaved += 1
+        return pdf_path
+
+    def _download(self, pmid: str, url: str) -> Optional[str]:
+        existing = self.get(pmid)
+        if existing:
+            return existing['path']
+
+        part_path = self._part_path(pmid, url)
+        slot = self._host_slot(url)
+        for attempt in range(self.max_attempts):
+            try:
+                with slot:
+                    self._fetch_to_part(url, part_path)
+                path = self._store(pmid, url, part_path)
+                logger.info(f"Downloaded PDF for PMID {pmid}")
+                return path
+            except DownloadRejected as e:
+                logger.warning(f"{e}")
+                break
+            except (requests.exceptions.RequestException, OSError) as e:
+                if attempt + 1 < self.max_attempts:
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Download of PMID {pmid} interrupted, resuming in {wait_time}s: {e}")
+                    self.metrics.record_retry(url, wait_time)
+                    time.sleep(wait_time)
+                else:
+                    logger.error(f"Error downloading PDF from {url}: {e}")
+                    # Keep the partial file so a later run can resume it
+                    return None
+
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return None
+
+    def download(self, pmid: str, url: str) -> Optional[str]:
+        """
+        Download one PDF (or reuse the stored copy)
+
+        Returns:
+            Path to <pmid>.pdf or None if failed
+        """
+        path = self._download(str(pmid), url)
+        if self._unsaved:
+            self.save_manifest()
+        return path
+
+    def download_many(self, items: Iterable[Tuple[str, str]]) -> Dict[str, Optional[str]]:
+        """
+        Download many PDFs concurrently
+
+        Args:
+            items: (pmid, url) pairs; only the first URL of a repeated PMID is used
+
+        Returns:
+            Mapping of PMID to path (None when the download failed)
+        """
+        jobs = {}
+        for pmid, url in items:
+            if url and str(pmid) not in jobs:
+                jobs[str(pmid)] = url
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._download, pmid, url): pmid for pmid, url in jobs.items()}
+            for done, future in enumerate(as_completed(futures), 1):
+                pmid = futures[future]
+                try:
+                    results[pmid] = future.result()
+                except Exception as e:
+                    logger.error(f"Unexpected error downloading PMID {pmid}: {e}")
+                    results[pmid] = None
+                if self._unsaved >= MANIFEST_SAVE_EVERY:
+                    self.save_manifest()
+                if done % 100 == 0:
+                    logger.info(f"PDF downloads: {done}/{len(jobs)}")
+
+        self.save_manifest()
+        downloaded = sum(1 for path in results.values() if path)
+        logger.info(f"Downloaded {downloaded}/{len(jobs)} PDFs")
+        return results
+
+
+def backfill_open_access_pdfs(data_dir: str = 'data/articles', pdf_dir: str = 'data/pdfs',
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Optional[str]]:
+    """Download missing PDFs for open access articles in file storage and record pdf_path"""
+    from scripts.file_storage import FileStorage
+
+    storage = FileStorage(data_dir=data_dir)
+    pending = storage.query_articles(
+        lambda a: a.get('access_type') == 'open_access' and a.get('pdf_url')
+        and not (a.get('pdf_path') and os.path.exists(a['pdf_path']))
+    )
+    logger.info(f"{len(pending)} open access articles without a PDF")
+
+    manager = PDFDownloadManager(pdf_dir=pdf_dir, max_workers=max_workers)
+    results = manager.download_many((article['pmid'], article['pdf_url']) for article in pending)
+    for pmid, path in results.items():
+        if path:
+            storage.insert_article({'pmid': pmid, 'pdf_path': path})
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Download missing open access PDFs')
+    parser.add_argument('--data-dir', default='data/articles',
+                       help='FileStorage directory (default: data/articles)')
+    parser.add_argument('--pdf-dir', default='data/pdfs',
+                       help='PDF directory (default: data/pdfs)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                       help=f'Concurrent downloads (default: {DEFAULT_MAX_WORKERS})')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    results = backfill_open_access_pdfs(args.data_dir, args.pdf_dir, args.workers)
+    print(f"Downloaded {sum(1 for path in results.values() if path)}/{len(results)} PDFs")
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+PDF Text Extraction Service
+One place to turn PDFs into text: pdfplumber first, PyPDF2 as the fallback.
+
+Results are cached per page in data/cache/pdf_text.db, keyed by the SHA-256 of
+the PDF's bytes plus EXTRACTOR_VERSION (which includes the library versions), so
+a renamed or re-downloaded copy of a paper is never parsed twice and upgrading
+an extractor invalidates old text. Only successful extractions are cached, so
+a failure (a truncated download, a missing library) is retried next time.
+Uncached documents are parsed in worker processes with a per-document timeout,
+which keeps a pathological PDF from stalling the caller; a single uncached
+document is parsed in this process (same timeout) instead of starting a pool.
+iter_pages() streams text page by page for callers that can stop early.
+"""
+
+import os
+import json
+import zlib
+import time
+import signal
+import sqlite3
+import hashlib
+import logging
+import threading
+import multiprocessing
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from scripts.pipeline_metrics import get_pipeline_metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pdfplumber
+    PDFPLUMBER_VERSION = getattr(pdfplumber, '__version__', 'unknown')
+except ImportError:
+    pdfplumber = None
+    PDFPLUMBER_VERSION = None
+
+try:
+    import PyPDF2
+    PYPDF2_VERSION = getattr(PyPDF2, '__version__', 'unknown')
+except ImportError:
+    PyPDF2 = None
+    PYPDF2_VERSION = None
+
+PDF_AVAILABLE = pdfplumber is not None or PyPDF2 is not None
+
+# Bump the trailing number when the extraction logic itself changes
+EXTRACTOR_VERSION = f"pdfplumber-{PDFPLUMBER_VERSION}/pypdf2-{PYPDF2_VERSION}/1"
+DEFAULT_TIMEOUT = 120
+
+
+class ExtractionTimeout(Exception):
+    """A document took longer than the per-document timeout"""
+
+
+def _default_cache_path() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    return os.path.join(project_root, 'data', 'cache', 'pdf_text.db')
+
+
+def _normalize_metadata(raw: Optional[Dict]) -> Dict[str, str]:
+    """pdfplumber ('Title') and PyPDF2 ('/Title') metadata in one shape"""
+    if not raw:
+        return {}
+    metadata = {}
+    for field in ('title', 'author', 'subject', 'creator'):
+        value = raw.get(field.capitalize()) or raw.get('/' + field.capitalize()) or ''
+        metadata[field] = str(value)
+    return metadata
+
+
+def _pdfplumber_pages(pdf_path: str) -> Iterator[str]:
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ''
+
+
+def _pypdf2_pages(pdf_path: str) -> Iterator[str]:
+    with open(pdf_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages:
+            yield page.extract_text() or ''
+
+
+def _read_metadata(pdf_path: str, method: str) -> Dict[str, str]:
+    try:
+        if method == 'pdfplumber':
+            with pdfplumber.open(pdf_path) as pdf:
+                return _normalize_metadata(pdf.metadata)
+        with open(pdf_path, 'rb') as f:
+            return _normalize_metadata(PyPDF2.PdfReader(f).metadata)
+    except Exception:
+        return {}
+
+
+def _extract_document(pdf_path: str) -> Dict:
+    """Extract every page with pdfplumber, falling back to PyPDF2"""
+    errors = []
+    for method, reader, available in (('pdfplumber', _pdfplumber_pages, pdfplumber is not None),
+                                      ('pypdf2', _pypdf2_pages, PyPDF2 is not None)):
+        if not available:
+            continue
+        try:
+            pages = list(reader(pdf_path))
+            return {'pages': pages, 'method': method, 'metadata': _read_metadata(pdf_path, method), 'error': None}
+        except ExtractionTimeout:
+            raise
+        except Exception as e:
+            logger.warning(f"{method} failed for {pdf_path}: {e}")
+            errors.append(f"{method}: {e}")
+    return {'pages': [], 'method': None, 'metadata': {}, 'error': '; '.join(errors) or 'no PDF library available'}
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_with_timeout(args) -> Dict:
+    """Worker entry point: extract one document, giving up after timeout seconds"""
+    pdf_path, timeout = args
+    # SIGALRM can only be handled in the main thread (of a worker, or of the caller for a single document)
+    use_alarm = (timeout and hasattr(signal, 'SIGALRM')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(int(max(1, timeout)))
+    try:
+        return _extract_document(pdf_path)
+    except ExtractionTimeout:
+        return {'pages': [], 'method': None, 'metadata': {}, 'error': f'timed out after {timeout}s', 'timeout': True}
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+class PDFTextExtractor:
+    """Cached, process-parallel PDF text extraction"""
+
+    def __init__(self, cache_path: Optional[str] = None, max_workers: Optional[int] = None,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT):
+        """
+        Initialize the extractor
+
+        Args:
+            cache_path: SQLite cache file (default: data/cache/pdf_text.db)
+            max_workers: Worker processes for uncached documents (default: CPU count)
+            timeout: Seconds allowed per document (None for no limit)
+        """
+        self.cache_path = cache_path or _default_cache_path()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            conn = sqlite3.connect(self.cache_path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    sha256 TEXT NOT NULL,
+                    extractor_version TEXT NOT NULL,
+                    pages BLOB NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    method TEXT,
+                    metadata TEXT,
+                    error TEXT,
+                    extracted_at TEXT,
+                    PRIMARY KEY (sha256, extractor_version)
+                )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def content_hash(self, pdf_path: str) -> str:
+        """SHA-256 of the file, remembered while its size and mtime are unchanged"""
+        stat = os.stat(pdf_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hashes.get(pdf_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+        self._hashes[pdf_path] = (signature, sha256)
+        return sha256
+
+    def _load(self, sha256: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT pages, method, metadata, error FROM documents WHERE sha256 = ? AND extractor_version = ?',
+                (sha256, EXTRACTOR_VERSION)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'pages': json.loads(zlib.decompress(row[0])),
+            'method': row[1],
+            'metadata': json.loads(row[2] or '{}'),
+            'error': row[3],
+            'cached': True
+        }
+
+    def _save(self, sha256: str, result: Dict):
+        if result.get('error'):
+            return  # failures and timeouts are retried on the next call
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO documents '
+                '(sha256, extractor_version, pages, page_count, method, metadata, error, extracted_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (sha256, EXTRACTOR_VERSION, zlib.compress(json.dumps(result['pages']).encode('utf-8'), 6),
+                 len(result['pages']), result.get('method'), json.dumps(result.get('metadata') or {}),
+                 result.get('error'), datetime.now().isoformat())
+            )
+            conn.commit()
+
+    @staticmethod
+    def _finish(pdf_path: str, sha256: Optional[str], result: Dict) -> Dict:
+        result = dict(result)
+        result['path'] = pdf_path
+        result['sha256'] = sha256
+        result.setdefault('cached', False)
+        if result.get('error') and not result['pages']:
+            logger.error(f"PDF text extraction failed for {pdf_path}: {result['error']}")
+        return result
+
+    def extract(self, pdf_path: str) -> Dict:
+        """
+        Extract one document (cached; parsed in this process on a miss)
+
+        Returns:
+            Dictionary with pages (list of page texts), method, metadata, error,
+            sha256 and cached
+        """
+        return self.extract_many([pdf_path])[pdf_path]
+
+    def extract_many(self, pdf_paths: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Extract many documents, parsing cache misses in parallel (one miss in this process)
+
+        Returns:
+            Mapping of path to result (see extract)
+        """
+        results = {}
+        misses = {}
+        for pdf_path in pdf_paths:
+            pdf_path = str(pdf_path)
+            if pdf_path in results or pdf_path in misses:
+                continue
+            try:
+                sha256 = self.content_hash(pdf_path)
+            except OSError as e:
+                results[pdf_path] = self._finish(pdf_path, None, {'pages': [], 'method': None, 'metadata': {},
+                                                                  'error': str(e)})
+                continue
+            cached = self._load(sha256)
+            if cached is not None:
+                results[pdf_path] = self._finish(pdf_path, sha256, cached)
+            else:
+                misses[pdf_path] = sha256
+
+        metrics = get_pipeline_metrics()
+        metrics.record_cache('pdf_text', hit=True, count=len(results))
+        metrics.record_cache('pdf_text', hit=False, count=len(misses))
+        if misses:
+            start = time.time()
+            tasks = [(pdf_path, self.timeout) for pdf_path in misses]
+            workers = min(self.max_workers, len(tasks))
+            if workers == 1:
+                # Not worth a process pool's start-up
+                extracted = map(_extract_with_timeout, tasks)
+                pool = None
+            else:
+                pool = multiprocessing.Pool(processes=workers)
+                extracted = pool.imap(_extract_with_timeout, tasks)
+            try:
+                for pdf_path, result in zip(misses, extracted):
+                    self._save(misses[pdf_path], result)
+                    results[pdf_path] = self._finish(pdf_path, misses[pdf_path], result)
+            finally:
+                if pool is not None:
+                    pool.terminate()
+                    pool.join()
+            logger.info(f"Extracted text from {len(misses)} PDFs in {time.time() - start:.1f}s "
+                        f"({len(results) - len(misses)} cached)")
+        return results
+
+    def cached_pages(self, pdf_path: str) -> Optional[List[str]]:
+        """Page texts of an already extracted document, or None (never parses)"""
+        cached = self._load(self.content_hash(pdf_path))
+        return cached['pages'] if cached else None
+
+    def iter_pages(self, pdf_path: str) -> Iterator[str]:
+        """
+        Yield page texts one at a time
+
+        Cached documents are read from the cache. Otherwise pages are parsed
+        in this process as they are requested, and the document is cached only
+        if every page was consumed.
+        """
+        sha256 = self.content_hash(pdf_path)
+        cached = self._load(sha256)
+        if cached is not None:
+            yield from cached['pages']
+            return
+
+        for method, reader, available in (('pdfplumber', _pdfplumber_pages, pdfplumber is not None),
+                                          ('pypdf2', _pypdf2_pages, PyPDF2 is not None)):
+            if not available:
+                continue
+            pages = []
+            try:
+                for page_text in reader(pdf_path):
+                    pages.append(page_text)
+                    yield page_text
+            except Exception as e:
+                if pages:
+                    logger.error(f"{method} failed on page {len(pages) + 1} of {pdf_path}: {e}")
+                    return
+                logger.warning(f"{method} failed for {pdf_path}: {e}")
+                continue
+            self._save(sha256, {'pages': pages, 'method': method,
+                                'metadata': _read_metadata(pdf_path, method), 'error': None})
+            return
+
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def join_pages(pages: List[str]) -> str:
+    """Non-empty pages joined the way the original extractors did (each followed by a newline)"""
+    return ''.join(page + '\n' for page in pages if page)
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_pdf_text_extractor() -> PDFTextExtractor:
+    """Shared extractor using the default cache"""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = PDFTextExtractor()
+        return _extractor
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Pipeline Timing and Throughput Metrics
+Lightweight instrumentation for the scrape pipeline: per-stage latency
+histograms, requests per host, cache hit rates (HTTP responses per host,
+memoized values, extracted PDF text), retry/backoff time and articles per
+minute.
+
+Enable with PIPELINE_METRICS=1. Each processed article is appended to
+logs/pipeline_metrics.jsonl (PIPELINE_METRICS_PATH to change it) as
+    {"type": "article", "pmid": ..., "status": ..., "seconds": ..., "stages": {stage: seconds}}
+and the end of a run adds a {"type": "summary", ...} line with the
+aggregates; format_summary() renders them as a table for the log.
+
+When disabled every hook returns after one attribute check (stage() hands
+back a shared no-op context manager), so instrumented code can call them
+unconditionally.
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Article lines are written in batches of this size (and on flush)
+WRITE_BATCH_SIZE = 50
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def _default_path() -> str:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, 'logs', 'pipeline_metrics.jsonl')
+
+
+class LatencyHistogram:
+    """Count, sum, min/max and fixed-bucket counts of durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None or seconds < self.min else self.min
+        self.max = seconds if self.max is None or seconds > self.max else self.max
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max for the open bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {('inf' if i == len(LATENCY_BUCKETS) else str(LATENCY_BUCKETS[i])): n
+                        for i, n in enumerate(self.buckets) if n}
+        }
+
+
+class _NullStage:
+    """Context manager that does nothing (metrics disabled)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, metrics: 'PipelineMetrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class PipelineMetrics:
+    """Collects stage timings and request counters for one run"""
+
+    def __init__(self, enabled: Optional[bool] = None, path: Optional[str] = None):
+        """
+        Args:
+            enabled: Collect metrics (default: PIPELINE_METRICS)
+            path: JSON-lines output file (default: logs/pipeline_metrics.jsonl, or PIPELINE_METRICS_PATH)
+        """
+        self.enabled = _env_flag('PIPELINE_METRICS') if enabled is None else enabled
+        self.path = path or os.getenv('PIPELINE_METRICS_PATH') or _default_path()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Start a new run (clears all aggregates)"""
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.stages: Dict[str, LatencyHistogram] = {}
+            self.requests: Dict[str, Dict[str, int]] = {}
+            self.retries: Dict[str, Dict] = {}
+            self.caches: Dict[str, Dict[str, int]] = {}
+            self.articles: Dict[str, int] = {}
+            self._pending: List[Dict] = []
+
+    # Recording hooks
+
+    def stage(self, name: str):
+        """Context manager timing a pipeline stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record_stage(self, name: str, seconds: float):
+        """Add a stage duration (also attributed to the article being processed on this thread)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = LatencyHistogram()
+            histogram.add(seconds)
+        item = getattr(self._local, 'item', None)
+        if item is not None:
+            item['stages'][name] = round(item['stages'].get(name, 0.0) + seconds, 6)
+
+    def record_request(self, url: str, cached: bool = False):
+        """Count a request to url's host (served from the cache or from the network)"""
+        if not self.enabled:
+            return
+        host = urlsplit(url).netloc.lower() or 'unknown'
+        with self._lock:
+            counts = self.requests.get(host)
+            if counts is None:
+                counts = self.requests[host] = {'network': 0, 'cached': 0}
+            counts['cached' if cached else 'network'] += 1
+
+    def record_cache(self, name: str, hit: bool, count: int = 1):
+        """Count lookups in a local cache (e.g. 'pdf_text')"""
+        if not self.enabled:
+            return
+        with self._lock:
+            counts = self.caches.get(name)
+            if counts is None:
+                counts = self.caches[name] = {'hits': 0, 'misses': 0}
+            counts['hits' if hit else 'misses'] += count
+
+    def record_retry(self, url: str, wait_seconds: float):
+        """Count a retry of a request to url's host and the backoff slept before it"""
+        if not self.enabled:
+            return
+        host = urlsplit(url).netloc.lower() or 'unknown'
+        with self._lock:
+            entry = self.retries.get(host)
+            if entry is None:
+                entry = self.retries[host] = {'retries': 0, 'backoff_seconds': 0.0}
+            entry['retries'] += 1
+            entry['backoff_seconds'] += wait_seconds
+
+    def count_articles(self, status: str, count: int = 1):
+        """Count articles finished in bulk (stages timed per phase rather than per article)"""
+        if not self.enabled or not count:
+            return
+        with self._lock:
+            self.articles[status] = self.articles.get(status, 0) + count
+
+    def begin_article(self, pmid: str):
+        """Attribute the following stages on this thread to an article"""
+        if not self.enabled:
+            return
+        self._local.item = {'pmid': str(pmid), 'start': time.perf_counter(), 'stages': {}}
+
+    def end_article(self, status: str):
+        """Finish the current article with a status ('processed', 'skipped', 'duplicate', 'error', ...)"""
+        if not self.enabled:
+            return
+        item = getattr(self._local, 'item', None)
+        if item is None:
+            return
+        self._local.item = None
+        seconds = time.perf_counter() - item['start']
+        line = {'type': 'article', 'time': datetime.now().isoformat(), 'pmid': item['pmid'],
+                'status': status, 'seconds': round(seconds, 6), 'stages': item['stages']}
+        with self._lock:
+            self.articles[status] = self.articles.get(status, 0) + 1
+            self._pending.append(line)
+            write = len(self._pending) >= WRITE_BATCH_SIZE
+        if write:
+            self.flush()
+
+    # Output
+
+    def _write(self, lines: List[Dict]):
+        if not lines:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(''.join(json.dumps(line, default=str) + '\n' for line in lines))
+        except OSError as e:
+            logger.warning(f"Could not write pipeline metrics to {self.path}: {e}")
+
+    def flush(self):
+        """Append buffered article lines to the metrics file"""
+        if not self.enabled:
+            return
+        with self._lock:
+            lines, self._pending = self._pending, []
+        self._write(lines)
+
+    def summary(self, http_cache=None) -> Dict:
+        """
+        Aggregates for the run so far
+
+        Args:
+            http_cache: HTTPCache whose hit/miss counters to include
+        """
+        elapsed = time.perf_counter() - self._started
+        with self._lock:
+            completed = sum(self.articles.values())
+            hosts = {}
+            for host, counts in sorted(self.requests.items()):
+                total = counts['network'] + counts['cached']
+                hosts[host] = dict(counts, total=total,
+                                   cache_hit_rate=round(counts['cached'] / total, 4) if total else 0.0)
+            summary = {
+                'type': 'summary',
+                'time': datetime.now().isoformat(),
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+                'elapsed_seconds': round(elapsed, 3),
+                'articles': dict(self.articles),
+                'articles_per_minute': round(completed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                'stages': {name: histogram.to_dict() for name, histogram in self.stages.items()},
+                'requests': hosts,
+                'retries': {host: dict(entry, backoff_seconds=round(entry['backoff_seconds'], 3))
+                            for host, entry in sorted(self.retries.items())},
+                'retry_backoff_seconds': round(sum(e['backoff_seconds'] for e in self.retries.values()), 3),
+                'caches': {name: dict(counts, hit_rate=round(counts['hits'] / (counts['hits'] + counts['misses']), 4))
+                           for name, counts in sorted(self.caches.items()) if counts['hits'] + counts['misses']},
+            }
+        if http_cache is not None:
+            summary['http_cache'] = http_cache.stats()
+        return summary
+
+    def finish(self, http_cache=None) -> Optional[Dict]:
+        """Flush article lines, append the run summary and log it as a table (None when disabled)"""
+        if not self.enabled:
+            return None
+        self.flush()
+        summary = self.summary(http_cache)
+        self._write([summary])
+        logger.info("Pipeline metrics:\n" + format_summary(summary))
+        return summary
+
+
+def format_summary(summary: Dict) -> str:
+    """Plain-text table of a run summary"""
+    lines = [f"{'stage':<22}{'count':>8}{'total s':>10}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"]
+    stages = sorted(summary['stages'].items(), key=lambda item: -item[1]['total'])
+    for name, h in stages:
+        lines.append(f"{name:<22}{h['count']:>8}{h['total']:>10.2f}{h['mean'] * 1000:>10.1f}"
+                     f"{h['p50'] * 1000:>9.1f}{h['p95'] * 1000:>9.1f}{h['max'] * 1000:>9.1f}")
+    if summary['requests']:
+        lines.append('')
+        lines.append(f"{'host':<32}{'network':>9}{'cached':>8}{'hit rate':>10}{'retries':>9}{'backoff s':>11}")
+        for host, counts in summary['requests'].items():
+            retry = summary['retries'].get(host, {'retries': 0, 'backoff_seconds': 0.0})
+            lines.append(f"{host:<32}{counts['network']:>9}{counts['cached']:>8}{counts['cache_hit_rate']:>10.1%}"
+                         f"{retry['retries']:>9}{retry['backoff_seconds']:>11.1f}")
+    if summary['caches']:
+        lines.append('')
+        lines.append(f"{'cache':<32}{'hits':>9}{'misses':>8}{'hit rate':>10}")
+        for name, counts in summary['caches'].items():
+            lines.append(f"{name:<32}{counts['hits']:>9}{counts['misses']:>8}{counts['hit_rate']:>10.1%}")
+    articles = ', '.join(f"{n} {status}" for status, n in sorted(summary['articles'].items())) or 'none'
+    lines.append('')
+    lines.append(f"Articles: {articles} in {summary['elapsed_seconds']:.1f}s "
+                 f"({summary['articles_per_minute']:.1f}/min); retry backoff {summary['retry_backoff_seconds']:.1f}s")
+    return '\n'.join(lines)
+
+
+_metrics: Optional[PipelineMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_pipeline_metrics() -> PipelineMetrics:
+    """Shared metrics collector (configured from the environment on first use)"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = PipelineMetrics()
+        return _metrics
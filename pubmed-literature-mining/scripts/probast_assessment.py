@@ -20,6 +20,9 @@ from typing import Dict, Optional, List
 from enum import Enum
 from datetime import datetime
 
+from scripts.rescoring import probast_version
+from scripts.text_analysis import AnalyzedText, analyze_article, extract_epv, first_sample_size
+
 logger = logging.getLogger(__name__)
 
 
@@ -85,26 +88,30 @@ class PROBASTAssessment:
                 "assessment_method": "manual"
             }
         
-        # Automated assessment based on article metadata
+        # Automated assessment based on article metadata (text analyzed once, shared by all domains)
+        analysis = analyze_article(article)
         assessment = {
-            "domain_1_participants": self._assess_domain_1(article),
-            "domain_2_predictors": self._assess_domain_2(article),
-            "domain_3_outcome": self._assess_domain_3(article),
-            "domain_4_analysis": self._assess_domain_4(article),
+            "domain_1_participants": self._assess_domain_1(article, analysis),
+            "domain_2_predictors": self._assess_domain_2(article, analysis),
+            "domain_3_outcome": self._assess_domain_3(article, analysis),
+            "domain_4_analysis": self._assess_domain_4(article, analysis),
             "assessment_date": datetime.now().isoformat(),
-            "assessment_method": "automated"
+            "assessment_method": "automated",
+            "assessment_version": probast_version()
         }
         
         assessment["overall_risk"] = self._calculate_overall_risk(assessment)
         
         return assessment
     
-    def _assess_domain_1(self, article: Dict) -> str:
+    def _assess_domain_1(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> str:
         """Assess Domain 1: Participants"""
+        if analysis is None:
+            analysis = analyze_article(article)
         # Check study design - safely handle None values
         study_type = (article.get("study_type") or "").lower()
-        abstract = (article.get("abstract") or "").lower()
-        title = (article.get("title") or "").lower()
+        abstract = analysis.lower("abstract")
+        title = analysis.lower("title")
         
         # High risk indicators
         if any(term in abstract or term in title for term in ["case report", "case series", "case-control"]):
@@ -122,9 +129,11 @@ class PROBASTAssessment:
         
         return PROBASTRiskLevel.UNCLEAR.value
     
-    def _assess_domain_2(self, article: Dict) -> str:
+    def _assess_domain_2(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> str:
         """Assess Domain 2: Predictors"""
-        abstract = (article.get("abstract") or "").lower()
+        if analysis is None:
+            analysis = analyze_article(article)
+        abstract = analysis.lower("abstract")
         
         # High risk indicators
         if any(term in abstract for term in ["retrospective", "chart review", "self-reported"]):
@@ -141,9 +150,11 @@ class PROBASTAssessment:
         
         return PROBASTRiskLevel.MODERATE.value
     
-    def _assess_domain_3(self, article: Dict) -> str:
+    def _assess_domain_3(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> str:
         """Assess Domain 3: Outcome"""
-        abstract = (article.get("abstract") or "").lower()
+        if analysis is None:
+            analysis = analyze_article(article)
+        abstract = analysis.lower("abstract")
         
         # Check for clear outcome definition
         outcome_terms = [
@@ -166,12 +177,14 @@ class PROBASTAssessment:
         
         return PROBASTRiskLevel.MODERATE.value
     
-    def _assess_domain_4(self, article: Dict) -> str:
+    def _assess_domain_4(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> str:
         """Assess Domain 4: Analysis"""
-        abstract = (article.get("abstract") or "").lower()
+        if analysis is None:
+            analysis = analyze_article(article)
+        abstract = analysis.lower("abstract")
         
         # Check sample size
-        sample_size = self._extract_sample_size(abstract)
+        sample_size = analysis.first_sample_size("abstract")
         if sample_size:
             if sample_size < 100:
                 return PROBASTRiskLevel.HIGH.value
@@ -195,7 +208,7 @@ class PROBASTAssessment:
         
         # Check for events per variable
         if "epv" in abstract or "events per variable" in abstract:
-            epv_match = self._extract_epv(abstract)
+            epv_match = analysis.epv("abstract")
             if epv_match and epv_match >= 15:
                 return PROBASTRiskLevel.LOW.value
         
@@ -203,45 +216,11 @@ class PROBASTAssessment:
     
     def _extract_sample_size(self, text: str) -> Optional[int]:
         """Extract sample size from text"""
-        import re
-        
-        # Common patterns: "n=1234", "n 1234", "1234 patients", "1234 participants"
-        patterns = [
-            r'\bn\s*[=:]\s*(\d+)',
-            r'\b(\d+)\s+patients',
-            r'\b(\d+)\s+participants',
-            r'\b(\d+)\s+subjects'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return int(match.group(1))
-                except:
-                    continue
-        
-        return None
+        return first_sample_size(text)
     
     def _extract_epv(self, text: str) -> Optional[float]:
         """Extract Events Per Variable (EPV) from text"""
-        import re
-        
-        patterns = [
-            r'epv\s*[=:]\s*(\d+\.?\d*)',
-            r'events\s+per\s+variable\s*[=:]\s*(\d+\.?\d*)',
-            r'(\d+\.?\d*)\s+events\s+per\s+variable'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1))
-                except:
-                    continue
-        
-        return None
+        return extract_epv(text)
     
     def _calculate_overall_risk(self, assessment: Dict) -> str:
         """
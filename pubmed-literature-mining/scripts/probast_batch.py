@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Batch PROBAST Assessment
+Assesses papers in literature.db with PROBAST and marks the usable ones,
+chunk by chunk:
+- candidate rows are read in chunks (keyset pagination on rowid, or the given
+  PMIDs in groups), with only the columns the assessment needs;
+- the regex-heavy domain checks run in worker processes, a few chunks ahead
+  of the writer so memory stays bounded;
+- each chunk is written back in one transaction: one executemany for the
+  assessments (stamped with the PROBAST version) and one for the usable marks.
+
+Manual assessments are never overwritten. Re-assessing the corpus after a
+PROBAST rule change only touches automated assessments from another version:
+    python scripts/probast_batch.py --reassess [--workers N] [--chunk-size N]
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+import multiprocessing
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.rescoring import probast_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 200
+# Columns read per candidate (text for the assessment, stored values for the usability check)
+CANDIDATE_COLUMNS = ('pmid', 'title', 'abstract', 'journal', 'relevance_score', 'used_in_model',
+                     'probast_risk', 'probast_domain_1', 'probast_domain_2', 'probast_domain_3',
+                     'probast_domain_4', 'assessment_method', 'probast_version')
+TEXT_COLUMNS = ('pmid', 'title', 'abstract', 'journal')
+
+
+def is_usable_with_justification(assessment: Optional[Dict]) -> bool:
+    """
+    Lenient usability criteria (see fix_probast_system.py)
+
+    Usable: all 4 domains Low, 3 Low + 1 Moderate, 2 Low + 2 Moderate, or
+    1+ Low and 3+ Moderate with no High domain.
+    """
+    if not assessment:
+        return False
+
+    domains = [(assessment.get(field) or '').lower() for field in
+               ('domain_1_participants', 'domain_2_predictors', 'domain_3_outcome', 'domain_4_analysis')]
+    low_count = domains.count('low')
+    moderate_count = domains.count('moderate')
+    high_count = domains.count('high')
+
+    if low_count == 4:
+        return True
+    if low_count == 3 and moderate_count == 1:
+        return True
+    if low_count == 2 and moderate_count == 2:
+        return True
+    return high_count == 0 and low_count >= 1 and moderate_count >= 3
+
+
+def justification_note(overall_risk: Optional[str]) -> str:
+    """Note stored with a paper marked usable with justification"""
+    if overall_risk == 'Low':
+        return 'Usable with justification: All domains Low Risk'
+    if overall_risk == 'Moderate':
+        return 'Usable with justification: 3+ Low domains or 2 Low + 2 Moderate'
+    return 'Usable with justification: Reclassified as usable'
+
+
+def _stored_assessment(row: Dict) -> Dict:
+    return {
+        'overall_risk': row.get('probast_risk'),
+        'domain_1_participants': row.get('probast_domain_1'),
+        'domain_2_predictors': row.get('probast_domain_2'),
+        'domain_3_outcome': row.get('probast_domain_3'),
+        'domain_4_analysis': row.get('probast_domain_4')
+    }
+
+
+# The assessor is built once per worker process
+_probast = None
+
+
+def _get_probast():
+    global _probast
+    if _probast is None:
+        from scripts.probast_assessment import PROBASTAssessment
+        _probast = PROBASTAssessment()
+    return _probast
+
+
+def _assess_chunk(articles: List[Dict]) -> List[Tuple[str, Optional[Dict]]]:
+    """(PMID, assessment) per article; None where the assessment failed"""
+    probast = _get_probast()
+    results = []
+    for article in articles:
+        try:
+            results.append((article['pmid'], probast.assess_article(article)))
+        except Exception as e:
+            logger.error(f"Error assessing {article.get('pmid')}: {e}")
+            results.append((article['pmid'], None))
+    return results
+
+
+class BatchAssessor:
+    """Chunked, multi-process PROBAST assessment and usability marking over literature.db"""
+
+    def __init__(self, db_path: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the assessor
+
+        Args:
+            db_path: Literature database
+            workers: Worker processes (default: CPU count; 1 assesses in this process)
+            chunk_size: Papers per chunk (and per write transaction)
+        """
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.version = probast_version()
+
+    def _needs_assessment(self, row: Dict, reassess: bool) -> bool:
+        if row['assessment_method'] == 'manual':
+            return False
+        if not row['probast_risk']:
+            return True
+        return reassess and row['probast_version'] != self.version
+
+    def _chunks(self, conn: sqlite3.Connection, pmids: Optional[List[str]], reassess: bool) -> Iterator[List[Dict]]:
+        """Candidate rows, chunk by chunk (each chunk is its own short read)"""
+        columns = ', '.join(CANDIDATE_COLUMNS)
+        if pmids is not None:
+            for i in range(0, len(pmids), self.chunk_size):
+                chunk = pmids[i:i + self.chunk_size]
+                rows = conn.execute(f"SELECT {columns} FROM papers WHERE pmid IN ({','.join('?' * len(chunk))})",
+                                    chunk).fetchall()
+                yield [dict(row) for row in rows]
+            return
+
+        # Whole corpus: only rows that can need an assessment
+        where = "probast_risk IS NULL OR probast_risk = ''"
+        params = []
+        if reassess:
+            where += " OR (assessment_method = 'automated' AND probast_version IS NOT ?)"
+            params.append(self.version)
+        last_rowid = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT rowid, {columns} FROM papers WHERE rowid > ? AND "
+                f"assessment_method IS NOT 'manual' AND ({where}) ORDER BY rowid LIMIT ?",
+                [last_rowid] + params + [self.chunk_size]
+            ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]['rowid']
+            yield [{column: row[column] for column in CANDIDATE_COLUMNS} for row in rows]
+
+    def _assessed(self, chunks: Iterable[List[Dict]], reassess: bool) -> Iterator[Tuple[List[Dict], Dict]]:
+        """(rows, PMID -> new assessment) per chunk, assessed in worker processes when workers > 1"""
+        def tasks(rows):
+            return [{column: row[column] for column in TEXT_COLUMNS}
+                    for row in rows if self._needs_assessment(row, reassess)]
+
+        if self.workers <= 1:
+            for rows in chunks:
+                yield rows, dict(_assess_chunk(tasks(rows)))
+            return
+
+        with multiprocessing.Pool(processes=self.workers) as pool:
+            pending = deque()
+            for rows in chunks:
+                pending.append((rows, pool.apply_async(_assess_chunk, (tasks(rows),))))
+                # Keep every worker busy without reading far ahead of the writer
+                if len(pending) > self.workers * 2:
+                    rows, result = pending.popleft()
+                    yield rows, dict(result.get())
+            while pending:
+                rows, result = pending.popleft()
+                yield rows, dict(result.get())
+
+    def run(self, pmids: Optional[Iterable[str]] = None, reassess: bool = False, mark_usable: bool = True,
+            mark_existing: bool = True, min_relevance: Optional[float] = None, note: Optional[str] = None) -> Dict:
+        """
+        Assess papers and mark the usable ones
+
+        Args:
+            pmids: Papers to process (default: the whole corpus)
+            reassess: Also reassess automated assessments from another PROBAST version
+            mark_usable: Mark papers that meet the lenient criteria as used in the model
+            mark_existing: Also check papers whose stored assessment was kept (False: only
+                papers assessed in this run can be marked)
+            min_relevance: Minimum relevance score for a paper to be marked
+            note: Note stored with marked papers (default: the justification for its risk)
+
+        Returns:
+            Dictionary with total, assessed, failed, kept, marked_usable, already_usable and not_usable
+        """
+        stats = {'total': 0, 'assessed': 0, 'failed': 0, 'kept': 0,
+                 'marked_usable': 0, 'already_usable': 0, 'not_usable': 0}
+        if pmids is not None:
+            pmids = list(dict.fromkeys(str(p) for p in pmids))
+
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for rows, assessments in self._assessed(self._chunks(conn, pmids, reassess), reassess):
+                now = datetime.now().isoformat()
+                updates, marks = [], []
+                for row in rows:
+                    stats['total'] += 1
+                    pmid = row['pmid']
+                    if pmid in assessments:
+                        assessment = assessments[pmid]
+                        if assessment is None:
+                            stats['failed'] += 1
+                            continue
+                        stats['assessed'] += 1
+                        updates.append((
+                            assessment.get('overall_risk'),
+                            assessment.get('domain_1_participants'),
+                            assessment.get('domain_2_predictors'),
+                            assessment.get('domain_3_outcome'),
+                            assessment.get('domain_4_analysis'),
+                            assessment.get('assessment_date'),
+                            self.version,
+                            now,
+                            pmid
+                        ))
+                    else:
+                        stats['kept'] += 1
+                        if not mark_existing:
+                            continue
+                        assessment = _stored_assessment(row)
+
+                    if not mark_usable:
+                        continue
+                    if row['used_in_model']:
+                        stats['already_usable'] += 1
+                    elif (is_usable_with_justification(assessment) and
+                          (min_relevance is None or (row['relevance_score'] or 0) >= min_relevance)):
+                        marks.append((note or justification_note(assessment.get('overall_risk')), now, pmid))
+                        stats['marked_usable'] += 1
+                    else:
+                        stats['not_usable'] += 1
+
+                with conn:
+                    if updates:
+                        conn.executemany('''
+                        UPDATE papers SET
+                            probast_risk = ?, probast_domain_1 = ?, probast_domain_2 = ?,
+                            probast_domain_3 = ?, probast_domain_4 = ?, assessment_date = ?,
+                            assessment_method = 'automated', probast_version = ?, last_updated = ?
+                        WHERE pmid = ? AND assessment_method IS NOT 'manual'
+                        ''', updates)
+                    if marks:
+                        conn.executemany(
+                            'UPDATE papers SET used_in_model = 1, notes = ?, last_updated = ? WHERE pmid = ?', marks)
+                logger.info(f"PROBAST batch: {stats['total']} papers, {stats['assessed']} assessed, "
+                            f"{stats['marked_usable']} marked usable")
+        finally:
+            conn.close()
+        return stats
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Assess papers with PROBAST and mark usable ones')
+    parser.add_argument('--db', default=None, help='Database path (default: data/literature.db)')
+    parser.add_argument('--reassess', action='store_true',
+                        help='Also reassess automated assessments from another PROBAST version')
+    parser.add_argument('--no-mark', action='store_true', help='Only assess; do not mark usable papers')
+    parser.add_argument('--min-relevance', type=float, default=None, help='Minimum relevance score to mark')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Papers per chunk')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_path = args.db or os.path.join(project_root, 'data', 'literature.db')
+    if not os.path.exists(db_path):
+        print(f"Database not found: {db_path}")
+        sys.exit(1)
+
+    assessor = BatchAssessor(db_path, workers=args.workers, chunk_size=args.chunk_size)
+    stats = assessor.run(reassess=args.reassess, mark_usable=not args.no_mark, min_relevance=args.min_relevance)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,7 +19,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.literature_database import LiteratureDatabase
 from scripts.pubmed_scraper import PubMedScraper
-from scripts.probast_assessment import PROBASTAssessment
+from scripts.probast_batch import BatchAssessor
 
 
 class ProcessMonitoringArticles:
@@ -27,7 +27,6 @@ class ProcessMonitoringArticles:
     
     def __init__(self):
         self.database = LiteratureDatabase()
-        self.probast = PROBASTAssessment()
         self.scraper = PubMedScraper()
     
     def get_monitoring_pmids(self, csv_path: str) -> List[str]:
@@ -77,126 +76,28 @@ class ProcessMonitoringArticles:
         return stats
     
     def assess_and_mark_articles(self, pmids: List[str]) -> Dict:
-        """Assess all monitoring articles with PROBAST and mark as usable if appropriate"""
+        """Assess all monitoring articles with PROBAST and mark as usable if appropriate (see probast_batch.py)"""
+        # Papers already used in the model are counted but not assessed again
         conn = sqlite3.connect(self.database.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        stats = {
-            'total_assessed': 0,
-            'marked_usable': 0,
-            'already_usable': 0,
-            'not_usable': 0
+        try:
+            used = {row[0] for row in conn.execute('SELECT pmid FROM papers WHERE used_in_model = 1')}
+        finally:
+            conn.close()
+        pmids = [str(p) for p in pmids]
+        already_usable = len({p for p in pmids if p in used})
+        
+        stats = BatchAssessor(self.database.db_path).run(
+            [p for p in pmids if p not in used], min_relevance=40,
+            note='Usable with justification: From GitHub monitoring'
+        )
+        if stats['failed']:
+            print(f"Warning: PROBAST assessment failed for {stats['failed']} articles")
+        return {
+            'total_assessed': stats['total'] + already_usable,
+            'marked_usable': stats['marked_usable'],
+            'already_usable': stats['already_usable'] + already_usable,
+            'not_usable': stats['not_usable']
         }
-        
-        for pmid in pmids:
-            try:
-                # Get article from database
-                cursor.execute('SELECT * FROM papers WHERE pmid = ?', (pmid,))
-                row = cursor.fetchone()
-                
-                if not row:
-                    continue
-                
-                article = self.database._row_to_dict(row)
-                stats['total_assessed'] += 1
-                
-                # Check if already marked as usable
-                if article.get('used_in_model'):
-                    stats['already_usable'] += 1
-                    continue
-                
-                # Assess with PROBAST if not already assessed
-                if not article.get('probast_risk'):
-                    assessment = self.probast.assess_article(article)
-                    
-                    # Update database with assessment
-                    cursor.execute('''
-                    UPDATE papers 
-                    SET probast_risk = ?,
-                        probast_domain_1 = ?,
-                        probast_domain_2 = ?,
-                        probast_domain_3 = ?,
-                        probast_domain_4 = ?,
-                        assessment_date = datetime('now'),
-                        assessment_method = 'automated'
-                    WHERE pmid = ?
-                    ''', (
-                        assessment.get('overall_risk'),
-                        assessment.get('domain_1_participants'),
-                        assessment.get('domain_2_predictors'),
-                        assessment.get('domain_3_outcome'),
-                        assessment.get('domain_4_analysis'),
-                        pmid
-                    ))
-                else:
-                    # Use existing assessment
-                    assessment = {
-                        'overall_risk': article.get('probast_risk'),
-                        'domain_1_participants': article.get('probast_domain_1'),
-                        'domain_2_predictors': article.get('probast_domain_2'),
-                        'domain_3_outcome': article.get('probast_domain_3'),
-                        'domain_4_analysis': article.get('probast_domain_4')
-                    }
-                
-                # Check if usable with justification
-                if self._is_usable_with_justification(assessment):
-                    # Check relevance score (should be ≥40)
-                    relevance = article.get('relevance_score', 0) or 0
-                    if relevance >= 40:
-                        cursor.execute('''
-                        UPDATE papers 
-                        SET used_in_model = 1,
-                            notes = 'Usable with justification: From GitHub monitoring'
-                        WHERE pmid = ?
-                        ''', (pmid,))
-                        stats['marked_usable'] += 1
-                    else:
-                        stats['not_usable'] += 1
-                else:
-                    stats['not_usable'] += 1
-            
-            except Exception as e:
-                print(f"Warning: Error processing PMID {pmid}: {e}")
-                continue
-        
-        conn.commit()
-        conn.close()
-        return stats
-    
-    def _is_usable_with_justification(self, assessment: Dict) -> bool:
-        """Check if article is usable with justification"""
-        if not assessment:
-            return False
-        
-        domain_1 = (assessment.get("domain_1_participants", "") or "").lower()
-        domain_2 = (assessment.get("domain_2_predictors", "") or "").lower()
-        domain_3 = (assessment.get("domain_3_outcome", "") or "").lower()
-        domain_4 = (assessment.get("domain_4_analysis", "") or "").lower()
-        
-        domains = [domain_1, domain_2, domain_3, domain_4]
-        low_count = sum(1 for d in domains if d == "low")
-        moderate_count = sum(1 for d in domains if d == "moderate")
-        high_count = sum(1 for d in domains if d == "high")
-        
-        # All Low = Usable
-        if low_count == 4:
-            return True
-        
-        # 3 Low + 1 Moderate = Usable
-        if low_count == 3 and moderate_count == 1:
-            return True
-        
-        # 2 Low + 2 Moderate = Usable
-        if low_count == 2 and moderate_count == 2:
-            return True
-        
-        # No High Risk domains
-        if high_count == 0:
-            if low_count >= 1 and moderate_count >= 3:
-                return True
-        
-        return False
     
     def process_all(self, monitoring_csv: str) -> Dict:
         """Process all monitoring articles through full workflow"""
@@ -24,6 +24,12 @@ from scripts.open_access_detector import OpenAccessDetector
 from scripts.relevance_scoring import RelevanceScorer
 from scripts.enhanced_relevance_scoring import EnhancedRelevanceScorer
 from scripts.factor_extraction import FactorExtractor
+from scripts.xata_client import XataClient
+from scripts.http_cache import get_http_cache, OfflineCacheMiss, ENDPOINT_TTL
+from scripts.pubmed_sync import PubMedSync
+from scripts.rescoring import scoring_version
+from scripts.near_duplicates import NearDuplicateIndex
+from scripts.pipeline_metrics import get_pipeline_metrics
 
 # Load environment variables
 load_dotenv()
@@ -54,10 +60,19 @@ class PubMedScraper:
         # Default to 5000 for comprehensive search (can be overridden by env var)
         self.max_articles = int(os.getenv('MAX_ARTICLES_PER_RUN', '5000'))
         self.storage = get_storage_client()  # Google Sheets if available, else file storage
+        self.http_cache = get_http_cache()  # ESearch/EFetch responses survive re-runs
+        self.metrics = get_pipeline_metrics()  # Stage timings (PIPELINE_METRICS=1)
+        # Processed articles are mirrored to Xata in bulk at the end of the run (when configured)
+        self.xata = XataClient() if os.getenv('XATA_API_KEY') else None
+        self._xata_queue = []
         self.oa_detector = OpenAccessDetector()
         self.relevance_scorer = RelevanceScorer()  # Keep for backward compatibility
         self.enhanced_scorer = EnhancedRelevanceScorer()  # New enhanced scorer
+        self.scoring_version = scoring_version(self.enhanced_scorer.config)  # Stamped on scores (see rescoring.py)
+        self.duplicates = NearDuplicateIndex()  # MinHash/LSH index of title + abstract
         self.factor_extractor = FactorExtractor()
+        # Only records added/revised since the last completed sync are searched (PUBMED_FULL_SYNC=true to rescan)
+        self.sync = PubMedSync(self)
         
         # Load search strategy configuration
         try:
@@ -74,19 +89,33 @@ class PubMedScraper:
             logger.warning(f"Could not load search strategy config: {e}, using defaults")
             self.search_config = None
         
-    def _make_request(self, url: str, params: Dict, retry_count: int = 0) -> Optional[requests.Response]:
-        """Make HTTP request with retry logic and rate limiting"""
+    def _make_request(self, url: str, params: Dict, retry_count: int = 0, ttl=ENDPOINT_TTL,
+                      refresh: bool = False) -> Optional[requests.Response]:
+        """
+        Make HTTP request with retry logic and rate limiting (served from the HTTP cache when possible)
+        
+        ttl=0 never reads or stores a cached response; refresh=True skips the cached
+        response but stores the new one (offline mode always replays the cache)
+        """
+        if not (refresh or ttl == 0) or self.http_cache.offline:
+            cached = self.http_cache.lookup('GET', url, params)
+            if cached is not None:
+                return cached
         try:
             time.sleep(self.REQUEST_DELAY)  # Rate limiting
-            response = requests.get(url, params=params, timeout=30)
+            response = self.http_cache.fetch('GET', url, params=params, ttl=ttl, timeout=30)
             response.raise_for_status()
             return response
+        except OfflineCacheMiss as e:
+            logger.error(f"{e}")
+            return None
         except requests.exceptions.RequestException as e:
             if retry_count < self.MAX_RETRIES:
                 wait_time = (2 ** retry_count) * 5  # Exponential backoff
                 logger.warning(f"Request failed, retrying in {wait_time}s: {e}")
+                self.metrics.record_retry(url, wait_time)
                 time.sleep(wait_time)
-                return self._make_request(url, params, retry_count + 1)
+                return self._make_request(url, params, retry_count + 1, ttl=ttl, refresh=refresh)
             else:
                 logger.error(f"Request failed after {self.MAX_RETRIES} retries: {e}")
                 return None
@@ -103,6 +132,32 @@ class PubMedScraper:
         Returns:
             List of PMID strings
         """
+        mindate = maxdate = None
+        # Only add date restrictions if date_range_years is specified AND query doesn't already have dates
+        # Check if query already has date restrictions (PDAT pattern)
+        has_date_in_query = '[PDAT]' in query or 'Publication Date' in query
+        if date_range_years is not None and not has_date_in_query:
+            mindate = (datetime.now() - timedelta(days=date_range_years*365)).strftime('%Y/%m/%d')
+            maxdate = datetime.now().strftime('%Y/%m/%d')
+        
+        return self.esearch(query, max_results=max_results, mindate=mindate, maxdate=maxdate) or []
+    
+    def esearch(self, query: str, max_results: int = 100, mindate: str = None, maxdate: str = None,
+                datetype: str = 'pdat', ttl=ENDPOINT_TTL) -> Optional[List[str]]:
+        """
+        Run one ESearch, optionally limited to a date window
+        
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to return
+            mindate: Start of the window (YYYY/MM/DD, inclusive)
+            maxdate: End of the window (YYYY/MM/DD, inclusive; default today)
+            datetype: 'pdat' (publication), 'edat' (added to PubMed) or 'mdat' (last modified)
+            ttl: HTTP cache lifetime of the result (0: always search PubMed)
+            
+        Returns:
+            List of PMID strings, or None if the search failed
+        """
         search_url = f"{self.BASE_URL}/esearch.fcgi"
         params = {
             'db': 'pubmed',
@@ -113,34 +168,31 @@ class PubMedScraper:
             'tool': self.tool,
             'sort': 'pub_date',  # Most recent first
         }
+        if mindate:
+            params['datetype'] = datetype
+            params['mindate'] = mindate
+            params['maxdate'] = maxdate or datetime.now().strftime('%Y/%m/%d')
         
-        # Only add date restrictions if date_range_years is specified AND query doesn't already have dates
-        # Check if query already has date restrictions (PDAT pattern)
-        has_date_in_query = '[PDAT]' in query or 'Publication Date' in query
-        if date_range_years is not None and not has_date_in_query:
-            params['datetype'] = 'pdat'
-            params['mindate'] = (datetime.now() - timedelta(days=date_range_years*365)).strftime('%Y/%m/%d')
-            params['maxdate'] = datetime.now().strftime('%Y/%m/%d')
-        
-        response = self._make_request(search_url, params)
+        response = self._make_request(search_url, params, ttl=ttl)
         if not response:
-            return []
+            return None
         
         try:
             data = response.json()
-            pmids = data.get('esearchresult', {}).get('idlist', [])
+            pmids = data['esearchresult'].get('idlist', [])
             logger.info(f"Found {len(pmids)} articles matching query")
             return pmids
-        except (json.JSONDecodeError, KeyError) as e:
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
             logger.error(f"Error parsing search results: {e}")
-            return []
+            return None
     
-    def fetch_article_details(self, pmid: str) -> Optional[Dict]:
+    def fetch_article_details(self, pmid: str, refresh: bool = False) -> Optional[Dict]:
         """
         Fetch detailed article information from PubMed
         
         Args:
             pmid: PubMed ID
+            refresh: Fetch the record again instead of using the cached EFetch (revised records)
             
         Returns:
             Dictionary with article details or None if error
@@ -154,7 +206,7 @@ class PubMedScraper:
             'tool': self.tool
         }
         
-        response = self._make_request(fetch_url, params)
+        response = self._make_request(fetch_url, params, refresh=refresh)
         if not response:
             return None
         
@@ -243,16 +295,30 @@ class PubMedScraper:
             logger.error(f"Unexpected error processing PMID {pmid}: {e}")
             return None
     
-    def process_article(self, pmid: str) -> bool:
+    def process_article(self, pmid: str, refresh: bool = False) -> bool:
         """
         Process a single article: fetch, check OA, score, extract factors, store
         
         Args:
             pmid: PubMed ID
+            refresh: Re-fetch and update an article already stored with full details
+                (records revised in PubMed since they were stored)
             
         Returns:
             True if successful, False otherwise
         """
+        self.metrics.begin_article(pmid)
+        success = False
+        try:
+            success = self._process_article(pmid, refresh=refresh)
+            return success
+        finally:
+            # No-op if the article already ended with a more specific status (skipped, duplicate)
+            self.metrics.end_article('processed' if success else 'error')
+    
+    def _process_article(self, pmid: str, refresh: bool = False) -> bool:
+        """Process one article (see process_article); each stage is timed in self.metrics"""
+        metrics = self.metrics
         try:
             # Check if already exists in DATABASE (source of truth for count)
             # Don't check JSON files - we want to add to database even if in JSON
@@ -262,13 +328,14 @@ class PubMedScraper:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             project_root = os.path.dirname(script_dir)
             db_path = os.path.join(project_root, 'data', 'literature.db')
-            db = LiteratureDatabase(db_path=db_path)
-            import sqlite3
-            conn = sqlite3.connect(db.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT pmid FROM papers WHERE pmid = ?', (pmid,))
-            exists_in_db = cursor.fetchone() is not None
-            conn.close()
+            with metrics.stage('db_lookup'):
+                db = LiteratureDatabase(db_path=db_path)
+                import sqlite3
+                conn = sqlite3.connect(db.db_path)
+                cursor = conn.cursor()
+                cursor.execute('SELECT pmid FROM papers WHERE pmid = ?', (pmid,))
+                exists_in_db = cursor.fetchone() is not None
+                conn.close()
             
             if exists_in_db:
                 # Check if article has full details in database
@@ -279,83 +346,105 @@ class PubMedScraper:
                 row = cursor.fetchone()
                 conn.close()
                 
-                if row and row[0] and row[0] != 'No title' and row[1] and row[1] != 'Unknown Journal':
+                if refresh:
+                    logger.info(f"Article {pmid} was revised in PubMed, will update")
+                elif row and row[0] and row[0] != 'No title' and row[1] and row[1] != 'Unknown Journal':
                     logger.info(f"Article {pmid} already exists in database with full details, skipping")
+                    metrics.end_article('skipped')
                     return True
                 else:
                     logger.info(f"Article {pmid} exists in database but missing details, will update")
                     # Continue to fetch and update
             
             # Also check storage (JSON files) for missing details check, but don't skip if only in JSON
-            existing = self.storage.get_article_by_pmid(pmid)
+            with metrics.stage('storage_lookup'):
+                existing = self.storage.get_article_by_pmid(pmid)
             if existing and not exists_in_db:
                 # Article is in JSON but not database - we'll add it to database
                 logger.info(f"Article {pmid} found in JSON files but not database - will add to database")
                 # Continue processing to add to database
             
             # Fetch article details
-            article_data = self.fetch_article_details(pmid)
+            with metrics.stage('fetch'):
+                article_data = self.fetch_article_details(pmid, refresh=refresh)
             if not article_data:
                 logger.warning(f"Could not fetch details for PMID {pmid}")
                 return False
             
-            # Check open access status
-            oa_info = self.oa_detector.check_open_access(
-                article_data.get('doi', ''),
-                pmid=pmid
-            )
-            article_data['access_type'] = 'open_access' if oa_info.get('is_open_access') else 'paywalled'
-            article_data['pdf_url'] = oa_info.get('pdf_url', '')
+            # Near-duplicates of a stored study are linked to it and skip the OA check, PDF and extraction
+            with metrics.stage('near_duplicate'):
+                duplicate = self.mark_duplicate(article_data)
             
-            # Download PDF if open access
-            if oa_info.get('is_open_access') and oa_info.get('pdf_url'):
-                pdf_path = self.oa_detector.download_pdf(oa_info['pdf_url'], pmid)
-                if pdf_path:
-                    article_data['pdf_path'] = pdf_path
-            
-            # Calculate relevance score using enhanced scorer
-            try:
-                enhanced_score, score_breakdown = self.enhanced_scorer.calculate_relevance_score(article_data)
-                article_data['relevance_score'] = enhanced_score
-                article_data['relevance_score_breakdown'] = score_breakdown
-                article_data['value_category'] = self.enhanced_scorer.get_value_category(enhanced_score)
-                article_data['priority_level'] = self.enhanced_scorer.get_priority_level(enhanced_score)
+            # Check open access status
+            if not duplicate:
+                with metrics.stage('open_access'):
+                    oa_info = self.oa_detector.check_open_access(
+                        article_data.get('doi', ''),
+                        pmid=pmid
+                    )
+                article_data['access_type'] = 'open_access' if oa_info.get('is_open_access') else 'paywalled'
+                article_data['pdf_url'] = oa_info.get('pdf_url', '')
                 
-                # Also calculate legacy score for backward compatibility
-                legacy_score = self.relevance_scorer.calculate_relevance_score(article_data)
-                article_data['relevance_score_legacy'] = legacy_score
-            except Exception as e:
-                logger.warning(f"Error calculating enhanced score for {pmid}, using legacy: {e}")
-                # Fallback to legacy scoring
-                relevance_score = self.relevance_scorer.calculate_relevance_score(article_data)
-                article_data['relevance_score'] = relevance_score
-                article_data['value_category'] = 'unknown'
-                article_data['priority_level'] = 'unknown'
+                # Download PDF if open access
+                if oa_info.get('is_open_access') and oa_info.get('pdf_url'):
+                    with metrics.stage('pdf_download'):
+                        pdf_path = self.oa_detector.download_pdf(oa_info['pdf_url'], pmid)
+                    if pdf_path:
+                        article_data['pdf_path'] = pdf_path
             
-            # Extract predictive factors
-            text = article_data.get('abstract', '')
-            if article_data.get('pdf_path'):
+            # Calculate relevance score using enhanced scorer
+            with metrics.stage('scoring'):
                 try:
-                    full_text = self.oa_detector.extract_pdf_text(article_data['pdf_path'])
-                    text += " " + full_text
+                    enhanced_score, score_breakdown = self.enhanced_scorer.calculate_relevance_score(article_data)
+                    article_data['relevance_score'] = enhanced_score
+                    article_data['relevance_score_breakdown'] = score_breakdown
+                    article_data['value_category'] = self.enhanced_scorer.get_value_category(enhanced_score)
+                    article_data['priority_level'] = self.enhanced_scorer.get_priority_level(enhanced_score)
+                
+                    # Also calculate legacy score for backward compatibility
+                    legacy_score = self.relevance_scorer.calculate_relevance_score(article_data)
+                    article_data['relevance_score_legacy'] = legacy_score
+                    article_data['scoring_version'] = self.scoring_version
                 except Exception as e:
-                    logger.warning(f"Could not extract PDF text for {pmid}: {e}")
+                    logger.warning(f"Error calculating enhanced score for {pmid}, using legacy: {e}")
+                    # Fallback to legacy scoring
+                    relevance_score = self.relevance_scorer.calculate_relevance_score(article_data)
+                    article_data['relevance_score'] = relevance_score
+                    article_data['value_category'] = 'unknown'
+                    article_data['priority_level'] = 'unknown'
             
-            predictive_factors = self.factor_extractor.extract_predictive_factors(text)
-            article_data['predictive_factors'] = predictive_factors
+            # Extract predictive factors (the canonical record holds a duplicate's evidence)
+            if duplicate:
+                article_data['predictive_factors'] = []
+            else:
+                text = article_data.get('abstract', '')
+                if article_data.get('pdf_path'):
+                    try:
+                        with metrics.stage('pdf_text'):
+                            full_text = self.oa_detector.extract_pdf_text(article_data['pdf_path'])
+                        text += " " + full_text
+                    except Exception as e:
+                        logger.warning(f"Could not extract PDF text for {pmid}: {e}")
+                
+                with metrics.stage('factor_extraction'):
+                    predictive_factors = self.factor_extractor.extract_predictive_factors(text)
+                article_data['predictive_factors'] = predictive_factors
             
             # Set processing status
-            article_data['processing_status'] = 'processed'
+            article_data['processing_status'] = 'duplicate' if duplicate else 'processed'
             article_data['created_at'] = datetime.now().isoformat()
             article_data['updated_at'] = datetime.now().isoformat()
             
             # Store in file storage (always try to save, even if Google Sheets fails)
             # File storage is the primary storage, Google Sheets is secondary
             try:
-                file_success = self.storage.insert_article(article_data)
+                with metrics.stage('store_files'):
+                    file_success = self.storage.insert_article(article_data)
                 if not file_success:
                     logger.error(f"Failed to store PMID {pmid} to file storage")
                     return False
+                if self.xata is not None:
+                    self._xata_queue.append(article_data)
             except Exception as e:
                 logger.error(f"Error storing article {pmid} to file storage: {e}")
                 return False
@@ -371,7 +460,8 @@ class PubMedScraper:
                 db = LiteratureDatabase(db_path=db_path)
                 # Get PROBAST assessment if available
                 probast_assessment = article_data.get('probast_assessment')
-                db_success = db.add_article(article_data, probast_assessment)
+                with metrics.stage('store_database'):
+                    db_success = db.add_article(article_data, probast_assessment)
                 if db_success:
                     score = article_data.get('relevance_score', 0)
                     logger.info(f"Successfully processed PMID {pmid} (score: {score}) - saved to database")
@@ -383,6 +473,8 @@ class PubMedScraper:
                 logger.warning(f"Error saving PMID {pmid} to database: {e} (but saved to file storage)")
                 success = True  # Still count as success since file storage worked
             
+            if duplicate:
+                metrics.end_article('duplicate')
             return success
             
         except Exception as e:
@@ -400,9 +492,35 @@ class PubMedScraper:
                 pass
             return False
     
-    def run(self):
-        """Main execution method"""
-        logger.info("Starting PubMed scraper")
+    def mark_duplicate(self, article_data: Dict) -> Optional[Dict]:
+        """
+        Index an article's MinHash signature and link it to its canonical record if it is a near-duplicate
+        
+        Args:
+            article_data: Fetched article (duplicate_of and duplicate_similarity are set on a match)
+            
+        Returns:
+            The match from NearDuplicateIndex.check_article, or None
+        """
+        try:
+            duplicate = self.duplicates.check_article(article_data)
+        except Exception as e:
+            logger.warning(f"Near-duplicate check failed for {article_data.get('pmid')}: {e}")
+            return None
+        if duplicate:
+            article_data['duplicate_of'] = duplicate['duplicate_of']
+            article_data['duplicate_similarity'] = round(duplicate['similarity'], 3)
+        return duplicate
+    
+    def _select_search(self):
+        """
+        Choose the search query from the configured strategy
+        
+        Returns:
+            (query, max_results, date_range_years, fallback_query) - fallback_query is
+            tried when the query finds nothing
+        """
+        current_query = '("knee osteoarthritis" OR "knee OA") AND ("progression" OR "total knee replacement" OR "arthroplasty" OR "TKR") AND (human[Filter])'
         
         # Determine which search strategy to use
         use_enhanced = os.getenv('USE_ENHANCED_SEARCH', 'true').lower() == 'true'
@@ -425,57 +543,89 @@ class PubMedScraper:
                     logger.info(f"Using focused search strategy (max_results: {max_results}, date_range: {date_range} years)")
                 else:
                     # Fallback to current strategy
-                    query = '("knee osteoarthritis" OR "knee OA") AND ("progression" OR "total knee replacement" OR "arthroplasty" OR "TKR") AND (human[Filter])'
+                    query = current_query
                     max_results = self.max_articles
                     date_range = 5
                     logger.info("Using current search strategy (fallback)")
-                
-                pmids = self.search_pubmed(query, max_results=max_results, date_range_years=date_range)
+                return query, max_results, date_range, None
                 
             except Exception as e:
                 logger.error(f"Error using enhanced search strategy: {e}, falling back to current")
-                query = '("knee osteoarthritis" OR "knee OA") AND ("progression" OR "total knee replacement" OR "arthroplasty" OR "TKR") AND (human[Filter])'
-                pmids = self.search_pubmed(query, max_results=self.max_articles, date_range_years=5)
-        else:
-            # Use current search strategy (backward compatible)
-            logger.info("Using current search strategy")
-            query = '("knee osteoarthritis" OR "knee OA") AND ("progression" OR "total knee replacement" OR "arthroplasty" OR "TKR") AND (human[Filter])'
-            pmids = self.search_pubmed(query, max_results=self.max_articles, date_range_years=5)
-            
-            # Progressive fallback if no results
-            if not pmids:
-                logger.info("No articles found with initial query, trying broader search...")
-                query = '("knee osteoarthritis" OR "knee OA") AND ("progression" OR "total knee replacement" OR "arthroplasty" OR "TKR")'
-                pmids = self.search_pubmed(query, max_results=self.max_articles, date_range_years=5)
+                return current_query, self.max_articles, 5, None
         
-        if not pmids:
-            logger.warning("No articles found with any search query")
-            return
+        # Use current search strategy (backward compatible), with a broader query if nothing is found
+        logger.info("Using current search strategy")
+        broader_query = '("knee osteoarthritis" OR "knee OA") AND ("progression" OR "total knee replacement" OR "arthroplasty" OR "TKR")'
+        return current_query, self.max_articles, 5, broader_query
+    
+    def _commit_batch(self):
+        """Write out changes queued for Google Sheets (write-behind) and Xata"""
+        if hasattr(self.storage, 'flush'):
+            self.storage.flush()
+        
+        # Bulk upsert processed articles to Xata
+        if self.xata is not None and self._xata_queue:
+            self.xata.upsert_articles(self._xata_queue)
+            self._xata_queue = []
         
-        # Process each article
+        self.metrics.flush()
+    
+    def run(self):
+        """Main execution method"""
+        logger.info("Starting PubMed scraper")
+        self.metrics.reset()
+        
+        query, max_results, date_range, fallback_query = self._select_search()
+        
+        # Process new articles in batches; the sync checkpoints after each committed batch
         processed = 0
         errors = 0
+        revised = set()
         
-        for pmid in pmids:
-            try:
-                if self.process_article(pmid):
-                    processed += 1
-                else:
+        def process_batch(pmids: List[str]) -> List[str]:
+            nonlocal processed, errors
+            failed = []
+            for pmid in pmids:
+                try:
+                    if self.process_article(pmid, refresh=pmid in revised):
+                        processed += 1
+                    else:
+                        errors += 1
+                        failed.append(pmid)
+                except Exception as e:
+                    logger.error(f"Unexpected error processing {pmid}: {e}")
                     errors += 1
-            except Exception as e:
-                logger.error(f"Unexpected error processing {pmid}: {e}")
-                errors += 1
-            
-            # Log progress
-            if (processed + errors) % 10 == 0:
-                logger.info(f"Progress: {processed} processed, {errors} errors")
+                    failed.append(pmid)
+                
+                # Log progress
+                if (processed + errors) % 10 == 0:
+                    logger.info(f"Progress: {processed} processed, {errors} errors")
+            self._commit_batch()
+            return failed
+        
+        run = self.sync.start(query, max_results=max_results, date_range_years=date_range)
+        
+        # Progressive fallback if no results
+        if run is None and fallback_query:
+            logger.info("No articles found with initial query, trying broader search...")
+            run = self.sync.start(fallback_query, max_results=max_results, date_range_years=date_range)
+        
+        if run is None:
+            logger.warning("No articles found with any search query")
+            self.metrics.finish(self.http_cache)
+            return
+        # Records revised since they were stored are fetched again and updated
+        revised.update(PubMedSync.revised(run))
+        result = self.sync.process(run, process_batch)
+        if result['found'] == 0:
+            logger.info("No new articles since the last sync")
         
         logger.info(f"Scraping complete: {processed} processed, {errors} errors")
         
-        # Write daily summary
-        self._write_daily_summary(processed, errors, len(pmids))
+        # Write daily summary (with the stage timings when metrics are enabled)
+        self._write_daily_summary(processed, errors, result['found'], self.metrics.finish(self.http_cache))
     
-    def _write_daily_summary(self, processed: int, errors: int, total: int):
+    def _write_daily_summary(self, processed: int, errors: int, total: int, metrics: Optional[Dict] = None):
         """Write daily summary to log file"""
         try:
             summary = {
@@ -485,6 +635,11 @@ class PubMedScraper:
                 'errors': errors,
                 'success_rate': (processed / total * 100) if total > 0 else 0
             }
+            if metrics:
+                summary['metrics'] = {key: metrics[key] for key in
+                                      ('elapsed_seconds', 'articles_per_minute', 'retry_backoff_seconds')}
+                summary['metrics']['stage_seconds'] = {name: stage['total']
+                                                       for name, stage in metrics['stages'].items()}
             
             os.makedirs('logs', exist_ok=True)
             with open('logs/daily_summary.json', 'w') as f:
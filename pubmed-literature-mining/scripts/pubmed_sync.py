@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Incremental PubMed Sync
+Keeps a high-water mark per search query so repeat runs only ask PubMed for
+records added (EDAT) or revised (MDAT) since the last completed sync, instead
+of re-running the full 5-10 year search and discarding duplicates.
+
+State lives in data/sync_state.json:
+- watermarks: per query, the last EDAT/MDAT window end, the PMIDs seen in that
+  window (PubMed dates are day-granular, so the overlap day is deduplicated
+  against them) and PMIDs that failed and should be retried
+- checkpoints: the PMID list of a sync in progress and the PMIDs already
+  committed, saved after every batch so a killed job resumes where it stopped
+
+Window searches always go to PubMed (never the HTTP cache: a second run on
+the same day asks for the same window). Revised records are listed in the
+run's 'revised' so callers fetch them again past the cached EFetch and update
+the stored article.
+
+The first sync of a query (or PUBMED_FULL_SYNC=true) runs the caller's normal
+full search.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%Y/%m/%d'
+DEFAULT_BATCH_SIZE = 25
+MAX_ATTEMPTS = 3  # failed PMIDs are retried by this many later syncs before being dropped
+
+
+def _default_state_path() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    return os.path.join(project_root, 'data', 'sync_state.json')
+
+
+def query_key(query: str) -> str:
+    """Stable key for a query (whitespace-insensitive)"""
+    return hashlib.sha256(' '.join(query.split()).encode('utf-8')).hexdigest()[:16]
+
+
+class SyncState:
+    """Watermarks and in-progress checkpoints, written atomically to a JSON file"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Load (or start) the sync state
+
+        Args:
+            path: JSON file (default: data/sync_state.json)
+        """
+        self.path = path or _default_state_path()
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    state = json.load(f)
+                state.setdefault('watermarks', {})
+                state.setdefault('checkpoints', {})
+                return state
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read sync state, starting fresh: {e}")
+        return {'watermarks': {}, 'checkpoints': {}}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get_watermark(self, key: str) -> Optional[Dict]:
+        """High-water mark of the last completed sync of a query"""
+        return self._state['watermarks'].get(key)
+
+    def set_watermark(self, key: str, watermark: Dict):
+        with self._lock:
+            self._state['watermarks'][key] = watermark
+            self._save()
+
+    def get_checkpoint(self, key: str) -> Optional[Dict]:
+        """Sync of a query that was started but not finished"""
+        return self._state['checkpoints'].get(key)
+
+    def set_checkpoint(self, key: str, checkpoint: Dict):
+        with self._lock:
+            self._state['checkpoints'][key] = checkpoint
+            self._save()
+
+    def finish(self, key: str, watermark: Dict):
+        """Record a completed sync and drop its checkpoint in one write"""
+        with self._lock:
+            self._state['watermarks'][key] = watermark
+            self._state['checkpoints'].pop(key, None)
+            self._save()
+
+
+class PubMedSync:
+    """Watermark-based incremental search with per-batch checkpoints"""
+
+    def __init__(self, scraper, state: Optional[SyncState] = None, full: Optional[bool] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize the sync
+
+        Args:
+            scraper: PubMedScraper (provides search_pubmed and esearch)
+            state: Sync state (default: data/sync_state.json)
+            full: Ignore watermarks and run full searches (default: PUBMED_FULL_SYNC)
+            batch_size: PMIDs per committed batch
+        """
+        self.scraper = scraper
+        self.state = state or SyncState()
+        if full is None:
+            full = os.getenv('PUBMED_FULL_SYNC', 'false').lower() == 'true'
+        self.full = full
+        self.batch_size = max(1, batch_size)
+
+    def start(self, query: str, max_results: int = 10000, date_range_years: int = None) -> Optional[Dict]:
+        """
+        Begin (or resume) a sync of one query
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum PMIDs per search
+            date_range_years: Publication window for the first (full) sync
+
+        Returns:
+            The sync run (PMIDs to process plus progress), or None if the search
+            failed (or a full search found nothing)
+        """
+        key = query_key(query)
+        checkpoint = self.state.get_checkpoint(key)
+        if checkpoint is not None:
+            logger.info(f"Resuming sync of query {key}: {len(self.remaining(checkpoint))} of "
+                        f"{len(checkpoint['pmids'])} PMIDs left")
+            return checkpoint
+
+        window_end = datetime.now().strftime(DATE_FORMAT)
+        watermark = None if self.full else self.state.get_watermark(key)
+
+        if watermark:
+            added = self.scraper.esearch(query, max_results=max_results, mindate=watermark['last_edat'],
+                                         maxdate=window_end, datetype='edat', ttl=0)
+            revised = self.scraper.esearch(query, max_results=max_results, mindate=watermark['last_mdat'],
+                                           maxdate=window_end, datetype='mdat', ttl=0)
+            if added is None or revised is None:
+                logger.error(f"Incremental search failed for query {key}; watermark left unchanged")
+                return None
+            seen = set(watermark.get('last_pmids', []))
+            retry = list(watermark.get('retry', {}))
+            added = [p for p in _unique(added) if p not in seen]
+            # Revised records are processed even if seen before: they are stored with the old version
+            revised = _unique([p for p in revised if p not in added]
+                              + [p for p in watermark.get('retry_revised', []) if p in retry])
+            pmids = _unique(retry + added + revised)
+            mode = 'incremental'
+            logger.info(f"Incremental sync since {watermark['last_edat']}: {len(added)} added, "
+                        f"{len(revised)} revised, {len(retry)} retried, {len(pmids)} to process")
+        else:
+            pmids = self.scraper.search_pubmed(query, max_results=max_results, date_range_years=date_range_years)
+            if not pmids:
+                # search_pubmed returns [] on errors too; without a watermark the next run searches again
+                logger.warning(f"Full search for query {key} returned nothing; no watermark recorded")
+                return None
+            pmids = _unique(pmids)
+            revised = []
+            mode = 'full'
+            logger.info(f"Full sync: {len(pmids)} PMIDs")
+
+        run = {
+            'key': key,
+            'query': query,
+            'mode': mode,
+            'window_end': window_end,
+            'pmids': pmids,
+            'revised': revised,
+            'done': [],
+            'failed': [],
+            'retry': (watermark or {}).get('retry', {}),
+            'started_at': datetime.now().isoformat()
+        }
+        self.state.set_checkpoint(key, run)
+        return run
+
+    @staticmethod
+    def remaining(run: Dict) -> List[str]:
+        """PMIDs of the run not yet committed or failed"""
+        finished = set(run['done']) | set(run['failed'])
+        return [pmid for pmid in run['pmids'] if pmid not in finished]
+
+    @staticmethod
+    def revised(run: Dict) -> Set[str]:
+        """PMIDs of the run revised in PubMed since they were stored (fetch them again, bypassing the cache)"""
+        return set(run.get('revised', []))
+
+    def checkpoint(self, run: Dict, done: Iterable[str], failed: Iterable[str] = ()):
+        """Record a committed batch"""
+        run['done'].extend(str(p) for p in done)
+        run['failed'].extend(str(p) for p in failed)
+        run['updated_at'] = datetime.now().isoformat()
+        self.state.set_checkpoint(run['key'], run)
+
+    def finish(self, run: Dict):
+        """Advance the watermark to the end of the run's window"""
+        retry = {}
+        for pmid in run['failed'] + self.remaining(run):
+            attempts = run['retry'].get(pmid, 0) + 1
+            if attempts < MAX_ATTEMPTS:
+                retry[pmid] = attempts
+            else:
+                logger.warning(f"Giving up on PMID {pmid} after {attempts} attempts")
+        self.state.finish(run['key'], {
+            'query': run['query'],
+            'last_edat': run['window_end'],
+            'last_mdat': run['window_end'],
+            'last_pmids': run['pmids'],
+            'retry': retry,
+            'retry_revised': [pmid for pmid in retry if pmid in self.revised(run)],
+            'last_mode': run['mode'],
+            'synced_at': datetime.now().isoformat()
+        })
+        logger.info(f"Sync of query {run['key']} complete: {len(run['done'])} committed, "
+                    f"{len(run['failed'])} failed; watermark {run['window_end']}")
+
+    def sync(self, query: str, process_batch: Callable[[List[str]], Iterable[str]], max_results: int = 10000,
+             date_range_years: int = None, should_stop: Callable[[], bool] = None) -> Dict:
+        """
+        Process every new PMID for a query in checkpointed batches
+
+        Args:
+            query: PubMed search query
+            process_batch: Called with each batch of PMIDs once the previous batch is
+                committed; returns the PMIDs that failed (None or empty if all succeeded)
+            max_results: Maximum PMIDs per search
+            date_range_years: Publication window for the first (full) sync
+            should_stop: Checked before each batch; stopping keeps the checkpoint for the next run
+
+        Returns:
+            Dictionary with mode, found, processed, failed and complete
+        """
+        run = self.start(query, max_results=max_results, date_range_years=date_range_years)
+        if run is None:
+            return {'mode': None, 'found': 0, 'processed': 0, 'failed': 0, 'complete': False}
+        return self.process(run, process_batch, should_stop=should_stop)
+
+    def process(self, run: Dict, process_batch: Callable[[List[str]], Iterable[str]],
+                should_stop: Callable[[], bool] = None) -> Dict:
+        """
+        Process a started run's remaining PMIDs in checkpointed batches (see sync)
+
+        Returns:
+            Dictionary with mode, found, processed, failed and complete
+        """
+        pending = self.remaining(run)
+        complete = True
+        for i in range(0, len(pending), self.batch_size):
+            if should_stop and should_stop():
+                complete = False
+                logger.info(f"Stopping sync of query {run['key']}; {len(pending) - i} PMIDs left for next run")
+                break
+            batch = pending[i:i + self.batch_size]
+            failed = set(str(p) for p in (process_batch(batch) or ()))
+            self.checkpoint(run, [p for p in batch if p not in failed], [p for p in batch if p in failed])
+
+        if complete:
+            self.finish(run)
+        return {
+            'mode': run['mode'],
+            'found': len(run['pmids']),
+            'processed': len(run['done']),
+            'failed': len(run['failed']),
+            'complete': complete
+        }
+
+
+def _unique(pmids: Iterable) -> List[str]:
+    seen = set()
+    ordered = []
+    for pmid in pmids:
+        pmid = str(pmid)
+        if pmid not in seen:
+            seen.add(pmid)
+            ordered.append(pmid)
+    return ordered
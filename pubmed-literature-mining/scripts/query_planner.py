@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Multi-Query Search Planner
+Runs every search query of a crawl up front as an IDs-only ESearch on the
+E-utilities history server, unions and deduplicates the PMID sets, subtracts
+the articles already in the corpus and hands back one fetch queue. Crawl cost
+then grows with the number of new articles instead of the number of
+overlapping queries (previously each query re-walked ~2,000 known PMIDs).
+
+The queue is ordered by cheap signals available without fetching a record:
+the number of queries that matched a PMID (more overlap = more on-topic), then
+recency (PMIDs are assigned in increasing order as records enter PubMed).
+
+Plans are checkpointed and watermarked through PubMedSync under one key for
+the query set, so after the first full plan later runs only search records
+added (EDAT) or revised (MDAT) since the last completed plan, and an
+interrupted crawl resumes from its last committed batch.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+
+from scripts.pubmed_sync import DATE_FORMAT, PubMedSync, query_key
+
+logger = logging.getLogger(__name__)
+
+# ESearch returns at most 10,000 UIDs per request (and per query for PubMed)
+ESEARCH_PAGE_SIZE = 10000
+
+
+def _project_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configured_queries(config_path: Optional[str] = None) -> List[Dict]:
+    """
+    Search strategies from config/search_strategy.json
+
+    Returns:
+        [{'name', 'query', 'max_results'}] (empty if the file is missing or unreadable)
+    """
+    config_path = config_path or os.path.join(_project_root(), 'config', 'search_strategy.json')
+    try:
+        with open(config_path, 'r') as f:
+            strategies = json.load(f).get('search_strategies', {})
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load search strategies from {config_path}: {e}")
+        return []
+    return [{'name': name, 'query': strategy['query'], 'max_results': strategy.get('max_results', ESEARCH_PAGE_SIZE)}
+            for name, strategy in strategies.items() if strategy.get('query')]
+
+
+def corpus_pmids(db_path: Optional[str] = None, articles_dir: Optional[str] = None) -> Set[str]:
+    """
+    PMIDs already stored, from the papers table and the article index (no article files are read)
+
+    Args:
+        db_path: Literature database (default: data/literature.db)
+        articles_dir: File storage directory holding index.json (default: data/articles)
+    """
+    db_path = db_path or os.path.join(_project_root(), 'data', 'literature.db')
+    articles_dir = articles_dir or os.path.join(_project_root(), 'data', 'articles')
+    pmids = set()
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            pmids.update(str(row[0]) for row in conn.execute('SELECT pmid FROM papers WHERE pmid IS NOT NULL'))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read PMIDs from {db_path}: {e}")
+        finally:
+            conn.close()
+    index_path = os.path.join(articles_dir, 'index.json')
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r') as f:
+                pmids.update(str(pmid) for pmid in json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read {index_path}: {e}")
+    return pmids
+
+
+def _recency(pmid: str) -> int:
+    return int(pmid) if pmid.isdigit() else 0
+
+
+def _normalize(queries: Iterable[Union[str, Dict]], max_results: int) -> List[Dict]:
+    normalized, seen = [], set()
+    for i, query in enumerate(queries, 1):
+        if isinstance(query, str):
+            query = {'query': query}
+        text = ' '.join(query['query'].split())
+        if text in seen:
+            continue
+        seen.add(text)
+        normalized.append({'name': query.get('name') or f'query_{i}', 'query': query['query'],
+                           'max_results': min(query.get('max_results') or max_results, max_results)})
+    return normalized
+
+
+def plan_key(queries: Iterable[Union[str, Dict]]) -> str:
+    """Sync key of a query set (order- and whitespace-insensitive)"""
+    texts = sorted(' '.join((q if isinstance(q, str) else q['query']).split()) for q in queries)
+    return 'plan-' + query_key('\n'.join(texts))
+
+
+class QueryPlanner:
+    """Plans one deduplicated, prioritized fetch queue for a set of PubMed queries"""
+
+    def __init__(self, scraper, sync: Optional[PubMedSync] = None):
+        """
+        Initialize the planner
+
+        Args:
+            scraper: PubMedScraper (provides _make_request, BASE_URL, email and tool)
+            sync: Checkpoints and watermarks (default: the scraper's PubMedSync)
+        """
+        self.scraper = scraper
+        self.sync = sync or scraper.sync
+        self._webenv = None
+
+    def search_ids(self, query: str, max_results: int = ESEARCH_PAGE_SIZE, mindate: Optional[str] = None,
+                   maxdate: Optional[str] = None, datetype: str = 'pdat') -> Optional[List[str]]:
+        """
+        IDs-only ESearch posted to the history server
+
+        The first request stores the result set under the planner's WebEnv (shared by
+        all queries of a plan); further pages are read back from it with #query_key,
+        so every page comes from the same snapshot. None of these requests use the
+        HTTP cache: a cached WebEnv may have expired on the history server.
+
+        Returns:
+            PMIDs (most recent first), or None if the search failed
+        """
+        url = f"{self.scraper.BASE_URL}/esearch.fcgi"
+        params = {
+            'db': 'pubmed',
+            'term': query,
+            'usehistory': 'y',
+            'retmax': min(max_results, ESEARCH_PAGE_SIZE),
+            'retmode': 'json',
+            'sort': 'pub_date',
+            'email': self.scraper.email,
+            'tool': self.scraper.tool,
+        }
+        if mindate:
+            params.update(datetype=datetype, mindate=mindate,
+                          maxdate=maxdate or datetime.now().strftime(DATE_FORMAT))
+        if self._webenv:
+            params['WebEnv'] = self._webenv
+
+        pmids = []
+        while True:
+            response = self.scraper._make_request(url, params, ttl=0)
+            if not response:
+                return None
+            try:
+                result = response.json()['esearchresult']
+                page = result.get('idlist', [])
+                count = int(result.get('count', 0))
+            except (ValueError, KeyError) as e:
+                logger.error(f"Error parsing search results: {e}")
+                return None
+            pmids.extend(page)
+            self._webenv = result.get('webenv') or self._webenv
+            if not page or len(pmids) >= min(count, max_results):
+                return pmids[:max_results]
+            # Read the next page of the stored result set
+            params = {
+                'db': 'pubmed',
+                'term': f"#{result['querykey']}",
+                'WebEnv': self._webenv,
+                'retstart': len(pmids),
+                'retmax': min(max_results - len(pmids), ESEARCH_PAGE_SIZE),
+                'retmode': 'json',
+                'sort': 'pub_date',
+                'email': self.scraper.email,
+                'tool': self.scraper.tool,
+            }
+
+    def plan(self, queries: Iterable[Union[str, Dict]], existing: Iterable[str] = (), max_results: int = ESEARCH_PAGE_SIZE,
+             date_range_years: Optional[int] = None, watermark: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Search every query and build the fetch queue
+
+        Args:
+            queries: Query strings or {'name', 'query', 'max_results'} dictionaries
+            existing: PMIDs already in the corpus (left out of the queue)
+            max_results: Cap on PMIDs per query
+            date_range_years: Publication window for full searches (skipped for queries with [PDAT])
+            watermark: Last completed plan of this query set; only records added or revised since
+                its window end are searched, and its PMIDs are not queued again unless revised
+
+        Returns:
+            {'pmids': queue of new PMIDs, 'revised': stored PMIDs revised since the watermark,
+            'hits': PMID -> matching queries, 'queries': per-query counts, 'union', 'known', 'mode'},
+            or None if any search failed
+        """
+        self._webenv = None
+        queries = _normalize(queries, max_results)
+        existing = set(str(p) for p in existing)
+        hits: Dict[str, int] = {}
+        modified: Set[str] = set()
+        per_query = []
+        for query in queries:
+            if watermark:
+                found = []
+                for datetype, since in (('edat', watermark['last_edat']), ('mdat', watermark['last_mdat'])):
+                    ids = self.search_ids(query['query'], query['max_results'], mindate=since, datetype=datetype)
+                    if ids is None:
+                        logger.error(f"Incremental search failed for {query['name']}; plan abandoned")
+                        return None
+                    found.extend(ids)
+                    if datetype == 'mdat':
+                        modified.update(str(p) for p in ids)
+            else:
+                mindate = None
+                if date_range_years is not None and '[PDAT]' not in query['query']:
+                    mindate = (datetime.now() - timedelta(days=date_range_years * 365)).strftime(DATE_FORMAT)
+                found = self.search_ids(query['query'], query['max_results'], mindate=mindate)
+                if found is None:
+                    logger.error(f"Search failed for {query['name']}; plan abandoned")
+                    return None
+            found = set(str(p) for p in found)
+            for pmid in found:
+                hits[pmid] = hits.get(pmid, 0) + 1
+            per_query.append({'name': query['name'], 'found': len(found),
+                              'new': sum(1 for p in found if p not in existing)})
+            logger.info(f"{query['name']}: {len(found)} PMIDs ({per_query[-1]['new']} not in the corpus)")
+
+        seen = set((watermark or {}).get('last_pmids', []))
+        new = [pmid for pmid in hits if pmid not in existing and pmid not in seen]
+        new.sort(key=lambda pmid: (-hits[pmid], -_recency(pmid)))
+        # Stored (or already queued) records revised since the watermark are fetched again to update them
+        revised = sorted((pmid for pmid in modified if pmid in existing or pmid in seen),
+                         key=lambda pmid: (-hits[pmid], -_recency(pmid)))
+        logger.info(f"Plan: {sum(q['found'] for q in per_query)} hits across {len(queries)} queries, "
+                    f"{len(hits)} unique PMIDs, {len(new)} to fetch, {len(revised)} revised to update")
+        return {
+            'pmids': new,
+            'revised': revised,
+            'hits': {pmid: hits[pmid] for pmid in new + revised},
+            'queries': per_query,
+            'union': len(hits),
+            'known': len(hits) - len(new) - len(revised),
+            'mode': 'incremental' if watermark else 'full'
+        }
+
+    def start(self, queries: Iterable[Union[str, Dict]], existing: Iterable[str] = (),
+              max_results: int = ESEARCH_PAGE_SIZE, date_range_years: Optional[int] = None) -> Optional[Dict]:
+        """
+        Begin (or resume) a checkpointed crawl of a query set
+
+        Returns:
+            The sync run (see PubMedSync.start) with the plan's per-query counts, or None if a search failed
+        """
+        queries = list(queries)
+        key = plan_key(queries)
+        checkpoint = self.sync.state.get_checkpoint(key)
+        if checkpoint is not None:
+            logger.info(f"Resuming plan {key}: {len(self.sync.remaining(checkpoint))} of "
+                        f"{len(checkpoint['pmids'])} PMIDs left")
+            return checkpoint
+
+        window_end = datetime.now().strftime(DATE_FORMAT)
+        watermark = None if self.sync.full else self.sync.state.get_watermark(key)
+        plan = self.plan(queries, existing, max_results=max_results, date_range_years=date_range_years,
+                         watermark=watermark)
+        if plan is None:
+            return None
+        retry = (watermark or {}).get('retry', {})
+        retry_revised = set((watermark or {}).get('retry_revised', []))
+        existing = set(str(p) for p in existing)
+        revised = plan['revised'] + [p for p in retry if p in retry_revised and p not in plan['revised']]
+        pmids = ([p for p in retry if p not in existing or p in retry_revised]
+                 + [p for p in plan['pmids'] + plan['revised'] if p not in retry])
+        run = {
+            'key': key,
+            'query': [q if isinstance(q, str) else q['query'] for q in queries],
+            'mode': plan['mode'],
+            'window_end': window_end,
+            'pmids': pmids,
+            'revised': revised,
+            'done': [],
+            'failed': [],
+            'retry': retry,
+            'plan': {'queries': plan['queries'], 'union': plan['union'], 'known': plan['known'],
+                     'revised': len(revised)},
+            'started_at': datetime.now().isoformat()
+        }
+        self.sync.state.set_checkpoint(key, run)
+        return run
+
+    def crawl(self, queries: Iterable[Union[str, Dict]], process_batch: Callable[[List[str]], Iterable[str]],
+              existing: Iterable[str] = (), max_results: int = ESEARCH_PAGE_SIZE,
+              date_range_years: Optional[int] = None, should_stop: Callable[[], bool] = None) -> Dict:
+        """
+        Plan a query set and process its fetch queue in checkpointed batches
+
+        Args:
+            queries: Query strings or {'name', 'query', 'max_results'} dictionaries
+            process_batch: Called with each batch of PMIDs; returns the PMIDs that failed (to refetch
+                revised records past the cache, use start and PubMedSync.revised instead)
+            existing: PMIDs already in the corpus
+            max_results: Cap on PMIDs per query
+            date_range_years: Publication window for the first (full) plan
+            should_stop: Checked before each batch; stopping keeps the checkpoint for the next run
+
+        Returns:
+            PubMedSync.process result plus the plan's per-query counts, union and known
+        """
+        run = self.start(queries, existing, max_results=max_results, date_range_years=date_range_years)
+        if run is None:
+            return {'mode': None, 'found': 0, 'processed': 0, 'failed': 0, 'complete': False,
+                    'queries': [], 'union': 0, 'known': 0, 'revised': 0}
+        result = self.sync.process(run, process_batch, should_stop=should_stop)
+        result.update(run.get('plan', {}))
+        return result
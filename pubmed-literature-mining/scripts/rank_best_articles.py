@@ -19,6 +19,7 @@ from typing import List, Dict
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.literature_database import LiteratureDatabase
+from scripts.corpus_snapshot import load_corpus
 
 
 class ArticleRanker:
@@ -131,25 +132,12 @@ class ArticleRanker:
         Returns:
             List of ranked articles with quality scores
         """
-        # Get usable articles from database
-        conn = self.database.db_path
-        import sqlite3
-        
-        conn_db = sqlite3.connect(conn)
-        conn_db.row_factory = sqlite3.Row
-        cursor = conn_db.cursor()
-        
-        cursor.execute('''
-        SELECT * FROM papers 
-        WHERE used_in_model = 1
-        AND relevance_score >= 40
-        ORDER BY relevance_score DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        articles = [self.database._row_to_dict(row) for row in rows]
-        
-        conn_db.close()
+        # Get usable articles from the packed corpus snapshot
+        corpus = load_corpus(self.database.db_path)
+        papers, _ = corpus.load_dataframes()
+        usable = papers[(papers['used_in_model']) & (papers['relevance_score'] >= 40)]
+        usable = usable.sort_values('relevance_score', ascending=False, kind='stable')
+        articles = corpus.load_articles(pmids=usable['pmid'].tolist())
         
         # Calculate quality scores
         ranked = []
@@ -8,7 +8,10 @@ import os
 import json
 import logging
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from scripts.keyword_matcher import KeywordHits
+from scripts.text_analysis import AnalyzedText, analyze_article, article_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -42,88 +45,58 @@ class RelevanceScorer:
             self.study_designs = {}
             self.top_tier_journals = []
             self.mid_tier_journals = []
+        
+        # Compiled once and shared with EnhancedRelevanceScorer (see text_analysis.article_matcher)
+        self.matcher = article_matcher(self.config)
+        self.keyword_categories = [f"high_value_keywords.{category}" for category in self.keywords]
     
-    def count_keywords(self, text: str) -> int:
+    def count_keywords(self, text: str, hits: Optional[KeywordHits] = None) -> int:
         """Count occurrences of high-value keywords in text"""
         if not text:
             return 0
         
-        text_lower = text.lower()
-        count = 0
-        
-        # Count keywords from each category
-        for category, keywords in self.keywords.items():
-            for keyword in keywords:
-                # Use word boundaries for better matching
-                pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-                matches = len(re.findall(pattern, text_lower))
-                count += matches
-        
-        return count
+        # Word-bounded counts for every keyword of every category, from one scan
+        if hits is None:
+            hits = self.matcher.match(text)
+        return hits.count_words(self.keyword_categories)
     
-    def get_study_design_score(self, article: Dict) -> int:
+    def get_study_design_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Score based on study design (max 30 points)
         
         Returns:
             Score from 0-30
         """
-        text = f"{article.get('title', '')} {article.get('abstract', '')}".lower()
-        
-        # Check for systematic review/meta-analysis first (highest score)
-        for design_term in self.study_designs['systematic_review']:
-            if design_term.lower() in text:
-                return 20
-        
-        # Check for cohort study
-        for design_term in self.study_designs['cohort_study']:
-            if design_term.lower() in text:
-                return 15
-        
-        # Check for RCT
-        for design_term in self.study_designs['rct']:
-            if design_term.lower() in text:
-                return 15
-        
-        # Check for case-control
-        for design_term in self.study_designs['case_control']:
-            if design_term.lower() in text:
-                return 10
-        
-        # Check for cross-sectional
-        for design_term in self.study_designs['cross_sectional']:
-            if design_term.lower() in text:
-                return 5
+        if analysis is None:
+            analysis = analyze_article(article)
+        hits = analysis.hits(self.matcher, 'title_abstract')
+        
+        # Checked in priority order: systematic review/meta-analysis scores highest
+        design_scores = [
+            ('systematic_review', 20),
+            ('cohort_study', 15),
+            ('rct', 15),
+            ('case_control', 10),
+            ('cross_sectional', 5)
+        ]
+        for design, design_score in design_scores:
+            if hits.any(f"study_designs.{design}"):
+                return design_score
         
         return 0
     
-    def get_sample_size_score(self, article: Dict) -> int:
+    def get_sample_size_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Score based on sample size (max 15 points)
         
         Returns:
             Score from 0-15
         """
-        text = f"{article.get('abstract', '')}".lower()
-        
-        # Look for sample size patterns
-        patterns = [
-            r'\b(\d{1,3}(?:,\d{3})*)\s*(?:patients?|subjects?|participants?|individuals?|cases?)',
-            r'n\s*=\s*(\d{1,3}(?:,\d{3})*)',
-            r'sample\s+size\s+(?:of\s+)?(\d{1,3}(?:,\d{3})*)',
-            r'(\d{1,3}(?:,\d{3})*)\s*(?:patients?|subjects?)\s+(?:were|included|enrolled)'
-        ]
+        if analysis is None:
+            analysis = analyze_article(article)
         
-        max_size = 0
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                # Remove commas and convert to int
-                try:
-                    size = int(match.replace(',', ''))
-                    max_size = max(max_size, size)
-                except ValueError:
-                    continue
+        # Sample size patterns, matched on the lowercased abstract
+        max_size = analysis.max_sample_size('abstract', ('count', 'n_equals', 'sample_size_of', 'enrolled'))
         
         # Score based on size
         if max_size >= 1000:
@@ -137,27 +110,28 @@ class RelevanceScorer:
         else:
             return 0
     
-    def get_journal_score(self, article: Dict) -> int:
+    def get_journal_score(self, article: Dict, analysis: Optional[AnalyzedText] = None) -> int:
         """
         Score based on journal impact (max 15 points)
         
         Returns:
             Score from 0-15
         """
-        journal = article.get('journal', '').lower()
+        if analysis is None:
+            analysis = analyze_article(article)
         
-        if not journal:
+        if not analysis.text('journal'):
             return 5  # Default for unknown journals
         
+        journal_hits = analysis.hits(self.matcher, 'journal')
+        
         # Check top-tier journals
-        for top_journal in self.top_tier_journals:
-            if top_journal.lower() in journal:
-                return 15
+        if journal_hits.any('top_tier_journals'):
+            return 15
         
         # Check mid-tier journals
-        for mid_journal in self.mid_tier_journals:
-            if mid_journal.lower() in journal:
-                return 10
+        if journal_hits.any('mid_tier_journals'):
+            return 10
         
         # Default: peer-reviewed journal (assumed)
         return 5
@@ -173,26 +147,38 @@ class RelevanceScorer:
             Score from 0-100
         """
         score = 0
+        analysis = analyze_article(article)
         
         # Keyword matching (40 points max)
-        text = f"{article.get('title', '')} {article.get('abstract', '')}"
-        keyword_count = self.count_keywords(text)
+        text = analysis.text('title_abstract')
+        keyword_count = self.count_keywords(text, hits=analysis.hits(self.matcher, 'title_abstract'))
         # Scale: each keyword worth up to 4 points, max 40
         keyword_score = min(keyword_count * 2, 40)  # Adjusted: 2 points per keyword
         score += keyword_score
         
         # Study design (30 points max)
-        design_score = self.get_study_design_score(article)
+        design_score = self.get_study_design_score(article, analysis=analysis)
         score += design_score
         
         # Sample size (15 points max)
-        size_score = self.get_sample_size_score(article)
+        size_score = self.get_sample_size_score(article, analysis=analysis)
         score += size_score
         
         # Journal impact (15 points max)
-        journal_score = self.get_journal_score(article)
+        journal_score = self.get_journal_score(article, analysis=analysis)
         score += journal_score
         
         # Ensure score is between 0 and 100
         return min(max(score, 0), 100)
-
+    
+    def score_many(self, articles: List[Dict]) -> List[int]:
+        """
+        Calculate relevance scores for a batch of articles
+        
+        Args:
+            articles: List of article dictionaries
+            
+        Returns:
+            List of scores (0-100), in input order
+        """
+        return [self.calculate_relevance_score(article) for article in articles]
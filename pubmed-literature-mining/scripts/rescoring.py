@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Versioned Incremental Rescoring
+Recomputes derived scores only for articles that a scorer or config change can
+actually affect.
+
+Every derived score carries the version it was computed with:
+- scoring_version: relevance_score, relevance_score_breakdown,
+  relevance_score_legacy, value_category and priority_level. Hash of
+  config/keywords.json and the scorer code.
+- probast_version: automated PROBAST fields in literature.db. Hash of the
+  PROBAST code.
+
+Stale articles are found from an index: FileStorage keeps the scoring version
+in index.json, and literature.db has indexed version columns.
+
+data/keyword_postings.db records, for every scored article, the keyword terms
+found in its title/abstract and journal, plus the keywords.json behind each
+scoring version. When only keyword lists changed since an article's version,
+the article is recomputed only if:
+- a changed term (removed, added, or moved between categories) occurs in it,
+  by a postings lookup for known terms or a scan of the stored title/abstract
+  for new ones; or
+- its postings were never recorded.
+Every other stale article is restamped without rescoring. Code changes and
+non-keyword settings still rescore everything stale.
+
+Rescoring runs in worker processes, in batches. Results are written back in
+bulk: one index.json write and one transaction per batch. PROBAST reassessment
+goes through the batch assessor (probast_batch.py).
+
+Usage: python scripts/rescoring.py [--workers N] [--batch-size N] [--dry-run]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import multiprocessing
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.keyword_matcher import KeywordMatcher, config_categories, load_keyword_config
+
+logger = logging.getLogger(__name__)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Code whose behaviour the stored values depend on
+SCORER_MODULES = ('relevance_scoring.py', 'enhanced_relevance_scoring.py', 'text_analysis.py', 'keyword_matcher.py')
+PROBAST_MODULES = ('probast_assessment.py', 'text_analysis.py')
+
+DEFAULT_BATCH_SIZE = 200
+SCORE_FIELDS = ('relevance_score', 'relevance_score_breakdown', 'relevance_score_legacy',
+                'value_category', 'priority_level')
+
+
+# (file names, modification times) -> hash, so stamping every article does not reread the code
+_file_hashes = {}
+
+
+def _hash_files(names: Iterable[str]) -> str:
+    paths = [os.path.join(SCRIPTS_DIR, name) for name in names]
+    key = tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+    cached = _file_hashes.get(key)
+    if cached is None:
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        cached = _file_hashes[key] = digest.hexdigest()[:16]
+    return cached
+
+
+def scorer_code_hash() -> str:
+    """Hash of the relevance scorer code"""
+    return _hash_files(SCORER_MODULES)
+
+
+def scoring_version(config: Optional[Dict] = None, code_hash: Optional[str] = None) -> str:
+    """
+    Version stamp for relevance scores
+
+    Args:
+        config: keywords.json contents (default: read the file)
+        code_hash: scorer_code_hash() (default: computed)
+    """
+    if config is None:
+        config = load_keyword_config()
+    digest = hashlib.sha256()
+    digest.update((code_hash or scorer_code_hash()).encode('utf-8'))
+    digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def probast_version() -> str:
+    """Version stamp for automated PROBAST assessments"""
+    return _hash_files(PROBAST_MODULES)
+
+
+def _settings(config: Dict) -> Dict:
+    """keywords.json without its term lists (values the matcher does not see)"""
+    settings = {}
+    for group, value in config.items():
+        if isinstance(value, dict):
+            settings[group] = {k: v for k, v in value.items() if not isinstance(v, list)}
+        elif not isinstance(value, list):
+            settings[group] = value
+    return settings
+
+
+def _vocabulary(config: Dict) -> Set[str]:
+    return {term.lower() for terms in config_categories(config).values() for term in terms if term}
+
+
+def changed_terms(old_config: Dict, new_config: Dict) -> Optional[Set[str]]:
+    """
+    Terms whose category membership differs between two keywords.json versions
+
+    Returns:
+        Lowercased terms that were added, removed or moved, or None if a
+        non-keyword setting changed (everything must be rescored)
+    """
+    if _settings(old_config) != _settings(new_config):
+        return None
+    old_categories = config_categories(old_config)
+    new_categories = config_categories(new_config)
+    changed = set()
+    for category in old_categories.keys() | new_categories.keys():
+        old = Counter(term.lower() for term in old_categories.get(category, []) if term)
+        new = Counter(term.lower() for term in new_categories.get(category, []) if term)
+        if old != new:
+            changed.update(term for term in old.keys() | new.keys() if old[term] != new[term])
+    return changed
+
+
+def article_terms(article: Dict, matcher: KeywordMatcher) -> Set[str]:
+    """Keyword terms present in an article's title/abstract and journal (from the cached analysis)"""
+    from scripts.text_analysis import analyze_article
+    analysis = analyze_article(article)
+    return set(analysis.hits(matcher, 'title_abstract').positions) | set(analysis.hits(matcher, 'journal').positions)
+
+
+def _default_postings_path() -> str:
+    return os.path.join(PROJECT_ROOT, 'data', 'keyword_postings.db')
+
+
+class KeywordPostings:
+    """Keyword term -> article postings plus the keywords.json of each scoring version"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (or create) the postings database
+
+        Args:
+            path: SQLite file (default: data/keyword_postings.db)
+        """
+        self.path = path or _default_postings_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                pmid TEXT NOT NULL,
+                PRIMARY KEY (term, pmid)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_pmid ON postings(pmid);
+            CREATE TABLE IF NOT EXISTS articles (
+                pmid TEXT PRIMARY KEY,
+                version TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS configs (
+                version TEXT PRIMARY KEY,
+                code_hash TEXT NOT NULL,
+                config TEXT NOT NULL,
+                recorded_at TEXT
+            );
+        ''')
+        self._conn.commit()
+
+    def record_config(self, version: str, code_hash: str, config: Dict):
+        """Remember the keywords.json behind a scoring version"""
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO configs (version, code_hash, config, recorded_at) '
+                               'VALUES (?, ?, ?, ?)',
+                               (version, code_hash, json.dumps(config, sort_keys=True), datetime.now().isoformat()))
+            self._conn.commit()
+
+    def get_config(self, version: str) -> Optional[Dict]:
+        """{'code_hash', 'config'} recorded for a scoring version"""
+        with self._lock:
+            row = self._conn.execute('SELECT code_hash, config FROM configs WHERE version = ?',
+                                     (version,)).fetchone()
+        return {'code_hash': row[0], 'config': json.loads(row[1])} if row else None
+
+    def record_many(self, entries: Iterable[Tuple[str, Iterable[str]]], version: str):
+        """Replace the postings of many articles in one transaction"""
+        with self._lock:
+            try:
+                for pmid, terms in entries:
+                    self._conn.execute('DELETE FROM postings WHERE pmid = ?', (pmid,))
+                    self._conn.executemany('INSERT OR IGNORE INTO postings (term, pmid) VALUES (?, ?)',
+                                           [(term, pmid) for term in terms])
+                    self._conn.execute('INSERT OR REPLACE INTO articles (pmid, version) VALUES (?, ?)',
+                                       (pmid, version))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def restamp(self, pmids: Iterable[str], old_version: str, version: str):
+        """Carry postings computed under old_version forward (the term set did not change)"""
+        with self._lock:
+            self._conn.executemany('UPDATE articles SET version = ? WHERE pmid = ? AND version = ?',
+                                   [(version, pmid, old_version) for pmid in pmids])
+            self._conn.commit()
+
+    def versions(self, pmids: Iterable[str]) -> Dict[str, str]:
+        """PMID -> version its postings were recorded under (unrecorded PMIDs are absent)"""
+        result = {}
+        pmids = list(pmids)
+        with self._lock:
+            for i in range(0, len(pmids), 500):
+                chunk = pmids[i:i + 500]
+                result.update(self._conn.execute(
+                    f"SELECT pmid, version FROM articles WHERE pmid IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return result
+
+    def articles_with_terms(self, terms: Iterable[str]) -> Set[str]:
+        """PMIDs whose recorded postings include any of the terms"""
+        pmids = set()
+        with self._lock:
+            for term in terms:
+                pmids.update(row[0] for row in self._conn.execute(
+                    'SELECT pmid FROM postings WHERE term = ?', (term,)))
+        return pmids
+
+    def close(self):
+        """Close the postings database"""
+        with self._lock:
+            self._conn.close()
+
+
+# Scorers are built once per worker process
+_scorers = None
+
+
+def _get_scorers():
+    global _scorers
+    if _scorers is None:
+        from scripts.relevance_scoring import RelevanceScorer
+        from scripts.enhanced_relevance_scoring import EnhancedRelevanceScorer
+        _scorers = (RelevanceScorer(), EnhancedRelevanceScorer())
+    return _scorers
+
+
+def score_article(article: Dict) -> Dict:
+    """Relevance fields of an article, as the scraper computes them, plus its keyword terms"""
+    legacy, enhanced = _get_scorers()
+    score, breakdown = enhanced.calculate_relevance_score(article)
+    return {
+        'pmid': str(article['pmid']),
+        'relevance_score': score,
+        'relevance_score_breakdown': breakdown,
+        'relevance_score_legacy': legacy.calculate_relevance_score(article),
+        'value_category': enhanced.get_value_category(score),
+        'priority_level': enhanced.get_priority_level(score),
+        'terms': sorted(article_terms(article, enhanced.matcher))
+    }
+
+
+def _score_batch(articles: List[Dict]) -> List[Dict]:
+    results = []
+    for article in articles:
+        try:
+            results.append(score_article(article))
+        except Exception as e:
+            logger.error(f"Error rescoring {article.get('pmid')}: {e}")
+    return results
+
+
+class _FileStorageTarget:
+    """Relevance fields of the article JSON files"""
+
+    name = 'file storage'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def stale(self, version: str) -> Dict[str, str]:
+        return self.storage.get_stale_scoring(version)
+
+    def texts(self, pmids: List[str]) -> Dict[str, Tuple[str, str]]:
+        return self.storage.get_scoring_texts(pmids)
+
+    def load(self, pmids: List[str]) -> Iterable[Dict]:
+        return self.storage.load_articles(pmids)
+
+    def write(self, results: List[Dict], version: str):
+        self.storage.insert_articles([
+            dict({field: result[field] for field in SCORE_FIELDS}, pmid=result['pmid'], scoring_version=version)
+            for result in results
+        ])
+
+    def restamp(self, pmids: List[str], version: str):
+        self.storage.restamp_scoring_version(pmids, version)
+
+
+class _DatabaseTarget:
+    """relevance_score column of literature.db"""
+
+    name = 'database'
+
+    def __init__(self, database):
+        self.database = database
+
+    def stale(self, version: str) -> Dict[str, str]:
+        return self.database.get_stale_pmids('scoring_version', version)
+
+    def texts(self, pmids: List[str]) -> Dict[str, Tuple[str, str]]:
+        return {article['pmid']: (f"{article.get('title') or ''} {article.get('abstract') or ''}",
+                                  article.get('journal') or '')
+                for article in self.database.get_articles(pmids)}
+
+    def load(self, pmids: List[str]) -> Iterable[Dict]:
+        return self.database.get_articles(pmids)
+
+    def write(self, results: List[Dict], version: str):
+        self.database.update_relevance_scores([(r['pmid'], r['relevance_score']) for r in results], version)
+
+    def restamp(self, pmids: List[str], version: str):
+        self.database.restamp_version('scoring_version', pmids, version)
+
+
+class Rescorer:
+    """Finds stale derived scores and recomputes the ones that can have changed"""
+
+    def __init__(self, storage=None, database=None, postings: Optional[KeywordPostings] = None,
+                 workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 config: Optional[Dict] = None):
+        """
+        Initialize the rescorer
+
+        Args:
+            storage: FileStorage (or HybridStorage) whose articles are rescored (None to skip)
+            database: LiteratureDatabase whose scores and PROBAST fields are rescored (None to skip)
+            postings: Keyword postings (default: data/keyword_postings.db)
+            workers: Worker processes (default: CPU count; 1 scores in this process)
+            batch_size: Articles per batch
+            config: keywords.json contents (default: read the file)
+        """
+        if storage is not None and hasattr(storage, 'file_storage'):
+            storage = storage.file_storage
+        self.targets = [target for target in (
+            _FileStorageTarget(storage) if storage is not None else None,
+            _DatabaseTarget(database) if database is not None else None
+        ) if target is not None]
+        self.database = database
+        self.postings = postings or KeywordPostings()
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self.config = config if config is not None else load_keyword_config()
+        self.code_hash = scorer_code_hash()
+        self.version = scoring_version(self.config, self.code_hash)
+
+    def _map(self, func, items: List[Dict]) -> Iterable[List]:
+        """Apply a batch function to items in batches, in worker processes when workers > 1"""
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        if self.workers <= 1 or len(batches) <= 1:
+            for batch in batches:
+                yield func(batch)
+            return
+        with multiprocessing.Pool(processes=min(self.workers, len(batches))) as pool:
+            yield from pool.imap(func, batches)
+
+    def plan(self, target, stale: Dict[str, str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Split stale articles into those to rescore and those only to restamp
+
+        Returns:
+            (PMIDs to rescore, old version -> PMIDs to restamp)
+        """
+        by_version = {}
+        for pmid, old_version in stale.items():
+            by_version.setdefault(old_version, []).append(pmid)
+
+        rescore, restamp = [], {}
+        for old_version, pmids in by_version.items():
+            snapshot = self.postings.get_config(old_version) if old_version else None
+            terms = None
+            if snapshot and snapshot['code_hash'] == self.code_hash:
+                terms = changed_terms(snapshot['config'], self.config)
+            if terms is None:
+                rescore.extend(pmids)
+                continue
+
+            recorded = self.postings.versions(pmids)
+            affected = {pmid for pmid in pmids if recorded.get(pmid) != old_version}
+            old_vocabulary = _vocabulary(snapshot['config'])
+            known = terms & old_vocabulary
+            new = terms - old_vocabulary
+            if known:
+                affected |= self.postings.articles_with_terms(known) & set(pmids)
+            if new:
+                scan = [pmid for pmid in pmids if pmid not in affected]
+                matcher = KeywordMatcher({'changed': sorted(new)})
+                for pmid, (title_abstract, journal) in target.texts(scan).items():
+                    if matcher.match(title_abstract).positions or matcher.match(journal).positions:
+                        affected.add(pmid)
+            rescore.extend(pmid for pmid in pmids if pmid in affected)
+            unaffected = [pmid for pmid in pmids if pmid not in affected]
+            if unaffected:
+                restamp[old_version] = unaffected
+            logger.info(f"Version {old_version}: {len(terms)} changed terms, {len(pmids)} stale, "
+                        f"{len(pmids) - len(unaffected)} to rescore")
+        return rescore, restamp
+
+    def rescore_target(self, target, dry_run: bool = False, computed: Optional[Dict[str, Dict]] = None,
+                       restamped: Optional[Dict[str, Set[str]]] = None) -> Dict:
+        """
+        Rescore one target's stale articles
+
+        Args:
+            target: Article store
+            dry_run: Only count
+            computed: PMID -> scores already computed this run (reused, and added to)
+            restamped: Old version -> PMIDs restamped this run (added to; their postings
+                are carried forward by run() once every target is planned)
+        """
+        stale = target.stale(self.version)
+        rescore, restamp = self.plan(target, stale) if stale else ([], {})
+        stats = {'stale': len(stale), 'rescored': 0, 'restamped': sum(len(p) for p in restamp.values())}
+        logger.info(f"{target.name}: {len(stale)} stale, {len(rescore)} to rescore, "
+                    f"{stats['restamped']} to restamp")
+        if dry_run:
+            stats['rescored'] = len(rescore)
+            return stats
+
+        for old_version, pmids in restamp.items():
+            target.restamp(pmids, self.version)
+            if restamped is not None:
+                restamped.setdefault(old_version, set()).update(pmids)
+
+        computed = computed if computed is not None else {}
+        reused = [computed[pmid] for pmid in rescore if pmid in computed]
+        if reused:
+            target.write(reused, self.version)
+            stats['rescored'] += len(reused)
+        pending = [pmid for pmid in rescore if pmid not in computed]
+        for results in self._map(_score_batch, list(target.load(pending))):
+            target.write(results, self.version)
+            self.postings.record_many(((r['pmid'], r['terms']) for r in results), self.version)
+            for result in results:
+                computed[result['pmid']] = result
+            stats['rescored'] += len(results)
+        return stats
+
+    def reassess_probast(self, dry_run: bool = False) -> Dict:
+        """Reassess automated PROBAST fields stamped with another PROBAST version"""
+        version = probast_version()
+        stale = list(self.database.get_stale_pmids('probast_version', version, automated_only=True))
+        stats = {'stale': len(stale), 'reassessed': 0}
+        logger.info(f"PROBAST: {len(stale)} stale automated assessments")
+        if dry_run or not stale:
+            return stats
+        from scripts.probast_batch import BatchAssessor
+        assessor = BatchAssessor(self.database.db_path, workers=self.workers, chunk_size=self.batch_size)
+        stats['reassessed'] = assessor.run(stale, reassess=True, mark_usable=False)['assessed']
+        return stats
+
+    def run(self, dry_run: bool = False) -> Dict:
+        """
+        Rescore every target and reassess PROBAST
+
+        Returns:
+            Dictionary with per-target stats, the scoring version and the PROBAST stats
+        """
+        self.postings.record_config(self.version, self.code_hash, self.config)
+        computed, restamped = {}, {}
+        result = {'scoring_version': self.version}
+        for target in self.targets:
+            result[target.name] = self.rescore_target(target, dry_run=dry_run, computed=computed,
+                                                      restamped=restamped)
+        for old_version, pmids in restamped.items():
+            self.postings.restamp(pmids - computed.keys(), old_version, self.version)
+        if self.database is not None:
+            result['probast'] = self.reassess_probast(dry_run=dry_run)
+        return result
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rescore articles whose derived scores are stale')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Articles per batch')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be rescored')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from scripts.file_storage import FileStorage
+    from scripts.literature_database import LiteratureDatabase
+    storage = FileStorage(os.path.join(PROJECT_ROOT, 'data', 'articles'))
+    database = LiteratureDatabase(os.path.join(PROJECT_ROOT, 'data', 'literature.db'))
+    result = Rescorer(storage=storage, database=database, workers=args.workers,
+                      batch_size=args.batch_size).run(dry_run=args.dry_run)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,14 +2,22 @@
 """
 Review Manager for Literature Findings
 Manages the review and approval workflow for new findings from PubMed.
+
+The queue is a SQLite table (data/review_queue.db) indexed by status and
+created_at: status changes update a single row in one transaction, summary
+counts are a GROUP BY, and the dashboard export is filtered and paginated in
+SQL. An existing data/review_queue.json is imported the first time the
+database is opened.
 """
 
 import os
 import sys
 import json
+import sqlite3
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from enum import Enum
 
@@ -24,6 +32,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
 
 class ReviewStatus(Enum):
     """Status of a review item"""
@@ -37,33 +48,127 @@ class ReviewStatus(Enum):
 
 class ReviewManager:
     """Manages review and approval workflow for literature findings"""
-    
-    def __init__(self):
-        self.storage = get_storage_client()
-        self.review_file = Path(__file__).parent.parent / "data" / "review_queue.json"
-        self.review_file.parent.mkdir(parents=True, exist_ok=True)
-        self._load_review_queue()
-    
-    def _load_review_queue(self):
-        """Load review queue from file"""
-        if self.review_file.exists():
-            try:
-                with open(self.review_file, 'r') as f:
-                    self.review_queue = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading review queue: {e}")
-                self.review_queue = {}
+
+    def __init__(self, db_path: Optional[str] = None, legacy_file: Optional[str] = None):
+        """
+        Open (or create) the review queue
+
+        Args:
+            db_path: SQLite database (default: data/review_queue.db)
+            legacy_file: JSON queue imported once into an empty database (default:
+                data/review_queue.json for the default database, none for a custom db_path)
+        """
+        data_dir = Path(__file__).parent.parent / "data"
+        self.db_path = Path(db_path) if db_path else data_dir / "review_queue.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if legacy_file:
+            self.legacy_file = Path(legacy_file)
         else:
-            self.review_queue = {}
-    
-    def _save_review_queue(self):
-        """Save review queue to file"""
+            self.legacy_file = None if db_path else data_dir / "review_queue.json"
+        self._storage = None
+        self._lock = threading.Lock()
+        # Autocommit mode; multi-statement changes use explicit transactions
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._create_schema()
+        self._import_legacy_queue()
+
+    @property
+    def storage(self):
+        """Storage client, created on first use"""
+        if self._storage is None:
+            self._storage = get_storage_client()
+        return self._storage
+
+    def _create_schema(self):
+        with self._lock:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS reviews (
+                    id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    source TEXT,
+                    pmid TEXT,
+                    title TEXT,
+                    data TEXT NOT NULL,
+                    notes TEXT NOT NULL DEFAULT '[]',
+                    approval_history TEXT NOT NULL DEFAULT '[]',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_reviews_status_created ON reviews(status, created_at);
+                CREATE INDEX IF NOT EXISTS idx_reviews_type_created ON reviews(type, created_at);
+                CREATE INDEX IF NOT EXISTS idx_reviews_created ON reviews(created_at);
+            ''')
+
+    def _import_legacy_queue(self):
+        """Copy review_queue.json into an empty database"""
+        if self.legacy_file is None or not self.legacy_file.exists():
+            return
+        with self._lock:
+            if self._conn.execute('SELECT 1 FROM reviews LIMIT 1').fetchone():
+                return
         try:
-            with open(self.review_file, 'w') as f:
-                json.dump(self.review_queue, f, indent=2, default=str)
+            with open(self.legacy_file, 'r') as f:
+                legacy = json.load(f)
         except Exception as e:
-            logger.error(f"Error saving review queue: {e}")
-    
+            logger.error(f"Error loading legacy review queue: {e}")
+            return
+        items = [item for item in legacy.values() if isinstance(item, dict) and item.get('id')]
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(self._INSERT, [self._to_row(item) for item in items])
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        logger.info(f"Imported {len(items)} review items from {self.legacy_file}")
+
+    _INSERT = (
+        'INSERT OR REPLACE INTO reviews '
+        '(id, type, status, source, pmid, title, data, notes, approval_history, created_at, updated_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+    )
+
+    @staticmethod
+    def _to_row(item: Dict) -> tuple:
+        data = item.get('data') or {}
+        return (
+            item['id'],
+            item.get('type', ''),
+            item.get('status', ReviewStatus.PENDING.value),
+            item.get('source'),
+            str(data.get('pmid') or ''),
+            str(data.get('title') or data.get('parameter_name') or ''),
+            json.dumps(data, default=str),
+            json.dumps(item.get('notes', []), default=str),
+            json.dumps(item.get('approval_history', []), default=str),
+            item.get('created_at') or datetime.now().isoformat(),
+            item.get('updated_at') or item.get('created_at') or datetime.now().isoformat()
+        )
+
+    @staticmethod
+    def _to_item(row: sqlite3.Row) -> Dict:
+        return {
+            'id': row['id'],
+            'type': row['type'],
+            'status': row['status'],
+            'data': json.loads(row['data']),
+            'source': row['source'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'notes': json.loads(row['notes']),
+            'approval_history': json.loads(row['approval_history'])
+        }
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_item(row) for row in rows]
+
     def add_to_review_queue(self, finding_type: str, data: Dict, source: str = "pubmed") -> str:
         """
         Add a finding to the review queue
@@ -90,38 +195,52 @@ class ReviewManager:
             'approval_history': []
         }
         
-        self.review_queue[review_id] = review_item
-        self._save_review_queue()
+        with self._lock:
+            self._conn.execute(self._INSERT, self._to_row(review_item))
         logger.info(f"Added {finding_type} to review queue: {review_id}")
         
         return review_id
     
     def update_review_status(self, review_id: str, status: ReviewStatus, notes: str = None, approved_by: str = None):
-        """Update the status of a review item"""
-        if review_id not in self.review_queue:
-            logger.error(f"Review ID not found: {review_id}")
-            return False
-        
-        review_item = self.review_queue[review_id]
-        old_status = review_item['status']
-        review_item['status'] = status.value
-        review_item['updated_at'] = datetime.now().isoformat()
-        
-        if notes:
-            review_item['notes'].append({
-                'timestamp': datetime.now().isoformat(),
-                'note': notes,
-                'status_change': f"{old_status} -> {status.value}"
-            })
-        
-        if approved_by:
-            review_item['approval_history'].append({
-                'timestamp': datetime.now().isoformat(),
-                'action': status.value,
-                'approved_by': approved_by
-            })
-        
-        self._save_review_queue()
+        """Update the status of a review item (one row, in one transaction)"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT status, notes, approval_history FROM reviews WHERE id = ?', (review_id,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute('ROLLBACK')
+                    logger.error(f"Review ID not found: {review_id}")
+                    return False
+
+                old_status = row['status']
+                item_notes = json.loads(row['notes'])
+                approval_history = json.loads(row['approval_history'])
+                if notes:
+                    item_notes.append({
+                        'timestamp': now,
+                        'note': notes,
+                        'status_change': f"{old_status} -> {status.value}"
+                    })
+                if approved_by:
+                    approval_history.append({
+                        'timestamp': now,
+                        'action': status.value,
+                        'approved_by': approved_by
+                    })
+
+                self._conn.execute(
+                    'UPDATE reviews SET status = ?, updated_at = ?, notes = ?, approval_history = ? WHERE id = ?',
+                    (status.value, now, json.dumps(item_notes, default=str),
+                     json.dumps(approval_history, default=str), review_id)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
         logger.info(f"Updated review {review_id}: {old_status} -> {status.value}")
         
         return True
@@ -171,35 +290,50 @@ class ReviewManager:
             approved_by=approved_by
         )
     
+    def get_review(self, review_id: str) -> Optional[Dict]:
+        """Get one review item by ID"""
+        items = self._query('SELECT * FROM reviews WHERE id = ?', (review_id,))
+        return items[0] if items else None
+
     def get_pending_reviews(self) -> List[Dict]:
         """Get all pending review items"""
-        return [
-            item for item in self.review_queue.values()
-            if item['status'] == ReviewStatus.PENDING.value
-        ]
+        return self.get_reviews_by_status(ReviewStatus.PENDING)
     
-    def get_reviews_by_status(self, status: ReviewStatus) -> List[Dict]:
-        """Get all reviews with a specific status"""
-        return [
-            item for item in self.review_queue.values()
-            if item['status'] == status.value
-        ]
+    def get_reviews_by_status(self, status: ReviewStatus, limit: int = None, offset: int = 0) -> List[Dict]:
+        """Get reviews with a specific status, newest first, optionally paginated"""
+        return self._query(
+            'SELECT * FROM reviews WHERE status = ? ORDER BY created_at DESC LIMIT ? OFFSET ?',
+            (status.value, limit if limit else -1, offset)
+        )
     
     def get_all_reviews(self, limit: int = None) -> List[Dict]:
         """Get all review items, optionally limited"""
-        items = list(self.review_queue.values())
-        items.sort(key=lambda x: x['created_at'], reverse=True)
-        return items[:limit] if limit else items
+        return self._query('SELECT * FROM reviews ORDER BY created_at DESC LIMIT ?', (limit if limit else -1,))
+
+    def get_pmid_statuses(self, finding_type: str = None) -> Dict[str, str]:
+        """PMID -> status of its most recently updated review item (screening decisions)"""
+        sql = "SELECT pmid, status FROM reviews WHERE pmid IS NOT NULL AND pmid != ''"
+        params = ()
+        if finding_type:
+            sql += ' AND type = ?'
+            params = (finding_type,)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY updated_at', params).fetchall()
+        return dict(rows)
+
+    @property
+    def review_queue(self) -> Dict[str, Dict]:
+        """Snapshot of the whole queue keyed by review ID"""
+        return {item['id']: item for item in self.get_all_reviews()}
     
     def get_review_summary(self) -> Dict:
         """Get summary statistics of review queue"""
-        total = len(self.review_queue)
-        by_status = {}
-        for status in ReviewStatus:
-            by_status[status.value] = len(self.get_reviews_by_status(status))
+        with self._lock:
+            counts = dict(self._conn.execute('SELECT status, COUNT(*) FROM reviews GROUP BY status').fetchall())
+        by_status = {status.value: counts.get(status.value, 0) for status in ReviewStatus}
         
         return {
-            'total': total,
+            'total': sum(counts.values()),
             'by_status': by_status,
             'pending': by_status.get('pending', 0),
             'proves_current': by_status.get('proves_current', 0),
@@ -208,18 +342,87 @@ class ReviewManager:
             'rejected': by_status.get('rejected', 0),
             'implemented': by_status.get('implemented', 0)
         }
+
+    def search_reviews(self, status: str = None, finding_type: str = None, search: str = None,
+                       limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Filtered page of review items, newest first
+
+        Args:
+            status: Status value to match (None for all)
+            finding_type: Finding type to match (None for all)
+            search: Case-insensitive substring of the title/parameter name or PMID
+            limit: Page size
+            offset: Items to skip
+
+        Returns:
+            (items, total number of matching items)
+        """
+        clauses, params = [], []
+        if status:
+            clauses.append('status = ?')
+            params.append(status)
+        if finding_type:
+            clauses.append('type = ?')
+            params.append(finding_type)
+        if search:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append("(title LIKE ? ESCAPE '\\' OR pmid LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM reviews {where}', params).fetchone()[0]
+        items = self._query(f'SELECT * FROM reviews {where} ORDER BY created_at DESC LIMIT ? OFFSET ?',
+                            tuple(params) + (limit, offset))
+        return items, total
     
-    def export_for_dashboard(self) -> Dict:
-        """Export review data for dashboard display"""
+    def export_for_dashboard(self, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE, status: str = None,
+                             finding_type: str = None, search: str = None) -> Dict:
+        """
+        Export review data for dashboard display
+
+        'recent' holds one page of items matching the filters; the per-status
+        lists hold at most page_size of the newest items each. 'pagination'
+        describes the filtered result.
+        """
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        items, total = self.search_reviews(status=status, finding_type=finding_type, search=search,
+                                           limit=page_size, offset=(page - 1) * page_size)
         return {
             'summary': self.get_review_summary(),
-            'pending': self.get_pending_reviews(),
-            'new_parameters': self.get_reviews_by_status(ReviewStatus.NEW_PARAMETER),
-            'approved': self.get_reviews_by_status(ReviewStatus.APPROVED),
-            'proves_current': self.get_reviews_by_status(ReviewStatus.PROVES_CURRENT),
-            'recent': self.get_all_reviews(limit=20)
+            'pending': self.get_reviews_by_status(ReviewStatus.PENDING, limit=page_size),
+            'new_parameters': self.get_reviews_by_status(ReviewStatus.NEW_PARAMETER, limit=page_size),
+            'approved': self.get_reviews_by_status(ReviewStatus.APPROVED, limit=page_size),
+            'proves_current': self.get_reviews_by_status(ReviewStatus.PROVES_CURRENT, limit=page_size),
+            'recent': items,
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'pages': (total + page_size - 1) // page_size
+            }
         }
 
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_review_manager() -> ReviewManager:
+    """Shared review manager using the default database (kept open between requests)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ReviewManager()
+        return _manager
+
 
 if __name__ == "__main__":
     # Example usage
@@ -5,6 +5,10 @@ Scrape Batch 2: 5,000 New PubMed Articles
 Scrapes 5,000 NEW articles avoiding duplicates from batch 1.
 
 CRITICAL: Checks existing database and JSON files to avoid duplicates.
+
+All queries (the ones below plus config/search_strategy.json) are planned up
+front by QueryPlanner: IDs-only searches, one deduplicated queue with the
+existing corpus removed, most-matched and most recent PMIDs first.
 """
 
 import os
@@ -21,46 +25,15 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from scripts.literature_database import LiteratureDatabase
 from scripts.pubmed_scraper import PubMedScraper
 from scripts.probast_assessment import PROBASTAssessment
+from scripts.query_planner import QueryPlanner, configured_queries, corpus_pmids
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def get_existing_pmids() -> Set[str]:
-    """Get all existing PMIDs from database and JSON files"""
-    existing_pmids = set()
-    
-    # 1. Get from SQLite database
-    try:
-        db = LiteratureDatabase()
-        import sqlite3
-        conn = sqlite3.connect(db.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT pmid FROM papers WHERE pmid IS NOT NULL')
-        db_pmids = {row[0] for row in cursor.fetchall()}
-        existing_pmids.update(db_pmids)
-        conn.close()
-        logger.info(f"Found {len(db_pmids)} PMIDs in database")
-    except Exception as e:
-        logger.warning(f"Error reading database: {e}")
-    
-    # 2. Get from JSON files
-    try:
-        articles_dir = Path(__file__).parent.parent / "data" / "articles"
-        if articles_dir.exists():
-            json_files = list(articles_dir.rglob("*.json"))
-            for json_file in json_files:
-                try:
-                    with open(json_file, 'r') as f:
-                        article = json.load(f)
-                        if 'pmid' in article and article['pmid']:
-                            existing_pmids.add(str(article['pmid']))
-                except Exception as e:
-                    continue
-            logger.info(f"Found {len([f for f in json_files])} JSON files")
-    except Exception as e:
-        logger.warning(f"Error reading JSON files: {e}")
-    
+    """Get all existing PMIDs from database and JSON files (via the article index)"""
+    existing_pmids = corpus_pmids()
     logger.info(f"Total existing PMIDs: {len(existing_pmids)}")
     return existing_pmids
 
@@ -135,72 +108,42 @@ def scrape_new_articles(target_count: int = 5000) -> Dict:
             '("knee osteoarthritis"[Title/Abstract] OR "knee OA"[Title/Abstract] OR "Osteoarthritis, Knee"[MeSH]) AND (English[Language]) AND (Humans[Mesh]) AND ("cohort study"[Publication Type] OR "prospective"[Title/Abstract] OR "retrospective"[Title/Abstract] OR "longitudinal"[Title/Abstract])',
         ]
         
+        # Plan every query at once: one queue of PMIDs not already in the corpus
+        queries = search_queries + configured_queries()
+        planner = QueryPlanner(scraper)
+        plan = planner.plan(queries, existing_pmids, max_results=5000, date_range_years=15)  # 15 years to find more
+        if plan is None:
+            raise RuntimeError("PubMed search failed while planning the queries")
+        
+        for query_stats in plan['queries']:
+            print(f"   {query_stats['name']}: {query_stats['found']} PMIDs ({query_stats['new']} new)")
+        skipped_duplicates = plan['known']
+        print(f"   Unique PMIDs across {len(queries)} queries: {plan['union']}")
+        print(f"   Duplicates (skipping): {plan['known']} PMIDs")
+        print(f"   New (not in database): {len(plan['pmids'])} PMIDs")
+        logger.info(f"Fetch queue: {len(plan['pmids'])} new PMIDs from {len(queries)} queries")
+        
+        # Process the queue (most-matched, most recent first) until the target is reached
         total_processed = 0
-        for i, query in enumerate(search_queries):
-            # Check if we've reached target
-            new_existing_pmids = get_existing_pmids()
-            new_count = len(new_existing_pmids) - len(existing_pmids)
-            
-            if new_count >= target_count:
-                print(f"\n✅ Target reached! Found {new_count} new articles (target: {target_count})")
-                logger.info(f"Target reached! Stopping queries.")
+        for j, pmid in enumerate(plan['pmids']):
+            if processed_count >= target_count:
+                print(f"   ✅ Target reached! Stopping processing.")
+                logger.info(f"Target reached! Stopping processing.")
                 break
+            if j % 50 == 0 and j > 0:
+                print(f"   Progress: {processed_count} new articles (target: {target_count}), "
+                      f"processed {j}/{len(plan['pmids'])} from the queue")
             
-            print(f"\n{'='*80}")
-            print(f"QUERY {i+1}/{len(search_queries)}")
-            print(f"{'='*80}")
-            print(f"Query: {query[:100]}...")
-            logger.info(f"Running query {i+1}/{len(search_queries)}: {query[:80]}...")
-            
-            # Get PMIDs from this query
-            pmids = scraper.search_pubmed(query, max_results=5000, date_range_years=15)  # 15 years to find more
-            
-            if not pmids:
-                logger.warning(f"No articles found with query {i+1}")
-                print(f"   ⚠️  No articles found")
-                continue
-            
-            print(f"   Found: {len(pmids)} PMIDs")
-            logger.info(f"Found {len(pmids)} PMIDs, processing...")
-            
-            # Filter out known duplicates before processing (faster)
-            new_pmids = [p for p in pmids if str(p) not in existing_pmids]
-            print(f"   New (not in database): {len(new_pmids)} PMIDs")
-            print(f"   Duplicates (skipping): {len(pmids) - len(new_pmids)} PMIDs")
-            
-            if not new_pmids:
-                print(f"   ⚠️  All articles from this query are duplicates")
-                continue
-            
-            # Process each NEW PMID
-            processed_this_query = 0
-            for j, pmid in enumerate(new_pmids):
-                # Check progress periodically
-                if j % 50 == 0 and j > 0:
-                    new_existing_pmids = get_existing_pmids()
-                    new_count = len(new_existing_pmids) - len(existing_pmids)
-                    print(f"   Progress: {new_count} new articles (target: {target_count}), processed {j}/{len(new_pmids)} from this query")
-                    
-                    if new_count >= target_count:
-                        print(f"   ✅ Target reached! Stopping processing.")
-                        logger.info(f"Target reached! Stopping processing.")
-                        break
-                
-                try:
-                    # Process article (scraper checks for duplicates internally as backup)
-                    if scraper.process_article(pmid):
-                        processed_count += 1
-                        processed_this_query += 1
-                        total_processed += 1
-                except Exception as e:
-                    logger.error(f"Error processing {pmid}: {e}")
-            
-            # Check final count after this query
-            new_existing_pmids = get_existing_pmids()
-            new_count = len(new_existing_pmids) - len(existing_pmids)
-            print(f"   ✅ Query {i+1} complete: {new_count} new articles total (target: {target_count})")
-            print(f"   Processed from this query: {processed_this_query} new articles")
-            logger.info(f"After query {i+1}: {new_count} new articles (target: {target_count})")
+            try:
+                # Process article (scraper checks for duplicates internally as backup)
+                if scraper.process_article(pmid):
+                    processed_count += 1
+                    total_processed += 1
+            except Exception as e:
+                logger.error(f"Error processing {pmid}: {e}")
+            if (j + 1) % 25 == 0:
+                scraper._commit_batch()
+        scraper._commit_batch()
         
         # Final check
         new_existing_pmids = get_existing_pmids()
@@ -4,13 +4,19 @@ Robust Batch 2 Scraper - Continuous Operation
 ==============================================
 Scrapes 5,000 NEW articles with robust error handling and progress tracking.
 Designed to run continuously without stopping.
+
+All queries (the ones below plus config/search_strategy.json) are planned
+together (see query_planner.py): IDs-only searches, one deduplicated fetch queue
+without the PMIDs already stored, most-matched and most recent first. The plan is
+synced incrementally (see pubmed_sync.py): after the first run only records added
+or revised since its watermark are searched, and progress is checkpointed after
+every batch so an interrupted run resumes where it stopped.
 """
 
 import os
 import sys
 import json
 import logging
-import time
 from pathlib import Path
 from typing import Set, List, Dict
 from datetime import datetime
@@ -21,6 +27,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from scripts.literature_database import LiteratureDatabase
 from scripts.pubmed_scraper import PubMedScraper
 from scripts.probast_assessment import PROBASTAssessment
+from scripts.query_planner import QueryPlanner, configured_queries, corpus_pmids
 
 logging.basicConfig(
     level=logging.INFO,
@@ -58,48 +65,13 @@ def get_existing_pmids() -> Set[str]:
                     db_path = alt_path
                     break
         
-        import sqlite3
-        conn = sqlite3.connect(str(db_path))
-        cursor = conn.cursor()
-        
-        # Get all PMIDs from database
-        cursor.execute('SELECT DISTINCT pmid FROM papers WHERE pmid IS NOT NULL')
-        rows = cursor.fetchall()
-        db_pmids = {str(row[0]) for row in rows if row[0] and str(row[0]).strip()}
-        
-        # If that didn't work, try simpler query
-        if not db_pmids:
-            cursor.execute('SELECT pmid FROM papers')
-            rows = cursor.fetchall()
-            db_pmids = {str(row[0]) for row in rows if row[0] and str(row[0]).strip()}
-        
-        existing_pmids.update(db_pmids)
-        conn.close()
-        logger.info(f"Found {len(db_pmids)} PMIDs in database at {db_path}")
+        # Database PMIDs plus the article index (for articles not yet in DB)
+        existing_pmids.update(corpus_pmids(db_path=str(db_path)))
     except Exception as e:
-        logger.error(f"Error reading database: {e}")
+        logger.error(f"Error reading existing PMIDs: {e}")
         import traceback
         traceback.print_exc()
     
-    # 2. Get from JSON files (SECONDARY - for articles not yet in DB)
-    try:
-        articles_dir = Path(__file__).parent.parent / "data" / "articles"
-        if articles_dir.exists():
-            json_files = list(articles_dir.rglob("*.json"))
-            json_count = 0
-            for json_file in json_files:
-                try:
-                    with open(json_file, 'r') as f:
-                        article = json.load(f)
-                        if 'pmid' in article and article['pmid']:
-                            existing_pmids.add(str(article['pmid']))
-                            json_count += 1
-                except Exception as e:
-                    continue
-            logger.info(f"Found {json_count} PMIDs in {len(json_files)} JSON files")
-    except Exception as e:
-        logger.warning(f"Error reading JSON files: {e}")
-    
     logger.info(f"Total existing PMIDs: {len(existing_pmids)}")
     return existing_pmids
 
@@ -121,6 +93,7 @@ def save_progress(query_num: int, processed: int, new_count: int, target: int):
 def scrape_new_articles_robust(target_count: int = 5000) -> Dict:
     """
     Robust scraper that runs continuously with error recovery
+    (resumes from the last committed batch of each query)
     """
     print("=" * 80)
     print("ROBUST BATCH 2 SCRAPING - CONTINUOUS OPERATION")
@@ -205,217 +178,97 @@ def scrape_new_articles_robust(target_count: int = 5000) -> Dict:
     total_processed = 0
     total_errors = 0
     
-    print(f"\n3. STARTING MULTI-QUERY SEARCH")
+    def count_new_articles():
+        """Current database count and articles added since the start"""
+        try:
+            import sqlite3
+            # Fresh connection in autocommit mode to see committed changes
+            conn = sqlite3.connect(str(db_path))
+            conn.isolation_level = None
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM papers')
+            current_db_count = cursor.fetchone()[0]
+            conn.close()
+            return current_db_count, current_db_count - initial_db_count
+        except Exception as e:
+            logger.error(f"Error checking database count: {e}")
+            return initial_count + total_processed, total_processed
+    
+    queries = search_queries + configured_queries()
+    planner = QueryPlanner(scraper)
+    
+    print(f"\n3. PLANNING {len(queries)} QUERIES")
     print(f"   Target: {target_count} new articles")
-    print(f"   Queries: {len(search_queries)}")
-    print(f"   This will run continuously until target is reached\n")
+    print(f"   All queries are searched first (IDs only); one queue of new PMIDs is then fetched")
+    print(f"   After the first run only records added or revised since the last completed plan are searched")
+    print(f"   Progress is checkpointed after every batch; re-run to resume after an interruption\n")
     
-    for i, query in enumerate(search_queries, 1):
-        try:
-                # Check progress - get actual database count (REFRESH from database)
-            try:
-                import sqlite3
-                conn = sqlite3.connect(str(db_path))
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM papers')
-                current_db_count = cursor.fetchone()[0]
-                conn.close()
-                new_count = current_db_count - initial_db_count
-                # Force refresh to see actual count
-                if new_count > 0:
-                    print(f"   🎉 Database count increased! Now: {current_db_count} (was: {initial_db_count})")
-            except Exception as e:
-                logger.error(f"Error checking database count: {e}")
-                current_pmids = get_existing_pmids()
-                new_count = len(current_pmids) - initial_count
-                current_db_count = len(current_pmids)
-            
-            if new_count >= target_count:
-                print(f"\n{'='*80}")
-                print(f"✅ TARGET REACHED!")
-                print(f"{'='*80}")
-                print(f"New articles added: {new_count} (target: {target_count})")
-                print(f"Total articles now: {current_db_count} (started with: {initial_db_count})")
-                break
-            
-            print(f"\n{'='*80}")
-            print(f"QUERY {i}/{len(search_queries)}")
-            print(f"{'='*80}")
-            print(f"Current progress: {new_count} NEW articles added (target: {target_count})")
-            print(f"Database: {current_db_count} total articles (started with: {initial_db_count})")
-            print(f"Query: {query[:80]}...")
-            
-            # Search PubMed with rate limiting
-            try:
-                print(f"   Searching PubMed (this may take 30-60 seconds)...")
-                # Use max_results=5000, no date_range_years (dates are in query if needed)
-                pmids = scraper.search_pubmed(query, max_results=5000, date_range_years=None)
-                # Add delay after search to respect rate limits
-                time.sleep(2)
-            except Exception as e:
-                logger.error(f"Error searching PubMed for query {i}: {e}")
-                print(f"   ❌ Search failed: {e}")
-                print(f"   Waiting 30 seconds before next query...")
-                time.sleep(30)  # Wait longer on error
-                continue
-            
-            if not pmids:
-                print(f"   ⚠️  No articles found")
-                continue
-            
-            print(f"   Found: {len(pmids)} PMIDs")
-            
-            # Filter duplicates BEFORE processing - check BOTH database AND JSON files
-            # This matches what process_article() checks, so we don't process duplicates
+    queue_stats = {'processed': 0, 'errors': 0, 'duplicates': 0, 'batches': 0}
+    revised = set()
+    
+    def process_batch(pmids: List[str]) -> List[str]:
+        """Process one batch of PMIDs, skipping articles stored since the plan was made (unless revised)"""
+        nonlocal total_processed, total_errors
+        failed = []
+        new_pmids = [p for p in pmids if p not in existing_pmids or p in revised]
+        queue_stats['duplicates'] += len(pmids) - len(new_pmids)
+        for pmid in new_pmids:
             try:
-                import sqlite3
-                conn = sqlite3.connect(str(db_path))
-                cursor = conn.cursor()
-                cursor.execute('SELECT DISTINCT pmid FROM papers WHERE pmid IS NOT NULL')
-                current_db_pmids = {str(row[0]) for row in cursor.fetchall() if row[0]}
-                conn.close()
-                
-                # ALSO check JSON files (process_article checks these too!)
-                json_pmids = set()
-                articles_dir = Path(__file__).parent.parent / "data" / "articles"
-                if articles_dir.exists():
-                    json_files = list(articles_dir.rglob("*.json"))
-                    for json_file in json_files:
-                        try:
-                            with open(json_file, 'r') as f:
-                                article = json.load(f)
-                                if 'pmid' in article and article['pmid']:
-                                    json_pmids.add(str(article['pmid']))
-                        except:
-                            continue
-                
-                # Combine both sources
-                existing_pmids = current_db_pmids | json_pmids
-                print(f"   ✓ Checked database: {len(current_db_pmids)} PMIDs")
-                print(f"   ✓ Checked JSON files: {len(json_pmids)} PMIDs")
-                print(f"   ✓ Total existing: {len(existing_pmids)} PMIDs")
-            except Exception as e:
-                logger.warning(f"Could not refresh PMID list: {e}")
-            
-            # Filter to ONLY new PMIDs - don't process duplicates at all
-            new_pmids = [str(p) for p in pmids if str(p) not in existing_pmids]
-            duplicate_count = len(pmids) - len(new_pmids)
-            
-            print(f"   📊 Results:")
-            print(f"      Total found: {len(pmids)}")
-            print(f"      Duplicates (skipping): {duplicate_count}")
-            print(f"      NEW articles to process: {len(new_pmids)}")
-            
-            if not new_pmids:
-                print(f"   ⚠️  All {len(pmids)} articles are duplicates - moving to next query immediately")
-                print(f"   💡 This query found articles you already have. Trying next query...")
-                continue
-            
-            # CRITICAL: Update existing_pmids set so we don't check these again
-            existing_pmids.update(new_pmids)
-            
-            # Process ONLY new articles (duplicates already filtered out)
-            print(f"   🚀 Processing {len(new_pmids)} NEW articles (duplicates already skipped)...")
-            processed_this_query = 0
-            errors_this_query = 0
-            
-            # Add delay before processing to respect rate limits
-            time.sleep(1)
-            
-            for j, pmid in enumerate(new_pmids, 1):
-                # Check if target reached - use database count
-                if j % 50 == 0 or j == len(new_pmids):
-                    try:
-                        import sqlite3
-                        # Force a fresh connection to see committed changes
-                        conn = sqlite3.connect(str(db_path))
-                        # Ensure we see committed data
-                        conn.isolation_level = None  # Autocommit mode
-                        cursor = conn.cursor()
-                        cursor.execute('SELECT COUNT(*) FROM papers')
-                        current_db_count = cursor.fetchone()[0]
-                        conn.close()
-                        new_count = current_db_count - initial_db_count
-                        if new_count > 0:
-                            print(f"   🎉 Database count increased! Now: {current_db_count} (was: {initial_db_count})")
-                    except Exception as e:
-                        logger.error(f"Error checking database count: {e}")
-                        current_pmids = get_existing_pmids()
-                        new_count = len(current_pmids) - initial_count
-                        current_db_count = len(current_pmids)
-                    
-                    print(f"   📈 Progress: {new_count} NEW articles added, processed {j}/{len(new_pmids)} from this query")
-                    print(f"   📊 Database: {current_db_count} total (target: {initial_db_count + target_count})")
-                    
-                    if new_count >= target_count:
-                        print(f"   ✅ Target reached!")
-                        break
-                
-                # Process article - these are confirmed NEW (duplicates already filtered)
-                # We already checked they don't exist, so process directly
-                try:
-                    # Process the article - it's confirmed NEW
-                    success = scraper.process_article(pmid)
-                    if success:
-                        processed_this_query += 1
-                        total_processed += 1
-                        if j % 10 == 0:
-                            print(f"      ✓ Processed {j}/{len(new_pmids)}: {processed_this_query} successful")
-                    else:
-                        errors_this_query += 1
-                        total_errors += 1
-                except KeyboardInterrupt:
-                    print(f"\n⚠️  Interrupted by user")
-                    raise
-                except Exception as e:
-                    errors_this_query += 1
+                if scraper.process_article(pmid, refresh=pmid in revised):
+                    queue_stats['processed'] += 1
+                    total_processed += 1
+                    existing_pmids.add(pmid)
+                else:
+                    queue_stats['errors'] += 1
                     total_errors += 1
-                    logger.error(f"Error processing {pmid}: {e}")
-                    # Continue processing - don't stop on errors
-                    continue
-                
-                # Small delay to avoid rate limiting
-                if j % 10 == 0:
-                    time.sleep(0.3)
-                elif j % 50 == 0:
-                    time.sleep(1)
-            
-            # Update existing PMIDs for next query
-            existing_pmids = get_existing_pmids()
-            
-            # Final count for this query - use database count
-            try:
-                import sqlite3
-                conn = sqlite3.connect(str(db_path))
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM papers')
-                current_db_count = cursor.fetchone()[0]
-                conn.close()
-                new_count = current_db_count - initial_db_count
-            except:
-                current_pmids = get_existing_pmids()
-                new_count = len(current_pmids) - initial_count
-                current_db_count = len(current_pmids)
-            
-            print(f"   ✅ Query {i} complete: {processed_this_query} new articles processed")
+                    failed.append(pmid)
+            except KeyboardInterrupt:
+                print(f"\n⚠️  Interrupted by user")
+                raise
+            except Exception as e:
+                queue_stats['errors'] += 1
+                total_errors += 1
+                failed.append(pmid)
+                logger.error(f"Error processing {pmid}: {e}")
+                # Continue processing - don't stop on errors
+        scraper._commit_batch()
+        queue_stats['batches'] += 1
+        
+        current_db_count, new_count = count_new_articles()
+        print(f"   📈 Progress: {new_count} NEW articles added ({queue_stats['processed']} processed, "
+              f"{queue_stats['errors']} errors)")
+        print(f"   📊 Database: {current_db_count} total (target: {initial_db_count + target_count})")
+        save_progress(queue_stats['batches'], total_processed, new_count, target_count)
+        return failed
+    
+    def target_reached() -> bool:
+        return count_new_articles()[1] >= target_count
+    
+    try:
+        # No date_range_years: dates are in the queries if needed
+        run = planner.start(queries, existing=existing_pmids, max_results=5000, date_range_years=None)
+        if run is None:
+            print(f"   ⚠️  Search failed - re-run to try again")
+        else:
+            # Stored records revised in PubMed since the last plan are fetched again and updated
+            revised.update(planner.sync.revised(run))
+            result = planner.sync.process(run, process_batch, should_stop=target_reached)
+            result.update(run.get('plan', {}))
+            for query_stats in result['queries']:
+                print(f"   {query_stats['name']}: {query_stats['found']} PMIDs ({query_stats['new']} new)")
+            current_db_count, new_count = count_new_articles()
+            print(f"   ✅ Plan {'complete' if result['complete'] else 'paused (checkpoint saved)'}: "
+                  f"{result['found']} new PMIDs queued in {result['mode']} mode "
+                  f"({result['union']} unique across queries, {result['known']} already stored, "
+                  f"{result.get('revised', 0)} revised)")
             print(f"   Total NEW articles added: {new_count} (target: {target_count})")
             print(f"   Database: {current_db_count} total articles (started with: {initial_db_count})")
-            print(f"   Errors this query: {errors_this_query}")
-            
-            # Save progress
-            save_progress(i, total_processed, new_count, target_count)
-            
-        except KeyboardInterrupt:
-            print(f"\n⚠️  Interrupted by user")
-            current_pmids = get_existing_pmids()
-            new_count = len(current_pmids) - initial_count
-            print(f"Progress saved: {new_count} new articles")
-            break
-        except Exception as e:
-            logger.error(f"Error in query {i}: {e}", exc_info=True)
-            print(f"   ❌ Query {i} failed: {e}")
-            print(f"   Continuing to next query...")
-            continue
+            save_progress(queue_stats['batches'], total_processed, new_count, target_count)
+            if new_count >= target_count:
+                print(f"\n✅ TARGET REACHED! New articles added: {new_count} (target: {target_count})")
+    except KeyboardInterrupt:
+        print(f"\n⚠️  Interrupted by user")
+        print(f"Progress saved: {total_processed} new articles; re-run to resume from the last checkpoint")
     
     # Final summary - use database count
     try:
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Active-Learning Screening Ranker
+Ranks unscreened papers for human screening with a linear classifier trained
+on the screening decisions made so far.
+
+The corpus is kept as a sparse TF-IDF matrix over title + abstract unigrams
+and bigrams. New papers only append their rows; IDF weights are applied when
+the matrix is used, so adding papers never re-tokenizes the corpus. The
+classifier is an L2-regularized, class-balanced logistic regression fit by
+accelerated gradient descent on the labeled rows, warm-started from the
+previous fit, so each refit after a batch of decisions is cheap.
+
+Unscreened papers are ranked by predicted relevance (to find the relevant set
+quickly) or by uncertainty (to improve the model fastest). The state is
+saved to data/screening_model.npz.
+"""
+
+import os
+import re
+import json
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RANKING_STRATEGIES = ('relevance', 'uncertainty')
+DEFAULT_L2 = 0.01
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-4
+
+STOPWORDS = frozenset('''
+a about after all also an and any are as at be been before between both but by can could did do does
+during each for from had has have he her his how however if in into is it its may more most no not of
+on or our over she should so some such than that the their them then there these they this those through
+to under up was we were what when where which while who will with within without would
+'''.split())
+
+_TOKEN = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words without stopwords, plus adjacent word bigrams"""
+    words = [word for word in _TOKEN.findall((text or '').lower()) if len(word) > 1 and word not in STOPWORDS]
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def article_text(article: Dict) -> str:
+    """Text a paper is screened on"""
+    return f"{article.get('title') or ''} {article.get('abstract') or ''}"
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def _default_path() -> str:
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'screening_model.npz')
+
+
+class TfidfCorpus:
+    """Append-only sparse TF-IDF matrix (CSR) keyed by PMID"""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.pmids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self._df: List[int] = []
+        self._indices: List[np.ndarray] = []
+        self._tf: List[np.ndarray] = []
+        self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self.pmids)
+
+    def __contains__(self, pmid: str) -> bool:
+        return pmid in self.rows
+
+    def add(self, pmid: str, text: str) -> bool:
+        """Append a paper's row (papers already in the corpus are left as they are)"""
+        pmid = str(pmid)
+        if pmid in self.rows:
+            return False
+        counts = Counter(tokenize(text))
+        vocabulary, df = self.vocabulary, self._df
+        ids = []
+        for term in counts:
+            term_id = vocabulary.get(term)
+            if term_id is None:
+                term_id = vocabulary[term] = len(df)
+                df.append(0)
+            df[term_id] += 1
+            ids.append(term_id)
+        self.rows[pmid] = len(self.pmids)
+        self.pmids.append(pmid)
+        self._indices.append(np.array(ids, dtype=np.int64))
+        self._tf.append(1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts))))
+        self._matrix = None
+        return True
+
+    def matrix(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(indptr, indices, data) of the L2-normalized TF-IDF matrix, rebuilt only after additions"""
+        if self._matrix is None:
+            lengths = np.fromiter((len(ids) for ids in self._indices), dtype=np.int64, count=len(self._indices))
+            indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            indices = np.concatenate(self._indices) if self._indices else np.empty(0, dtype=np.int64)
+            tf = np.concatenate(self._tf) if self._tf else np.empty(0)
+            df = np.asarray(self._df, dtype=np.float64)
+            idf = np.log((1.0 + len(self.pmids)) / (1.0 + df)) + 1.0
+            data = tf * idf[indices]
+            row_ids = np.repeat(np.arange(len(lengths)), lengths)
+            norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=len(lengths)))
+            norms[norms == 0] = 1.0
+            data /= norms[row_ids]
+            self._matrix = (indptr, indices, data)
+        return self._matrix
+
+    def submatrix(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(row_ids, indices, data, lengths) of the selected rows, flattened"""
+        indptr, indices, data = self.matrix()
+        lengths = indptr[rows + 1] - indptr[rows]
+        offsets = np.zeros(len(rows), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        positions = np.repeat(indptr[rows] - offsets, lengths) + np.arange(lengths.sum())
+        return np.repeat(np.arange(len(rows)), lengths), indices[positions], data[positions], lengths
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        lengths = np.fromiter((len(ids) for ids in self._indices), dtype=np.int64, count=len(self._indices))
+        return {
+            'vocabulary': np.array(json.dumps(list(self.vocabulary))),
+            'pmids': np.array(self.pmids, dtype=str),
+            'df': np.asarray(self._df, dtype=np.int64),
+            'lengths': lengths,
+            'indices': np.concatenate(self._indices) if self._indices else np.empty(0, dtype=np.int64),
+            'tf': np.concatenate(self._tf) if self._tf else np.empty(0)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> 'TfidfCorpus':
+        corpus = cls()
+        corpus.vocabulary = {term: i for i, term in enumerate(json.loads(str(arrays['vocabulary'])))}
+        corpus.pmids = [str(pmid) for pmid in arrays['pmids']]
+        corpus.rows = {pmid: i for i, pmid in enumerate(corpus.pmids)}
+        corpus._df = arrays['df'].tolist()
+        bounds = np.cumsum(arrays['lengths'])[:-1]
+        corpus._indices = np.split(arrays['indices'], bounds) if len(corpus.pmids) else []
+        corpus._tf = np.split(arrays['tf'], bounds) if len(corpus.pmids) else []
+        return corpus
+
+
+class ScreeningRanker:
+    """TF-IDF corpus, screening labels and a logistic regression ranker"""
+
+    def __init__(self, path: Optional[str] = None, l2: float = DEFAULT_L2):
+        """
+        Load (or start) the ranker
+
+        Args:
+            path: .npz state file (default: data/screening_model.npz; '' keeps it in memory)
+            l2: L2 regularization strength
+        """
+        self.path = _default_path() if path is None else path
+        self.l2 = l2
+        self.corpus = TfidfCorpus()
+        self.labels: Dict[str, int] = {}
+        self.weights = np.zeros(0)
+        self.bias = 0.0
+        self.fitted = False
+        if self.path and os.path.exists(self.path):
+            try:
+                with np.load(self.path) as arrays:
+                    self.corpus = TfidfCorpus.from_arrays(arrays)
+                    self.labels = dict(zip((str(p) for p in arrays['label_pmids']), arrays['labels'].tolist()))
+                    self.weights = arrays['weights']
+                    self.bias = float(arrays['bias'])
+                    self.fitted = bool(arrays['fitted'])
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"Error loading screening model, starting empty: {e}")
+
+    def add_articles(self, articles: Iterable[Dict]) -> int:
+        """Add papers to the corpus (title + abstract); returns the number added"""
+        return sum(1 for article in articles if self.corpus.add(article['pmid'], article_text(article)))
+
+    def record_decisions(self, decisions: Dict[str, bool]) -> int:
+        """
+        Record screening decisions (PMID -> relevant)
+
+        Returns:
+            Number of labels added or changed
+        """
+        changed = 0
+        for pmid, relevant in decisions.items():
+            label = 1 if relevant else 0
+            if self.labels.get(str(pmid)) != label:
+                self.labels[str(pmid)] = label
+                changed += 1
+        return changed
+
+    def can_fit(self) -> bool:
+        """Whether both relevant and irrelevant decisions exist for papers in the corpus"""
+        labels = {label for pmid, label in self.labels.items() if pmid in self.corpus}
+        return labels == {0, 1}
+
+    def fit(self) -> bool:
+        """
+        Refit the classifier on every labeled paper in the corpus (warm start)
+
+        Returns:
+            False if there are not yet decisions of both kinds
+        """
+        labeled = [(self.corpus.rows[pmid], label) for pmid, label in self.labels.items() if pmid in self.corpus]
+        if {label for _, label in labeled} != {0, 1}:
+            return False
+        rows = np.array([row for row, _ in labeled], dtype=np.int64)
+        y = np.array([label for _, label in labeled], dtype=np.float64)
+        row_ids, indices, data, _ = self.corpus.submatrix(rows)
+        # Only terms of labeled papers get a data gradient; every other weight's optimum is 0
+        features, indices = np.unique(indices, return_inverse=True)
+        n_features = len(features)
+
+        # Class-balanced sample weights, averaged so the step size does not depend on the label count
+        positives = y.sum()
+        sample_weight = np.where(y == 1, 0.5 / positives, 0.5 / (len(y) - positives))
+
+        previous = self.weights[features[features < len(self.weights)]]
+        w = np.zeros(n_features)
+        w[:len(previous)] = previous
+        b = self.bias
+        # Rows have unit norm, so with the bias the loss gradient is (0.5 + l2)-Lipschitz
+        step = 1.0 / (0.5 + self.l2)
+
+        def gradient(w, b):
+            margins = np.bincount(row_ids, weights=data * w[indices], minlength=len(rows)) + b
+            residual = sample_weight * (_sigmoid(margins) - y)
+            grad_w = np.bincount(indices, weights=data * residual[row_ids], minlength=n_features) + self.l2 * w
+            return grad_w, residual.sum()
+
+        prev_w, prev_b = w.copy(), b
+        for iteration in range(1, MAX_ITERATIONS + 1):
+            momentum = (iteration - 1) / (iteration + 2)
+            look_w = w + momentum * (w - prev_w)
+            look_b = b + momentum * (b - prev_b)
+            grad_w, grad_b = gradient(look_w, look_b)
+            prev_w, prev_b = w, b
+            w = look_w - step * grad_w
+            b = look_b - step * grad_b
+            if np.sqrt(grad_w @ grad_w + grad_b * grad_b) < TOLERANCE:
+                break
+
+        self.weights = np.zeros(len(self.corpus.vocabulary))
+        self.weights[features] = w
+        self.bias, self.fitted = b, True
+        logger.info(f"Screening model fit on {len(y)} decisions ({int(positives)} relevant) "
+                    f"in {iteration} iterations")
+        return True
+
+    def predict(self) -> np.ndarray:
+        """Predicted probability of relevance for every paper, in corpus order"""
+        indptr, indices, data = self.corpus.matrix()
+        n_features = len(self.corpus.vocabulary)
+        w = np.zeros(n_features)
+        w[:min(len(self.weights), n_features)] = self.weights[:n_features]
+        row_ids = np.repeat(np.arange(len(self.corpus)), np.diff(indptr))
+        margins = np.bincount(row_ids, weights=data * w[indices], minlength=len(self.corpus)) + self.bias
+        return _sigmoid(margins)
+
+    def rank(self, strategy: str = 'relevance', limit: Optional[int] = None,
+             exclude: Iterable[str] = ()) -> List[Dict]:
+        """
+        Unscreened papers, best first
+
+        Args:
+            strategy: 'relevance' (most likely relevant first) or 'uncertainty'
+                (probability closest to 0.5 first)
+            limit: Maximum number of papers
+            exclude: PMIDs to leave out besides the labeled ones (e.g. already queued)
+
+        Returns:
+            List of {'pmid', 'probability'}; empty until the model has been fit
+        """
+        if strategy not in RANKING_STRATEGIES:
+            raise ValueError(f"Unknown ranking strategy: {strategy}")
+        if not self.fitted or not len(self.corpus):
+            return []
+        probabilities = self.predict()
+        skip = set(self.labels) | set(exclude)
+        candidates = np.array([row for row, pmid in enumerate(self.corpus.pmids) if pmid not in skip],
+                              dtype=np.int64)
+        if not len(candidates):
+            return []
+        keys = -probabilities[candidates] if strategy == 'relevance' else np.abs(probabilities[candidates] - 0.5)
+        order = candidates[np.argsort(keys, kind='stable')][:limit]
+        return [{'pmid': self.corpus.pmids[row], 'probability': float(probabilities[row])} for row in order]
+
+    def save(self):
+        """Write the ranker state atomically"""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp.npz'
+            np.savez_compressed(
+                tmp_path,
+                label_pmids=np.array(list(self.labels), dtype=str),
+                labels=np.array(list(self.labels.values()), dtype=np.int8),
+                weights=self.weights,
+                bias=np.array(self.bias),
+                fitted=np.array(self.fitted),
+                **self.corpus.to_arrays()
+            )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving screening model: {e}")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Full-Text Search Index
+SQLite FTS5 index over each article's title, abstract, extracted full text and
+predictive factor contexts, ranked with BM25.
+
+Queries are plain text: every word must match (porter-stemmed, so "knees"
+finds "knee"), "double quoted" parts match as phrases and a trailing * makes
+a word a prefix. The mode argument changes the default: 'any' ORs the terms,
+'phrase' treats the whole query as one phrase and 'prefix' makes every word a
+prefix.
+
+LiteratureDatabase keeps a papers_fts table inside literature.db, written in
+the same transaction as the paper. FileStorage keeps a SearchIndex next to
+index.json (search_index.db), refreshed from index.json's updated_at stamps
+when opened, so article files changed by a git pull are reindexed.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FTS_COLUMNS = ('title', 'abstract', 'full_text', 'factors')
+# bm25() column weights, in FTS_COLUMNS order: a title hit outranks a full text hit
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 3.0)
+SEARCH_MODES = ('all', 'any', 'phrase', 'prefix')
+SNIPPET_TOKENS = 12
+
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_available()
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def match_expression(query: str, mode: str = 'all') -> str:
+    """
+    FTS5 MATCH expression for a user query (never raises on user input)
+
+    Args:
+        query: Search text
+        mode: 'all', 'any', 'phrase' or 'prefix'
+
+    Returns:
+        The expression, or '' if the query has no searchable words
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    query = query or ''
+    if mode == 'phrase':
+        words = _WORD.findall(query)
+        return _quote(' '.join(words)) if words else ''
+
+    terms = []
+    for phrase, word in _QUERY_PART.findall(query):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                terms.append(_quote(' '.join(words)))
+            continue
+        words = _WORD.findall(word)
+        if not words:
+            continue
+        prefix = mode == 'prefix' or word.endswith('*')
+        terms.append(_quote(' '.join(words)) + ('*' if prefix else ''))
+    return (' OR ' if mode == 'any' else ' AND ').join(terms)
+
+
+def _cached_full_text(pdf_path: Optional[str]) -> str:
+    """Text of a PDF that the extraction service has already parsed (never parses)"""
+    if not pdf_path or not os.path.exists(pdf_path):
+        return ''
+    try:
+        from scripts.pdf_text import get_pdf_text_extractor, join_pages
+        pages = get_pdf_text_extractor().cached_pages(pdf_path)
+        return join_pages(pages) if pages else ''
+    except Exception as e:
+        logger.debug(f"No cached text for {pdf_path}: {e}")
+        return ''
+
+
+def article_document(article: Dict) -> Dict[str, str]:
+    """Indexed text of an article, one string per FTS column"""
+    factors = article.get('predictive_factors') or []
+    if isinstance(factors, str):
+        try:
+            factors = json.loads(factors)
+        except ValueError:
+            factors = []
+    factor_text = []
+    for factor in factors if isinstance(factors, list) else []:
+        if isinstance(factor, dict):
+            factor_text.append(' '.join(str(factor.get(key) or '')
+                                        for key in ('factor', 'outcome', 'context')))
+    return {
+        'title': article.get('title') or '',
+        'abstract': article.get('abstract') or '',
+        'full_text': article.get('full_text') or _cached_full_text(article.get('pdf_path')),
+        'factors': '\n'.join(factor_text)
+    }
+
+
+def create_fts_table(conn: sqlite3.Connection, table: str):
+    """Create an external-rowid FTS5 table (rowids are supplied by the caller)"""
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                 f"{', '.join(FTS_COLUMNS)}, tokenize='porter unicode61 remove_diacritics 2')")
+
+
+def index_document(conn: sqlite3.Connection, table: str, rowid: int, document: Dict[str, str]):
+    """Replace the indexed text stored under rowid"""
+    conn.execute(f'DELETE FROM {table} WHERE rowid = ?', (rowid,))
+    conn.execute(f"INSERT INTO {table} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                 (rowid,) + tuple(document[column] for column in FTS_COLUMNS))
+
+
+def search_fts(conn: sqlite3.Connection, table: str, key_table: str, query: str, mode: str = 'all',
+               limit: int = 100, offset: int = 0) -> List[Dict]:
+    """
+    BM25-ranked matches of an FTS table whose rowids are rowids of key_table
+
+    Returns:
+        List of {'pmid', 'score', 'snippet'}, best first (higher score is better)
+    """
+    expression = match_expression(query, mode)
+    if not expression:
+        return []
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    rows = conn.execute(
+        f"SELECT k.pmid, -bm25({table}, {weights}) AS score, "
+        f"snippet({table}, -1, '[', ']', '...', {SNIPPET_TOKENS}) "
+        f"FROM {table} JOIN {key_table} k ON k.rowid = {table}.rowid "
+        f"WHERE {table} MATCH ? ORDER BY score DESC LIMIT ? OFFSET ?",
+        (expression, limit, offset)
+    ).fetchall()
+    return [{'pmid': row[0], 'score': row[1], 'snippet': row[2]} for row in rows]
+
+
+def count_fts(conn: sqlite3.Connection, table: str, query: str, mode: str = 'all') -> int:
+    """Number of documents matching a query"""
+    expression = match_expression(query, mode)
+    if not expression:
+        return 0
+    return conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {table} MATCH ?', (expression,)).fetchone()[0]
+
+
+class SearchIndex:
+    """Standalone FTS5 index keyed by PMID, for article stores without a database"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the index
+
+        Args:
+            path: SQLite file
+        """
+        if not FTS5_AVAILABLE:
+            raise RuntimeError("SQLite was built without FTS5")
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS documents (
+                pmid TEXT PRIMARY KEY,
+                updated_at TEXT
+            )
+        ''')
+        create_fts_table(self._conn, 'documents_fts')
+        self._conn.commit()
+
+    def _add(self, article: Dict):
+        pmid = str(article['pmid'])
+        self._conn.execute(
+            'INSERT INTO documents (pmid, updated_at) VALUES (?, ?) '
+            'ON CONFLICT(pmid) DO UPDATE SET updated_at = excluded.updated_at',
+            (pmid, article.get('updated_at') or '')
+        )
+        rowid = self._conn.execute('SELECT rowid FROM documents WHERE pmid = ?', (pmid,)).fetchone()[0]
+        index_document(self._conn, 'documents_fts', rowid, article_document(article))
+
+    def _remove(self, pmids: Iterable[str]):
+        for pmid in pmids:
+            row = self._conn.execute('SELECT rowid FROM documents WHERE pmid = ?', (pmid,)).fetchone()
+            if row:
+                self._conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (row[0],))
+                self._conn.execute('DELETE FROM documents WHERE rowid = ?', (row[0],))
+
+    def add_article(self, article: Dict):
+        """Index (or reindex) one article"""
+        with self._lock:
+            try:
+                self._add(article)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def add_articles(self, articles: Iterable[Dict]):
+        """Index (or reindex) many articles in one transaction"""
+        with self._lock:
+            try:
+                for article in articles:
+                    self._add(article)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def get_texts(self, pmids: Iterable[str], columns: Iterable[str] = FTS_COLUMNS) -> Dict[str, Dict[str, str]]:
+        """Indexed text of articles: PMID -> {column: text} (unindexed PMIDs are absent)"""
+        columns = [column for column in columns if column in FTS_COLUMNS]
+        texts = {}
+        with self._lock:
+            for pmid in pmids:
+                row = self._conn.execute(
+                    f"SELECT {', '.join('f.' + c for c in columns)} FROM documents d "
+                    f"JOIN documents_fts f ON f.rowid = d.rowid WHERE d.pmid = ?", (pmid,)
+                ).fetchone()
+                if row:
+                    texts[pmid] = dict(zip(columns, row))
+        return texts
+
+    def sync(self, stamps: Dict[str, str], load: Callable[[List[str]], Iterable[Dict]]) -> int:
+        """
+        Bring the index in line with the store
+
+        Args:
+            stamps: PMID -> updated_at of every stored article
+            load: Loads the article dictionaries for a list of PMIDs
+
+        Returns:
+            Number of articles (re)indexed or removed
+        """
+        with self._lock:
+            indexed = dict(self._conn.execute('SELECT pmid, updated_at FROM documents').fetchall())
+            stale = [pmid for pmid, stamp in stamps.items() if indexed.get(pmid) != (stamp or '')]
+            removed = [pmid for pmid in indexed if pmid not in stamps]
+            if not stale and not removed:
+                return 0
+            logger.info(f"Updating search index: {len(stale)} articles to index, {len(removed)} to remove")
+            try:
+                self._remove(removed)
+                for article in load(stale):
+                    self._add(article)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return len(stale) + len(removed)
+
+    def search(self, query: str, mode: str = 'all', limit: int = 100, offset: int = 0) -> List[Dict]:
+        """BM25-ranked {'pmid', 'score', 'snippet'} matches, best first"""
+        with self._lock:
+            return search_fts(self._conn, 'documents_fts', 'documents', query, mode=mode,
+                              limit=limit, offset=offset)
+
+    def count(self, query: str, mode: str = 'all') -> int:
+        """Number of matching articles"""
+        with self._lock:
+            return count_fts(self._conn, 'documents_fts', query, mode=mode)
+
+    def close(self):
+        """Close the index database"""
+        with self._lock:
+            self._conn.close()
@@ -30,7 +30,7 @@ def test_github_actions_integration():
     
     # Create temporary directory
     test_dir = tempfile.mkdtemp(prefix="workflow_test_")
-    test_review_file = Path(test_dir) / "review_queue.json"
+    test_review_db = Path(test_dir) / "review_queue.db"
     
     try:
         # Mock storage to return test articles
@@ -65,12 +65,10 @@ def test_github_actions_integration():
             mock_storage_instance.get_all_articles.return_value = mock_articles
             mock_storage.return_value = mock_storage_instance
             
-            # Patch review manager to use test file
+            # Patch review manager to use test database
             original_init = ReviewManager.__init__
             def patched_init(self):
-                original_init(self)
-                self.review_file = test_review_file
-                self._load_review_queue()
+                original_init(self, db_path=str(test_review_db))
             
             with patch.object(ReviewManager, '__init__', patched_init):
                 notifier = NotificationSystem()
@@ -83,10 +81,8 @@ def test_github_actions_integration():
                 # Simulate the run() method adding to review queue
                 print("\nSimulating GitHub Actions workflow...")
                 
-                # Manually create review manager for testing
+                # Manually create review manager for testing (uses the patched test database)
                 manager = ReviewManager()
-                manager.review_file = test_review_file
-                manager._load_review_queue()
                 
                 # Add potential parameters to review queue (simulating analyze_and_notify.py)
                 for param_name, articles in potential_params.items():
@@ -144,12 +140,10 @@ def test_all_dashboard_actions():
     print("=" * 80)
     
     test_dir = tempfile.mkdtemp(prefix="dashboard_test_")
-    test_review_file = Path(test_dir) / "review_queue.json"
+    test_review_db = Path(test_dir) / "review_queue.db"
     
     try:
-        manager = ReviewManager()
-        manager.review_file = test_review_file
-        manager._load_review_queue()
+        manager = ReviewManager(db_path=str(test_review_db))
         
         # Create test items in different states
         test_items = [
@@ -276,12 +270,10 @@ def test_api_endpoints():
     print("=" * 80)
     
     test_dir = tempfile.mkdtemp(prefix="api_test_")
-    test_review_file = Path(test_dir) / "review_queue.json"
+    test_review_db = Path(test_dir) / "review_queue.db"
     
     try:
-        manager = ReviewManager()
-        manager.review_file = test_review_file
-        manager._load_review_queue()
+        manager = ReviewManager(db_path=str(test_review_db))
         
         # Add test data
         test_id = manager.add_to_review_queue('new_parameter', {
@@ -316,7 +308,7 @@ def test_api_endpoints():
         assert success, "API update failed"
         
         # Verify update
-        updated_item = manager.review_queue.get(test_id)
+        updated_item = manager.get_review(test_id)
         assert updated_item is not None, "Item not found after update"
         assert updated_item['status'] == 'approved', "Status not updated correctly"
         assert len(updated_item['notes']) > 0, "Notes not added"
@@ -348,13 +340,10 @@ def test_dashboard_filters():
     print("=" * 80)
     
     test_dir = tempfile.mkdtemp(prefix="filter_test_")
-    test_review_file = Path(test_dir) / "review_queue.json"
+    test_review_db = Path(test_dir) / "review_queue.db"
     
     try:
-        manager = ReviewManager()
-        manager.review_file = test_review_file
-        manager.review_queue = {}  # Start with empty queue
-        manager._save_review_queue()
+        manager = ReviewManager(db_path=str(test_review_db))  # Start with empty queue
         
         # Create items with different statuses and types
         print("\nCreating test items...")
@@ -30,17 +30,14 @@ def test_persistence_flow():
     test_dir = tempfile.mkdtemp(prefix="persistence_test_")
     test_data_dir = Path(test_dir) / "data"
     test_data_dir.mkdir(parents=True, exist_ok=True)
-    test_review_file = test_data_dir / "review_queue.json"
+    test_review_db = test_data_dir / "review_queue.db"
     
     try:
         # STEP 1: Simulate GitHub Actions adding items
         print("STEP 1: Simulating GitHub Actions workflow...")
         
         # Create ReviewManager with test file path
-        manager1 = ReviewManager()
-        manager1.review_file = test_review_file
-        manager1.review_queue = {}
-        manager1._save_review_queue()
+        manager1 = ReviewManager(db_path=str(test_review_db))  # Start with empty queue
         
         # Simulate analyze_and_notify.py adding items
         test_items = [
@@ -74,29 +71,25 @@ def test_persistence_flow():
             review_ids.append(review_id)
             print(f"  ✓ Added: {review_id}")
         
-        # Verify file exists and has content
-        assert test_review_file.exists(), "Review queue file was not created!"
-        print(f"  ✓ File created: {test_review_file}")
+        # Verify database exists and has content
+        assert test_review_db.exists(), "Review queue database was not created!"
+        print(f"  ✓ Database created: {test_review_db}")
         
-        # Verify file has content
-        with open(test_review_file, 'r') as f:
-            file_content = json.load(f)
-        assert len(file_content) == 2, f"Expected 2 items, got {len(file_content)}"
-        print(f"  ✓ File contains {len(file_content)} items")
+        # Verify database has content
+        item_count = manager1.get_review_summary()['total']
+        assert item_count == 2, f"Expected 2 items, got {item_count}"
+        print(f"  ✓ Database contains {item_count} items")
         
         # STEP 2: Simulate file being committed to git (just verify it exists)
         print("\nSTEP 2: Verifying file is ready for commit...")
-        print(f"  ✓ File path: {test_review_file}")
-        print(f"  ✓ File size: {test_review_file.stat().st_size} bytes")
-        print(f"  ✓ File is readable and valid JSON")
+        print(f"  ✓ File path: {test_review_db}")
+        print(f"  ✓ File size: {test_review_db.stat().st_size} bytes")
         
         # STEP 3: Simulate Dashboard API loading the file
         print("\nSTEP 3: Simulating Dashboard API loading...")
         
         # Create NEW ReviewManager instance (simulating API request)
-        manager2 = ReviewManager()
-        manager2.review_file = test_review_file
-        manager2._load_review_queue()
+        manager2 = ReviewManager(db_path=str(test_review_db))
         
         # Verify items are loaded
         all_reviews = manager2.get_all_reviews()
@@ -105,7 +98,7 @@ def test_persistence_flow():
         
         # Verify specific items
         for review_id in review_ids:
-            item = manager2.review_queue.get(review_id)
+            item = manager2.get_review(review_id)
             assert item is not None, f"Item {review_id} not found in loaded queue!"
             print(f"  ✓ Item {review_id} loaded correctly")
         
@@ -134,11 +127,9 @@ def test_persistence_flow():
         )
         
         # Reload and verify update persisted
-        manager3 = ReviewManager()
-        manager3.review_file = test_review_file
-        manager3._load_review_queue()
+        manager3 = ReviewManager(db_path=str(test_review_db))
         
-        updated_item = manager3.review_queue.get(review_ids[0])
+        updated_item = manager3.get_review(review_ids[0])
         assert updated_item['status'] == 'approved', "Status update did not persist!"
         assert len(updated_item['notes']) > 0, "Notes did not persist!"
         print(f"  ✓ Status updates persist correctly")
@@ -152,7 +143,7 @@ def test_persistence_flow():
         print("  3. Dashboard API loads items from file ✓")
         print("  4. Dashboard export works ✓")
         print("  5. Status updates persist ✓")
-        print("\n⚠️  IMPORTANT: Ensure review_queue.json is committed to git!")
+        print("\n⚠️  IMPORTANT: Ensure review_queue.db is committed to git!")
         print("   The GitHub Actions workflow should commit this file.")
         
         return True
@@ -29,17 +29,14 @@ def test_review_system():
     
     # Create temporary directory for test data
     test_dir = tempfile.mkdtemp(prefix="review_test_")
-    test_review_file = Path(test_dir) / "review_queue.json"
+    test_review_db = Path(test_dir) / "review_queue.db"
     
     print(f"Test directory: {test_dir}")
-    print(f"Test review file: {test_review_file}\n")
+    print(f"Test review database: {test_review_db}\n")
     
     try:
-        # Create a test review manager with temporary file
-        # We'll patch the review_file path
-        manager = ReviewManager()
-        original_file = manager.review_file
-        manager.review_file = test_review_file
+        # Create a test review manager with a temporary database
+        manager = ReviewManager(db_path=str(test_review_db))
         
         print("✓ ReviewManager initialized")
         
@@ -167,9 +164,7 @@ def test_review_system():
         print("-" * 80)
         
         # Create new manager instance to test file loading
-        manager2 = ReviewManager()
-        manager2.review_file = test_review_file
-        manager2._load_review_queue()
+        manager2 = ReviewManager(db_path=str(test_review_db))
         
         loaded_count = len(manager2.review_queue)
         print(f"✓ Loaded {loaded_count} items from file")
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Shared Article Text Analysis
+Computes the normalized text, sentence spans, numeric extractions and keyword
+hits of an article once, for every consumer that reads them.
+
+The relevance scorers, PROBAST assessment, article flagging and factor
+extraction all look at the same title, abstract and full text. Each of them
+asks `analyze_article(article)` (or `analyze_text(text)`) for the article's
+`AnalyzedText`, which computes every derived value lazily on first use and
+caches it. The sample size, follow-up, EPV and p-value patterns live here only.
+"""
+
+import re
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scripts.keyword_matcher import KeywordHits, KeywordMatcher, config_categories
+
+# Longest "sentence" produced by split_sentences; text without sentence
+# punctuation (typical of PDF extraction) is chunked at whitespace beyond this
+MAX_SENTENCE_CHARS = 2000
+
+# Number of recently analyzed articles/texts kept for reuse
+ANALYSIS_CACHE_SIZE = 64
+
+# Term lists scored in addition to keywords.json, as "scoring.<name>" categories
+SCORING_TERMS = {
+    # Direct prediction terms (high value)
+    'direct_prediction': [
+        'predict tkr', 'predict total knee', 'predict arthroplasty',
+        'prognostic model', 'prediction model', 'risk prediction',
+        'predict progression', 'predict surgery', 'predict replacement'
+    ],
+    # Progression/outcome terms (medium value)
+    'progression': [
+        'progression', 'total knee replacement', 'tkr', 'tka',
+        'arthroplasty', 'joint replacement', 'surgical intervention'
+    ],
+    # Prediction/prognosis terms (medium value)
+    'prediction': [
+        'predictor', 'risk factor', 'prognostic', 'prognosis',
+        'forecast', 'outcome prediction'
+    ],
+    # OA-related but not progression (low value)
+    'osteoarthritis': ['osteoarthritis', 'knee oa'],
+    'novel_indicators': [
+        'novel', 'new', 'first', 'previously unreported',
+        'innovative', 'breakthrough', 'significant finding'
+    ],
+    'highly_significant': ['highly significant'],
+    'modifiable': [
+        'bmi', 'body mass index', 'weight', 'exercise', 'physical activity',
+        'strength', 'muscle', 'gait', 'walking', 'lifestyle', 'intervention',
+        'treatment', 'therapy', 'rehabilitation'
+    ],
+    'clinical': [
+        'clinical', 'practice', 'guideline', 'recommendation',
+        'screening', 'assessment', 'diagnosis', 'management'
+    ],
+    'actionable': ['should', 'recommend', 'consider', 'suggest', 'indicate']
+}
+
+_NUMBER = r'(\d{1,3}(?:,\d{3})*)'
+
+# Sample size mentions, matched on lowercased text. Consumers take the maximum
+# over the subset of patterns they score on.
+SAMPLE_SIZE_PATTERNS = {
+    'count': re.compile(r'\b' + _NUMBER + r'\s*(?:patients?|subjects?|participants?|individuals?|cases?)'),
+    'n_equals': re.compile(r'n\s*=\s*' + _NUMBER),
+    'sample_size_of': re.compile(r'sample\s+size\s+(?:of\s+)?' + _NUMBER),
+    'enrolled': re.compile(_NUMBER + r'\s*(?:patients?|subjects?)\s+(?:were|included|enrolled)'),
+}
+
+# PROBAST takes the first hit in this order rather than the maximum
+FIRST_SAMPLE_SIZE_PATTERNS = [
+    re.compile(r'\bn\s*[=:]\s*(\d+)', re.IGNORECASE),
+    re.compile(r'\b(\d+)\s+patients', re.IGNORECASE),
+    re.compile(r'\b(\d+)\s+participants', re.IGNORECASE),
+    re.compile(r'\b(\d+)\s+subjects', re.IGNORECASE),
+]
+
+FOLLOWUP_PATTERNS = [
+    re.compile(r'(?:follow[-\s]?up|followed|over)\s+([0-9.]+)\s*(?:years?|yrs?)'),
+    re.compile(r'([0-9.]+)\s*(?:year|yr)\s*(?:follow[-\s]?up|follow)'),
+]
+
+EPV_PATTERNS = [
+    re.compile(r'epv\s*[=:]\s*(\d+\.?\d*)', re.IGNORECASE),
+    re.compile(r'events\s+per\s+variable\s*[=:]\s*(\d+\.?\d*)', re.IGNORECASE),
+    re.compile(r'(\d+\.?\d*)\s+events\s+per\s+variable', re.IGNORECASE),
+]
+
+P_VALUE_PATTERN = re.compile(r'p\s*[<>=]\s*([\d.]+)', re.IGNORECASE)
+SIGNIFICANT_P_PATTERN = re.compile(r'p\s*[<>=]\s*0\.0[0-5]')
+
+_SENTENCE_END = re.compile(r'[.!?]+\s+')
+_ABBREVIATIONS = ('et al.', 'vs.', 'e.g.', 'i.e.', 'fig.', 'approx.')
+
+
+def split_sentences(text: str, max_chars: int = MAX_SENTENCE_CHARS) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) spans of sentences in text
+
+    Sentences end at ., ! or ? followed by whitespace, except after common
+    abbreviations or inside unclosed parentheses. Spans longer than max_chars
+    are cut at the last whitespace before the limit.
+    """
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        segment = text[start:match.start() + 1]
+        if segment.count('(') > segment.count(')') and end - start < max_chars:
+            continue
+        if segment.lower().endswith(_ABBREVIATIONS) and end - start < max_chars:
+            continue
+        yield from _bounded_spans(text, start, end, max_chars)
+        start = end
+    if start < len(text):
+        yield from _bounded_spans(text, start, len(text), max_chars)
+
+
+def _bounded_spans(text: str, start: int, end: int, max_chars: int) -> Iterator[Tuple[int, int]]:
+    """Cut [start, end) into spans of at most max_chars, preferring whitespace"""
+    while end - start > max_chars:
+        cut = start + max_chars
+        space = max(text.rfind(' ', start, cut), text.rfind('\n', start, cut))
+        if space > start:
+            cut = space + 1
+        yield start, cut
+        start = cut
+    yield start, end
+
+
+def first_sample_size(text: str) -> Optional[int]:
+    """First sample size found by FIRST_SAMPLE_SIZE_PATTERNS, in pattern order"""
+    for pattern in FIRST_SAMPLE_SIZE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                return int(match.group(1))
+            except ValueError:
+                continue
+    return None
+
+
+def extract_epv(text: str) -> Optional[float]:
+    """Events Per Variable (EPV) reported in text"""
+    for pattern in EPV_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                return float(match.group(1))
+            except ValueError:
+                continue
+    return None
+
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def article_matcher(config: Dict) -> KeywordMatcher:
+    """
+    Keyword matcher over every keywords.json category plus SCORING_TERMS
+
+    Matchers are compiled once per distinct config and shared, so scorers
+    built from the same config hit the same cached scan of each field.
+    """
+    key = json.dumps(config, sort_keys=True)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            categories = config_categories(config)
+            categories.update(config_categories({'scoring': SCORING_TERMS}))
+            matcher = _matchers[key] = KeywordMatcher(categories)
+        return matcher
+
+
+class AnalyzedText:
+    """
+    Lazily computed, cached analysis of an article's text fields
+
+    Fields are 'title', 'abstract', 'full_text' and 'journal' for articles
+    (plus the derived 'title_abstract', "<title> <abstract>"), or 'text' for
+    plain texts. Every accessor takes the field to analyze.
+    """
+
+    ARTICLE_FIELDS = ('title', 'abstract', 'full_text', 'journal')
+
+    def __init__(self, fields: Dict[str, str], source: Any = None):
+        self.fields = fields
+        self.source = source
+        self._lower = {}
+        self._cache = {}
+
+    @classmethod
+    def from_article(cls, article: Dict) -> 'AnalyzedText':
+        """Analysis of an article dictionary's text fields"""
+        fields = {name: article.get(name) or '' for name in cls.ARTICLE_FIELDS}
+        fields['title_abstract'] = f"{fields['title']} {fields['abstract']}"
+        return cls(fields, source=article)
+
+    @classmethod
+    def from_text(cls, text: str) -> 'AnalyzedText':
+        """Analysis of a single text, available as field 'text'"""
+        return cls({'text': text or ''}, source=text)
+
+    def is_current(self, article: Dict) -> bool:
+        """True if the article's text fields are still the ones analyzed"""
+        fields = self.fields
+        for name in self.ARTICLE_FIELDS:
+            value = article.get(name) or ''
+            if value is not fields[name] and value != fields[name]:
+                return False
+        return True
+
+    def memo(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Cached value under key, computed on first use"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = compute()
+            return value
+
+    def cached(self, key: Any) -> Any:
+        """Value stored under key, or None"""
+        return self._cache.get(key)
+
+    def store(self, key: Any, value: Any):
+        """Store a derived value that is only known after the fact"""
+        self._cache[key] = value
+
+    def text(self, field: str) -> str:
+        """Raw text of a field"""
+        return self.fields.get(field, '')
+
+    def lower(self, field: str) -> str:
+        """Lowercased text of a field"""
+        try:
+            return self._lower[field]
+        except KeyError:
+            value = self._lower[field] = self.text(field).lower()
+            return value
+
+    def sentence_spans(self, field: str) -> List[Tuple[int, int]]:
+        """(start, end) sentence spans of a field"""
+        return self.memo(('sentences', field), lambda: list(split_sentences(self.text(field))))
+
+    def hits(self, matcher: KeywordMatcher, field: str) -> KeywordHits:
+        """Keyword hits of a matcher in a field (one scan per matcher and field)"""
+        key = ('hits', matcher, field)
+        try:
+            return self._cache[key]
+        except KeyError:
+            hits = self._cache[key] = matcher.match(self.lower(field), lowered=True)
+            return hits
+
+    def sample_sizes(self, field: str, pattern: str) -> List[int]:
+        """Sample size mentions found in a field by one of SAMPLE_SIZE_PATTERNS"""
+        return self.memo(('sample_sizes', field, pattern), lambda: [
+            int(match.replace(',', '')) for match in SAMPLE_SIZE_PATTERNS[pattern].findall(self.lower(field))
+        ])
+
+    def max_sample_size(self, field: str, patterns: Iterable[str]) -> int:
+        """Largest sample size found by the named patterns (0 if none)"""
+        return max((size for pattern in patterns for size in self.sample_sizes(field, pattern)), default=0)
+
+    def first_sample_size(self, field: str) -> Optional[int]:
+        """Sample size as PROBAST reads it (first pattern that matches)"""
+        return self.memo(('first_sample_size', field), lambda: first_sample_size(self.text(field)))
+
+    def followup_years(self, field: str) -> List[float]:
+        """Follow-up durations in years mentioned in a field"""
+        def compute():
+            text = self.lower(field)
+            years = []
+            for pattern in FOLLOWUP_PATTERNS:
+                for match in pattern.findall(text):
+                    try:
+                        years.append(float(match))
+                    except ValueError:
+                        continue
+            return years
+        return self.memo(('followup_years', field), compute)
+
+    def epv(self, field: str) -> Optional[float]:
+        """Events Per Variable reported in a field"""
+        return self.memo(('epv', field), lambda: extract_epv(self.text(field)))
+
+    def p_values(self, field: str) -> List[str]:
+        """Reported p-value thresholds in a field, as written"""
+        return self.memo(('p_values', field), lambda: P_VALUE_PATTERN.findall(self.text(field)))
+
+    def has_significant_p(self, field: str) -> bool:
+        """True if a field reports p at or below 0.05 (p<0.0x)"""
+        return self.memo(('significant_p', field),
+                         lambda: SIGNIFICANT_P_PATTERN.search(self.lower(field)) is not None)
+
+
+class _AnalysisCache:
+    """
+    Bounded map of recent analyses, evicting the oldest entry first
+
+    Lookups take no lock (a dict read is atomic); inserts and evictions do.
+    """
+
+    def __init__(self, size: int = ANALYSIS_CACHE_SIZE):
+        self.size = size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[AnalyzedText]:
+        return self._entries.get(key)
+
+    def put(self, key: Any, analysis: AnalyzedText):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = analysis
+            while len(self._entries) > self.size:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_article_cache = _AnalysisCache()
+_text_cache = _AnalysisCache()
+
+
+def analyze_article(article: Dict) -> AnalyzedText:
+    """
+    Shared analysis of an article
+
+    Consumers of the same article dictionary get the same AnalyzedText while
+    it is among the most recent ANALYSIS_CACHE_SIZE articles; it is rebuilt if
+    the article's text fields change. The cache holds a reference to the
+    article, so its id cannot be reused while cached.
+    """
+    analysis = _article_cache.get(id(article))
+    if analysis is not None and analysis.source is article and analysis.is_current(article):
+        return analysis
+    analysis = AnalyzedText.from_article(article)
+    _article_cache.put(id(article), analysis)
+    return analysis
+
+
+def analyze_text(text: str) -> AnalyzedText:
+    """Shared analysis of a plain text (field 'text')"""
+    text = text or ''
+    analysis = _text_cache.get(text)
+    if analysis is None:
+        analysis = AnalyzedText.from_text(text)
+        _text_cache.put(text, analysis)
+    return analysis
+
+
+def clear_analysis_cache():
+    """Forget all cached analyses"""
+    _article_cache.clear()
+    _text_cache.clear()
@@ -2,26 +2,95 @@
 """
 Xata Database Client
 Handles all database operations for storing and retrieving PubMed articles.
+
+All requests share one pooled `requests.Session` (keep-alive, automatic retries
+on rate limits and gateway errors) and a client-wide rate limiter. Queries follow
+Xata's page cursors so callers see every matching record, and bulk writes are
+sent as transactions chunked by serialized payload size, a few at a time.
 """
 
 import os
+import json
+import time
 import logging
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Xata limits: 1000 records per page / per transaction; keep request bodies well under 4MB
+MAX_PAGE_SIZE = 1000
+MAX_TRANSACTION_OPERATIONS = 1000
+DEFAULT_MAX_PAYLOAD_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+MAX_RETRIES = 3
+
+
+class _RateLimiter:
+    """Spaces request start times so the client stays under a requests/second budget"""
+
+    def __init__(self, requests_per_second: Optional[float]):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+
+class _WriteSafeRetry(Retry):
+    """
+    Retry policy that never resends a write the server may have applied
+
+    Gateway errors (502/503/504) are retried for idempotent methods only; a
+    POST/PATCH is resent only after 429, which rejects the request unapplied.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method and method.upper() not in Retry.DEFAULT_ALLOWED_METHODS and status_code != 429:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
 
 class XataClient:
     """Client for Xata database operations"""
     
-    def __init__(self):
-        self.api_key = os.getenv('XATA_API_KEY')
-        self.database_url = os.getenv('XATA_DATABASE_URL')
-        self.table_name = 'pubmed_articles'
+    def __init__(self, api_key: Optional[str] = None, database_url: Optional[str] = None,
+                 table_name: str = 'pubmed_articles', max_workers: int = DEFAULT_MAX_WORKERS,
+                 requests_per_second: Optional[float] = DEFAULT_REQUESTS_PER_SECOND):
+        """
+        Initialize the client
+        
+        Args:
+            api_key: Xata API key (default: XATA_API_KEY)
+            database_url: https://{workspace}.{region}.xata.sh/db/{database}:{branch}
+                (default: XATA_DATABASE_URL)
+            table_name: Table used by the article methods
+            max_workers: Concurrent requests allowed for bulk writes
+            requests_per_second: Client-wide request rate (None disables the limit)
+        """
+        self.api_key = api_key or os.getenv('XATA_API_KEY')
+        self.database_url = database_url or os.getenv('XATA_DATABASE_URL')
+        self.table_name = table_name
+        self.max_workers = max(1, max_workers)
+        self._rate_limiter = _RateLimiter(requests_per_second)
+        self._session = None
+        self._session_lock = threading.Lock()
         
         if not self.api_key or not self.database_url:
             logger.warning("Xata credentials not found. Database operations will be skipped.")
@@ -32,7 +101,7 @@ class XataClient:
             # Format: https://{workspace}.{region}.xata.sh/db/{database}:{branch}
             try:
                 url_parts = self.database_url.rstrip('/')
-                if ':' in url_parts:
+                if ':' in url_parts.split('/')[-1]:
                     # Has branch specified
                     base, branch = url_parts.rsplit(':', 1)
                     self.base_url = base
@@ -53,31 +122,59 @@ class XataClient:
                 logger.error(f"Error parsing database URL: {e}")
                 self.enabled = False
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Optional[Dict]:
-        """Make HTTP request to Xata API"""
+    @property
+    def session(self) -> requests.Session:
+        """Pooled keep-alive session, created on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    retry = _WriteSafeRetry(
+                        total=MAX_RETRIES,
+                        connect=MAX_RETRIES,
+                        read=0,  # a timed-out write may have been applied; don't resend it
+                        status=MAX_RETRIES,
+                        backoff_factor=1.0,
+                        status_forcelist=(429, 502, 503, 504),  # writes: 429 only (see _WriteSafeRetry)
+                        allowed_methods=None,
+                        respect_retry_after_header=True,
+                        raise_on_status=False
+                    )
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers,
+                                          max_retries=retry)
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({
+                        'Authorization': f'Bearer {self.api_key}',
+                        'Content-Type': 'application/json'
+                    })
+                    self._session = session
+        return self._session
+    
+    def close(self):
+        """Close pooled connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    def _request(self, method: str, path: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Make HTTP request to a path below {database}:{branch}"""
         if not self.enabled:
             logger.warning("Xata not enabled, skipping request")
             return None
         
-        # Xata API format: https://{workspace}.{region}.xata.sh/db/{database}:{branch}/tables/{table}/{endpoint}
-        url = f"{self.base_url}:{self.branch}/tables/{self.table_name}{endpoint}"
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
-        }
+        if method not in ('GET', 'POST', 'PUT', 'PATCH'):
+            logger.error(f"Unsupported HTTP method: {method}")
+            return None
+        
+        url = f"{self.base_url}:{self.branch}{path}"
+        self._rate_limiter.wait()
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, params=params or data, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, headers=headers, json=data, params=params, timeout=30)
-            elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=data, params=params, timeout=30)
-            elif method == 'PATCH':
-                response = requests.patch(url, headers=headers, json=data, params=params, timeout=30)
+                response = self.session.request(method, url, params=params or data, timeout=30)
             else:
-                logger.error(f"Unsupported HTTP method: {method}")
-                return None
+                response = self.session.request(method, url, json=data, params=params, timeout=30)
             
             response.raise_for_status()
             return response.json() if response.content else {}
@@ -91,6 +188,12 @@ class XataClient:
                     pass
             return None
     
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None,
+                      table_name: Optional[str] = None) -> Optional[Dict]:
+        """Make HTTP request to Xata API"""
+        # Xata API format: https://{workspace}.{region}.xata.sh/db/{database}:{branch}/tables/{table}/{endpoint}
+        return self._request(method, f"/tables/{table_name or self.table_name}{endpoint}", data, params)
+    
     def get_article_by_pmid(self, pmid: str) -> Optional[Dict]:
         """Get article by PMID (primary key)"""
         if not self.enabled:
@@ -125,13 +228,130 @@ class XataClient:
         result = self._make_request('PATCH', f'/{article_data["pmid"]}', data=article_data)
         return result is not None
     
-    def query_articles(self, filter_dict: Optional[Dict] = None, limit: int = 100) -> List[Dict]:
+    def _transaction_chunks(self, operations: List[Dict], max_payload_bytes: int) -> List[List[Dict]]:
+        """Split operations into transactions under the payload and operation limits"""
+        chunks = []
+        chunk = []
+        size = 0
+        for operation in operations:
+            op_size = len(json.dumps(operation, default=str)) + 1
+            if chunk and (size + op_size > max_payload_bytes or len(chunk) >= MAX_TRANSACTION_OPERATIONS):
+                chunks.append(chunk)
+                chunk = []
+                size = 0
+            if op_size > max_payload_bytes:
+                logger.warning(f"Single record of {op_size} bytes exceeds the payload budget; sending it alone")
+            chunk.append(operation)
+            size += op_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+    
+    def upsert_records(self, records: List[Dict], table_name: Optional[str] = None,
+                       id_field: Optional[str] = None,
+                       max_payload_bytes: int = DEFAULT_MAX_PAYLOAD_BYTES) -> int:
+        """
+        Write many records with as few requests as possible
+        
+        Records are grouped into transactions no larger than max_payload_bytes
+        (and at most 1000 operations), sent by up to max_workers threads under
+        the client's rate limit. Each transaction is all-or-nothing.
+        
+        Args:
+            records: Records to write
+            table_name: Target table (default: the client's table)
+            id_field: Field holding the record id; records are upserted by id.
+                Without it records are inserted.
+            max_payload_bytes: Maximum serialized size of one transaction
+            
+        Returns:
+            Number of records written
+        """
+        if not self.enabled:
+            logger.warning("Xata not enabled, skipping bulk upsert")
+            return 0
+        if not records:
+            return 0
+        
+        table = table_name or self.table_name
+        operations = []
+        for record in records:
+            if id_field and record.get(id_field) not in (None, ''):
+                operations.append({'update': {'table': table, 'id': str(record[id_field]),
+                                              'fields': record, 'upsert': True}})
+            else:
+                operations.append({'insert': {'table': table, 'record': record}})
+        
+        chunks = self._transaction_chunks(operations, max_payload_bytes)
+        
+        def send(chunk: List[Dict]) -> int:
+            result = self._request('POST', '/transaction', data={'operations': chunk})
+            return len(chunk) if result is not None else 0
+        
+        if len(chunks) == 1 or self.max_workers == 1:
+            written = [send(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                written = list(executor.map(send, chunks))
+        
+        failed = sum(1 for count in written if not count)
+        if failed:
+            logger.error(f"{failed} of {len(chunks)} Xata transactions failed for table {table}")
+        total = sum(written)
+        logger.info(f"Upserted {total}/{len(records)} records into {table} in {len(chunks)} transactions")
+        return total
+    
+    def upsert_articles(self, articles: List[Dict], max_payload_bytes: int = DEFAULT_MAX_PAYLOAD_BYTES) -> int:
+        """Bulk insert or update articles keyed by PMID; returns the number written"""
+        with_pmid = [article for article in articles if article.get('pmid')]
+        if len(with_pmid) < len(articles):
+            logger.error(f"Skipping {len(articles) - len(with_pmid)} articles without PMID")
+        return self.upsert_records(with_pmid, id_field='pmid', max_payload_bytes=max_payload_bytes)
+    
+    def iter_records(self, filter_dict: Optional[Dict] = None, columns: Optional[List[str]] = None,
+                     page_size: int = 200, table_name: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Iterate over every matching record, following page cursors
+        
+        Args:
+            filter_dict: Xata filter expression
+            columns: Columns to return (default: all)
+            page_size: Records per request (max 1000)
+            table_name: Table to query (default: the client's table)
+            
+        Yields:
+            Record dictionaries
+        """
+        if not self.enabled:
+            return
+        
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        query_data = {'columns': columns or ['*'], 'page': {'size': page_size}}
+        if filter_dict:
+            query_data['filter'] = filter_dict
+        
+        while True:
+            result = self._make_request('POST', '/query', data=query_data, table_name=table_name)
+            if not result:
+                return
+            yield from result.get('records', [])
+            
+            page = (result.get('meta') or {}).get('page') or {}
+            cursor = page.get('cursor')
+            if not page.get('more') or not cursor:
+                return
+            # The cursor encodes the filter, sort and columns of the original query
+            query_data = {'page': {'after': cursor, 'size': page_size}}
+    
+    def query_articles(self, filter_dict: Optional[Dict] = None, limit: Optional[int] = 100,
+                       columns: Optional[List[str]] = None) -> List[Dict]:
         """
         Query articles with optional filter
         
         Args:
             filter_dict: Xata filter expression
-            limit: Maximum number of results
+            limit: Maximum number of results (None for all matching articles)
+            columns: Columns to return (default: all)
             
         Returns:
             List of article dictionaries
@@ -139,23 +359,22 @@ class XataClient:
         if not self.enabled:
             return []
         
-        query_data = {'columns': ['*'], 'page': {'size': limit}}
-        if filter_dict:
-            query_data['filter'] = filter_dict
-        
-        result = self._make_request('POST', '/query', data=query_data)
-        if result and 'records' in result:
-            return result['records']
-        return []
+        page_size = MAX_PAGE_SIZE if limit is None else min(limit, MAX_PAGE_SIZE)
+        records = []
+        for record in self.iter_records(filter_dict, columns=columns, page_size=page_size):
+            records.append(record)
+            if limit is not None and len(records) >= limit:
+                break
+        return records
     
-    def get_high_relevance_articles(self, threshold: int = 70) -> List[Dict]:
+    def get_high_relevance_articles(self, threshold: int = 70, limit: Optional[int] = None) -> List[Dict]:
         """Get articles with relevance score >= threshold"""
         filter_expr = {
             'relevance_score': {'$ge': threshold}
         }
-        return self.query_articles(filter_expr)
+        return self.query_articles(filter_expr, limit=limit)
     
-    def get_paywalled_articles(self, threshold: int = 70) -> List[Dict]:
+    def get_paywalled_articles(self, threshold: int = 70, limit: Optional[int] = None) -> List[Dict]:
         """Get paywalled articles with relevance >= threshold"""
         filter_expr = {
             '$and': [
@@ -163,20 +382,23 @@ class XataClient:
                 {'relevance_score': {'$ge': threshold}}
             ]
         }
-        return self.query_articles(filter_expr)
+        return self.query_articles(filter_expr, limit=limit)
     
     def count_paywalled_articles(self) -> int:
         """Count paywalled articles"""
-        articles = self.get_paywalled_articles(threshold=0)
-        return len(articles)
+        filter_expr = {
+            '$and': [
+                {'access_type': 'paywalled'},
+                {'relevance_score': {'$ge': 0}}
+            ]
+        }
+        return sum(1 for _ in self.iter_records(filter_expr, columns=['id'], page_size=MAX_PAGE_SIZE))
     
     def count_predictive_factors(self) -> int:
         """Count total number of predictive factors extracted"""
-        articles = self.query_articles(limit=1000)
         total = 0
-        for article in articles:
+        for article in self.iter_records(columns=['predictive_factors'], page_size=MAX_PAGE_SIZE):
             factors = article.get('predictive_factors', [])
             if isinstance(factors, list):
                 total += len(factors)
         return total
-
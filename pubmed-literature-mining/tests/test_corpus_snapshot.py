@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the packed corpus snapshot
+"""
+
+import pytest
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pyarrow")
+
+from scripts.literature_database import LiteratureDatabase
+from scripts.corpus_snapshot import load_corpus
+
+
+class TestCorpusSnapshot:
+    """Test snapshot export and loading"""
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, tmp_path):
+        """Set up a small literature database"""
+        self.db_path = str(tmp_path / 'literature.db')
+        self.database = LiteratureDatabase(db_path=self.db_path)
+        self.database.add_article({
+            'pmid': '111', 'title': 'First', 'abstract': 'Cohort study', 'relevance_score': 80,
+            'access_type': 'paywalled',
+            'predictive_factors': [{'factor': 'BMI', 'outcome': 'TKR', 'effect_size': 'OR: 1.8'},
+                                   {'factor': 'Age', 'outcome': 'TKR'}]
+        })
+        self.database.add_article({'pmid': '222', 'title': 'Second', 'relevance_score': 45,
+                                   'access_type': 'open_access'})
+        self.database.mark_as_used_in_model('111')
+
+    def test_dataframes_and_factor_table(self):
+        """Papers and factors are exported as separate tables"""
+        papers, factors = load_corpus(self.db_path).load_dataframes()
+        assert sorted(papers['pmid']) == ['111', '222']
+        assert papers.set_index('pmid').loc['111', 'factor_count'] == 2
+        assert bool(papers.set_index('pmid').loc['111', 'used_in_model'])
+        assert list(factors['factor']) == ['BMI', 'Age']
+        assert 'predictive_factors' not in papers.columns
+
+    def test_load_articles_reattaches_factors(self):
+        """load_articles returns storage-shaped dicts in the requested order"""
+        corpus = load_corpus(self.db_path)
+        articles = corpus.load_articles(pmids=['222', '111'])
+        assert [a['pmid'] for a in articles] == ['222', '111']
+        assert articles[0]['predictive_factors'] == []
+        assert articles[1]['predictive_factors'][0]['factor'] == 'BMI'
+        assert articles[1]['relevance_score'] == 80
+
+    def test_snapshot_refreshes_when_source_changes(self):
+        """A stale snapshot is rebuilt on load"""
+        corpus = load_corpus(self.db_path)
+        assert not corpus.is_stale(self.db_path)
+
+        self.database.add_article({'pmid': '333', 'title': 'Third', 'relevance_score': 10})
+        os.utime(self.db_path, (time.time() + 1, time.time() + 1))
+        assert corpus.is_stale(self.db_path)
+
+        papers, _ = load_corpus(self.db_path).load_dataframes()
+        assert len(papers) == 3
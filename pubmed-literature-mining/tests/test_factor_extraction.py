@@ -6,6 +6,7 @@ Tests for predictive factor extraction
 import pytest
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -64,3 +65,11 @@ class TestFactorExtraction:
         factors = self.extractor.extract_predictive_factors(abstract)
         assert isinstance(factors, list), "Should return a list even if no factors found"
 
+    
+    def test_pathological_input_is_fast(self):
+        """Long unpunctuated input does not cause catastrophic backtracking"""
+        text = "BMI was associated with pain " * 5000
+        start = time.monotonic()
+        factors = self.extractor.extract_statistical_associations(text, time_budget=None)
+        assert time.monotonic() - start < 5
+        assert factors == []
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for file-based storage and its index-only queries
+"""
+
+import pytest
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.file_storage import FileStorage
+
+
+class TestFileStorage:
+    """Test FileStorage index maintenance and queries"""
+
+    @pytest.fixture(autouse=True)
+    def setup_storage(self, tmp_path):
+        """Set up a storage directory with a few articles"""
+        self.data_dir = tmp_path / 'articles'
+        self.storage = FileStorage(data_dir=str(self.data_dir))
+        self.storage.insert_article({
+            'pmid': '11111111', 'title': 'A', 'relevance_score': 85,
+            'access_type': 'paywalled',
+            'predictive_factors': [{'factor': 'BMI'}, {'factor': 'Age'}]
+        })
+        self.storage.insert_article({
+            'pmid': '22222222', 'title': 'B', 'relevance_score': '40',
+            'access_type': 'paywalled', 'predictive_factors': []
+        })
+        self.storage.insert_article({
+            'pmid': '33333333', 'title': 'C', 'relevance_score': 72,
+            'access_type': 'open_access',
+            'predictive_factors': [{'factor': 'KL grade'}]
+        })
+
+    def test_counts_from_index(self):
+        """Counts are answered from the index"""
+        assert self.storage.count_paywalled_articles() == 2
+        assert self.storage.count_predictive_factors() == 3
+
+    def test_threshold_queries(self):
+        """Threshold queries return matching articles, highest score first"""
+        high = self.storage.get_high_relevance_articles(threshold=70)
+        assert [a['pmid'] for a in high] == ['11111111', '33333333']
+
+        paywalled = self.storage.get_paywalled_articles(threshold=0)
+        assert {a['pmid'] for a in paywalled} == {'11111111', '22222222'}
+        assert [a['pmid'] for a in self.storage.get_paywalled_articles(threshold=70)] == ['11111111']
+
+    def test_update_moves_article_between_buckets(self):
+        """Updating an article keeps the secondary structures consistent"""
+        self.storage.insert_article({
+            'pmid': '22222222', 'relevance_score': 90, 'access_type': 'open_access',
+            'predictive_factors': [{'factor': 'Pain'}]
+        })
+        assert self.storage.count_paywalled_articles() == 1
+        assert self.storage.count_predictive_factors() == 4
+        high = self.storage.get_high_relevance_articles(threshold=70)
+        assert [a['pmid'] for a in high] == ['22222222', '11111111', '33333333']
+
+    def test_queries_do_not_read_unmatched_files(self):
+        """Only matching article files are opened"""
+        os.remove(self.storage._get_article_file('22222222'))
+        assert self.storage.count_paywalled_articles() == 2
+        assert len(self.storage.get_high_relevance_articles(threshold=70)) == 2
+
+    def test_updated_since(self):
+        """Recency queries use the updated_at index"""
+        updated_at = self.storage.index['33333333']['updated_at']
+        recent = self.storage.get_articles_updated_since(updated_at)
+        assert [a['pmid'] for a in recent] == ['33333333']
+
+    def test_legacy_index_is_backfilled(self, monkeypatch):
+        """Index files without factor_count are backfilled and saved once, on the first load"""
+        index_file = self.data_dir / 'index.json'
+        index = json.loads(index_file.read_text())
+        for entry in index.values():
+            entry.pop('factor_count')
+        index_file.write_text(json.dumps(index))
+
+        reloaded = FileStorage(data_dir=str(self.data_dir))
+        assert reloaded.count_predictive_factors() == 3
+        assert json.loads(index_file.read_text())['11111111']['factor_count'] == 2
+        assert not (self.data_dir / 'index.json.tmp').exists()
+
+        # Migrated: later opens read no article files
+        monkeypatch.setattr(FileStorage, 'get_article_by_pmid',
+                            lambda self, pmid: pytest.fail(f"read article {pmid}"))
+        assert FileStorage(data_dir=str(self.data_dir)).count_predictive_factors() == 3
+
+
+class TestFactorIndex:
+    """Test the factor -> article postings maintained on insert"""
+
+    @pytest.fixture(autouse=True)
+    def setup_storage(self, tmp_path):
+        """Set up articles that share factors with and without statistical evidence"""
+        self.data_dir = tmp_path / 'articles'
+        self.storage = FileStorage(data_dir=str(self.data_dir))
+        for i in range(6):
+            self.storage.insert_article({
+                'pmid': f'4000000{i}', 'title': f'Study {i}', 'relevance_score': 90 - i * 5,
+                'predictive_factors': [
+                    {'factor': 'Bone Marrow Lesion ', 'effect_size': 'OR 2.1' if i < 5 else 'not specified',
+                     'significance': 'mentioned in text'},
+                    {'factor': 'bone marrow lesion', 'effect_size': 'not specified', 'significance': ''},
+                    {'factor': 'BMI', 'effect_size': 'HR 1.4', 'significance': 'p<0.01'}
+                ]
+            })
+
+    def test_threshold_queries(self):
+        """Factors are normalized and counted once per article"""
+        factors = self.storage.get_factor_articles(5)
+        assert set(factors) == {'bone marrow lesion', 'bmi'}
+        assert factors['bmi'][0] == '40000000'  # highest score first
+
+        assert set(self.storage.get_factor_articles(6, statistical_only=True)) == {'bmi'}
+        new = self.storage.get_factor_articles(5, statistical_only=True, new_parameters_only=True)
+        assert list(new) == ['bone marrow lesion']
+        assert len(new['bone marrow lesion']) == 5
+
+    def test_relevance_threshold(self):
+        """Only articles above the relevance threshold count"""
+        assert self.storage.get_factor_articles(5, relevance_threshold=75) == {}
+        assert len(self.storage.get_factor_articles(4, relevance_threshold=75)['bmi']) == 4
+
+    def test_updates_replace_postings(self):
+        """Re-inserting an article replaces its postings, and the index persists"""
+        self.storage.insert_article({'pmid': '40000000', 'predictive_factors': [{'factor': 'Pain'}]})
+        assert len(self.storage.factor_index.postings['bmi']) == 5
+        assert self.storage.factor_index.postings['pain'] == {'40000000': 'mention'}
+
+        reloaded = FileStorage(data_dir=str(self.data_dir))
+        assert reloaded.factor_index.postings == self.storage.factor_index.postings
+
+    def test_missing_index_is_built_from_articles(self):
+        """A corpus without factor_index.json is indexed on first use"""
+        os.remove(self.data_dir / 'factor_index.json')
+        reloaded = FileStorage(data_dir=str(self.data_dir))
+        assert set(reloaded.get_factor_articles(5)) == {'bone marrow lesion', 'bmi'}
+        assert (self.data_dir / 'factor_index.json').exists()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Tests for write-behind Google Sheets storage (against an in-memory worksheet)
+"""
+
+import pytest
+import sys
+import os
+import re
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.google_sheets_storage import GoogleSheetsStorage, HybridStorage, HEADERS
+
+
+class FakeWorksheet:
+    """In-memory stand-in for a gspread worksheet that records API calls"""
+
+    def __init__(self, rows=None, title="oa_articles"):
+        self.title = title
+        self.rows = [list(HEADERS)] + [list(r) for r in (rows or [])]
+        self.calls = []
+        self.fail_next = 0
+
+    def _call(self, name):
+        self.calls.append(name)
+        if self.fail_next:
+            self.fail_next -= 1
+            raise Exception("APIError: [429]: Quota exceeded")
+
+    def get_all_values(self):
+        self._call('get_all_values')
+        return [[str(v) for v in row] for row in self.rows]
+
+    def append_row(self, values, **kwargs):
+        self._call('append_row')
+        self.rows.append(list(values))
+
+    def append_rows(self, values, **kwargs):
+        self._call('append_rows')
+        first = len(self.rows) + 1
+        self.rows.extend(list(v) for v in values)
+        last = len(self.rows)
+        return {'updates': {'updatedRange': f"{self.title}!A{first}:O{last}"}}
+
+    def batch_update(self, data, **kwargs):
+        self._call('batch_update')
+        for item in data:
+            cells = re.findall(r'([A-Z]+)(\d+)', item['range'])
+            col = sum((ord(ch) - 64) * 26 ** i for i, ch in enumerate(reversed(cells[0][0])))
+            row = self.rows[int(cells[0][1]) - 1]
+            for offset, value in enumerate(item['values'][0]):
+                while len(row) < col + offset:
+                    row.append('')
+                row[col + offset - 1] = value
+
+    def cell(self, pmid, field):
+        for row in self.rows[1:]:
+            if str(row[1]) == pmid:
+                return row[HEADERS.index(field)]
+        return None
+
+
+def _article(pmid, **fields):
+    article = {'pmid': pmid, 'title': f'Title {pmid}', 'abstract': 'Abstract',
+               'journal': 'Journal', 'access_type': 'paywalled', 'relevance_score': 50}
+    article.update(fields)
+    return article
+
+
+class TestGoogleSheetsStorage:
+    """Test the local mirror and batched flushes"""
+
+    def setup_method(self):
+        """Set up a sheet with one existing article"""
+        existing = ['111', '111', 'No title', '', '', 'Unknown Journal', '', '', 'paywalled',
+                    '40', '[]', '', 'processed', '2024-01-01', '2024-01-01']
+        self.sheet = FakeWorksheet(rows=[existing])
+        self.storage = GoogleSheetsStorage(worksheet=self.sheet, flush_interval=None, flush_size=10)
+
+    def test_inserts_are_batched(self):
+        """New articles are appended together once flushed"""
+        for i in range(5):
+            assert self.storage.insert_article(_article(str(200 + i)))
+        assert self.sheet.calls == ['get_all_values']
+
+        assert self.storage.flush()
+        assert self.sheet.calls == ['get_all_values', 'append_rows']
+        assert len(self.sheet.rows) == 7
+
+    def test_size_threshold_triggers_flush(self):
+        """Reaching flush_size writes the queue"""
+        for i in range(10):
+            self.storage.insert_article(_article(str(300 + i)))
+        assert self.sheet.calls.count('append_rows') == 1
+        assert self.storage.pending_count() == 0
+
+    def test_updates_are_coalesced(self):
+        """Repeated updates of a row become one batch update"""
+        self.storage.insert_article(_article('111', title='Real title', relevance_score=60))
+        self.storage.insert_article(_article('111', relevance_score=80, doi='10.1/x'))
+        assert self.storage.pending_count() == 1
+
+        self.storage.flush()
+        assert self.sheet.calls == ['get_all_values', 'batch_update']
+        assert self.sheet.cell('111', 'title') == 'Real title'
+        assert self.sheet.cell('111', 'journal') == 'Journal'
+        assert self.sheet.cell('111', 'relevance_score') == 80
+        assert self.sheet.cell('111', 'doi') == '10.1/x'
+
+    def test_lower_score_does_not_overwrite(self):
+        """Only better values replace existing cells"""
+        self.storage.insert_article(_article('111', relevance_score=10))
+        self.storage.flush()
+        assert self.sheet.cell('111', 'relevance_score') == '40'
+
+    def test_updates_to_queued_rows_go_into_the_append(self):
+        """A row updated before its append is flushed is appended once, up to date"""
+        self.storage.insert_article(_article('400', relevance_score=50))
+        self.storage.insert_article(_article('400', relevance_score=90))
+        self.storage.flush()
+        assert self.sheet.calls == ['get_all_values', 'append_rows']
+        assert self.sheet.cell('400', 'relevance_score') == 90
+
+        # Later updates address the appended row
+        self.storage.insert_article(_article('400', relevance_score=95))
+        self.storage.flush()
+        assert self.sheet.cell('400', 'relevance_score') == 95
+
+    def test_reads_use_local_mirror(self):
+        """Reads, counts and queries make no API calls"""
+        self.storage.insert_article(_article('500', relevance_score=85))
+        assert self.storage.get_article_by_pmid('500')['title'] == 'Title 500'
+        assert self.storage.get_article_by_pmid('999') is None
+        assert self.storage.count_paywalled_articles() == 2
+        assert [a['pmid'] for a in self.storage.get_high_relevance_articles(threshold=70)] == [500]
+        assert self.sheet.calls == ['get_all_values']
+
+    def test_failed_flush_is_retried(self, monkeypatch):
+        """Changes stay queued when the API keeps failing"""
+        monkeypatch.setattr('time.sleep', lambda seconds: None)
+        self.storage.insert_article(_article('600'))
+        self.sheet.fail_next = 5
+        assert not self.storage.flush()
+        assert self.storage.pending_count() == 1
+
+        assert self.storage.flush()
+        assert self.sheet.cell('600', 'title') == 'Title 600'
+
+    def _insert_during_append(self, articles, fail=False):
+        """Make the next append_rows insert articles from another thread while the API call is in flight"""
+        append_rows = self.sheet.append_rows
+        blocked = []
+
+        def slow_append(values, **kwargs):
+            writer = threading.Thread(target=lambda: [self.storage.insert_article(a) for a in articles])
+            writer.start()
+            writer.join(timeout=5)
+            blocked.append(writer.is_alive())
+            if fail:
+                raise Exception("APIError: [500]: Internal error")
+            return append_rows(values, **kwargs)
+
+        self.sheet.append_rows = slow_append
+        return blocked
+
+    def test_inserts_are_not_blocked_by_a_flush(self, monkeypatch):
+        """Articles queued while a flush writes are kept for the next flush"""
+        self.storage.insert_article(_article('700', relevance_score=50))
+        blocked = self._insert_during_append([_article('700', relevance_score=90), _article('701')])
+        assert self.storage.flush()
+        assert blocked == [False]
+        assert self.sheet.cell('700', 'relevance_score') == 50
+        assert self.storage.pending_count() == 2
+
+        self.sheet.append_rows = FakeWorksheet.append_rows.__get__(self.sheet)
+        assert self.storage.flush()
+        assert self.sheet.cell('700', 'relevance_score') == 90
+        assert self.sheet.cell('701', 'title') == 'Title 701'
+        assert [row[1] for row in self.sheet.rows[1:]] == ['111', '700', '701']
+
+    def test_failed_append_keeps_changes_made_in_flight(self, monkeypatch):
+        """A row updated while its append fails is re-queued with the update"""
+        monkeypatch.setattr('time.sleep', lambda seconds: None)
+        self.storage.insert_article(_article('800', relevance_score=50))
+        blocked = self._insert_during_append([_article('800', relevance_score=90)], fail=True)
+        assert not self.storage.flush()
+        assert blocked[0] is False
+        assert self.storage.pending_count() == 1
+
+        self.sheet.append_rows = FakeWorksheet.append_rows.__get__(self.sheet)
+        assert self.storage.flush()
+        assert self.sheet.cell('800', 'relevance_score') == 90
+        assert self.sheet.calls.count('batch_update') == 0
+
+
+class TestHybridStorage:
+    """Test hybrid reads and writes"""
+
+    def test_reads_prefer_file_storage(self, tmp_path):
+        """get_article_by_pmid does not touch Sheets for locally stored articles"""
+        from scripts.file_storage import FileStorage
+
+        sheet = FakeWorksheet()
+        hybrid = HybridStorage.__new__(HybridStorage)
+        hybrid.sheets_storage = GoogleSheetsStorage(worksheet=sheet, flush_interval=None)
+        hybrid.file_storage = FileStorage(data_dir=str(tmp_path / 'articles'))
+
+        assert hybrid.insert_article(_article('700'))
+        assert hybrid.get_article_by_pmid('700')['title'] == 'Title 700'
+        assert sheet.calls == ['get_all_values']
+
+        assert hybrid.flush()
+        assert sheet.calls == ['get_all_values', 'append_rows']
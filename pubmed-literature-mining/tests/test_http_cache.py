@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent HTTP response cache
+"""
+
+import pytest
+import sys
+import os
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.http_cache import HTTPCache, OfflineCacheMiss, normalize_request, ttl_for, FOREVER, DAY
+from scripts.open_access_detector import OpenAccessDetector
+
+
+class FakeSession:
+    """Session that answers every request with a canned JSON body"""
+
+    def __init__(self, status=200, body=b'{"is_oa": true, "oa_locations": []}'):
+        self.status = status
+        self.body = body
+        self.calls = []
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        self.calls.append((method, url, params, json))
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = self.body
+        response.headers['Content-Type'] = 'application/json'
+        response.url = url
+        return response
+
+
+class TestHTTPCache:
+    """Test keys, TTLs and offline replay"""
+
+    def setup_method(self):
+        """Set up a cache in a temporary file"""
+        self.session = FakeSession()
+
+    def _cache(self, tmp_path, **kwargs):
+        return HTTPCache(path=str(tmp_path / 'http_cache.db'), session=self.session, enabled=True, **kwargs)
+
+    def test_key_normalizes_params(self):
+        """Parameter order and identity parameters do not change the key"""
+        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi'
+        first = normalize_request('get', url, {'db': 'pubmed', 'id': '1', 'email': 'a@b.c'})
+        second = normalize_request('GET', url + '?id=1', {'tool': 'x', 'db': 'pubmed'})
+        assert first == second
+        assert first != normalize_request('GET', url, {'db': 'pubmed', 'id': '2'})
+
+    def test_endpoint_ttls(self):
+        """EFetch never expires, OA lookups last 30 days"""
+        assert ttl_for('https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi') is FOREVER
+        assert ttl_for('https://api.unpaywall.org/v2/10.1/x') == 30 * DAY
+        assert ttl_for('https://www.ebi.ac.uk/europepmc/webservices/rest/search') == 30 * DAY
+
+    def test_repeat_requests_are_served_from_disk(self, tmp_path):
+        """A second identical request does not hit the network, even after reopening"""
+        url = 'https://api.unpaywall.org/v2/10.1/x'
+        cache = self._cache(tmp_path)
+        assert cache.request('GET', url, params={'email': 'a@b.c'}).json()['is_oa']
+        cache.close()
+
+        reopened = self._cache(tmp_path)
+        response = reopened.request('GET', url, params={'email': 'other@b.c'})
+        assert response.from_cache
+        assert response.json()['is_oa']
+        assert len(self.session.calls) == 1
+        assert reopened.stats()['hits'] == 1
+
+    def test_expired_and_failed_responses(self, tmp_path):
+        """Expired entries are refetched; errors are never stored"""
+        url = 'https://api.unpaywall.org/v2/10.1/y'
+        cache = self._cache(tmp_path)
+        cache.request('GET', url, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.lookup('GET', url) is None
+
+        self.session.status = 500
+        cache.request('GET', 'https://api.unpaywall.org/v2/10.1/z')
+        assert cache.lookup('GET', 'https://api.unpaywall.org/v2/10.1/z') is None
+
+    def test_writes_are_never_replayed(self, tmp_path):
+        """A POST goes to the network every time unless the caller opts in with a ttl"""
+        url = 'https://api.github.com/repos/owner/repo/issues'
+        cache = self._cache(tmp_path)
+        cache.request('POST', url, json_body={'title': 'Alert'})
+        response = cache.request('POST', url, json_body={'title': 'Alert'})
+        assert not getattr(response, 'from_cache', False)
+        assert len(self.session.calls) == 2
+        assert cache.lookup('POST', url, json_body={'title': 'Alert'}) is None
+
+    def test_offline_replay(self, tmp_path):
+        """Offline mode replays stored (even expired) responses and never uses the network"""
+        url = 'https://api.unpaywall.org/v2/10.1/x'
+        self._cache(tmp_path).request('GET', url, ttl=0.01)
+        time.sleep(0.02)
+
+        offline = self._cache(tmp_path, offline=True)
+        assert offline.request('GET', url).json()['is_oa']
+        with pytest.raises(OfflineCacheMiss):
+            offline.request('GET', 'https://api.unpaywall.org/v2/10.1/unknown')
+        assert len(self.session.calls) == 1
+
+    def test_detector_uses_cache(self, tmp_path):
+        """OpenAccessDetector lookups go through the cache"""
+        detector = OpenAccessDetector()
+        detector.http_cache = self._cache(tmp_path)
+        detector.REQUEST_DELAY = 0
+        assert detector.check_unpaywall('10.1/x')['is_open_access']
+        assert detector.check_unpaywall('10.1/x')['is_open_access']
+        assert len(self.session.calls) == 1
+
+        detector.http_cache = self._cache(tmp_path, offline=True)
+        assert detector.check_unpaywall('10.1/unknown') is None
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled multi-keyword matcher
+"""
+
+import pytest
+import sys
+import os
+import re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """Test that the matcher reproduces per-keyword regex and substring checks"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.terms = ['risk', 'risk factor', 'cohort', 'cohort study', 'kl grade', 'x-ray', 'ha', 'new']
+        self.matcher = KeywordMatcher({'terms': self.terms})
+
+    @pytest.mark.parametrize('text', [
+        'Risk factor analysis in a cohort study; risk factors and risky cohorts.',
+        'X-ray and x-ray-based KL grade; kl grade_2 had HA levels (ha) and a new renewal.',
+        '',
+        'riskrisk risk_risk risk-risk',
+    ])
+    def test_word_counts_match_regex(self, text):
+        """word_count equals re.findall with word boundaries"""
+        hits = self.matcher.match(text)
+        for term in self.terms:
+            expected = len(re.findall(r'\b' + re.escape(term) + r'\b', text.lower()))
+            assert hits.word_count(term) == expected, term
+
+    def test_substring_presence(self):
+        """contains/count_present follow `term in text` semantics"""
+        hits = self.matcher.match('A renewal of the cohort')
+        assert hits.contains('new')
+        assert hits.contains('cohort')
+        assert not hits.contains('cohort study')
+        assert hits.count_present('terms') == 2
+        assert hits.any('terms')
+        assert not hits.any('unknown_category')
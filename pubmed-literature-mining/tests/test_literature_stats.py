@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the materialized literature statistics
+"""
+
+import pytest
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.literature_database import LiteratureDatabase
+from scripts.literature_stats import LiteratureStatistics, reconcile
+
+
+def _article(pmid, score, access_type='open_access'):
+    return {'pmid': pmid, 'title': f'Study {pmid}', 'abstract': 'Knee cohort.',
+            'relevance_score': score, 'access_type': access_type}
+
+
+def _assessment(risk):
+    return {'overall_risk': risk, 'assessment_method': 'automated'}
+
+
+class TestLiteratureStatistics:
+    """Test trigger-maintained statistics against recounts"""
+
+    @pytest.fixture
+    def database(self, tmp_path):
+        database = LiteratureDatabase(str(tmp_path / 'literature.db'))
+        database.add_article(_article('1', 82), _assessment('Low'))
+        database.add_article(_article('2', 65, 'paywalled'), _assessment('Moderate'))
+        database.add_article(_article('3', 71), _assessment('Low'))
+        database.add_article(_article('4', None, 'paywalled'))
+        database.mark_as_used_in_model('1')
+        return database
+
+    def test_statistics_follow_writes(self, database):
+        """Inserts, updates from any caller and deletes keep the counts exact"""
+        stats = database.get_statistics()
+        assert stats['total_articles'] == 4
+        assert stats['probast_low_risk'] == 2 and stats['probast_moderate_risk'] == 1
+        assert stats['used_in_model'] == 1
+        assert stats['by_access_type'] == {'open_access': 2, 'paywalled': 2}
+        assert stats['by_score_bucket'] == {60: 1, 70: 1, 80: 1}
+        assert sum(stats['by_month_added'].values()) == 4
+
+        # Scripts update papers with their own SQL
+        conn = sqlite3.connect(database.db_path)
+        conn.execute("UPDATE papers SET probast_risk = 'High', relevance_score = 90 WHERE pmid = '2'")
+        conn.execute("UPDATE papers SET notes = 'unrelated' WHERE pmid = '3'")
+        conn.execute("DELETE FROM papers WHERE pmid = '4'")
+        conn.commit()
+        conn.close()
+        database.add_article(_article('1', 88))
+
+        stats = database.get_statistics()
+        assert stats['total_articles'] == 3
+        assert stats['probast_high_risk'] == 1 and stats['probast_moderate_risk'] == 0
+        assert stats['by_access_type'] == {'open_access': 2, 'paywalled': 1}
+        assert stats['by_score_bucket'] == {70: 1, 80: 1, 90: 1}
+
+        conn = sqlite3.connect(database.db_path)
+        summary = LiteratureStatistics(conn).score_summary(used_only=True)
+        assert summary == {'count': 1, 'avg': 88, 'min': 88, 'max': 88}
+        assert reconcile(conn, repair=False) == []
+        conn.close()
+
+    def test_reconcile_repairs_drift(self, database):
+        """A hand-edited statistics table is detected and rebuilt"""
+        conn = sqlite3.connect(database.db_path)
+        conn.execute("UPDATE paper_stats SET papers = papers + 5 WHERE dimension = 'access_type'")
+        conn.execute("DELETE FROM paper_stats WHERE dimension = 'probast_risk' AND value = 'Low'")
+        conn.commit()
+
+        differences = reconcile(conn)
+        assert {diff['dimension'] for diff in differences} == {'access_type', 'probast_risk'}
+        assert reconcile(conn) == []
+        conn.close()
+        assert database.get_statistics()['probast_low_risk'] == 2
+
+    def test_existing_database_is_backfilled(self, tmp_path):
+        """Statistics are built from papers when an older database is opened"""
+        db_path = str(tmp_path / 'literature.db')
+        database = LiteratureDatabase(db_path)
+        database.add_article(_article('1', 50), _assessment('Unclear'))
+        conn = sqlite3.connect(db_path)
+        conn.execute('DROP TABLE paper_stats')
+        for trigger in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER papers_stats_{trigger}')
+        conn.commit()
+        conn.close()
+
+        stats = LiteratureDatabase(db_path).get_statistics()
+        assert stats['total_articles'] == 1 and stats['probast_unclear_risk'] == 1
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for MinHash/LSH near-duplicate detection
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.near_duplicates import (NearDuplicateIndex, article_shingles, estimate_similarity,
+                                     index_corpus, minhash_signature)
+from scripts.file_storage import FileStorage
+
+ABSTRACT = ('Background: Bone marrow lesions on baseline MRI were evaluated as predictors of total knee '
+            'replacement in a prospective cohort of 1,200 participants with knee osteoarthritis followed '
+            'for eight years. Larger lesion volume was associated with a higher hazard of arthroplasty '
+            '(HR 1.8, 95% CI 1.3-2.4) after adjustment for age, sex, BMI and Kellgren-Lawrence grade.')
+
+ORIGINAL = {'pmid': '40000001', 'title': 'Bone marrow lesions predict knee replacement', 'abstract': ABSTRACT,
+            'predictive_factors': [{'factor': 'bone marrow lesion', 'effect_size': 'HR 1.8'}]}
+# Journal version of a preprint: same study, lightly edited abstract
+REPUBLISHED = {'pmid': '40000002', 'title': 'Bone marrow lesions predict knee replacement.',
+               'abstract': ABSTRACT.replace('Background: ', '').replace('eight years', '8 years'),
+               'predictive_factors': [{'factor': 'bone marrow lesion', 'effect_size': 'HR 1.8'}]}
+UNRELATED = {'pmid': '40000003', 'title': 'Synovitis and pain sensitization in hand osteoarthritis',
+             'abstract': 'Cross-sectional ultrasound study of synovitis grade and pressure pain thresholds '
+                         'in 300 adults with erosive hand osteoarthritis recruited from rheumatology clinics.'}
+
+
+class TestMinHash:
+    """Test signatures"""
+
+    def test_similarity_estimates(self):
+        """Near-identical texts score high, different studies low; short texts get no signature"""
+        original = minhash_signature(article_shingles(ORIGINAL))
+        assert estimate_similarity(original, minhash_signature(article_shingles(REPUBLISHED))) >= 0.8
+        assert estimate_similarity(original, minhash_signature(article_shingles(UNRELATED))) < 0.2
+        assert minhash_signature(article_shingles({'title': 'Erratum'})) is None
+
+
+class TestNearDuplicateIndex:
+    """Test insert-time detection"""
+
+    def test_duplicates_link_to_canonical_record(self, tmp_path):
+        """Duplicates of a duplicate link to the first record; re-checking an article is not a match"""
+        index = NearDuplicateIndex(str(tmp_path / 'near_duplicates.db'))
+        assert index.check_article(ORIGINAL) is None
+        assert index.check_article(UNRELATED) is None
+
+        match = index.check_article(REPUBLISHED)
+        assert match['duplicate_of'] == '40000001'
+        assert match['similarity'] >= 0.8
+
+        translated = dict(REPUBLISHED, pmid='40000004')
+        assert index.check_article(translated)['duplicate_of'] == '40000001'
+        assert index.check_article(ORIGINAL) is None
+
+        reopened = NearDuplicateIndex(str(tmp_path / 'near_duplicates.db'))
+        assert reopened.get_duplicates('40000001') == ['40000002', '40000004']
+        assert reopened.canonical_of('40000003') is None
+
+    def test_index_corpus_marks_duplicates(self, tmp_path):
+        """Existing duplicates are marked and drop out of the factor counts"""
+        storage = FileStorage(data_dir=str(tmp_path / 'articles'))
+        for article in (REPUBLISHED, ORIGINAL, UNRELATED):
+            storage.insert_article(dict(article))
+        assert storage.get_factor_articles(min_articles=2) == {'bone marrow lesion': ['40000002', '40000001']}
+
+        index = NearDuplicateIndex(str(tmp_path / 'near_duplicates.db'))
+        assert list(index_corpus(storage, index, dry_run=True)) == ['40000002']
+        assert storage.get_article_by_pmid('40000002').get('duplicate_of') is None
+        assert index.indexed_pmids() == set()
+
+        # The real run after a dry run still finds and marks the duplicate
+        assert list(index_corpus(storage, index)) == ['40000002']
+        assert storage.get_article_by_pmid('40000002')['duplicate_of'] == '40000001'
+        assert storage.get_factor_articles(min_articles=2) == {}
+        assert storage.get_factor_articles(min_articles=1) == {'bone marrow lesion': ['40000001']}
@@ -6,10 +6,13 @@ Tests for open access detection
 import pytest
 import sys
 import os
+import json
+import requests
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.open_access_detector import OpenAccessDetector
+from scripts.http_cache import HTTPCache
 
 
 class TestOpenAccessDetection:
@@ -47,3 +50,77 @@ class TestOpenAccessDetection:
             assert 'is_open_access' in result
             assert 'source' in result
 
+
+
+class FakeOASession:
+    """Answers ID converter, Europe PMC and Unpaywall requests from small tables"""
+
+    def __init__(self, pmcids, europe_pmc, unpaywall_oa):
+        self.pmcids = pmcids
+        self.europe_pmc = europe_pmc
+        self.unpaywall_oa = unpaywall_oa
+        self.calls = []
+
+    def request(self, method, url, params=None, **kwargs):
+        self.calls.append(url)
+        if 'idconv' in url:
+            ids = params['ids'].split(',')
+            body = {'records': [dict(pmid=i, **({'pmcid': self.pmcids[i]} if i in self.pmcids else {}))
+                                for i in ids]}
+        elif 'europepmc' in url:
+            query = params['query']
+            body = {'resultList': {'result': [r for r in self.europe_pmc if f'"{r["doi"]}"' in query]}}
+        else:
+            doi = url.split('/v2/', 1)[1]
+            is_oa = doi in self.unpaywall_oa
+            body = {'is_oa': is_oa, 'oa_locations': [{'url_for_pdf': f'https://repo/{doi}.pdf'}] if is_oa else []}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.url = url
+        return response
+
+
+class TestBatchedOpenAccess:
+    """Test check_open_access_many request batching"""
+
+    def setup_method(self):
+        """Set up 600 articles: PMC, Europe PMC, Unpaywall and closed"""
+        self.articles = [{'pmid': str(1000 + i), 'doi': f'10.1/{i}'} for i in range(600)]
+        pmcids = {str(1000 + i): f'PMC{i}' for i in range(0, 600, 3)}
+        europe_pmc = [{'doi': f'10.1/{i}', 'isOpenAccess': 'Y', 'pdfUrl': f'https://epmc/{i}.pdf'}
+                      for i in range(1, 600, 3)]
+        unpaywall_oa = {f'10.1/{i}' for i in range(2, 600, 6)}
+        self.session = FakeOASession(pmcids, europe_pmc, unpaywall_oa)
+
+    def _detector(self, tmp_path):
+        detector = OpenAccessDetector()
+        detector.http_cache = HTTPCache(path=str(tmp_path / 'cache.db'), session=self.session, enabled=True)
+        detector.REQUEST_DELAY = 0
+        return detector
+
+    def test_batched_resolution(self, tmp_path):
+        """IDs are converted 200 at a time; Unpaywall is only asked about the remainder"""
+        results = self._detector(tmp_path).check_open_access_many(self.articles)
+
+        assert [r['source'] for r in results[:3]] == ['pmc', 'europe_pmc', 'unpaywall']
+        assert results[0]['pdf_url'] == 'https://www.ncbi.nlm.nih.gov/pmc/articles/PMC0/pdf'
+        assert sum(r['is_open_access'] for r in results) == 500
+        assert results[5] == {'is_open_access': False, 'pdf_url': None, 'source': 'none'}
+
+        idconv = sum('idconv' in url for url in self.session.calls)
+        europe_pmc = sum('europepmc' in url for url in self.session.calls)
+        unpaywall = sum('unpaywall' in url for url in self.session.calls)
+        assert idconv == 3
+        assert europe_pmc == 8  # 400 articles left, 50 per search
+        assert unpaywall == 200
+
+    def test_results_are_memoized(self, tmp_path):
+        """A second run, and single checks, reuse memoized statuses"""
+        detector = self._detector(tmp_path)
+        first = detector.check_open_access_many(self.articles)
+        calls = len(self.session.calls)
+
+        assert detector.check_open_access_many(self.articles) == first
+        assert detector.check_open_access('10.1/1', pmid='1001')['source'] == 'europe_pmc'
+        assert len(self.session.calls) == calls
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the PDF download manager (against a local HTTP server)
+"""
+
+import pytest
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pdf_downloader import PDFDownloadManager
+
+
+PAPER = b'%PDF-1.4\n' + b'paper body ' * 20000
+OTHER = b'%PDF-1.4\n' + b'another paper ' * 100
+
+
+class MockPDFServer:
+    """Serves PDFs with Range support; can cut a response short"""
+
+    def __init__(self):
+        self.files = {'/a.pdf': PAPER, '/mirror/a.pdf': PAPER, '/b.pdf': OTHER,
+                      '/page.html': b'<html>not a pdf</html>'}
+        self.drop_after = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+
+@pytest.fixture
+def server():
+    """Run a mock PDF server for one test"""
+    mock = MockPDFServer()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = mock.files.get(self.path)
+            range_header = self.headers.get('Range')
+            with mock.lock:
+                mock.requests.append((self.path, range_header))
+                drop_after = mock.drop_after.pop(self.path, None)
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            start = int(range_header.split('=')[1].rstrip('-')) if range_header else 0
+            self.send_response(206 if range_header else 200)
+            self.send_header('Content-Type', 'text/html' if self.path.endswith('.html') else 'application/pdf')
+            self.send_header('Content-Length', str(len(body) - start))
+            self.end_headers()
+            if drop_after is not None:
+                self.wfile.write(body[start:start + drop_after])
+                self.wfile.flush()
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            self.wfile.write(body[start:])
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    mock.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield mock
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestPDFDownloadManager:
+    """Test concurrency, resume and deduplication"""
+
+    def test_mirrors_are_stored_once(self, server, tmp_path):
+        """Identical content from different URLs shares one object"""
+        manager = PDFDownloadManager(pdf_dir=str(tmp_path), max_workers=4)
+        results = manager.download_many([
+            ('1', server.base + '/a.pdf'),
+            ('2', server.base + '/mirror/a.pdf'),
+            ('3', server.base + '/b.pdf'),
+        ])
+
+        assert all(results.values())
+        assert open(results['2'], 'rb').read() == PAPER
+        assert len(os.listdir(tmp_path / 'objects')) == 2
+
+        manifest = json.load(open(tmp_path / 'manifest.json'))
+        assert manifest['1']['sha256'] == manifest['2']['sha256'] != manifest['3']['sha256']
+        assert manifest['1']['path'] == results['1']
+
+    def test_interrupted_download_resumes(self, server, tmp_path, monkeypatch):
+        """A dropped connection continues from the partial file with a Range request"""
+        monkeypatch.setattr('time.sleep', lambda seconds: None)
+        server.drop_after['/a.pdf'] = 150000
+        manager = PDFDownloadManager(pdf_dir=str(tmp_path))
+
+        path = manager.download('10', server.base + '/a.pdf')
+        assert open(path, 'rb').read() == PAPER
+        assert [r[0] for r in server.requests] == ['/a.pdf', '/a.pdf']
+        first, resumed = server.requests[0][1], server.requests[1][1]
+        assert first is None and resumed.startswith('bytes=') and resumed != 'bytes=0-'
+        assert os.listdir(tmp_path / '.part') == []
+
+    def test_existing_downloads_are_reused(self, server, tmp_path):
+        """PMIDs already in the manifest are not downloaded again, even by a new manager"""
+        PDFDownloadManager(pdf_dir=str(tmp_path)).download('1', server.base + '/b.pdf')
+        path = PDFDownloadManager(pdf_dir=str(tmp_path)).download('1', server.base + '/b.pdf')
+        assert path.endswith('1.pdf')
+        assert len(server.requests) == 1
+
+    def test_rejects_non_pdf_and_oversized(self, server, tmp_path):
+        """HTML pages and files over the size cap are not stored"""
+        manager = PDFDownloadManager(pdf_dir=str(tmp_path), max_bytes=10000)
+        assert manager.download('1', server.base + '/page.html') is None
+        assert manager.download('2', server.base + '/a.pdf') is None
+        assert manager.download('3', server.base + '/b.pdf') is not None
+        assert os.listdir(tmp_path / '.part') == []
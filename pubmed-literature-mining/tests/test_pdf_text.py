@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached PDF text extraction service
+"""
+
+import pytest
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import pdf_text
+from scripts.pdf_text import PDFTextExtractor, PDF_AVAILABLE, join_pages
+
+pytestmark = pytest.mark.skipif(not PDF_AVAILABLE, reason="pdfplumber/PyPDF2 not installed")
+
+
+def _write_pdf(path, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+class TestPDFTextExtractor:
+    """Test extraction, caching and streaming"""
+
+    def _extractor(self, tmp_path):
+        return PDFTextExtractor(cache_path=str(tmp_path / 'pdf_text.db'), max_workers=2, timeout=30)
+
+    def test_extracts_pages(self, tmp_path):
+        """Every page is returned in order"""
+        path = _write_pdf(tmp_path / 'a.pdf', ['Hello page one', 'Second page text'])
+        result = self._extractor(tmp_path).extract(path)
+        assert result['error'] is None
+        assert result['method'] == 'pdfplumber'
+        assert 'Hello page one' in result['pages'][0]
+        assert 'Second page text' in result['pages'][1]
+        assert join_pages(result['pages']).count('\n') == 2
+
+    def test_cache_is_keyed_by_content(self, tmp_path):
+        """A copy under another name is served from the cache"""
+        first = _write_pdf(tmp_path / 'a.pdf', ['Cached text'])
+        extractor = self._extractor(tmp_path)
+        assert not extractor.extract(first)['cached']
+
+        second = _write_pdf(tmp_path / 'b.pdf', ['Cached text'])
+        reopened = self._extractor(tmp_path)
+        result = reopened.extract(second)
+        assert result['cached']
+        assert 'Cached text' in result['pages'][0]
+
+    def test_version_change_invalidates(self, tmp_path, monkeypatch):
+        """Text from another extractor version is not reused"""
+        path = _write_pdf(tmp_path / 'a.pdf', ['Versioned'])
+        self._extractor(tmp_path).extract(path)
+        monkeypatch.setattr(pdf_text, 'EXTRACTOR_VERSION', pdf_text.EXTRACTOR_VERSION + '-next')
+        assert not self._extractor(tmp_path).extract(path)['cached']
+
+        conn = sqlite3.connect(str(tmp_path / 'pdf_text.db'))
+        assert conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0] == 2
+
+    def test_extract_many(self, tmp_path):
+        """Misses are parsed in the pool and hits come from the cache"""
+        paths = [_write_pdf(tmp_path / f'{i}.pdf', [f'Document {i}']) for i in range(3)]
+        extractor = self._extractor(tmp_path)
+        extractor.extract(paths[0])
+        results = extractor.extract_many(paths + [paths[1]])
+        assert len(results) == 3
+        assert results[paths[0]]['cached']
+        assert not results[paths[2]]['cached']
+        assert 'Document 2' in results[paths[2]]['pages'][0]
+
+    def test_iter_pages_caches_complete_reads(self, tmp_path):
+        """Streaming stores the document only when every page was read"""
+        path = _write_pdf(tmp_path / 'a.pdf', ['First', 'Second'])
+        extractor = self._extractor(tmp_path)
+        pages = extractor.iter_pages(path)
+        assert 'First' in next(pages)
+        pages.close()
+        assert extractor._load(extractor.content_hash(path)) is None
+
+        assert len(list(extractor.iter_pages(path))) == 2
+        assert extractor.extract(path)['cached']
+
+    def test_corrupt_and_missing_files(self, tmp_path):
+        """Unreadable files report an error instead of raising"""
+        corrupt = tmp_path / 'bad.pdf'
+        corrupt.write_bytes(b'%PDF-1.4 not really a pdf')
+        extractor = self._extractor(tmp_path)
+        result = extractor.extract(str(corrupt))
+        assert result['pages'] == []
+        assert result['error']
+        # Failures are not cached: a repaired download with the same bytes is parsed again
+        assert not extractor.extract(str(corrupt))['cached']
+        assert extractor._load(result['sha256']) is None
+
+        missing = extractor.extract(str(tmp_path / 'missing.pdf'))
+        assert missing['error'] and missing['sha256'] is None
+
+    def test_single_miss_is_parsed_in_process(self, tmp_path, monkeypatch):
+        """extract() does not start a process pool for one uncached document"""
+        def no_pool(*args, **kwargs):
+            raise AssertionError("process pool started")
+
+        monkeypatch.setattr(pdf_text.multiprocessing, 'Pool', no_pool)
+        path = _write_pdf(tmp_path / 'one.pdf', ['Only page'])
+        result = self._extractor(tmp_path).extract(path)
+        assert result['error'] is None and 'Only page' in result['pages'][0]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipeline timing and throughput metrics
+"""
+
+import pytest
+import sys
+import os
+import json
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pipeline_metrics import PipelineMetrics, LatencyHistogram, format_summary
+from scripts.http_cache import HTTPCache
+
+
+class FakeSession:
+    """Session that answers every request with an empty JSON body"""
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{}'
+        response.url = url
+        return response
+
+
+class TestPipelineMetrics:
+    """Test stage timing, counters and output"""
+
+    def test_disabled_records_nothing(self, tmp_path):
+        """Hooks are no-ops and nothing is written when disabled"""
+        metrics = PipelineMetrics(enabled=False, path=str(tmp_path / 'metrics.jsonl'))
+        metrics.begin_article('1')
+        with metrics.stage('fetch'):
+            pass
+        metrics.record_request('https://example.org/x')
+        metrics.end_article('processed')
+        assert metrics.finish() is None
+        assert metrics.stages == {} and metrics.requests == {}
+        assert not os.path.exists(tmp_path / 'metrics.jsonl')
+
+    def test_histogram_quantiles(self):
+        """Quantiles come from bucket bounds, capped at the observed maximum"""
+        histogram = LatencyHistogram()
+        for seconds in [0.002] * 90 + [0.4] * 10:
+            histogram.add(seconds)
+        assert histogram.quantile(0.5) == 0.0025
+        assert histogram.quantile(0.95) == 0.4
+        assert histogram.to_dict()['count'] == 100
+
+    def test_articles_requests_and_summary(self, tmp_path):
+        """Article lines carry their stages; the summary aggregates hosts, caches and retries"""
+        path = tmp_path / 'metrics.jsonl'
+        metrics = PipelineMetrics(enabled=True, path=str(path))
+        cache = HTTPCache(path=str(tmp_path / 'http_cache.db'), session=FakeSession(), enabled=True)
+        cache.metrics = metrics
+        url = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi'
+
+        for pmid, status in (('1', 'processed'), ('2', 'skipped')):
+            metrics.begin_article(pmid)
+            with metrics.stage('fetch'):
+                cache.request('GET', url, params={'id': '1'})
+            metrics.record_stage('scoring', 0.01)
+            metrics.end_article(status)
+        metrics.record_retry(url, 5)
+        metrics.record_cache('pdf_text', hit=False)
+
+        summary = metrics.finish(cache)
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line['type'] for line in lines] == ['article', 'article', 'summary']
+        assert lines[0]['pmid'] == '1' and set(lines[0]['stages']) == {'fetch', 'http_fetch', 'scoring'}
+        assert 'http_fetch' not in lines[1]['stages']
+
+        host = summary['requests']['eutils.ncbi.nlm.nih.gov']
+        assert host == {'network': 1, 'cached': 1, 'total': 2, 'cache_hit_rate': 0.5}
+        assert summary['retries']['eutils.ncbi.nlm.nih.gov'] == {'retries': 1, 'backoff_seconds': 5.0}
+        assert summary['articles'] == {'processed': 1, 'skipped': 1}
+        assert summary['stages']['scoring']['count'] == 2
+        assert summary['caches']['pdf_text']['hit_rate'] == 0.0
+        assert 'eutils.ncbi.nlm.nih.gov' in format_summary(summary)
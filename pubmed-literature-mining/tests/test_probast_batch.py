@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked, multi-process PROBAST assessment
+"""
+
+import pytest
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.literature_database import LiteratureDatabase
+from scripts.probast_assessment import PROBASTAssessment
+from scripts.probast_batch import BatchAssessor, is_usable_with_justification
+from scripts.rescoring import probast_version
+
+COHORT = ("We conducted a prospective cohort study of 500 patients with knee osteoarthritis. "
+          "Baseline predictors including age, BMI, WOMAC scores and KL grades were measured. "
+          "Outcomes were total knee replacement at 5 years. Multivariable Cox regression was used "
+          "with internal validation via bootstrap. EPV was 18.5.")
+
+
+def _article(pmid, score=60, abstract=COHORT):
+    return {'pmid': pmid, 'title': f'Predictors of knee replacement {pmid}', 'abstract': abstract,
+            'journal': 'Osteoarthritis Cartilage', 'relevance_score': score}
+
+
+def _stored(db_path, pmid):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    row = dict(conn.execute('SELECT * FROM papers WHERE pmid = ?', (pmid,)).fetchone())
+    conn.close()
+    return row
+
+
+class TestBatchAssessor:
+    """Test chunked assessment, write-back and usability marking"""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        db_path = str(tmp_path / 'literature.db')
+        database = LiteratureDatabase(db_path)
+        for pmid in ('1', '2', '3', '4'):
+            database.add_article(_article(pmid))
+        database.add_article(_article('5', score=20))
+        database.add_article(_article('6', abstract='Narrative review.'),
+                             PROBASTAssessment().assess_article({}, manual_assessment={
+                                 'domain_1': 'High', 'domain_2': 'High', 'domain_3': 'High', 'domain_4': 'High'}))
+        return db_path
+
+    def test_matches_single_article_assessment(self, db_path):
+        """Chunked multi-process results equal assess_article, written with the PROBAST version"""
+        expected = PROBASTAssessment().assess_article(_article('1'))
+        manual = _stored(db_path, '6')
+        stats = BatchAssessor(db_path, workers=2, chunk_size=2).run(mark_usable=False)
+        assert stats['total'] == 5 and stats['assessed'] == 5 and stats['failed'] == 0
+
+        row = _stored(db_path, '3')
+        assert row['probast_risk'] == expected['overall_risk']
+        assert row['probast_domain_4'] == expected['domain_4_analysis']
+        assert row['assessment_method'] == 'automated' and row['probast_version'] == probast_version()
+        assert _stored(db_path, '6') == manual
+
+        # Nothing left to assess
+        assert BatchAssessor(db_path, workers=1).run(reassess=True)['assessed'] == 0
+
+    def test_marks_usable_papers(self, db_path):
+        """Usability follows the lenient criteria, the relevance threshold and the note"""
+        # Cohort abstract: Moderate/Moderate/Moderate/Low, usable with justification
+        assert is_usable_with_justification(PROBASTAssessment().assess_article(_article('1')))
+        stats = BatchAssessor(db_path, workers=1, chunk_size=2).run(
+            ['1', '2', '5', '6', '404'], min_relevance=40, note='From monitoring')
+        assert stats['total'] == 4 and stats['assessed'] == 3 and stats['kept'] == 1
+
+        assert stats['marked_usable'] == 2 and stats['not_usable'] == 2
+        assert _stored(db_path, '2')['used_in_model'] and _stored(db_path, '2')['notes'] == 'From monitoring'
+        assert not _stored(db_path, '5')['used_in_model']
+        assert not _stored(db_path, '6')['used_in_model']
+
+        stats = BatchAssessor(db_path, workers=1).run(['1', '2'])
+        assert stats['assessed'] == 0
+        assert stats['already_usable'] == 2 and stats['marked_usable'] == 0
+
+    def test_reassess_only_stale_automated(self, db_path):
+        """A PROBAST version change reassesses automated rows only"""
+        BatchAssessor(db_path, workers=1).run(mark_usable=False)
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE papers SET probast_version = 'old', probast_risk = 'Unclear' WHERE pmid IN ('2', '6')")
+        conn.commit()
+        conn.close()
+
+        assert BatchAssessor(db_path, workers=1).run(mark_usable=False)['assessed'] == 0
+        stats = BatchAssessor(db_path, workers=2, chunk_size=1).run(reassess=True, mark_usable=False)
+        assert stats['assessed'] == 1
+        assert _stored(db_path, '2')['probast_version'] == probast_version()
+        assert _stored(db_path, '6')['probast_risk'] == 'Unclear'
@@ -13,6 +13,14 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from scripts.pubmed_scraper import PubMedScraper
 
 
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    """Keep the scraper's file storage (data/articles under the working directory), caches and indexes out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('HTTP_CACHE_PATH', str(tmp_path / 'http_cache.db'))
+    monkeypatch.setattr('scripts.near_duplicates._default_path', lambda: str(tmp_path / 'near_duplicates.db'))
+
+
 class TestPubMedAPI:
     """Test PubMed API functionality"""
     
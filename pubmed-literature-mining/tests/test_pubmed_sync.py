@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for watermark-based incremental PubMed sync
+"""
+
+import pytest
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pubmed_sync import PubMedSync, SyncState, query_key, MAX_ATTEMPTS
+
+
+class FakeScraper:
+    """Answers full searches and date-window ESearches from canned PMID lists"""
+
+    def __init__(self, full=None, added=None, revised=None):
+        self.full = full or []
+        self.added = added or []
+        self.revised = revised or []
+        self.searches = []
+        self.ttls = []
+        self.fail = False
+
+    def search_pubmed(self, query, max_results=100, date_range_years=None):
+        self.searches.append(('full', None))
+        return list(self.full)
+
+    def esearch(self, query, max_results=100, mindate=None, maxdate=None, datetype='pdat', ttl=None):
+        self.searches.append((datetype, mindate))
+        self.ttls.append(ttl)
+        if self.fail:
+            return None
+        return list(self.added if datetype == 'edat' else self.revised)
+
+
+class TestPubMedSync:
+    """Test watermarks, checkpoints and resume"""
+
+    def setup_method(self):
+        """Set up a scraper with five PMIDs"""
+        self.scraper = FakeScraper(full=['1', '2', '3', '4', '5'])
+        self.query = 'knee osteoarthritis AND progression'
+
+    def _sync(self, tmp_path, **kwargs):
+        kwargs.setdefault('batch_size', 2)
+        return PubMedSync(self.scraper, state=SyncState(str(tmp_path / 'sync_state.json')), **kwargs)
+
+    def test_first_sync_is_full_then_incremental(self, tmp_path):
+        """Later runs search only the EDAT/MDAT window since the watermark"""
+        processed = []
+        result = self._sync(tmp_path).sync(self.query, lambda batch: processed.extend(batch))
+        assert result == {'mode': 'full', 'found': 5, 'processed': 5, 'failed': 0, 'complete': True}
+        assert processed == ['1', '2', '3', '4', '5']
+
+        state = json.load(open(tmp_path / 'sync_state.json'))
+        watermark = state['watermarks'][query_key(self.query)]
+        assert state['checkpoints'] == {}
+
+        # Overlap-day PMIDs already seen are skipped; new ones are processed, and revised ones again
+        self.scraper.added = ['5', '6']
+        self.scraper.revised = ['2']
+        processed.clear()
+        sync = self._sync(tmp_path)
+        run = sync.start(self.query)
+        assert sync.revised(run) == {'2'}
+        result = sync.process(run, lambda batch: processed.extend(batch))
+        assert result['mode'] == 'incremental'
+        assert processed == ['6', '2']
+        assert ('edat', watermark['last_edat']) in self.scraper.searches
+        assert ('mdat', watermark['last_mdat']) in self.scraper.searches
+        # Window searches are never answered from the HTTP cache
+        assert self.scraper.ttls == [0, 0]
+
+    def test_failed_revision_is_retried_as_revised(self, tmp_path):
+        """A revised PMID that failed is fetched past the cache again by the next run"""
+        self._sync(tmp_path).sync(self.query, lambda batch: None)
+        self.scraper.revised = ['3']
+        self._sync(tmp_path).sync(self.query, lambda batch: [p for p in batch if p == '3'])
+
+        self.scraper.revised = []
+        sync = self._sync(tmp_path)
+        run = sync.start(self.query)
+        assert sync.remaining(run) == ['3']
+        assert sync.revised(run) == {'3'}
+
+    def test_interrupted_sync_resumes(self, tmp_path):
+        """A killed run resumes after the last committed batch without searching again"""
+        processed = []
+
+        def crash_on_third(batch):
+            if '3' in batch:
+                raise KeyboardInterrupt()
+            processed.extend(batch)
+
+        with pytest.raises(KeyboardInterrupt):
+            self._sync(tmp_path).sync(self.query, crash_on_third)
+        assert processed == ['1', '2']
+
+        searches = len(self.scraper.searches)
+        result = self._sync(tmp_path).sync(self.query, lambda batch: processed.extend(batch))
+        assert processed == ['1', '2', '3', '4', '5']
+        assert result['complete']
+        assert len(self.scraper.searches) == searches
+
+    def test_should_stop_keeps_checkpoint(self, tmp_path):
+        """Stopping early leaves the rest for the next run"""
+        processed = []
+        result = self._sync(tmp_path).sync(self.query, lambda batch: processed.extend(batch),
+                                           should_stop=lambda: len(processed) >= 2)
+        assert not result['complete']
+        sync = self._sync(tmp_path)
+        assert sync.remaining(sync.state.get_checkpoint(query_key(self.query))) == ['3', '4', '5']
+
+    def test_failed_pmids_are_retried(self, tmp_path):
+        """Failures are carried into later incremental runs, up to MAX_ATTEMPTS"""
+        self._sync(tmp_path).sync(self.query, lambda batch: [p for p in batch if p == '4'])
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            processed = []
+
+            def fail_four(batch):
+                processed.extend(batch)
+                return [p for p in batch if p == '4']
+
+            self._sync(tmp_path).sync(self.query, fail_four)
+            assert processed == (['4'] if attempt < MAX_ATTEMPTS else [])
+
+    def test_failed_search_keeps_watermark(self, tmp_path):
+        """A failed incremental search processes nothing and leaves the watermark alone"""
+        self._sync(tmp_path).sync(self.query, lambda batch: None)
+        state = SyncState(str(tmp_path / 'sync_state.json'))
+        before = state.get_watermark(query_key(self.query))
+
+        self.scraper.fail = True
+        result = self._sync(tmp_path).sync(self.query, lambda batch: None)
+        assert result['mode'] is None
+        after = SyncState(str(tmp_path / 'sync_state.json')).get_watermark(query_key(self.query))
+        assert after == before
+
+    def test_full_flag_ignores_watermark(self, tmp_path):
+        """PUBMED_FULL_SYNC style full runs search everything again"""
+        self._sync(tmp_path).sync(self.query, lambda batch: None)
+        processed = []
+        result = self._sync(tmp_path, full=True).sync(self.query, lambda batch: processed.extend(batch))
+        assert result['mode'] == 'full'
+        assert len(processed) == 5
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-query search planner
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pubmed_sync import PubMedSync, SyncState
+from scripts.query_planner import QueryPlanner, plan_key
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self.result = result
+
+    def json(self):
+        return {'esearchresult': self.result}
+
+
+class FakeScraper:
+    """Answers history-server ESearches from canned PMID lists per query (or date type)"""
+
+    BASE_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils'
+    email = 'test@example.org'
+    tool = 'test'
+
+    def __init__(self, results, page_size=None):
+        self.results = results
+        self.page_size = page_size
+        self.requests = []
+        self.ttls = []
+        self.stored = {}
+
+    def _make_request(self, url, params, ttl=None):
+        self.requests.append(dict(params))
+        self.ttls.append(ttl)
+        term = params['term']
+        if term.startswith('#'):
+            pmids = self.stored[term[1:]]
+        else:
+            pmids = self.results.get((term, params.get('datetype')), self.results.get(term, []))
+            self.stored[str(len(self.stored) + 1)] = pmids
+        start = params.get('retstart', 0)
+        size = min(params['retmax'], self.page_size or params['retmax'])
+        return FakeResponse({'idlist': pmids[start:start + size], 'count': str(len(pmids)),
+                             'webenv': 'MCID_1', 'querykey': str(len(self.stored))})
+
+
+class TestQueryPlanner:
+    """Test the union, ordering, paging, checkpoint and watermark of plans"""
+
+    def make_planner(self, tmp_path, results, page_size=None):
+        scraper = FakeScraper(results, page_size)
+        sync = PubMedSync(scraper, state=SyncState(str(tmp_path / 'sync_state.json')), full=False, batch_size=2)
+        return scraper, QueryPlanner(scraper, sync)
+
+    def test_plan_unions_subtracts_and_orders(self, tmp_path):
+        """Overlapping queries give one queue without known PMIDs, most-matched then newest first"""
+        scraper, planner = self.make_planner(tmp_path, {
+            'knee OA': ['30', '20', '10', '5'],
+            'knee arthroplasty': ['40', '20', '10'],
+            'knee replacement': ['20', '10', '7'],
+        }, page_size=2)
+        plan = planner.plan(['knee OA', {'name': 'tka', 'query': 'knee arthroplasty'},
+                             'knee replacement', 'knee  OA'], existing={'10'})
+
+        assert plan['pmids'] == ['20', '40', '30', '7', '5']
+        assert plan['hits']['20'] == 3
+        assert plan['union'] == 6 and plan['known'] == 1
+        assert [q['name'] for q in plan['queries']] == ['query_1', 'tka', 'query_3']
+        assert plan['queries'][0] == {'name': 'query_1', 'found': 4, 'new': 3}
+        # Later pages are read back from the history server, not searched again
+        assert any(r['term'].startswith('#') and r['WebEnv'] == 'MCID_1' for r in scraper.requests)
+        assert sum(1 for r in scraper.requests if not r['term'].startswith('#')) == 3
+        # WebEnvs expire on the history server, so no request is answered from the HTTP cache
+        assert set(scraper.ttls) == {0}
+
+    def test_crawl_resumes_from_checkpoint(self, tmp_path):
+        """An interrupted crawl continues with the same queue instead of searching again"""
+        queries = ['knee OA', 'knee arthroplasty']
+        scraper, planner = self.make_planner(tmp_path, {'knee OA': ['1', '2', '3'], 'knee arthroplasty': ['3', '4']})
+        processed = []
+
+        def process_batch(pmids):
+            processed.extend(pmids)
+            return []
+
+        result = planner.crawl(queries, process_batch, should_stop=lambda: len(processed) >= 2)
+        assert result['complete'] is False and result['processed'] == 2
+        assert processed == ['3', '4']
+        searches = len(scraper.requests)
+
+        result = planner.crawl(list(reversed(queries)), process_batch)
+        assert result['complete'] is True
+        assert processed == ['3', '4', '2', '1']
+        assert len(scraper.requests) == searches
+        assert planner.sync.state.get_checkpoint(plan_key(queries)) is None
+
+    def test_incremental_plan_after_watermark(self, tmp_path):
+        """After a completed plan only added or revised records are searched and queued"""
+        queries = ['knee OA', 'knee arthroplasty']
+        scraper, planner = self.make_planner(tmp_path, {'knee OA': ['1', '2'], 'knee arthroplasty': ['2']})
+        planner.crawl(queries, lambda pmids: [])
+
+        scraper.results = {('knee OA', 'edat'): ['5'], ('knee OA', 'mdat'): ['2'],
+                           ('knee arthroplasty', 'edat'): ['5', '6'], ('knee arthroplasty', 'mdat'): []}
+        scraper.requests = []
+        processed = []
+        result = planner.crawl(queries, lambda pmids: processed.extend(pmids) or [])
+
+        assert result['mode'] == 'incremental'
+        # New records first, then the stored record revised since the last plan
+        assert processed == ['5', '6', '2']
+        assert result['revised'] == 1
+        assert {r['datetype'] for r in scraper.requests if 'datetype' in r} == {'edat', 'mdat'}
+
+    def test_revised_corpus_pmids_are_queued(self, tmp_path):
+        """Records already in the corpus are queued again (as revised) only when MDAT finds them"""
+        queries = ['knee OA']
+        scraper, planner = self.make_planner(tmp_path, {'knee OA': ['1', '2']})
+        planner.crawl(queries, lambda pmids: [], existing={'1', '2'})
+
+        scraper.results = {('knee OA', 'edat'): ['1', '3'], ('knee OA', 'mdat'): ['2']}
+        run = planner.start(queries, existing={'1', '2'})
+        assert run['pmids'] == ['3', '2']
+        assert planner.sync.revised(run) == {'2'}
@@ -99,3 +99,12 @@ class TestRelevanceScoring:
         score = self.scorer.get_journal_score(mid_journal)
         assert score == 10, f"Mid-tier journal should score 10, got {score}"
 
+    
+    def test_score_many_matches_single_scores(self):
+        """Batch scoring returns the same scores as per-article scoring"""
+        articles = [
+            {'title': 'Cohort study of knee OA', 'abstract': 'We enrolled 500 participants.', 'journal': 'Lancet'},
+            {'title': 'Unrelated', 'abstract': '', 'journal': ''}
+        ]
+        scores = self.scorer.score_many(articles)
+        assert scores == [self.scorer.calculate_relevance_score(a) for a in articles]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for versioned incremental rescoring
+"""
+
+import pytest
+import sys
+import os
+import copy
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.rescoring import KeywordPostings, Rescorer, changed_terms, probast_version
+from scripts.keyword_matcher import load_keyword_config
+from scripts.file_storage import FileStorage
+from scripts.literature_database import LiteratureDatabase
+from scripts.probast_assessment import PROBASTAssessment
+
+ARTICLES = [
+    {'pmid': '30000001', 'title': 'Cartilage loss predicts knee arthroplasty',
+     'abstract': 'Prospective cohort study of radiographic progression.', 'journal': 'Osteoarthritis and Cartilage'},
+    {'pmid': '30000002', 'title': 'Osteophyte size and knee replacement risk',
+     'abstract': 'Baseline MRI predictors in a longitudinal cohort.', 'journal': 'Arthritis Care'},
+    {'pmid': '30000003', 'title': 'Shoulder tendon repair outcomes',
+     'abstract': 'Case series.', 'journal': 'Unrelated Journal'},
+]
+
+
+def _without_term(config, group, category, term):
+    """Copy of a keywords.json config with one term removed from one category"""
+    config = copy.deepcopy(config)
+    config[group][category] = [t for t in config[group][category] if t != term]
+    return config
+
+
+class TestChangedTerms:
+    """Test keyword config diffs"""
+
+    def test_term_changes(self):
+        """Added, removed and moved terms are reported; reordering is not a change"""
+        old = {'high_value_keywords': {'a': ['Knee', 'hip'], 'b': ['mri']}, 'top_tier_journals': ['lancet']}
+        new = {'high_value_keywords': {'a': ['hip', 'mri'], 'b': ['knee', 'ct']}, 'top_tier_journals': ['lancet']}
+        assert changed_terms(old, new) == {'knee', 'mri', 'ct'}
+        assert changed_terms(old, copy.deepcopy(old)) == set()
+
+    def test_setting_change_requires_full_rescore(self):
+        """A change to anything other than a term list cannot be narrowed down"""
+        old = {'scoring': {'weight': 1, 'terms': ['knee']}}
+        assert changed_terms(old, {'scoring': {'weight': 2, 'terms': ['knee']}}) is None
+
+
+class TestRescorer:
+    """Test stale detection and incremental rescoring"""
+
+    @pytest.fixture(autouse=True)
+    def setup_rescorer(self, tmp_path):
+        """Unscored articles in file storage and the database"""
+        self.storage = FileStorage(data_dir=str(tmp_path / 'articles'))
+        self.database = LiteratureDatabase(str(tmp_path / 'literature.db'))
+        for article in ARTICLES:
+            self.storage.insert_article(dict(article))
+            self.database.add_article(dict(article))
+        self.postings = KeywordPostings(str(tmp_path / 'keyword_postings.db'))
+        self.rescorer = Rescorer(storage=self.storage, database=self.database, postings=self.postings, workers=1)
+
+    def _stamp_old(self, old_version, old_config, code_hash=None):
+        """Pretend the current scores were computed under an older keywords.json"""
+        pmids = [a['pmid'] for a in ARTICLES]
+        self.postings.record_config(old_version, code_hash or self.rescorer.code_hash, old_config)
+        self.postings.restamp(pmids, self.rescorer.version, old_version)
+        self.storage.restamp_scoring_version(pmids, old_version)
+        self.database.restamp_version('scoring_version', pmids, old_version)
+
+    def test_full_run_then_nothing_stale(self):
+        """Unversioned scores are all computed once; a second run does nothing"""
+        result = self.rescorer.run()
+        assert result['file storage'] == {'stale': 3, 'rescored': 3, 'restamped': 0}
+        assert result['database'] == {'stale': 3, 'rescored': 3, 'restamped': 0}
+
+        article = self.storage.get_article_by_pmid('30000001')
+        assert article['scoring_version'] == self.rescorer.version
+        assert article['relevance_score'] > self.storage.get_article_by_pmid('30000003')['relevance_score']
+        assert article['value_category'] and article['relevance_score_breakdown']
+        paper = self.database.get_articles(['30000001'])[0]
+        assert paper['relevance_score'] == article['relevance_score']
+
+        again = self.rescorer.run()
+        assert again['file storage']['stale'] == 0
+        assert again['database']['stale'] == 0
+
+    def test_only_articles_with_changed_terms_are_rescored(self):
+        """A keyword added since an article's version rescores only articles containing it"""
+        self.rescorer.run()
+        config = load_keyword_config()
+        old_config = _without_term(config, 'high_value_keywords', 'imaging', 'cartilage')
+        assert changed_terms(old_config, config) == {'cartilage'}
+        self._stamp_old('oldversion', old_config)
+
+        result = self.rescorer.run()
+        assert result['file storage'] == {'stale': 3, 'rescored': 1, 'restamped': 2}
+        assert result['database'] == {'stale': 3, 'rescored': 1, 'restamped': 2}
+        assert self.storage.get_stale_scoring(self.rescorer.version) == {}
+        assert self.database.get_stale_pmids('scoring_version', self.rescorer.version) == {}
+
+    def test_known_term_uses_postings(self):
+        """A term moved between categories rescores the articles whose postings contain it"""
+        self.rescorer.run()
+        config = load_keyword_config()
+        old_config = _without_term(config, 'high_value_keywords', 'imaging', 'osteophyte')
+        self._stamp_old('oldversion', old_config)
+
+        result = self.rescorer.run(dry_run=True)
+        assert result['file storage'] == {'stale': 3, 'rescored': 1, 'restamped': 2}
+
+    def test_code_change_rescores_everything(self):
+        """Scores from another scorer version are all recomputed (here in worker processes)"""
+        self.rescorer.run()
+        self._stamp_old('oldversion', load_keyword_config(), code_hash='othercode')
+        rescorer = Rescorer(storage=self.storage, database=self.database, postings=self.postings,
+                            workers=2, batch_size=1)
+        assert rescorer.run()['file storage']['rescored'] == 3
+        assert self.storage.get_stale_scoring(rescorer.version) == {}
+
+    def test_stale_probast_assessments(self, tmp_path):
+        """Automated assessments from another PROBAST version are reassessed; manual ones are kept"""
+        assessor = PROBASTAssessment()
+        assessment = assessor.assess_article(ARTICLES[0])
+        assert assessment['assessment_version'] == probast_version()
+        self.database.add_article(ARTICLES[0], assessment)
+        self.database.add_article(ARTICLES[1], dict(assessment, assessment_version='old'))
+        self.database.add_article(ARTICLES[2], assessor.assess_article(ARTICLES[2], manual_assessment={
+            'domain_1': 'Low', 'domain_2': 'Low', 'domain_3': 'Low', 'domain_4': 'Low'}))
+
+        assert list(self.database.get_stale_pmids('probast_version', probast_version(),
+                                                  automated_only=True)) == ['30000002']
+        assert self.rescorer.run()['probast'] == {'stale': 1, 'reassessed': 1}
+        assert self.database.get_stale_pmids('probast_version', probast_version(), automated_only=True) == {}
+
+    def test_stale_query_uses_index(self):
+        """Stale rows are found from the version index, not a table scan"""
+        conn = sqlite3.connect(self.database.db_path)
+        plan = conn.execute('EXPLAIN QUERY PLAN SELECT pmid FROM papers WHERE '
+                            'scoring_version IS NULL OR scoring_version < ? OR scoring_version > ?',
+                            ('v', 'v')).fetchall()
+        conn.close()
+        assert any('idx_scoring_version' in row[-1] for row in plan)
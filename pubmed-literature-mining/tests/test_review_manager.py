@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite-backed review queue
+"""
+
+import pytest
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.review_manager import ReviewManager, ReviewStatus
+
+
+class TestReviewManager:
+    """Test queue storage, status updates and the dashboard export"""
+
+    def _manager(self, tmp_path, **kwargs):
+        kwargs.setdefault('legacy_file', str(tmp_path / 'review_queue.json'))
+        return ReviewManager(db_path=str(tmp_path / 'review_queue.db'), **kwargs)
+
+    def _add(self, manager, count, finding_type='new_parameter'):
+        return [manager.add_to_review_queue(finding_type, {'pmid': f'{finding_type}{i}', 'title': f'Finding {i}'})
+                for i in range(count)]
+
+    def test_status_update_persists(self, tmp_path):
+        """Updates append notes and approval history and survive reopening"""
+        manager = self._manager(tmp_path)
+        review_id = self._add(manager, 1)[0]
+        assert manager.approve_for_implementation(review_id, approved_by='reviewer')
+        assert not manager.mark_as_implemented('missing_id')
+
+        item = self._manager(tmp_path).get_review(review_id)
+        assert item['status'] == ReviewStatus.APPROVED.value
+        assert item['notes'][0]['status_change'] == 'pending -> approved'
+        assert item['approval_history'][0]['approved_by'] == 'reviewer'
+        assert item['data']['title'] == 'Finding 0'
+
+    def test_summary_counts(self, tmp_path):
+        """Summary counts every status"""
+        manager = self._manager(tmp_path)
+        ids = self._add(manager, 3)
+        manager.reject_finding(ids[0], 'not relevant')
+        summary = manager.get_review_summary()
+        assert summary['total'] == 3
+        assert summary['pending'] == 2
+        assert summary['rejected'] == 1
+        assert summary['implemented'] == 0
+
+    def test_export_is_paginated_and_filtered(self, tmp_path):
+        """The dashboard export returns one filtered page plus pagination metadata"""
+        manager = self._manager(tmp_path)
+        self._add(manager, 5)
+        self._add(manager, 2, finding_type='supporting_evidence')
+
+        data = manager.export_for_dashboard(page=2, page_size=3)
+        assert data['summary']['total'] == 7
+        assert data['pagination'] == {'page': 2, 'page_size': 3, 'total': 7, 'pages': 3}
+        assert len(data['recent']) == 3
+        assert len(data['pending']) == 3
+
+        evidence = manager.export_for_dashboard(finding_type='supporting_evidence')
+        assert evidence['pagination']['total'] == 2
+        assert all(item['type'] == 'supporting_evidence' for item in evidence['recent'])
+
+        searched = manager.export_for_dashboard(search='new_parameter3')
+        assert [item['data']['pmid'] for item in searched['recent']] == ['new_parameter3']
+        assert manager.export_for_dashboard(search='100%')['pagination']['total'] == 0
+
+    def test_legacy_json_is_imported(self, tmp_path):
+        """An existing review_queue.json seeds an empty database once"""
+        item = {
+            'id': 'new_parameter_20240101_000000_123', 'type': 'new_parameter', 'status': 'new_parameter',
+            'data': {'pmid': '123', 'title': 'Legacy'}, 'source': 'pubmed',
+            'created_at': '2024-01-01T00:00:00', 'updated_at': '2024-01-01T00:00:00',
+            'notes': [], 'approval_history': []
+        }
+        with open(tmp_path / 'review_queue.json', 'w') as f:
+            json.dump({item['id']: item}, f)
+
+        manager = self._manager(tmp_path)
+        assert manager.get_review(item['id']) == item
+        assert manager.get_reviews_by_status(ReviewStatus.NEW_PARAMETER) == [item]
+
+        manager.reject_finding(item['id'], 'duplicate')
+        assert self._manager(tmp_path).get_review(item['id'])['status'] == 'rejected'
+
+    def test_custom_database_skips_default_legacy_file(self, tmp_path):
+        """A database outside data/ does not import the real data/review_queue.json"""
+        manager = ReviewManager(db_path=str(tmp_path / 'review_queue.db'))
+        assert manager.legacy_file is None
+        assert manager.get_review_summary()['total'] == 0
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the active-learning screening ranker
+"""
+
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.screening_ranker import ScreeningRanker, tokenize
+from scripts.automated_screening import AutomatedScreening
+from scripts.literature_database import LiteratureDatabase
+from scripts.review_manager import ReviewManager
+
+RELEVANT_WORDS = ['knee', 'osteoarthritis', 'progression', 'arthroplasty', 'cartilage', 'radiographic',
+                  'kellgren', 'replacement', 'cohort', 'predictor']
+OTHER_WORDS = ['shoulder', 'tendon', 'rotator', 'cuff', 'tennis', 'elbow', 'wrist', 'fracture',
+               'dental', 'implant']
+COMMON_WORDS = ['patients', 'study', 'outcome', 'clinical', 'years', 'analysis', 'results', 'group']
+
+
+def _corpus(count, seed=0, start=50000000):
+    """Synthetic papers: every third one is about knee OA progression"""
+    rng = random.Random(seed)
+    papers = []
+    for i in range(count):
+        relevant = i % 3 == 0
+        words = rng.sample(RELEVANT_WORDS if relevant else OTHER_WORDS, 4) + rng.sample(COMMON_WORDS, 4)
+        rng.shuffle(words)
+        papers.append({'pmid': str(start + i), 'title': ' '.join(words[:4]), 'abstract': ' '.join(words),
+                       'relevance_score': 50, 'relevant': relevant})
+    return papers
+
+
+class TestScreeningRanker:
+    """Test the TF-IDF corpus and classifier"""
+
+    def test_tokenize(self):
+        """Stopwords are dropped and adjacent words form bigrams"""
+        assert tokenize('The Knee and the X-ray of a 3D model') == ['knee', 'x-ray', '3d', 'model', 'knee x-ray', 'x-ray 3d', '3d model']
+
+    def test_ranks_relevant_papers_first(self, tmp_path):
+        """After a few decisions the unscreened relevant papers come first; state survives reopening"""
+        papers = _corpus(90)
+        ranker = ScreeningRanker(str(tmp_path / 'model.npz'))
+        assert ranker.add_articles(papers) == 90
+        assert ranker.add_articles(papers[:5]) == 0
+        assert ranker.rank() == []
+
+        ranker.record_decisions({p['pmid']: p['relevant'] for p in papers[:6]})
+        assert ranker.fit()
+        ranked = ranker.rank()
+        assert len(ranked) == 84
+        relevant = {p['pmid'] for p in papers if p['relevant']}
+        assert {r['pmid'] for r in ranked[:28]} == relevant - {p['pmid'] for p in papers[:6]}
+        uncertain = ranker.rank(strategy='uncertainty', limit=5)
+        assert all(abs(u['probability'] - 0.5) <= abs(ranked[0]['probability'] - 0.5) for u in uncertain)
+
+        ranker.save()
+        reopened = ScreeningRanker(str(tmp_path / 'model.npz'))
+        assert [r['pmid'] for r in reopened.rank()] == [r['pmid'] for r in ranked]
+
+        # New papers are appended and ranked without refitting
+        reopened.add_articles(_corpus(3, seed=1, start=60000000))
+        assert len(reopened.rank()) == 87
+
+    def test_needs_both_kinds_of_decision(self):
+        """The model is not fit from relevant decisions alone"""
+        ranker = ScreeningRanker('')
+        papers = _corpus(9)
+        ranker.add_articles(papers)
+        ranker.record_decisions({papers[0]['pmid']: True})
+        assert not ranker.fit()
+        with pytest.raises(ValueError):
+            ranker.rank(strategy='random')
+
+
+class TestAutomatedScreening:
+    """Test screening batches through the review queue"""
+
+    def test_queue_learns_from_review_decisions(self, tmp_path):
+        """The first batch is seeded by score; later batches follow approve/reject decisions"""
+        database = LiteratureDatabase(str(tmp_path / 'literature.db'))
+        papers = _corpus(60)
+        for i, paper in enumerate(papers):
+            database.add_article(dict(paper, relevance_score=100 - i))
+        manager = ReviewManager(db_path=str(tmp_path / 'review_queue.db'),
+                                legacy_file=str(tmp_path / 'review_queue.json'))
+        screening = AutomatedScreening(database=database, review_manager=manager,
+                                       ranker=ScreeningRanker(str(tmp_path / 'model.npz')))
+
+        assert screening.auto_screen_articles()['ranking'] == 'relevance_score'
+        first = screening.queue_for_review(batch_size=6)
+        assert [manager.get_review(r)['data']['pmid'] for r in first] == [p['pmid'] for p in papers[:6]]
+
+        relevant = {p['pmid'] for p in papers if p['relevant']}
+        for review_id in first:
+            if manager.get_review(review_id)['data']['pmid'] in relevant:
+                manager.approve_for_implementation(review_id)
+            else:
+                manager.reject_finding(review_id, 'not relevant')
+
+        second = screening.queue_for_review(batch_size=10)
+        queued = [manager.get_review(r)['data']['pmid'] for r in second]
+        assert set(queued) <= relevant
+        assert not set(queued) & {p['pmid'] for p in papers[:6]}
+
+        results = screening.auto_screen_articles()
+        assert results['ranking'] == 'active_learning'
+        assert results['screened'] == 6
+        predicted = {a['pmid'] for a in results['relevant_articles']}
+        assert predicted and predicted <= relevant
+
+    def test_other_reviews_are_not_screening_decisions(self, tmp_path):
+        """Approving or rejecting a non-screening review of a paper leaves its screening label alone"""
+        database = LiteratureDatabase(str(tmp_path / 'literature.db'))
+        manager = ReviewManager(db_path=str(tmp_path / 'review_queue.db'),
+                                legacy_file=str(tmp_path / 'review_queue.json'))
+        screening = AutomatedScreening(database=database, review_manager=manager,
+                                       ranker=ScreeningRanker(str(tmp_path / 'model.npz')))
+        screened = manager.add_to_review_queue('screening', {'pmid': '50000001'}, source='screening')
+        manager.approve_for_implementation(screened)
+        assert screening.get_decisions() == {'50000001': True}
+
+        # A later parameter review of the same paper is rejected: still relevant for screening
+        parameter = manager.add_to_review_queue('new_parameter', {'pmid': '50000001'})
+        manager.reject_finding(parameter, 'effect size too small')
+        other = manager.add_to_review_queue('new_parameter', {'pmid': '50000002'})
+        manager.approve_for_implementation(other)
+        assert screening.get_decisions() == {'50000001': True}
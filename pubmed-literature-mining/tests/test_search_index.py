@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the full-text search index
+"""
+
+import pytest
+import sys
+import os
+import time
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.search_index import FTS5_AVAILABLE, match_expression
+from scripts.file_storage import FileStorage
+from scripts.literature_database import LiteratureDatabase
+
+pytestmark = pytest.mark.skipif(not FTS5_AVAILABLE, reason="SQLite built without FTS5")
+
+ARTICLES = [
+    {'pmid': '10000001', 'title': 'Cartilage loss predicts knee arthroplasty',
+     'abstract': 'Joint space narrowing was measured on radiographs.', 'relevance_score': 80},
+    {'pmid': '10000002', 'title': 'Hip replacement outcomes',
+     'abstract': 'Cohort study of hip pain.', 'relevance_score': 60,
+     'full_text': 'Secondary analysis mentions cartilage thickness once.'},
+    {'pmid': '10000003', 'title': 'Bone marrow lesions and progression',
+     'abstract': 'MRI features of knees.', 'relevance_score': 75,
+     'predictive_factors': [{'factor': 'bone marrow lesion', 'context': 'BML volume predicted TKR'}]},
+] + [
+    {'pmid': f'2000000{i}', 'title': f'Unrelated study {i}', 'abstract': 'Shoulder tendon repair.'}
+    for i in range(5)
+]
+
+
+class TestMatchExpression:
+    """Test query parsing"""
+
+    def test_modes(self):
+        """Words, phrases and prefixes are quoted for FTS5"""
+        assert match_expression('knee cartil*') == '"knee" AND "cartil"*'
+        assert match_expression('"joint space" knee', mode='any') == '"joint space" OR "knee"'
+        assert match_expression('joint space', mode='phrase') == '"joint space"'
+        assert match_expression('arthro', mode='prefix') == '"arthro"*'
+        assert match_expression('kellgren-lawrence') == '"kellgren lawrence"'
+
+    def test_syntax_is_not_interpreted(self):
+        """FTS5 operators and stray quotes in user input are treated as text"""
+        assert match_expression('NOT "') == '"NOT"'
+        assert match_expression('* - :') == ''
+        with pytest.raises(ValueError):
+            match_expression('knee', mode='fuzzy')
+
+
+class TestFileStorageSearch:
+    """Test FileStorage.search_articles"""
+
+    @pytest.fixture(autouse=True)
+    def setup_storage(self, tmp_path):
+        """Set up a storage directory with the sample articles"""
+        self.data_dir = tmp_path / 'articles'
+        self.storage = FileStorage(data_dir=str(self.data_dir))
+        for article in ARTICLES:
+            self.storage.insert_article(dict(article))
+
+    def test_ranked_search(self):
+        """Title matches outrank full-text matches; factor contexts are searchable"""
+        results = self.storage.search_articles('cartilage')
+        assert [a['pmid'] for a in results] == ['10000001', '10000002']
+        assert results[0]['search_score'] > results[1]['search_score']
+        assert '[Cartilage]' in results[0]['search_snippet']
+
+        assert [a['pmid'] for a in self.storage.search_articles('BML TKR')] == ['10000003']
+        assert [a['pmid'] for a in self.storage.search_articles('knee')] == ['10000001', '10000003']
+
+    def test_phrase_prefix_and_paging(self):
+        """Phrase, prefix and paginated queries"""
+        assert [a['pmid'] for a in self.storage.search_articles('"joint space narrowing"')] == ['10000001']
+        assert self.storage.search_articles('"narrowing joint space"') == []
+        assert [a['pmid'] for a in self.storage.search_articles('arthro', mode='prefix')] == ['10000001']
+        assert self.storage.count_search_results('study') == 6
+        assert len(self.storage.search_articles('study', limit=4, offset=4)) == 2
+
+    def test_index_follows_inserts_and_external_changes(self):
+        """Inserts update an open index; files changed elsewhere are reindexed when reopened"""
+        self.storage.search_articles('knee')
+        self.storage.insert_article({'pmid': '10000001', 'title': 'Meniscus extrusion'})
+        assert [a['pmid'] for a in self.storage.search_articles('meniscus')] == ['10000001']
+        self.storage.search_index.close()
+
+        # Another checkout rewrites an article file and its index entry
+        time.sleep(0.01)
+        other = FileStorage(data_dir=str(self.data_dir))
+        other.insert_article({'pmid': '10000002', 'title': 'Synovitis grading'})
+
+        reopened = FileStorage(data_dir=str(self.data_dir))
+        assert [a['pmid'] for a in reopened.search_articles('synovitis')] == ['10000002']
+        assert reopened.search_articles('hip replacement') == []
+
+
+class TestLiteratureDatabaseSearch:
+    """Test LiteratureDatabase.search"""
+
+    def test_search_follows_add_article(self, tmp_path):
+        """add_article indexes new and updated papers"""
+        db = LiteratureDatabase(str(tmp_path / 'literature.db'))
+        for article in ARTICLES:
+            db.add_article(article)
+        assert [a['pmid'] for a in db.search('cartilage')] == ['10000001', '10000002']
+
+        db.add_article({'pmid': '10000002', 'title': 'Synovitis grading'})
+        assert [a['pmid'] for a in db.search('synovitis')] == ['10000002']
+        assert [a['pmid'] for a in db.search('cartilage')] == ['10000001']
+
+    def test_existing_database_is_backfilled(self, tmp_path):
+        """Papers stored before the index existed are indexed on open"""
+        path = str(tmp_path / 'literature.db')
+        db = LiteratureDatabase(path)
+        db.add_article({'pmid': '1', 'title': 'Knee effusion', 'predictive_factors': [{'factor': 'effusion'}]})
+
+        conn = sqlite3.connect(path)
+        conn.execute('DROP TABLE papers_fts')
+        conn.commit()
+        conn.close()
+
+        results = LiteratureDatabase(path).search('effusion')
+        assert [a['pmid'] for a in results] == ['1']
+        assert results[0]['predictive_factors'] == [{'factor': 'effusion'}]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared article text analysis
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.text_analysis import AnalyzedText, analyze_article, analyze_text, split_sentences
+from scripts.relevance_scoring import RelevanceScorer
+from scripts.enhanced_relevance_scoring import EnhancedRelevanceScorer
+
+
+class TestTextAnalysis:
+    """Test AnalyzedText extractions and sharing"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.article = {
+            'title': 'Predictors of TKR: a prospective cohort study',
+            'abstract': ('We followed 1,250 patients (n = 1250) over 7 years. '
+                         'EPV = 18.5 in the final model. BMI was associated with TKR (p<0.01).'),
+            'journal': 'Osteoarthritis and Cartilage'
+        }
+
+    def test_numeric_extractions(self):
+        """Sample sizes, follow-up, EPV and p-values are extracted once per field"""
+        analysis = AnalyzedText.from_article(self.article)
+        assert analysis.max_sample_size('abstract', ('count', 'n_equals')) == 1250
+        assert analysis.first_sample_size('abstract') == 1250
+        assert analysis.followup_years('abstract') == [7.0]
+        assert analysis.epv('abstract') == 18.5
+        assert analysis.p_values('abstract') == ['0.01']
+        assert analysis.has_significant_p('title_abstract')
+
+    def test_analysis_is_shared_until_text_changes(self):
+        """Consumers of the same article share one analysis"""
+        first = analyze_article(self.article)
+        assert analyze_article(self.article) is first
+
+        self.article['relevance_score'] = 80
+        assert analyze_article(self.article) is first
+
+        self.article['abstract'] = 'A different abstract.'
+        assert analyze_article(self.article) is not first
+
+    def test_scorers_share_keyword_scan(self):
+        """Both relevance scorers read the same cached keyword hits"""
+        relevance, enhanced = RelevanceScorer(), EnhancedRelevanceScorer()
+        assert relevance.matcher is enhanced.matcher
+
+        analysis = analyze_article(self.article)
+        hits = analysis.hits(relevance.matcher, 'title_abstract')
+        relevance.calculate_relevance_score(self.article)
+        enhanced.calculate_relevance_score(self.article)
+        assert analysis.hits(enhanced.matcher, 'title_abstract') is hits
+
+    def test_text_analysis_is_cached(self):
+        """Plain texts are analyzed once"""
+        text = "Age was associated with pain, p<0.05. Sex was not."
+        analysis = analyze_text(text)
+        assert analyze_text(text) is analysis
+        assert len(analysis.sentence_spans('text')) == 2
+
+    def test_sentence_split_keeps_abbreviations(self):
+        """Sentence spans do not break on common abbreviations"""
+        text = "Risk was higher in women vs. men (OR 1.5). Pain was associated with TKR, p<0.01."
+        sentences = [text[start:end] for start, end in split_sentences(text)]
+        assert len(sentences) == 2
+        assert sentences[0].startswith("Risk was higher in women vs. men")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled Xata client (against a local mock Xata server)
+"""
+
+import pytest
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.xata_client import XataClient
+
+
+class MockXata:
+    """In-memory Xata database with cursor paging and transactions"""
+
+    def __init__(self):
+        self.tables = {}
+        self.requests = []
+        self.connections = set()
+        self.fail_next = 0
+        self.gateway_error_next = 0
+        self.lock = threading.Lock()
+
+    def handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = json.loads(handler.rfile.read(length)) if length else {}
+        with self.lock:
+            self.requests.append((handler.command, handler.path, body, len(json.dumps(body))))
+            self.connections.add(handler.client_address)
+            if self.fail_next:
+                self.fail_next -= 1
+                return 429, {'message': 'rate limited'}
+
+        path = handler.path.split(':main', 1)[1]
+        if path == '/transaction':
+            result = self._transaction(body['operations'])
+            with self.lock:
+                if self.gateway_error_next:
+                    # The write went through but the gateway lost the response
+                    self.gateway_error_next -= 1
+                    return 502, {'message': 'bad gateway'}
+            return 200, result
+        if path.endswith('/query'):
+            table = path.split('/')[2]
+            return 200, self._query(table, body)
+        return 404, {'message': 'not found'}
+
+    def _transaction(self, operations):
+        results = []
+        with self.lock:
+            for op in operations:
+                if 'update' in op:
+                    update = op['update']
+                    rows = self.tables.setdefault(update['table'], {})
+                    rows.setdefault(update['id'], {'id': update['id']}).update(update['fields'])
+                    results.append({'operation': 'update', 'id': update['id']})
+                else:
+                    insert = op['insert']
+                    rows = self.tables.setdefault(insert['table'], {})
+                    record_id = f"rec_{len(rows)}"
+                    rows[record_id] = dict(insert['record'], id=record_id)
+                    results.append({'operation': 'insert', 'id': record_id})
+        return {'results': results}
+
+    def _query(self, table, body):
+        page = body.get('page', {})
+        if 'after' in page:
+            filter_dict, offset = page['after']['filter'], page['after']['offset']
+        else:
+            filter_dict, offset = body.get('filter'), 0
+        size = page.get('size', 20)
+        records = [r for r in self.tables.get(table, {}).values() if self._matches(r, filter_dict)]
+        chunk = records[offset:offset + size]
+        more = offset + size < len(records)
+        cursor = {'filter': filter_dict, 'offset': offset + size} if more else None
+        return {'records': chunk, 'meta': {'page': {'cursor': cursor, 'more': more, 'size': len(chunk)}}}
+
+    def _matches(self, record, filter_dict):
+        if not filter_dict:
+            return True
+        if '$and' in filter_dict:
+            return all(self._matches(record, f) for f in filter_dict['$and'])
+        for field, condition in filter_dict.items():
+            value = record.get(field)
+            if isinstance(condition, dict):
+                if value is None or value < condition['$ge']:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+
+@pytest.fixture
+def xata():
+    """Run a mock Xata server for one test"""
+    mock = MockXata()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            status, payload = mock.handle(self)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    mock.url = f"http://127.0.0.1:{server.server_address[1]}/db/test:main"
+    yield mock
+    server.shutdown()
+    server.server_close()
+
+
+def _client(xata, **kwargs):
+    kwargs.setdefault('requests_per_second', None)
+    return XataClient(api_key='test-key', database_url=xata.url, **kwargs)
+
+
+def _article(pmid, **fields):
+    article = {'pmid': pmid, 'title': f'Title {pmid}', 'access_type': 'paywalled', 'relevance_score': 50}
+    article.update(fields)
+    return article
+
+
+class TestXataClient:
+    """Test pooling, paging and bulk writes"""
+
+    def test_database_url_with_port(self, xata):
+        """Branch is parsed from the database segment, not the host port"""
+        client = _client(xata)
+        assert client.branch == 'main'
+        assert client.base_url.endswith('/db/test')
+
+    def test_bulk_upsert_chunks_by_payload(self, xata):
+        """Records are written in transactions under the payload budget"""
+        client = _client(xata, max_workers=3)
+        articles = [_article(str(1000 + i), abstract='x' * 500) for i in range(60)]
+        assert client.upsert_articles(articles, max_payload_bytes=8000) == 60
+
+        transactions = [r for r in xata.requests if r[1].endswith('/transaction')]
+        assert len(transactions) > 1
+        assert all(size <= 8000 + 100 for _, _, _, size in transactions)
+        assert len(xata.tables['pubmed_articles']) == 60
+
+        # Upserting again updates in place
+        client.upsert_articles([_article('1000', relevance_score=90)])
+        assert len(xata.tables['pubmed_articles']) == 60
+        assert xata.tables['pubmed_articles']['1000']['relevance_score'] == 90
+
+    def test_requests_reuse_connections(self, xata):
+        """Sequential requests share one keep-alive connection"""
+        client = _client(xata, max_workers=1)
+        for i in range(5):
+            client.upsert_articles([_article(str(i))])
+        assert len(xata.requests) == 5
+        assert len(xata.connections) == 1
+
+    def test_query_follows_cursors(self, xata):
+        """query_articles and counts see every page"""
+        client = _client(xata)
+        client.upsert_articles([_article(str(i), relevance_score=i % 100) for i in range(250)])
+
+        assert len(list(client.iter_records(page_size=40))) == 250
+        assert len(client.query_articles(limit=None)) == 250
+        assert len(client.query_articles(limit=120)) == 120
+        assert len(client.get_high_relevance_articles(threshold=70)) == 60
+        assert client.count_paywalled_articles() == 250
+        queries = [r for r in xata.requests if r[1].endswith('/query')]
+        assert any('after' in body.get('page', {}) for _, _, body, _ in queries)
+
+    def test_inserts_without_ids(self, xata):
+        """Records without an id field are inserted into the named table"""
+        client = _client(xata, table_name='cancer_rankings')
+        rows = [{'cancer_type': f'type {i}', 'rank': i} for i in range(5)]
+        assert client.upsert_records(rows) == 5
+        assert len(list(client.iter_records(table_name='cancer_rankings'))) == 5
+
+    def test_rate_limited_requests_are_retried(self, xata):
+        """429 responses are retried by the session"""
+        client = _client(xata)
+        xata.fail_next = 1
+        assert client.upsert_articles([_article('1')]) == 1
+
+    def test_writes_are_not_resent_after_gateway_errors(self, xata):
+        """A 502 on a transaction is reported as failed, not resent (it may have been applied)"""
+        client = _client(xata, table_name='cancer_rankings')
+        xata.gateway_error_next = 1
+        assert client.upsert_records([{'cancer_type': f'type {i}', 'rank': i} for i in range(5)]) == 0
+        assert len(xata.requests) == 1
+        assert len(xata.tables['cancer_rankings']) == 5
+
+    def test_disabled_client_skips_requests(self):
+        """Without credentials nothing is sent"""
+        client = XataClient(api_key='', database_url='')
+        assert client.upsert_articles([_article('1')]) == 0
+        assert list(client.iter_records()) == []
@@ -7,6 +7,8 @@ Includes ALL cancers with dependency data + cell line names
 import pandas as pd
 import numpy as np
 
+from src.data.depmap_store import DepMapStore
+
 print("=" * 80)
 print("COMPREHENSIVE CANCER TYPE RANKINGS - ALL TARGETS")
 print("Using CRISPRGeneEffect.csv (negative = dependent)")
@@ -20,29 +22,20 @@ print("\n" + "=" * 80)
 print("STEP 1: Loading dependency data (CRISPRGeneEffect.csv)...")
 print("=" * 80)
 
-dep_df = pd.read_csv("data/raw/depmap/CRISPRGeneEffect.csv", index_col=0)
-dep_df = dep_df.reset_index()
-dep_df.columns.values[0] = "ModelID"
-print(f"Total cell lines in dependency data: {len(dep_df)}")
+# Binary DepMap store, imported from data/raw/depmap on first use (src/data/depmap_store.py)
+store = DepMapStore.open()
+dep_df = store.matrix("gene_effect")
+print(f"Total cell lines in dependency data: {len(dep_df.models)}")
 
 # Get target gene columns
-targets = {
-    "STK17A": [
-        col for col in dep_df.columns if "STK17A" in col and "STK17B" not in col
-    ][0],
-    "STK17B": [col for col in dep_df.columns if "STK17B" in col][0],
-    "MYLK4": [col for col in dep_df.columns if "MYLK4" in col][0],
-    "TBK1": [col for col in dep_df.columns if "TBK1" in col][0],
-    "CLK4": [col for col in dep_df.columns if "CLK4" in col][0],
-}
+targets = {gene: dep_df.gene_label(gene) for gene in ["STK17A", "STK17B", "MYLK4", "TBK1", "CLK4"]}
 
 print("\nTarget gene columns found:")
 for gene, col in targets.items():
     print(f"  {gene}: {col}")
 
 # Create clean dependency dataframe
-dep_clean = dep_df[["ModelID"] + list(targets.values())].copy()
-dep_clean.columns = ["ModelID", "STK17A", "STK17B", "MYLK4", "TBK1", "CLK4"]
+dep_clean = dep_df.frame(list(targets)).reset_index()
 
 print(f"\nDependency data shape: {dep_clean.shape}")
 
@@ -62,7 +55,7 @@ print("\n" + "=" * 80)
 print("STEP 2: Loading model metadata...")
 print("=" * 80)
 
-model_df = pd.read_csv("data/raw/depmap/Model.csv")
+model_df = store.models()
 print(f"Total cell lines in Model.csv: {len(model_df)}")
 
 # Get relevant columns
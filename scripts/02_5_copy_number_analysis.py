@@ -18,7 +18,11 @@ import sys
 from pathlib import Path
 
 # Set up paths
-PROJECT_ROOT = Path(__file__).parent.parent
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.data.depmap_store import DepMapStore
+
 DATA_RAW = PROJECT_ROOT / "data" / "raw" / "depmap"
 DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
 FIGURES = PROJECT_ROOT / "outputs" / "figures"
@@ -60,14 +64,14 @@ if not cn_file.exists():
     print("=" * 80)
     sys.exit(0)
 
-# Load copy number data
-print("  Loading copy number data (may take 30-60 seconds)...")
-copy_number = pd.read_csv(cn_file)
-copy_number = copy_number.set_index('ModelID')
-print(f"✓ Copy number data: {copy_number.shape}")
+# Load copy number data from the binary store (imported from DATA_RAW on first use,
+# see src/data/depmap_store.py); only the target genes are read
+store = DepMapStore.open(raw_dir=DATA_RAW)
+copy_number = store.matrix("copy_number")
+print(f"✓ Copy number data: {len(copy_number.models)} cell lines × {len(copy_number.genes)} genes")
 
 # Load cell line metadata
-model = pd.read_csv(DATA_RAW / "Model.csv")
+model = store.models()
 print(f"✓ Model metadata: {model.shape}")
 
 # Load existing cancer rankings
@@ -91,7 +95,7 @@ target_genes = {
 # Find columns in copy number data
 cn_cols = {}
 for gene, entrez_id in target_genes.items():
-    matches = [col for col in copy_number.columns if gene in col and entrez_id in col]
+    matches = [copy_number.gene_label(entrez_id)] if copy_number.has_gene(entrez_id) else []
     if matches:
         cn_cols[gene] = matches[0]
         print(f"  ✓ Copy number - {gene:10s}: {matches[0]}")
@@ -121,11 +125,9 @@ if len(cn_cols) == 0:
 print("\n[STEP 3] Classifying copy number states...")
 
 # Extract copy number data for target genes
-cn_data = pd.DataFrame(index=copy_number.index)
+cn_data = copy_number.frame({f'{gene}_CN': col for gene, col in cn_cols.items()})
 
 for gene, col in cn_cols.items():
-    cn_data[f'{gene}_CN'] = copy_number[col]
-    
     # Classify states
     # Amplified: CN > 0.5
     # Normal: -0.5 <= CN <= 0.5
@@ -21,7 +21,12 @@ import sys
 from pathlib import Path
 
 # Set up paths
-PROJECT_ROOT = Path(__file__).parent.parent
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.analysis.multiple_testing import adjust_pvalues
+from src.data.depmap_store import DepMapStore
+
 DATA_RAW = PROJECT_ROOT / "data" / "raw" / "depmap"
 DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
 FIGURES = PROJECT_ROOT / "outputs" / "figures"
@@ -40,20 +45,21 @@ print("=" * 80)
 
 print("\n[STEP 1] Loading data files...")
 
+# DepMap matrices come from the binary store (imported from DATA_RAW on first use,
+# see src/data/depmap_store.py); only the target genes are read
+store = DepMapStore.open(raw_dir=DATA_RAW)
+
 # Load cell line metadata
-model = pd.read_csv(DATA_RAW / "Model.csv")
+model = store.models()
 print(f"✓ Model metadata: {model.shape}")
 
-# Load dependency scores (CRISPR Gene Effect)
-print("  Loading dependency data (may take 30-60 seconds)...")
-dependency = pd.read_csv(DATA_RAW / "CRISPRGeneEffect.csv", index_col=0)
-print(f"✓ Dependency scores: {dependency.shape}")
+# Dependency scores (CRISPR Gene Effect), genes × cell lines
+dependency = store.matrix("gene_effect")
+print(f"✓ Dependency scores: {len(dependency.models)} cell lines × {len(dependency.genes)} genes")
 
-# Load expression data
-print("  Loading expression data (may take 60-90 seconds)...")
-expression = pd.read_csv(DATA_RAW / "OmicsExpressionTPMLogp1HumanProteinCodingGenes.csv")
-expression = expression.set_index('ModelID')
-print(f"✓ Expression data: {expression.shape}")
+# Expression data
+expression = store.matrix("expression")
+print(f"✓ Expression data: {len(expression.models)} cell lines × {len(expression.genes)} genes")
 
 # Load existing cancer rankings
 cancer_rankings = pd.read_csv(DATA_PROCESSED / "cancer_type_rankings.csv")
@@ -64,7 +70,7 @@ top_cell_lines = pd.read_csv(DATA_PROCESSED / "top_dependent_cell_lines.csv")
 print(f"✓ Top dependent cell lines: {top_cell_lines.shape}")
 
 # Check alignment
-common_lines = expression.index.intersection(dependency.index)
+common_lines = pd.Index(expression.models).intersection(pd.Index(dependency.models))
 print(f"\n✓ Common cell lines (expression ∩ dependency): {len(common_lines)}")
 
 # ==============================================================================
@@ -84,7 +90,7 @@ target_genes = {
 # Find columns in dependency data
 dep_cols = {}
 for gene, entrez_id in target_genes.items():
-    matches = [col for col in dependency.columns if gene in col and entrez_id in col]
+    matches = [dependency.gene_label(entrez_id)] if dependency.has_gene(entrez_id) else []
     if matches:
         dep_cols[gene] = matches[0]
         print(f"  ✓ Dependency - {gene:10s}: {matches[0]}")
@@ -95,7 +101,7 @@ for gene, entrez_id in target_genes.items():
 # Find columns in expression data
 expr_cols = {}
 for gene, entrez_id in target_genes.items():
-    matches = [col for col in expression.columns if gene in col and entrez_id in col]
+    matches = [expression.gene_label(entrez_id)] if expression.has_gene(entrez_id) else []
     if matches:
         expr_cols[gene] = matches[0]
         print(f"  ✓ Expression - {gene:10s}: {matches[0]}")
@@ -110,14 +116,10 @@ for gene, entrez_id in target_genes.items():
 print("\n[STEP 3] Creating aligned dataset...")
 
 # Extract expression data for target genes
-expr_data = pd.DataFrame(index=expression.index)
-for gene, col in expr_cols.items():
-    expr_data[f'{gene}_expression'] = expression[col]
+expr_data = expression.frame({f'{gene}_expression': col for gene, col in expr_cols.items()})
 
 # Extract dependency data for target genes
-dep_data = pd.DataFrame(index=dependency.index)
-for gene, col in dep_cols.items():
-    dep_data[f'{gene}_dependency'] = dependency[col]
+dep_data = dependency.frame({f'{gene}_dependency': col for gene, col in dep_cols.items()})
 
 # Merge expression and dependency (inner join on ModelID)
 combined = expr_data.join(dep_data, how='inner')
@@ -155,25 +157,29 @@ for gene in target_genes.keys():
             'gene': gene,
             'correlation': corr,
             'p_value': p_val,
-            'n_cells': len(data),
-            'significant': p_val < 0.05
+            'n_cells': len(data)
         })
-        
-        print(f"\n{gene}:")
-        print(f"  Correlation (r): {corr:.4f}")
-        print(f"  P-value: {p_val:.2e}")
-        print(f"  N cell lines: {len(data)}")
-        
-        if p_val < 0.05:
-            if corr > 0:
-                print(f"  ✅ SIGNIFICANT: Higher expression → Higher dependency")
-            else:
-                print(f"  ⚠️  SIGNIFICANT but NEGATIVE: Higher expression → Lower dependency")
-        else:
-            print(f"  ❌ NOT SIGNIFICANT")
 
 global_corr_df = pd.DataFrame(global_corrs)
 
+# Benjamini-Hochberg across the target genes (src/analysis/multiple_testing.py)
+global_corr_df['q_value'] = adjust_pvalues(global_corr_df['p_value'], 'bh')
+global_corr_df['significant'] = global_corr_df['q_value'] < 0.05
+
+for _, row in global_corr_df.iterrows():
+    print(f"\n{row['gene']}:")
+    print(f"  Correlation (r): {row['correlation']:.4f}")
+    print(f"  P-value: {row['p_value']:.2e} (FDR q-value: {row['q_value']:.2e})")
+    print(f"  N cell lines: {row['n_cells']}")
+    
+    if row['significant']:
+        if row['correlation'] > 0:
+            print(f"  ✅ SIGNIFICANT: Higher expression → Higher dependency")
+        else:
+            print(f"  ⚠️  SIGNIFICANT but NEGATIVE: Higher expression → Lower dependency")
+    else:
+        print(f"  ❌ NOT SIGNIFICANT")
+
 # ==============================================================================
 # STEP 5: Per-Cancer-Type Correlation Analysis
 # ==============================================================================
@@ -197,7 +203,6 @@ for cancer_type in combined['OncotreePrimaryDisease'].dropna().unique():
     }
     
     # Calculate correlation for each gene
-    sig_corrs = []
     for gene in target_genes.keys():
         expr_col = f'{gene}_expression'
         dep_col = f'{gene}_dependency'
@@ -211,10 +216,6 @@ for cancer_type in combined['OncotreePrimaryDisease'].dropna().unique():
                 cancer_result[f'{gene}_corr_pval'] = p_val
                 cancer_result[f'{gene}_expression_mean'] = data[expr_col].mean()
                 cancer_result[f'{gene}_expression_std'] = data[expr_col].std()
-                
-                # Count significant positive correlations
-                if p_val < 0.10 and corr > 0:
-                    sig_corrs.append(corr)
             except:
                 cancer_result[f'{gene}_corr'] = np.nan
                 cancer_result[f'{gene}_corr_pval'] = np.nan
@@ -241,16 +242,23 @@ for cancer_type in combined['OncotreePrimaryDisease'].dropna().unique():
     
     cancer_result['high_expr_high_dep_count'] = high_expr_high_dep
     
-    # Expression correlation score (0-1, based on avg of significant positive correlations)
-    if len(sig_corrs) > 0:
-        cancer_result['expression_correlation_score'] = min(1.0, max(0.0, np.mean(sig_corrs)))
-    else:
-        cancer_result['expression_correlation_score'] = 0.0
-    
     cancer_corrs.append(cancer_result)
 
 # Create DataFrame
 cancer_corr_df = pd.DataFrame(cancer_corrs)
+
+# FDR q-values per target gene, across cancer types (one family per gene)
+sig_corrs = []
+for gene in target_genes.keys():
+    cancer_corr_df[f'{gene}_corr_qval'] = adjust_pvalues(cancer_corr_df[f'{gene}_corr_pval'], 'bh')
+    # Significant positive correlations (q < 0.10)
+    significant = (cancer_corr_df[f'{gene}_corr_qval'] < 0.10) & (cancer_corr_df[f'{gene}_corr'] > 0)
+    sig_corrs.append(cancer_corr_df[f'{gene}_corr'].where(significant))
+
+# Expression correlation score (0-1, based on avg of significant positive correlations)
+cancer_corr_df['expression_correlation_score'] = (
+    pd.concat(sig_corrs, axis=1).mean(axis=1).clip(0.0, 1.0).fillna(0.0)
+)
 cancer_corr_df = cancer_corr_df.sort_values('expression_correlation_score', ascending=False)
 
 print(f"\n✓ Analyzed {len(cancer_corr_df)} cancer types with ≥3 cell lines")
@@ -274,7 +282,8 @@ for gene in target_genes.keys():
         f'{gene}_expression_mean',
         f'{gene}_expression_std',
         f'{gene}_corr',
-        f'{gene}_corr_pval'
+        f'{gene}_corr_pval',
+        f'{gene}_corr_qval'
     ])
 required_cols.extend(['high_expr_high_dep_count', 'expression_correlation_score'])
 
@@ -308,6 +317,7 @@ with open(summary_file, 'w') as f:
         f.write(f"\n{row['gene']}:\n")
         f.write(f"  Correlation: r={row['correlation']:.4f}\n")
         f.write(f"  P-value: {row['p_value']:.2e}\n")
+        f.write(f"  FDR q-value: {row['q_value']:.2e}\n")
         f.write(f"  N cell lines: {row['n_cells']}\n")
         f.write(f"  Significant: {row['significant']}\n")
         
@@ -333,8 +343,9 @@ with open(summary_file, 'w') as f:
         for gene in target_genes.keys():
             corr = row[f'{gene}_corr']
             pval = row[f'{gene}_corr_pval']
+            qval = row[f'{gene}_corr_qval']
             if not np.isnan(corr):
-                f.write(f"   {gene}: r={corr:.3f} (p={pval:.3f})\n")
+                f.write(f"   {gene}: r={corr:.3f} (p={pval:.3f}, q={qval:.3f})\n")
     
     # Key findings
     f.write("\n\n" + "=" * 80 + "\n")
@@ -10,6 +10,7 @@ Outputs:
 """
 
 import pandas as pd
+import io
 import time
 from pathlib import Path
 from Bio import Entrez
@@ -24,6 +25,13 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
 REPORTS = PROJECT_ROOT / "outputs" / "reports"
 
+# E-utilities responses are cached on disk (HTTP_CACHE_OFFLINE=1 replays them without network)
+sys.path.insert(0, str(PROJECT_ROOT / "pubmed-literature-mining"))
+from scripts.http_cache import get_http_cache
+
+EUTILS_BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+http_cache = get_http_cache(str(PROJECT_ROOT / "data" / "cache" / "http_cache.db"))
+
 # Create output directories
 DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
 REPORTS.mkdir(parents=True, exist_ok=True)
@@ -61,6 +69,17 @@ print(f"✓ Target genes: {', '.join(target_genes)}")
 # STEP 3: PubMed Search Function
 # ==============================================================================
 
+def eutils_read(endpoint, **params):
+    """Call an E-utility through the HTTP cache and parse it with Entrez.read"""
+    params.update({'email': Entrez.email, 'tool': 'biopython'})
+    response = http_cache.lookup('GET', f"{EUTILS_BASE}/{endpoint}.fcgi", params)
+    if response is None:
+        time.sleep(0.34)  # ~3 requests per second, only for network requests
+        response = http_cache.fetch('GET', f"{EUTILS_BASE}/{endpoint}.fcgi", params=params, timeout=30)
+    response.raise_for_status()
+    return Entrez.read(io.BytesIO(response.content))
+
+
 def search_pubmed(gene, cancer_type=None, max_results=100):
     """
     Search PubMed for gene and cancer type
@@ -76,9 +95,7 @@ def search_pubmed(gene, cancer_type=None, max_results=100):
             query = f'({gene}[Title/Abstract]) AND (kinase OR phosphorylation) AND cancer'
         
         # Search PubMed
-        handle = Entrez.esearch(db="pubmed", term=query, retmax=max_results, sort="relevance")
-        record = Entrez.read(handle)
-        handle.close()
+        record = eutils_read("esearch", db="pubmed", term=query, retmax=max_results, sort="relevance")
         
         total_count = int(record["Count"])
         pmids = record["IdList"]
@@ -89,9 +106,7 @@ def search_pubmed(gene, cancer_type=None, max_results=100):
         
         if pmids:
             # Fetch details
-            handle = Entrez.efetch(db="pubmed", id=pmids[:5], retmode="xml")
-            articles = Entrez.read(handle)
-            handle.close()
+            articles = eutils_read("efetch", db="pubmed", id=",".join(pmids[:5]), retmode="xml")
             
             for article in articles['PubmedArticle']:
                 try:
@@ -117,9 +132,6 @@ def search_pubmed(gene, cancer_type=None, max_results=100):
                 except Exception as e:
                     continue
         
-        # Rate limiting
-        time.sleep(0.34)  # ~3 requests per second
-        
         return {
             'total_papers': total_count,
             'recent_papers': recent_count,
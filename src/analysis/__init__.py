@@ -0,0 +1,31 @@
+"""Statistical analyses over the DepMap release (synthetic lethality, scoring)."""
+
+from .multiple_testing import (
+    adjust_pvalues,
+    adjust_frame,
+    storey_pi0,
+    METHODS,
+)
+from .synthetic_lethality import (
+    welch_grid,
+    welch_scan,
+    scan_store,
+    testable_mutations,
+    MIN_MUTANTS,
+    MIN_WT,
+    RESULT_COLUMNS,
+)
+
+__all__ = [
+    "adjust_pvalues",
+    "adjust_frame",
+    "storey_pi0",
+    "METHODS",
+    "welch_grid",
+    "welch_scan",
+    "scan_store",
+    "testable_mutations",
+    "MIN_MUTANTS",
+    "MIN_WT",
+    "RESULT_COLUMNS",
+]
@@ -3,9 +3,17 @@ PROMPT 4: Comprehensive Integrated Scoring
 Creates final unified rankings integrating ALL evidence dimensions
 """
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 
+# Project root on the path when run as python3 src/analysis/prompt_4_integrated_scoring.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from src.analysis.multiple_testing import adjust_pvalues
+
 print("="*80)
 print("PROMPT 4: COMPREHENSIVE INTEGRATED SCORING")
 print("="*80)
@@ -34,9 +42,10 @@ print(f"  Synthetic lethality results: {len(synleth)} rows")
 print("\n" + "="*80)
 print("STEP 2: Calculating mutation_context_score...")
 
-# Count significant SL hits
-sig_sl = synleth[synleth['p_value'] < 0.10].copy()
-print(f"  Significant SL hits (p < 0.10): {len(sig_sl)}")
+# Count significant SL hits (Benjamini-Hochberg q-value over all SL tests)
+synleth['q_value'] = adjust_pvalues(synleth['p_value'], 'bh')
+sig_sl = synleth[synleth['q_value'] < 0.10].copy()
+print(f"  Significant SL hits (FDR q < 0.10): {len(sig_sl)}")
 
 # Create mutation_context dataframe
 mutation_context = pd.DataFrame()
@@ -0,0 +1,348 @@
+"""
+Vectorized synthetic-lethality scan — Welch t-tests over the full mutation × gene grid.
+
+For every mutation (hotspot/damaging matrix column) and dependency gene, cell
+lines are split into mutant (value == 1) and wild-type (value == 0) groups
+and compared with Welch's unequal-variance t-test, as
+``scipy.stats.ttest_ind(mutant, wt, equal_var=False)`` does pair by pair.
+
+Instead of one test per pair, group counts, sums and sums of squares for a
+block of mutations × a block of genes come from three matrix products per
+group (mask @ values), so a genome-wide scan is a few dense BLAS calls per
+block. Dependency values are centered per gene before the products (float64)
+to keep the variance formula numerically stable. Blocks are bounded by
+``gene_chunk`` × ``mutation_chunk`` so memory stays flat however many genes
+are screened.
+
+Result rows keep the schema of comprehensive_synthetic_lethality_all_mutations.py
+(mutation, mutation_column, target, n_mutant, n_wt, mutant_mean, wt_mean,
+mean_diff, p_value, is_synthetic_lethal) plus t_statistic, df and cohens_d.
+Pairs below MIN_MUTANTS mutant or MIN_WT wild-type cell lines (after dropping
+cell lines without a dependency value) are skipped.
+
+Usage:
+    python -m src.analysis.synthetic_lethality --targets STK17A MYLK4 TBK1 CLK4
+    python -m src.analysis.synthetic_lethality --all-genes --max-p 0.01 --out data/processed/sl_genome_wide.csv
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+logger = logging.getLogger(__name__)
+
+# Minimum sample size requirements
+MIN_MUTANTS = 3
+MIN_WT = 10
+
+RESULT_COLUMNS = [
+    "mutation",
+    "mutation_column",
+    "target",
+    "n_mutant",
+    "n_wt",
+    "mutant_mean",
+    "wt_mean",
+    "mean_diff",
+    "p_value",
+    "is_synthetic_lethal",
+]
+STAT_COLUMNS = ["t_statistic", "df", "cohens_d"]
+
+DEFAULT_GENE_CHUNK = 2048
+DEFAULT_MUTATION_CHUNK = 512
+
+
+def gene_symbol(label: str) -> str:
+    """Gene name from a "SYMBOL (ENTREZ)" column label."""
+    return label.split()[0] if " " in label else label
+
+
+def mutation_masks(mutations: np.ndarray, missing_as_wt: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mutant and wild-type masks of a mutations × cell lines matrix.
+
+    Missing values count as wild-type when missing_as_wt (the scripts' fillna(0)),
+    otherwise they are in neither group; so are values other than 0 and 1
+    (e.g. 2 hotspot mutations).
+    """
+    status = np.asarray(mutations, dtype=np.float64)
+    if missing_as_wt:
+        status = np.nan_to_num(status, nan=0.0)
+    return (status == 1).astype(np.float64), (status == 0).astype(np.float64)
+
+
+def testable_mutations(
+    mutations: np.ndarray,
+    labels: Sequence[str],
+    min_mutants: int = MIN_MUTANTS,
+    min_wt: int = MIN_WT,
+) -> pd.DataFrame:
+    """
+    Mutations with enough mutant and wild-type cell lines to be tested at all.
+
+    Missing values count as wild-type here, so per-pair group sizes never exceed
+    these counts.
+
+    Returns:
+        DataFrame with gene, column, n_mutant, n_wt and the mutation's row (one row
+        per testable mutation).
+    """
+    mutant, wt = mutation_masks(mutations)
+    n_mutant = mutant.sum(axis=1).astype(int)
+    n_wt = wt.sum(axis=1).astype(int)
+    keep = np.flatnonzero((n_mutant >= min_mutants) & (n_wt >= min_wt))
+    return pd.DataFrame({
+        "gene": [gene_symbol(labels[i]) for i in keep],
+        "column": [labels[i] for i in keep],
+        "n_mutant": n_mutant[keep],
+        "n_wt": n_wt[keep],
+        "row": keep,
+    })
+
+
+def _group_moments(mask: np.ndarray, valid: np.ndarray, centered: np.ndarray, squared: np.ndarray):
+    """Counts, means and sample variances of every (mask row, gene) group."""
+    n = mask @ valid.T
+    s1 = mask @ centered.T
+    s2 = mask @ squared.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s1 / n
+        var = (s2 - s1 * mean) / (n - 1)
+    return n, mean, np.maximum(var, 0.0)
+
+
+def welch_grid(mutant: np.ndarray, wt: np.ndarray, values: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Welch statistics for every mutation × gene pair of one block.
+
+    Args:
+        mutant: Mutant masks, mutations × cell lines (0/1 float).
+        wt: Wild-type masks, mutations × cell lines (0/1 float).
+        values: Dependency values, genes × cell lines (NaN = missing).
+
+    Returns:
+        Arrays of shape mutations × genes: n_mutant, n_wt, mutant_mean, wt_mean,
+        mean_diff, t_statistic, df, p_value, cohens_d.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    # Per-gene mean of the observed values (0 for genes with none)
+    center = np.nansum(values, axis=1) / np.maximum(valid.sum(axis=1), 1)
+    centered = np.where(valid, values - center[:, None], 0.0)
+    valid = valid.astype(np.float64)
+
+    n_a, mean_a, var_a = _group_moments(mutant, valid, centered, centered * centered)
+    n_w, mean_w, var_w = _group_moments(wt, valid, centered, centered * centered)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se_a = var_a / n_a
+        se_w = var_w / n_w
+        se2 = se_a + se_w
+        diff = mean_a - mean_w
+        t = diff / np.sqrt(se2)
+        dof = se2 * se2 / (se_a * se_a / (n_a - 1) + se_w * se_w / (n_w - 1))
+        pooled = np.sqrt(((n_a - 1) * var_a + (n_w - 1) * var_w) / (n_a + n_w - 2))
+        cohens_d = diff / pooled
+    # Both groups constant: scipy reports no test
+    degenerate = ~(se2 > 0)
+    t[degenerate] = np.nan
+    dof[degenerate] = np.nan
+    p = 2.0 * special.stdtr(dof, -np.abs(t))
+
+    return {
+        "n_mutant": n_a,
+        "n_wt": n_w,
+        "mutant_mean": mean_a + center[None, :],
+        "wt_mean": mean_w + center[None, :],
+        "mean_diff": diff,
+        "t_statistic": t,
+        "df": dof,
+        "p_value": p,
+        "cohens_d": cohens_d,
+    }
+
+
+def gene_blocks(values: np.ndarray, chunk_size: int = DEFAULT_GENE_CHUNK) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield (first gene position, block) over an in-memory genes × cell lines array."""
+    for start in range(0, len(values), chunk_size):
+        yield start, values[start:start + chunk_size]
+
+
+def welch_scan(
+    mutations: np.ndarray,
+    mutation_labels: Sequence[str],
+    blocks: Iterable[tuple[int, np.ndarray]],
+    target_names: Sequence[str],
+    min_mutants: int = MIN_MUTANTS,
+    min_wt: int = MIN_WT,
+    max_p_value: float | None = None,
+    mutation_chunk: int = DEFAULT_MUTATION_CHUNK,
+    missing_as_wt: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Test every mutation against every target gene, one block at a time.
+
+    Args:
+        mutations: Mutations × cell lines, aligned to the columns of the gene blocks.
+        mutation_labels: "SYMBOL (ENTREZ)" label of each mutation row.
+        blocks: (first gene position, genes × cell lines dependency block) pairs, e.g.
+            DepMapMatrix.iter_gene_chunks or gene_blocks.
+        target_names: Name reported as target for each gene position.
+        min_mutants, min_wt: Minimum group sizes per pair.
+        max_p_value: Only keep pairs with p_value below this (None keeps every tested pair).
+        mutation_chunk: Mutations per block (memory is about 12 × genes per block × mutation_chunk × 8 bytes).
+        missing_as_wt: Count cell lines without a mutation status as wild-type.
+
+    Yields:
+        One DataFrame of results per block (RESULT_COLUMNS + STAT_COLUMNS), rows in
+        mutation-major order within a gene block.
+    """
+    mutant, wt = mutation_masks(mutations, missing_as_wt)
+    mutation_genes = np.array([gene_symbol(l) for l in mutation_labels], dtype=object)
+    mutation_labels = np.array(list(mutation_labels), dtype=object)
+    names = np.array(list(target_names), dtype=object)
+
+    for g_start, block in blocks:
+        for m_start in range(0, len(mutation_labels), mutation_chunk):
+            m_stop = m_start + mutation_chunk
+            stats = welch_grid(mutant[m_start:m_stop], wt[m_start:m_stop], block)
+            keep = (stats["n_mutant"] >= min_mutants) & (stats["n_wt"] >= min_wt)
+            if max_p_value is not None:
+                keep &= stats["p_value"] < max_p_value
+            rows, cols = np.nonzero(keep)
+            if not len(rows):
+                continue
+            result = pd.DataFrame({
+                "mutation": mutation_genes[m_start + rows],
+                "mutation_column": mutation_labels[m_start + rows],
+                "target": names[g_start + cols],
+                "n_mutant": stats["n_mutant"][rows, cols].astype(int),
+                "n_wt": stats["n_wt"][rows, cols].astype(int),
+                "mutant_mean": stats["mutant_mean"][rows, cols],
+                "wt_mean": stats["wt_mean"][rows, cols],
+                "mean_diff": stats["mean_diff"][rows, cols],
+                "p_value": stats["p_value"][rows, cols],
+            })
+            result["is_synthetic_lethal"] = result["mean_diff"] < 0  # Negative = SL
+            for column in STAT_COLUMNS:
+                result[column] = stats[column][rows, cols]
+            yield result
+
+
+def scan_store(
+    store,
+    targets: Sequence[str | int] | None = None,
+    mutation_dataset: str = "mutations_hotspot",
+    dependency_dataset: str = "gene_dependency",
+    mutation_genes: Sequence[str | int] | None = None,
+    min_mutants: int = MIN_MUTANTS,
+    min_wt: int = MIN_WT,
+    max_p_value: float | None = None,
+    gene_chunk: int = DEFAULT_GENE_CHUNK,
+    mutation_chunk: int = DEFAULT_MUTATION_CHUNK,
+    all_models: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Scan a DepMapStore: mutations of one matrix against dependency genes.
+
+    Cell lines are those with both dependency and mutation data (an inner merge),
+    or with all_models every dependency cell line, those without mutation data
+    counting as wild-type (a left merge + fillna(0)). Only mutations that pass
+    min_mutants/min_wt over those cell lines are tested.
+
+    Args:
+        store: DepMapStore (see src/data/depmap_store.py).
+        targets: Target genes (symbols, labels or Entrez IDs); None screens every gene,
+            gene_chunk rows of the memory map at a time.
+        mutation_dataset: Mutation matrix to test.
+        dependency_dataset: Dependency matrix ("gene_dependency" or "gene_effect").
+        mutation_genes: Restrict to these mutation genes (default: every testable mutation).
+
+    Yields:
+        Result blocks as from welch_scan.
+    """
+    dependency = store.matrix(dependency_dataset)
+    mutation_matrix = store.matrix(mutation_dataset)
+    if all_models:
+        models = list(dependency.models)
+    else:
+        in_mutations = set(mutation_matrix.models)
+        models = [m for m in dependency.models if m in in_mutations]
+
+    if mutation_genes is None:
+        labels = list(mutation_matrix.genes)
+    else:
+        labels = [mutation_matrix.gene_label(g) for g in mutation_genes if mutation_matrix.has_gene(g)]
+    status = mutation_matrix.slice(labels, models)
+    testable = testable_mutations(status, labels, min_mutants, min_wt)
+    logger.info("%s: %d testable mutations over %d cell lines", mutation_dataset, len(testable), len(models))
+
+    if targets is None:
+        blocks = dependency.iter_gene_chunks(gene_chunk, models)
+        names = [gene_symbol(label) for label in dependency.genes]
+    else:
+        blocks = gene_blocks(dependency.slice(targets, models), gene_chunk)
+        names = [str(g) for g in targets]
+
+    yield from welch_scan(
+        status[testable["row"].to_numpy()],
+        testable["column"].tolist(),
+        blocks,
+        names,
+        min_mutants=min_mutants,
+        min_wt=min_wt,
+        max_p_value=max_p_value,
+        mutation_chunk=mutation_chunk,
+        missing_as_wt=all_models,
+    )
+
+
+def main() -> int:
+    import argparse
+    from pathlib import Path
+
+    from src.data.depmap_store import DepMapStore
+
+    parser = argparse.ArgumentParser(description="Genome-wide synthetic-lethality scan (Welch t-tests)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--targets", nargs="+", help="Target genes (symbols or Entrez IDs)")
+    group.add_argument("--all-genes", action="store_true", help="Screen every gene in the dependency matrix")
+    parser.add_argument("--mutations", nargs="+", default=["mutations_hotspot", "mutations_damaging"],
+                        help="Mutation datasets")
+    parser.add_argument("--dependency", default="gene_dependency", help="Dependency dataset")
+    parser.add_argument("--max-p", type=float, default=None, help="Only write pairs with p below this")
+    parser.add_argument("--gene-chunk", type=int, default=DEFAULT_GENE_CHUNK)
+    parser.add_argument("--mutation-chunk", type=int, default=DEFAULT_MUTATION_CHUNK)
+    parser.add_argument("--out", default="data/processed/synthetic_lethality_scan.csv", help="Output CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = DepMapStore.open()
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    start = time.time()
+    written = 0
+    with open(out, "w", newline="") as f:
+        for dataset in args.mutations:
+            if not store.has(dataset):
+                logger.warning("%s not in the DepMap store; skipped", dataset)
+                continue
+            for block in scan_store(store, None if args.all_genes else args.targets, dataset, args.dependency,
+                                    max_p_value=args.max_p, gene_chunk=args.gene_chunk,
+                                    mutation_chunk=args.mutation_chunk):
+                block.insert(0, "mutation_type", dataset.replace("mutations_", ""))
+                block.to_csv(f, index=False, header=written == 0)
+                written += len(block)
+    print(f"Wrote {written} results to {out} in {time.time() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
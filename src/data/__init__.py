@@ -9,6 +9,13 @@ from .load_kihealth import (
     build_unified_kihealth,
     UNIFIED_SCHEMA,
 )
+from .depmap_store import (
+    DepMapStore,
+    DepMapMatrix,
+    import_release,
+    read_depmap_matrix,
+    DEPMAP_DATASETS,
+)
 
 __all__ = [
     "load_frankfurt",
@@ -18,4 +25,9 @@ __all__ = [
     "generate_data_quality_report",
     "build_unified_kihealth",
     "UNIFIED_SCHEMA",
+    "DepMapStore",
+    "DepMapMatrix",
+    "import_release",
+    "read_depmap_matrix",
+    "DEPMAP_DATASETS",
 ]
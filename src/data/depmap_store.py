@@ -0,0 +1,394 @@
+"""
+DepMap release store — binary, memory-mapped copy of a DepMap release.
+
+A release's CSV matrices are parsed once and written as float32 ``.npy``
+files, gene-major (genes × cell lines), so reading a handful of genes for
+every cell line touches a few contiguous rows of a memory map instead of
+re-parsing a 0.5–1 GB CSV (30–90 s per file, per script).
+
+Layout of a store directory (default: data/depmap_store):
+
+    manifest.json              datasets, shapes and the source file each came from
+    <dataset>.npy              float32 matrix, genes × cell lines, NaN = missing
+    <dataset>.index.json       {"models": [ModelID, ...], "genes": ["SYMBOL (ENTREZ)", ...]}
+    models.parquet             Model.csv as a typed table (models.pkl without pyarrow);
+                               ``DepMapStore.models`` returns its text columns as plain
+                               object columns, like ``pd.read_csv`` on pandas < 3
+
+Datasets (see DEPMAP_DATASETS) are imported from data/raw/depmap by
+``import_release`` — or on first use by ``DepMapStore.open`` — and re-imported
+whenever the source CSV changes (size or modification time).
+
+Usage:
+    python -m src.data.depmap_store [--raw data/raw/depmap] [--store data/depmap_store] [--force]
+
+    store = DepMapStore.open()
+    effect = store.matrix("gene_effect").frame(["STK17A", "TBK1"])   # ModelID × gene, milliseconds
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_RAW_DIR = _PROJECT_ROOT / "data" / "raw" / "depmap"
+DEFAULT_STORE_DIR = _PROJECT_ROOT / "data" / "depmap_store"
+
+# Dataset name -> DepMap release file (cell lines × "SYMBOL (ENTREZ)" columns)
+DEPMAP_DATASETS = {
+    "gene_effect": "CRISPRGeneEffect.csv",
+    "gene_dependency": "CRISPRGeneDependency.csv",
+    "expression": "OmicsExpressionTPMLogp1HumanProteinCodingGenes.csv",
+    "copy_number": "OmicsCNGeneWGS.csv",
+    "mutations_hotspot": "OmicsSomaticMutationsMatrixHotspot.csv",
+    "mutations_damaging": "OmicsSomaticMutationsMatrixDamaging.csv",
+}
+MODEL_FILE = "Model.csv"
+
+# Per-sequencing metadata columns of Omics matrices (not genes)
+METADATA_COLUMNS = (
+    "SequencingID",
+    "ModelConditionID",
+    "IsDefaultEntryForModel",
+    "IsDefaultEntryForMC",
+)
+# Model.csv text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+_GENE_LABEL = re.compile(r"^(?P<symbol>.+?) \((?P<entrez>\d+)\)$")
+
+try:
+    import pyarrow  # noqa: F401
+
+    _PARQUET = True
+except ImportError:
+    _PARQUET = False
+
+
+def _source_stamp(path: Path) -> dict:
+    stat = path.stat()
+    return {"file": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """Write JSON atomically (temp file + rename)."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def read_depmap_matrix(path: Path | str) -> pd.DataFrame:
+    """
+    Parse a DepMap matrix CSV into a float32 frame indexed by ModelID.
+
+    Handles both layouts: ModelID as the (unnamed) first column, and Omics
+    files with a ModelID column plus per-sequencing metadata. Where a model has
+    several sequencing rows, its default entry (IsDefaultEntryForModel) is kept,
+    else the first row.
+    """
+    df = pd.read_csv(path, low_memory=False)
+    if "ModelID" not in df.columns:
+        df = df.rename(columns={df.columns[0]: "ModelID"})
+    if "IsDefaultEntryForModel" in df.columns:
+        is_default = df["IsDefaultEntryForModel"].astype(str).str.lower().isin(("yes", "true", "1"))
+        df = df.assign(_default=is_default).sort_values("_default", ascending=False, kind="stable")
+    df = df.drop_duplicates("ModelID", keep="first").set_index("ModelID")
+    gene_cols = [
+        c for c in df.columns
+        if c not in METADATA_COLUMNS and c != "_default" and not str(c).startswith("Unnamed:")
+    ]
+    return df[gene_cols].apply(pd.to_numeric, errors="coerce").astype(np.float32)
+
+
+def _typed_model_table(path: Path | str) -> pd.DataFrame:
+    """Model.csv with numeric columns parsed and low-cardinality text columns as categoricals."""
+    model = pd.read_csv(path, low_memory=False)
+    for col in model.columns:
+        if col == "ModelID" or pd.api.types.is_numeric_dtype(model[col]) or pd.api.types.is_bool_dtype(model[col]):
+            continue
+        values = model[col].dropna()
+        if len(values) and values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+            model[col] = model[col].astype("category")
+        else:
+            model[col] = model[col].astype("string")
+    model["ModelID"] = model["ModelID"].astype("string")
+    return model
+
+
+def import_release(
+    raw_dir: Path | str | None = None,
+    store_dir: Path | str | None = None,
+    datasets: Iterable[str] | None = None,
+    force: bool = False,
+) -> dict:
+    """
+    Convert a DepMap release into the binary store (one-time per release).
+
+    Args:
+        raw_dir: Directory with the release CSVs (default: data/raw/depmap).
+        store_dir: Store directory (default: data/depmap_store).
+        datasets: Dataset names to import (default: every DEPMAP_DATASETS file present).
+        force: Re-import even if the stored copy matches its source.
+
+    Returns:
+        The store manifest.
+    """
+    raw = Path(raw_dir) if raw_dir else DEFAULT_RAW_DIR
+    store = Path(store_dir) if store_dir else DEFAULT_STORE_DIR
+    store.mkdir(parents=True, exist_ok=True)
+    manifest_path = store / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    manifest.setdefault("datasets", {})
+
+    names = list(datasets) if datasets is not None else list(DEPMAP_DATASETS)
+    for name in names:
+        if name not in DEPMAP_DATASETS:
+            raise KeyError(f"Unknown DepMap dataset: {name}")
+        source = raw / DEPMAP_DATASETS[name]
+        if not source.exists():
+            if datasets is not None:
+                raise FileNotFoundError(f"DepMap file not found: {source}")
+            continue
+        stamp = _source_stamp(source)
+        entry = manifest["datasets"].get(name)
+        if not force and entry and entry.get("source") == stamp and (store / f"{name}.npy").exists():
+            continue
+
+        logger.info("Importing %s from %s", name, source.name)
+        df = read_depmap_matrix(source)
+        tmp = store / f"{name}.npy.tmp"
+        matrix = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(df.shape[1], df.shape[0]))
+        matrix[:] = df.to_numpy(dtype=np.float32).T
+        matrix.flush()
+        del matrix
+        os.replace(tmp, store / f"{name}.npy")
+        _write_json(store / f"{name}.index.json", {"models": [str(m) for m in df.index], "genes": [str(g) for g in df.columns]})
+        manifest["datasets"][name] = {"genes": df.shape[1], "models": df.shape[0], "dtype": "float32", "source": stamp}
+        _write_json(manifest_path, manifest)
+        logger.info("Imported %s: %d genes × %d cell lines", name, df.shape[1], df.shape[0])
+
+    model_source = raw / MODEL_FILE
+    if model_source.exists():
+        stamp = _source_stamp(model_source)
+        entry = manifest.get("models")
+        model_file = "models.parquet" if _PARQUET else "models.pkl"
+        if force or not entry or entry.get("source") != stamp or not (store / entry["file"]).exists():
+            model = _typed_model_table(model_source)
+            tmp = store / f"{model_file}.tmp"
+            if _PARQUET:
+                model.to_parquet(tmp, index=False)
+            else:
+                model.to_pickle(tmp)
+            os.replace(tmp, store / model_file)
+            manifest["models"] = {"file": model_file, "rows": len(model), "source": stamp}
+            _write_json(manifest_path, manifest)
+            logger.info("Imported %s: %d models", MODEL_FILE, len(model))
+    return manifest
+
+
+class DepMapMatrix:
+    """One memory-mapped dataset: float32 values, genes × cell lines, with ModelID and gene indexes."""
+
+    def __init__(self, path: Path | str, name: str):
+        store = Path(path)
+        self.name = name
+        self.values = np.load(store / f"{name}.npy", mmap_mode="r")
+        index = json.loads((store / f"{name}.index.json").read_text())
+        self.models: list[str] = index["models"]
+        self.genes: list[str] = index["genes"]
+        self._model_pos = {m: i for i, m in enumerate(self.models)}
+        self._gene_pos = {g: i for i, g in enumerate(self.genes)}
+        self._by_symbol: dict[str, list[int]] = {}
+        self._by_entrez: dict[str, int] = {}
+        for i, label in enumerate(self.genes):
+            match = _GENE_LABEL.match(label)
+            symbol = match.group("symbol") if match else label
+            self._by_symbol.setdefault(symbol, []).append(i)
+            if match:
+                self._by_entrez[match.group("entrez")] = i
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """(genes, cell lines)."""
+        return self.values.shape
+
+    def gene_position(self, gene: str | int) -> int:
+        """
+        Row of a gene, given as "SYMBOL (ENTREZ)", a symbol, or an Entrez ID.
+
+        Raises:
+            KeyError: Unknown gene, or a symbol shared by several Entrez IDs.
+        """
+        key = str(gene)
+        if key in self._gene_pos:
+            return self._gene_pos[key]
+        if key in self._by_entrez:
+            return self._by_entrez[key]
+        positions = self._by_symbol.get(key)
+        if not positions:
+            raise KeyError(f"{gene} not in {self.name}")
+        if len(positions) > 1:
+            raise KeyError(f"{gene} is ambiguous in {self.name}: {[self.genes[p] for p in positions]}")
+        return positions[0]
+
+    def gene_label(self, gene: str | int) -> str:
+        """The "SYMBOL (ENTREZ)" column name of a gene."""
+        return self.genes[self.gene_position(gene)]
+
+    def has_gene(self, gene: str | int) -> bool:
+        try:
+            self.gene_position(gene)
+        except KeyError:
+            return False
+        return True
+
+    def model_positions(self, models: Iterable[str]) -> np.ndarray:
+        """Columns of the given ModelIDs (-1 where a model is not in the dataset)."""
+        return np.array([self._model_pos.get(str(m), -1) for m in models], dtype=np.int64)
+
+    def slice(self, genes: Sequence[str | int], models: Sequence[str] | None = None) -> np.ndarray:
+        """
+        Gene × cell-line values (float32 copy; NaN for models not in the dataset).
+
+        Args:
+            genes: Genes (see gene_position).
+            models: ModelIDs for the columns (default: every model, in store order).
+        """
+        rows = self.values[[self.gene_position(g) for g in genes]]
+        if models is None:
+            return np.array(rows)
+        cols = self.model_positions(models)
+        out = np.full((len(rows), len(cols)), np.nan, dtype=np.float32)
+        found = cols >= 0
+        out[:, found] = rows[:, cols[found]]
+        return out
+
+    def frame(self, genes: Sequence[str | int] | dict[str, str | int], models: Sequence[str] | None = None) -> pd.DataFrame:
+        """
+        Cell line × gene DataFrame indexed by ModelID, like the CSV columns it replaces.
+
+        Args:
+            genes: Genes (see gene_position); a dict maps output column names to genes.
+            models: ModelIDs for the rows (default: every model in the dataset).
+        """
+        if isinstance(genes, dict):
+            columns, genes = list(genes), list(genes.values())
+        else:
+            genes = list(genes)
+            columns = [str(g) for g in genes]
+        index = pd.Index(list(models) if models is not None else self.models, name="ModelID")
+        return pd.DataFrame(self.slice(genes, models).T, index=index, columns=columns)
+
+    def iter_gene_chunks(self, chunk_size: int = 1024, models: Sequence[str] | None = None):
+        """Yield (first gene position, genes × cell lines block) over all genes, chunk_size rows at a time."""
+        cols = None if models is None else self.model_positions(models)
+        for start in range(0, len(self.genes), chunk_size):
+            block = np.asarray(self.values[start:start + chunk_size], dtype=np.float32)
+            if cols is not None:
+                out = np.full((len(block), len(cols)), np.nan, dtype=np.float32)
+                found = cols >= 0
+                out[:, found] = block[:, cols[found]]
+                block = out
+            yield start, block
+
+
+class DepMapStore:
+    """Read access to an imported DepMap release."""
+
+    def __init__(self, store_dir: Path | str | None = None):
+        self.path = Path(store_dir) if store_dir else DEFAULT_STORE_DIR
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(
+                f"DepMap store not found: {self.path} (run: python -m src.data.depmap_store)"
+            )
+        self.manifest = json.loads(manifest_path.read_text())
+        self._matrices: dict[str, DepMapMatrix] = {}
+        self._models: pd.DataFrame | None = None
+
+    @classmethod
+    def open(
+        cls,
+        raw_dir: Path | str | None = None,
+        store_dir: Path | str | None = None,
+        datasets: Iterable[str] | None = None,
+    ) -> "DepMapStore":
+        """Open the store, importing any dataset that is missing or older than its CSV first."""
+        import_release(raw_dir, store_dir, datasets=datasets)
+        return cls(store_dir)
+
+    @property
+    def datasets(self) -> list[str]:
+        return list(self.manifest.get("datasets", {}))
+
+    def has(self, name: str) -> bool:
+        return name in self.manifest.get("datasets", {})
+
+    def matrix(self, name: str) -> DepMapMatrix:
+        """A dataset's memory-mapped matrix (opened once per store)."""
+        if name not in self._matrices:
+            if not self.has(name):
+                raise KeyError(f"DepMap dataset not imported: {name} ({DEPMAP_DATASETS.get(name, 'unknown')})")
+            self._matrices[name] = DepMapMatrix(self.path, name)
+        return self._matrices[name]
+
+    def models(self, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        """Model.csv as a typed table (optionally only some columns)."""
+        if self._models is None:
+            entry = self.manifest.get("models")
+            if not entry:
+                raise KeyError(f"{MODEL_FILE} not imported")
+            path = self.path / entry["file"]
+            self._models = _plain_text_columns(
+                pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_pickle(path)
+            )
+        return self._models if columns is None else self._models[list(columns)]
+
+
+def _plain_text_columns(model: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stored categorical/string columns back as object columns with NaN for missing values.
+
+    Callers group, filter and merge on these columns as read from the CSV: a
+    categorical groupby would report every unobserved category (n=0 rows on
+    pandas < 3) and an NA-valued string comparison cannot be used as a mask.
+    """
+    for col in model.columns:
+        dtype = model[col].dtype
+        if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            model[col] = pd.Series(model[col].to_numpy(dtype=object, na_value=np.nan), index=model.index, dtype=object)
+    return model
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import a DepMap release into the binary store")
+    parser.add_argument("--raw", default=None, help="Release CSV directory (default: data/raw/depmap)")
+    parser.add_argument("--store", default=None, help="Store directory (default: data/depmap_store)")
+    parser.add_argument("--dataset", action="append", choices=sorted(DEPMAP_DATASETS), help="Only these datasets")
+    parser.add_argument("--force", action="store_true", help="Re-import even if unchanged")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    manifest = import_release(args.raw, args.store, datasets=args.dataset, force=args.force)
+    for name, entry in manifest.get("datasets", {}).items():
+        print(f"{name}: {entry['genes']} genes × {entry['models']} cell lines ({entry['source']['file']})")
+    if "models" in manifest:
+        print(f"models: {manifest['models']['rows']} rows ({manifest['models']['file']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
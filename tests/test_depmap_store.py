@@ -0,0 +1,88 @@
+"""Tests for the binary DepMap release store."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.depmap_store import DepMapStore, import_release
+
+
+@pytest.fixture
+def release(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    genes = ["STK17A (9263)", "STK17B (9262)", "TBK1 (29110)", "TTBK1 (84630)"]
+    effect = pd.DataFrame(
+        np.arange(12, dtype=float).reshape(3, 4) / 10,
+        index=pd.Index(["ACH-000001", "ACH-000002", "ACH-000003"]),
+        columns=genes,
+    )
+    effect.iloc[1, 2] = np.nan
+    effect.to_csv(raw / "CRISPRGeneEffect.csv")
+    # Omics layout: ModelID column, metadata columns, two sequencing rows for one model
+    pd.DataFrame({
+        "SequencingID": ["CDS-1", "CDS-2", "CDS-3"],
+        "ModelID": ["ACH-000002", "ACH-000002", "ACH-000004"],
+        "IsDefaultEntryForModel": ["No", "Yes", "Yes"],
+        "STK17A (9263)": [9.0, 1.5, 2.5],
+        "TBK1 (29110)": [9.0, 3.5, 4.5],
+    }).to_csv(raw / "OmicsExpressionTPMLogp1HumanProteinCodingGenes.csv", index=False)
+    pd.DataFrame({
+        "ModelID": ["ACH-000001", "ACH-000002", "ACH-000003", "ACH-000004"],
+        "StrippedCellLineName": ["A549", "HELA", "MCF7", "H1299"],
+        "OncotreeLineage": ["Lung", "Cervix", "Lung", "Lung"],
+        "Age": [58, 31, 69, 43],
+    }).to_csv(raw / "Model.csv", index=False)
+    store_dir = tmp_path / "store"
+    import_release(raw, store_dir)
+    return raw, store_dir, effect
+
+
+def test_slices_match_csv(release):
+    raw, store_dir, effect = release
+    store = DepMapStore(store_dir)
+    matrix = store.matrix("gene_effect")
+    assert matrix.shape == (4, 3)
+    assert matrix.values.dtype == np.float32
+
+    frame = matrix.frame({"STK17A": "STK17A", "TBK1": "29110"})
+    expected = effect[["STK17A (9263)", "TBK1 (29110)"]].astype(np.float32)
+    np.testing.assert_array_equal(frame.to_numpy(), expected.to_numpy())
+    assert list(frame.columns) == ["STK17A", "TBK1"]
+    assert frame.index.name == "ModelID"
+    assert matrix.gene_label("TBK1") == "TBK1 (29110)"
+    with pytest.raises(KeyError):
+        matrix.gene_position("CLK4")
+
+    # Aligned to another dataset's models; unknown models are NaN
+    aligned = matrix.slice(["STK17B"], ["ACH-000003", "ACH-000999"])
+    assert aligned[0, 0] == np.float32(effect.iloc[2, 1]) and np.isnan(aligned[0, 1])
+
+
+def test_omics_default_entries_and_model_table(release):
+    raw, store_dir, _ = release
+    store = DepMapStore(store_dir)
+    expression = store.matrix("expression").frame(["STK17A", "TBK1"])
+    assert list(expression.index) == ["ACH-000002", "ACH-000004"]
+    assert expression.loc["ACH-000002", "TBK1"] == np.float32(3.5)
+
+    models = store.models()
+    assert models["OncotreeLineage"].dtype == object and models["ModelID"].dtype == object
+    assert pd.api.types.is_integer_dtype(models["Age"])
+    # Only observed lineages are grouped, whatever the pandas default for categoricals
+    subset = models[models["StrippedCellLineName"] != "HELA"]
+    assert subset.groupby("OncotreeLineage").size().to_dict() == {"Lung": 3}
+    assert store.models(["ModelID", "StrippedCellLineName"]).shape == (4, 2)
+
+
+def test_reimports_only_changed_sources(release):
+    raw, store_dir, effect = release
+    before = (store_dir / "expression.npy").stat().st_mtime_ns
+    effect.iloc[0, 0] = -2.0
+    effect.to_csv(raw / "CRISPRGeneEffect.csv")
+
+    store = DepMapStore.open(raw, store_dir)
+    assert store.matrix("gene_effect").frame(["STK17A"]).iloc[0, 0] == np.float32(-2.0)
+    assert (store_dir / "expression.npy").stat().st_mtime_ns == before
+    with pytest.raises(KeyError):
+        store.matrix("copy_number")
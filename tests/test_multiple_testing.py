@@ -0,0 +1,80 @@
+"""Tests for the vectorized multiple-testing corrections."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.multiple_testing import adjust_frame, adjust_pvalues, storey_pi0
+
+
+def _loop_bh(p_values):
+    """The per-element Benjamini-Hochberg loop the SL script used."""
+    p_values = np.array(p_values)
+    n = len(p_values)
+    sorted_indices = np.argsort(p_values)
+    sorted_p = p_values[sorted_indices]
+    p_adjusted = np.zeros(n)
+    for i in range(n - 1, -1, -1):
+        if i == n - 1:
+            p_adjusted[sorted_indices[i]] = sorted_p[i]
+        else:
+            p_adjusted[sorted_indices[i]] = min(sorted_p[i] * n / (i + 1), p_adjusted[sorted_indices[i + 1]])
+    return p_adjusted
+
+
+def test_known_values():
+    p = [0.01, 0.02, 0.03, 0.04, 0.05]
+    np.testing.assert_allclose(adjust_pvalues(p, "bh"), [0.05] * 5)
+    np.testing.assert_allclose(adjust_pvalues(p, "by"), [0.05 * (1 + 1 / 2 + 1 / 3 + 1 / 4 + 1 / 5)] * 5)
+    np.testing.assert_allclose(adjust_pvalues(p, "bonferroni"), [0.05, 0.1, 0.15, 0.2, 0.25])
+    np.testing.assert_allclose(adjust_pvalues(p[::-1], "holm"), [0.09, 0.09, 0.09, 0.08, 0.05])
+    np.testing.assert_allclose(adjust_pvalues([0.3, 0.9], "bonferroni"), [0.6, 1.0])
+    with pytest.raises(ValueError):
+        adjust_pvalues(p, "fdr")
+
+
+def test_matches_loop_bh_and_skips_missing():
+    rng = np.random.default_rng(3)
+    p = rng.random(500) ** 3
+    p[10] = p[11]
+    np.testing.assert_allclose(adjust_pvalues(p, "bh"), _loop_bh(p), rtol=1e-12)
+
+    with_missing = np.insert(p, [0, 200], np.nan)
+    q = adjust_pvalues(with_missing, "bh")
+    assert np.isnan(q[0]) and np.isnan(q[201])
+    np.testing.assert_allclose(q[~np.isnan(with_missing)], _loop_bh(p), rtol=1e-12)
+
+
+def test_grouped_equals_per_family():
+    rng = np.random.default_rng(5)
+    frame = pd.DataFrame({
+        "p_value": rng.random(300) ** 2,
+        "target": rng.choice(["STK17A", "TBK1", "CLK4"], 300),
+        "lineage": rng.choice(["Lung", "Skin"], 300),
+    })
+    for method in ("bh", "by", "holm", "bonferroni", "storey"):
+        grouped = adjust_pvalues(frame["p_value"], method, groups=frame["target"])
+        for _, family in frame.groupby("target"):
+            np.testing.assert_allclose(grouped[family.index], adjust_pvalues(family["p_value"], method))
+
+    adjusted = adjust_frame(frame, ("bh", "holm"), by=["target", "lineage"], alpha=0.1)
+    family = frame[(frame["target"] == "TBK1") & (frame["lineage"] == "Lung")]
+    np.testing.assert_allclose(adjusted.loc[family.index, "q_bh"], _loop_bh(family["p_value"]))
+    assert (adjusted["significant_holm"] == (adjusted["q_holm"] < 0.1)).all()
+
+
+def test_storey_scales_bh_by_pi0():
+    rng = np.random.default_rng(9)
+    p = np.concatenate([rng.random(800), rng.random(200) * 1e-4])
+    pi0 = storey_pi0(p)
+    assert np.allclose(pi0, pi0[0]) and 0.6 < pi0[0] < 1.0
+    np.testing.assert_allclose(adjust_pvalues(p, "storey"), np.minimum(1, pi0[0] * _loop_bh(p)), rtol=1e-12)
+    np.testing.assert_allclose(adjust_pvalues(p, "storey", pi0=1.0), adjust_pvalues(p, "bh"))
+
+
+@pytest.mark.filterwarnings("error")
+def test_missing_family_labels_are_left_unadjusted():
+    p = np.array([0.01, 0.02, 0.03, 0.04])
+    labels = pd.DataFrame({"target": ["TBK1", None, "TBK1", "CLK4"], "lineage": ["Lung", "Lung", None, "Lung"]})
+    np.testing.assert_allclose(adjust_pvalues(p, "bonferroni", groups=labels), [0.01, np.nan, np.nan, 0.04])
+    np.testing.assert_allclose(adjust_pvalues(p, "bonferroni", groups=pd.Series(labels["target"])), [0.02, np.nan, 0.06, 0.04])
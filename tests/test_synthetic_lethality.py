@@ -0,0 +1,106 @@
+"""Tests for the vectorized synthetic-lethality scan."""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from src.analysis import synthetic_lethality as sl
+from src.analysis.synthetic_lethality import gene_blocks, scan_store, welch_scan
+from src.data.depmap_store import DepMapStore, import_release
+
+
+def _pairwise(mutations, labels, values, names, min_mutants=3, min_wt=10, missing_as_wt=True):
+    """One scipy Welch test per pair, as the scripts did before."""
+    rows = []
+    status = np.nan_to_num(mutations) if missing_as_wt else mutations
+    for i, label in enumerate(labels):
+        for j, name in enumerate(names):
+            mutant = values[j][status[i] == 1]
+            wt = values[j][status[i] == 0]
+            mutant, wt = mutant[~np.isnan(mutant)], wt[~np.isnan(wt)]
+            if len(mutant) < min_mutants or len(wt) < min_wt:
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # Constant groups
+                t, p = stats.ttest_ind(mutant, wt, equal_var=False)
+            rows.append((label, name, len(mutant), len(wt), mutant.mean() - wt.mean(), t, p))
+    return pd.DataFrame(rows, columns=["mutation_column", "target", "n_mutant", "n_wt", "mean_diff",
+                                       "t_statistic", "p_value"])
+
+
+@pytest.fixture
+def grid():
+    rng = np.random.default_rng(7)
+    n_models = 60
+    mutations = (rng.random((7, n_models)) < 0.15).astype(float)
+    mutations[0, :2] = np.nan          # Missing status
+    mutations[1, :4] = 2               # Neither mutant nor wild-type
+    mutations[2] = 0
+    mutations[2, :2] = 1               # Too few mutants
+    values = rng.normal(0.3, 0.2, (5, n_models))
+    values[0, ::7] = np.nan
+    values[1] -= 0.5 * np.nan_to_num(mutations[3])   # A synthetic-lethal pair
+    values[4] = 0.25                   # Constant gene: no test
+    labels = [f"MUT{i} ({100 + i})" for i in range(7)]
+    names = [f"GENE{j}" for j in range(5)]
+    return mutations, labels, values, names
+
+
+def test_matches_pairwise_scipy(grid):
+    mutations, labels, values, names = grid
+    expected = _pairwise(mutations, labels, values, names)
+    result = pd.concat(welch_scan(mutations, labels, gene_blocks(values, 2), names, mutation_chunk=3),
+                       ignore_index=True)
+    result = result.sort_values(["mutation_column", "target"], ignore_index=True)
+
+    assert len(result) == len(expected) and "MUT2 (102)" not in set(result["mutation_column"])
+    assert (result[["mutation_column", "target"]] == expected[["mutation_column", "target"]]).all().all()
+    np.testing.assert_array_equal(result["n_mutant"], expected["n_mutant"])
+    np.testing.assert_array_equal(result["n_wt"], expected["n_wt"])
+    for column in ("mean_diff", "t_statistic", "p_value"):
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-9, atol=1e-12)
+
+    lethal = result[(result["mutation"] == "MUT3") & (result["target"] == "GENE1")].iloc[0]
+    assert lethal["is_synthetic_lethal"] and lethal["p_value"] < 1e-3
+    assert result.loc[result["target"] == "GENE4", "p_value"].isna().all()
+
+    filtered = pd.concat(welch_scan(mutations, labels, gene_blocks(values), names, max_p_value=0.05))
+    assert (filtered["p_value"] < 0.05).all()
+    assert len(filtered) == (expected["p_value"] < 0.05).sum()
+
+
+def test_testable_mutations(grid):
+    mutations, labels, _, _ = grid
+    testable = sl.testable_mutations(mutations, labels)
+    assert "MUT2" not in set(testable["gene"])
+    assert testable.loc[testable["gene"] == "MUT0", "n_wt"].iloc[0] == (np.nan_to_num(mutations[0]) == 0).sum()
+
+
+def test_scan_store_all_genes(grid, tmp_path):
+    mutations, labels, values, names = grid
+    models = [f"ACH-{i:06d}" for i in range(values.shape[1])]
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    genes = [f"{name} ({200 + j})" for j, name in enumerate(names)]
+    pd.DataFrame(values.T, index=pd.Index(models), columns=genes).to_csv(raw / "CRISPRGeneDependency.csv")
+    hotspot = pd.DataFrame(mutations.T, columns=labels)
+    hotspot.insert(0, "ModelID", models)
+    hotspot.iloc[::-1].to_csv(raw / "OmicsSomaticMutationsMatrixHotspot.csv", index=False)
+    import_release(raw, tmp_path / "store")
+    store = DepMapStore(tmp_path / "store")
+
+    values = values.astype(np.float32).astype(float)
+    for all_models in (False, True):
+        everything = pd.concat(scan_store(store, gene_chunk=2, all_models=all_models), ignore_index=True)
+        expected = _pairwise(mutations, labels, values, names, missing_as_wt=all_models)
+        assert len(everything) == len(expected)
+        np.testing.assert_array_equal(everything.sort_values(["mutation_column", "target"])["n_wt"], expected["n_wt"])
+        np.testing.assert_allclose(
+            everything.sort_values(["mutation_column", "target"])["p_value"], expected["p_value"], rtol=1e-9)
+
+    targeted = pd.concat(scan_store(store, ["GENE1", "200"], mutation_genes=["MUT3", "MUT1"]), ignore_index=True)
+    assert list(targeted["target"].unique()) == ["GENE1", "200"]
+    assert list(targeted["mutation"].unique()) == ["MUT3", "MUT1"]
@@ -3,13 +3,17 @@ Upload StarX Data to Xata
 ==========================
 
 This script uploads your prepared JSON data to Xata.
-Requires: pip install xata
+Uses the pooled XataClient from pubmed-literature-mining (bulk transactions
+chunked by payload size, rate limited, with retries).
+Requires XATA_API_KEY in your .env file.
 """
 
 import json
-import os
+import sys
 from pathlib import Path
-from xata.client import XataClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "pubmed-literature-mining"))
+from scripts.xata_client import XataClient
 
 # Configuration
 OUTPUT_DIR = Path(__file__).parent / "output"
@@ -17,7 +21,17 @@ DATABASE_URL = "https://Parker-Case-s-workspace-s4h25u.us-east-1.xata.sh/db/star
 
 # Initialize Xata client
 # Make sure XATA_API_KEY is in your .env file
-xata = XataClient(db_url=DATABASE_URL)
+xata = XataClient(database_url=DATABASE_URL)
+
+
+def upload_table(table_name: str, records: list) -> None:
+    """Bulk insert one table's records"""
+    written = xata.upsert_records(records, table_name=table_name)
+    if written == len(records):
+        print(f"✅ Finished {table_name} ({written} total)")
+    else:
+        print(f"   ❌ Only {written} of {len(records)} {table_name} records uploaded (see log)")
+
 
 print("🚀 Uploading StarX Data to Xata")
 print("=" * 60)
@@ -31,18 +45,7 @@ print(" Uploading cancer rankings...")
 with open(OUTPUT_DIR / "cancer_rankings.json") as f:
     cancer_rankings = json.load(f)
 
-# Bulk insert (Xata supports up to 1000 records per request)
-batch_size = 100
-for i in range(0, len(cancer_rankings), batch_size):
-    batch = cancer_rankings[i : i + batch_size]
-
-    try:
-        xata.data().bulk_insert("cancer_rankings", {"records": batch})
-        print(f"   ✅ Uploaded batch {i//batch_size + 1} ({len(batch)} records)")
-    except Exception as e:
-        print(f"   ❌ Error in batch {i//batch_size + 1}: {e}")
-
-print(f"✅ Finished cancer_rankings ({len(cancer_rankings)} total)")
+upload_table("cancer_rankings", cancer_rankings)
 print()
 
 # =============================================================================
@@ -53,16 +56,7 @@ print(" Uploading target scores...")
 with open(OUTPUT_DIR / "target_scores.json") as f:
     target_scores = json.load(f)
 
-for i in range(0, len(target_scores), batch_size):
-    batch = target_scores[i : i + batch_size]
-
-    try:
-        xata.data().bulk_insert("target_scores", {"records": batch})
-        print(f"   ✅ Uploaded batch {i//batch_size + 1} ({len(batch)} records)")
-    except Exception as e:
-        print(f"   ❌ Error in batch {i//batch_size + 1}: {e}")
-
-print(f"✅ Finished target_scores ({len(target_scores)} total)")
+upload_table("target_scores", target_scores)
 print()
 
 # =============================================================================
@@ -75,16 +69,7 @@ if sl_file.exists():
     with open(sl_file) as f:
         sl_records = json.load(f)
 
-    for i in range(0, len(sl_records), batch_size):
-        batch = sl_records[i : i + batch_size]
-
-        try:
-            xata.data().bulk_insert("synthetic_lethality", {"records": batch})
-            print(f"   ✅ Uploaded batch {i//batch_size + 1} ({len(batch)} records)")
-        except Exception as e:
-            print(f"   ❌ Error in batch {i//batch_size + 1}: {e}")
-
-    print(f"✅ Finished synthetic_lethality ({len(sl_records)} total)")
+    upload_table("synthetic_lethality", sl_records)
 else:
     print("⚠️  No synthetic_lethality.json found, skipping")
 print()
@@ -97,16 +82,7 @@ print("🧫 Uploading cell line dependencies...")
 with open(OUTPUT_DIR / "cell_line_dependencies.json") as f:
     cell_lines = json.load(f)
 
-for i in range(0, len(cell_lines), batch_size):
-    batch = cell_lines[i : i + batch_size]
-
-    try:
-        xata.data().bulk_insert("cell_line_dependencies", {"records": batch})
-        print(f"   ✅ Uploaded batch {i//batch_size + 1} ({len(batch)} records)")
-    except Exception as e:
-        print(f"   ❌ Error in batch {i//batch_size + 1}: {e}")
-
-print(f"✅ Finished cell_line_dependencies ({len(cell_lines)} total)")
+upload_table("cell_line_dependencies", cell_lines)
 print()
 
 # =============================================================================